@@ -98,6 +98,38 @@ async def ensure_screenshot_storage_key_column(conn: AsyncConnection) -> None:
         logger.info("Adding missing analysis_pages.screenshot_storage_key column")
 
 
+async def ensure_screenshot_tiles_column(conn: AsyncConnection) -> None:
+    """Ensure the `screenshot_tiles` column exists on analysis_pages."""
+    dialect = conn.dialect.name
+
+    if dialect == "sqlite":
+        added = await _add_sqlite_column_if_missing(conn, "analysis_pages", "screenshot_tiles", "JSON")
+    else:
+        exists = await _postgres_column_exists(conn, "analysis_pages", "screenshot_tiles")
+        if not exists:
+            await _add_postgres_column_if_missing(conn, "analysis_pages", "screenshot_tiles", "JSON")
+        added = not exists
+
+    if added:
+        logger.info("Adding missing analysis_pages.screenshot_tiles column")
+
+
+async def ensure_screenshot_asset_delete_failed_column(conn: AsyncConnection) -> None:
+    """Ensure the `delete_failed_at` column exists on screenshot_assets."""
+    dialect = conn.dialect.name
+
+    if dialect == "sqlite":
+        added = await _add_sqlite_column_if_missing(conn, "screenshot_assets", "delete_failed_at", "DATETIME")
+    else:
+        exists = await _postgres_column_exists(conn, "screenshot_assets", "delete_failed_at")
+        if not exists:
+            await _add_postgres_column_if_missing(conn, "screenshot_assets", "delete_failed_at", "TIMESTAMP WITH TIME ZONE")
+        added = not exists
+
+    if added:
+        logger.info("Adding missing screenshot_assets.delete_failed_at column")
+
+
 async def ensure_user_role_column(conn: AsyncConnection) -> None:
     """Ensure the `role` column exists on the users table."""
     dialect = conn.dialect.name
@@ -13,7 +13,9 @@ from ..models.database import Base, User
 from ..services.passwords import hash_password, verify_password
 from .migrations import (
     ensure_recipient_email_column,
+    ensure_screenshot_asset_delete_failed_column,
     ensure_screenshot_storage_key_column,
+    ensure_screenshot_tiles_column,
     ensure_user_password_hash_column,
     ensure_user_role_column,
     ensure_user_plan_column,
@@ -68,6 +70,8 @@ async def init_db() -> None:
             await conn.run_sync(Base.metadata.create_all)
             await ensure_recipient_email_column(conn)
             await ensure_screenshot_storage_key_column(conn)
+            await ensure_screenshot_tiles_column(conn)
+            await ensure_screenshot_asset_delete_failed_column(conn)
             await ensure_user_role_column(conn)
             await ensure_user_password_hash_column(conn)
             await ensure_user_plan_column(conn)
@@ -13,6 +13,11 @@ import logging
 import os
 
 from .db.session import init_db
+from .services.llm_cache import cleanup_llm_cache
+from .services.page_index import cleanup_page_index
+from .services.screenshot import cleanup_screenshot_service
+from .services.storage import cleanup_storage_service
+from .services.vision_preprocess import cleanup_vision_executor
 from .routes import analysis, auth, metrics, reports, webhooks, oauth, user, admin, health, email_test, debug, tracking  # cleanup disabled
 from .utils.config import settings
 
@@ -32,6 +37,11 @@ async def lifespan(app: FastAPI):
     logger.info(f"Environment: {settings.ENVIRONMENT}")
     yield
     logger.info("🛑 Shutting down Funnel Analyzer Pro API")
+    await cleanup_screenshot_service()
+    cleanup_vision_executor()
+    cleanup_page_index()
+    cleanup_llm_cache()
+    cleanup_storage_service()
 
 
 # Initialize FastAPI app
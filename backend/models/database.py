@@ -108,6 +108,7 @@ class AnalysisPage(Base):
     text_content = Column(Text, nullable=True)
     screenshot_url = Column(String(2048), nullable=True)
     screenshot_storage_key = Column(String(2048), nullable=True, index=True)
+    screenshot_tiles = Column(JSON, nullable=True)  # Tile manifest for pages captured in tiles
     
     # Page-specific scores
     page_scores = Column(JSON, nullable=True)
@@ -121,6 +122,31 @@ class AnalysisPage(Base):
         return f"<AnalysisPage {self.url}>"
 
 
+class ScreenshotAsset(Base):
+    """A stored screenshot object shared by every page that captured a near-identical image."""
+
+    __tablename__ = "screenshot_assets"
+
+    id = Column(Integer, primary_key=True, index=True)
+    storage_key = Column(String(2048), unique=True, nullable=False, index=True)
+    url = Column(String(2048), nullable=False)
+    source_url = Column(String(2048), nullable=False, index=True)
+    phash = Column(String(64), nullable=True)  # 256-bit difference hash, hex encoded
+    content_sha256 = Column(String(64), nullable=False, index=True)
+    content_type = Column(String(50), nullable=False)
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    size_bytes = Column(Integer, nullable=False, default=0)
+    ref_count = Column(Integer, nullable=False, default=1)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    # Set when the last reference was released but deleting the object failed; cleanup retries it
+    delete_failed_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<ScreenshotAsset {self.storage_key} refs={self.ref_count}>"
+
+
 class WebhookEvent(Base):
     """Raw webhook payloads for audit trails and replay support."""
 
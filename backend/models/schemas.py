@@ -111,6 +111,9 @@ class VideoRecommendation(BaseModel):
 class PipelineStageTimings(BaseModel):
     scrape_seconds: Optional[float] = Field(default=None, ge=0, description="Time spent scraping URLs")
     analysis_seconds: Optional[float] = Field(default=None, ge=0, description="Time spent in LLM analysis")
+    time_to_first_score_seconds: Optional[float] = Field(
+        default=None, ge=0, description="Mean time from page-analysis request to streamed scores"
+    )
     screenshot_seconds: Optional[float] = Field(default=None, ge=0, description="Time spent awaiting screenshots")
     total_seconds: Optional[float] = Field(default=None, ge=0, description="Total pipeline duration")
 
@@ -121,12 +124,66 @@ class ScreenshotPipelineMetrics(BaseModel):
     failed: int = Field(default=0, ge=0)
     uploaded: int = Field(default=0, ge=0)
     timeouts: int = Field(default=0, ge=0)
+    queue_wait_seconds: Optional[float] = Field(default=None, ge=0, description="Time spent waiting for a pooled browser page")
+    navigation_seconds: Optional[float] = Field(default=None, ge=0, description="Time spent loading pages before capture")
+    blocked_requests: Optional[int] = Field(default=None, ge=0, description="Third-party requests blocked during capture")
+    estimated_bytes_saved: Optional[int] = Field(default=None, ge=0, description="Estimated transfer avoided by blocking")
+    encoded_bytes: Optional[int] = Field(default=None, ge=0, description="Total size of encoded screenshots")
+    tiled_pages: Optional[int] = Field(default=None, ge=0, description="Pages captured as tiles")
+    tiles_uploaded: Optional[int] = Field(default=None, ge=0)
+    mobile_captured: Optional[int] = Field(default=None, ge=0, description="Pages with an emulated mobile capture")
+    cancelled: Optional[int] = Field(default=None, ge=0, description="Captures cancelled at the timeout")
+    deduplicated: Optional[int] = Field(default=None, ge=0, description="Screenshots reused from a matching recent capture")
+    previews: Optional[int] = Field(default=None, ge=0, description="Above-the-fold previews captured before the full page")
+    preview_for_llm: Optional[int] = Field(default=None, ge=0, description="Pages analyzed from the preview instead of the full capture")
+    preview_without_visual_elements: Optional[int] = Field(
+        default=None, ge=0, description="Preview-based analyses made before visual elements were extracted"
+    )
+
+
+class LLMCallMetrics(BaseModel):
+    model: str
+    cached: bool = False
+    batch: bool = Field(default=False, description="Answered through an offline batch at the batch price")
+    estimated_prompt_tokens: Optional[int] = Field(default=None, ge=0, description="Budgeter estimate made before the call")
+    prompt_tokens: int = Field(default=0, ge=0)
+    completion_tokens: int = Field(default=0, ge=0)
+    cached_prompt_tokens: int = Field(default=0, ge=0, description="Prompt tokens served from the provider's prefix cache")
+    cost_usd: Optional[float] = Field(default=None, ge=0)
+    latency_ms: Optional[float] = Field(default=None, ge=0)
+
+
+class LLMPipelineMetrics(BaseModel):
+    plan: Optional[str] = Field(default=None, description="Plan whose model routing and prompt budget were used")
+    calls: int = Field(default=0, ge=0)
+    fallbacks: int = Field(default=0, ge=0, description="Results replaced by placeholders after provider failures")
+    validated_replies: int = Field(default=0, ge=0, description="Page analysis replies checked against the result schema")
+    repaired_replies: int = Field(default=0, ge=0, description="Replies fixed locally (truncated JSON, types, defaults)")
+    reasked_fields: int = Field(default=0, ge=0, description="Fields asked for again because they could not be repaired")
+    repair_rate: Optional[float] = Field(default=None, ge=0, le=1)
+    cache_hits: int = Field(default=0, ge=0)
+    cache_misses: int = Field(default=0, ge=0)
+    prompt_tokens: Optional[int] = Field(default=None, ge=0, description="Tokens sent to the API (cache misses only)")
+    completion_tokens: Optional[int] = Field(default=None, ge=0)
+    cached_prompt_tokens: Optional[int] = Field(default=None, ge=0, description="Prompt tokens billed at the cached-input rate")
+    cost_usd: Optional[float] = Field(default=None, ge=0, description="Estimated API spend for this analysis")
+    cache_savings_usd: Optional[float] = Field(default=None, ge=0, description="Estimated spend avoided by cache hits")
+    cache_hit_latency_ms: Optional[float] = Field(default=None, ge=0)
+    api_latency_ms: Optional[float] = Field(default=None, ge=0)
+    per_call: Optional[List[LLMCallMetrics]] = None
+
+
+class PageIndexMetrics(BaseModel):
+    reused: int = Field(default=0, ge=0, description="Pages answered with the result of a near-identical earlier page")
+    hinted: int = Field(default=0, ge=0, description="Pages analysed with a similar earlier analysis in the prompt")
 
 
 class PipelineTelemetry(BaseModel):
     stage_timings: Optional[PipelineStageTimings] = None
     screenshot: Optional[ScreenshotPipelineMetrics] = None
     llm_provider: Optional[str] = None
+    llm: Optional[LLMPipelineMetrics] = None
+    page_index: Optional[PageIndexMetrics] = None
     notes: Optional[List[str]] = None
 
 
@@ -159,6 +216,24 @@ class SourceAnalysis(BaseModel):
     conversion_tracking: Optional[List[str]] = None
 
 
+class ScreenshotTileEntry(BaseModel):
+    index: int = Field(..., ge=0)
+    offset_y: int = Field(..., ge=0)
+    width: int = Field(..., ge=0)
+    height: int = Field(..., ge=0)
+    key: str
+    url: str
+
+
+class ScreenshotTileManifest(BaseModel):
+    """Full-resolution tiles of a tall page; ``screenshot_url`` then holds the overview."""
+
+    page_height: int = Field(..., ge=0)
+    captured_height: int = Field(..., ge=0)
+    truncated: bool = False
+    tiles: List[ScreenshotTileEntry] = Field(default_factory=list)
+
+
 class PageAnalysis(BaseModel):
     """Analysis results for a single page."""
     
@@ -169,6 +244,7 @@ class PageAnalysis(BaseModel):
     feedback: str
     screenshot_url: Optional[str] = None
     screenshot_storage_key: Optional[str] = None
+    screenshot_tiles: Optional[ScreenshotTileManifest] = None
     headline_recommendation: Optional[str] = None
     headline_alternatives: Optional[List[str]] = None  # 3-5 alternative headline options
     cta_recommendations: Optional[List[CTARecommendation]] = None
@@ -275,6 +351,7 @@ class ReportDeleteResponse(BaseModel):
     analysis_id: int
     assets_total: int
     assets_deleted: int
+    assets_retained: int = 0  # Still referenced by another analysis
     assets_failed: int
     assets_skipped: int
     storage_available: bool
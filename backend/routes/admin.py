@@ -3,8 +3,8 @@
 from __future__ import annotations
 
 import logging
-from typing import List, Optional
-from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from datetime import datetime, timedelta, timezone
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Header
 from sqlalchemy import select, func, delete
@@ -15,6 +15,9 @@ from typing import Optional
 from ..db.session import get_db_session
 from ..models.database import User, Analysis, EmailTemplate
 from ..services.auth import validate_jwt_token
+from ..services.llm_provider import get_llm_routing_stats
+from ..services.llm_resilience import get_llm_resilience_stats
+from ..services.llm_telemetry import get_plan_usage_stats
 from ..services.passwords import hash_password
 # from ..services.screenshot_cleanup import ScreenshotCleanupService
 from ..services.storage import get_storage_service
@@ -224,6 +227,88 @@ async def get_platform_stats(
     )
 
 
+class LLMUsageRow(BaseModel):
+    """LLM token and spend totals for one user, plan and day."""
+    day: str
+    user_id: int
+    email: Optional[str] = None
+    plan: str
+    analyses: int = 0
+    calls: int = 0
+    cache_hits: int = 0
+    prompt_tokens: int = 0
+    cached_prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost_usd: float = 0.0
+    cache_savings_usd: float = 0.0
+
+
+_LLM_USAGE_TOTALS = (
+    "calls",
+    "cache_hits",
+    "prompt_tokens",
+    "cached_prompt_tokens",
+    "completion_tokens",
+    "cost_usd",
+    "cache_savings_usd",
+)
+
+
+@router.get("/llm-usage", response_model=List[LLMUsageRow])
+async def get_llm_usage(
+    session: AsyncSession = Depends(get_db_session),
+    admin: User = Depends(require_admin),
+    days: int = Query(30, ge=1, le=365),
+    user_id: Optional[int] = Query(None, ge=1),
+):
+    """LLM usage per user, plan and day, from the telemetry stored with each analysis."""
+
+    since = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days - 1)
+    query = (
+        select(Analysis.user_id, User.email, User.plan, Analysis.created_at, Analysis.pipeline_metrics)
+        .join(User, User.id == Analysis.user_id)
+        .where(Analysis.created_at >= since, Analysis.pipeline_metrics.isnot(None))
+    )
+    if user_id is not None:
+        query = query.where(Analysis.user_id == user_id)
+    result = await session.execute(query)
+
+    rows: Dict[tuple, LLMUsageRow] = {}
+    for row_user_id, email, user_plan, created_at, metrics in result.all():
+        llm = (metrics or {}).get("llm") if isinstance(metrics, dict) else None
+        if not isinstance(llm, dict):
+            continue
+        # The plan the analysis ran under, which may differ from the user's current plan
+        plan = str(llm.get("plan") or user_plan or "free")
+        day = created_at.date().isoformat()
+        row = rows.get((day, row_user_id, plan))
+        if row is None:
+            row = rows[(day, row_user_id, plan)] = LLMUsageRow(
+                day=day, user_id=row_user_id, email=email, plan=plan
+            )
+        row.analyses += 1
+        for key in _LLM_USAGE_TOTALS:
+            setattr(row, key, getattr(row, key) + (llm.get(key) or 0))
+
+    # Newest day first, biggest spenders first within a day
+    usage = sorted(rows.values(), key=lambda row: (row.day, row.cost_usd), reverse=True)
+    for row in usage:
+        row.cost_usd = round(row.cost_usd, 6)
+        row.cache_savings_usd = round(row.cache_savings_usd, 6)
+    return usage
+
+
+@router.get("/llm-usage/live")
+async def get_live_llm_usage(admin: User = Depends(require_admin)):
+    """Per-plan spend, LLM call outcomes and provider routing since this process started."""
+
+    return {
+        "plans": get_plan_usage_stats(),
+        "resilience": get_llm_resilience_stats(),
+        "routing": get_llm_routing_stats(),
+    }
+
+
 @router.get("/users", response_model=List[UserListItem])
 async def list_users(
     session: AsyncSession = Depends(get_db_session),
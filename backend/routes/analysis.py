@@ -85,6 +85,14 @@ async def analyze_funnel_endpoint(
         # Convert Pydantic URLs to strings
         url_strings = [str(url) for url in request.urls]
 
+        # Get user plan for prompt budgeting and filtering
+        user_plan: str | None = None
+        if user_id:
+            user = await session.get(User, user_id)
+            if user:
+                # Type assertion: user.plan is a str at runtime even though it's Column[str] in the model
+                user_plan = str(user.plan)  # type: ignore[arg-type]
+        
         result = await analyze_funnel(
             url_strings,
             session=session,
@@ -94,16 +102,9 @@ async def analyze_funnel_endpoint(
             industry=request.industry,
             name=request.name,
             parent_analysis_id=request.parent_analysis_id,
+            plan=user_plan,
         )
 
-        # Get user plan for filtering
-        user_plan: str | None = None
-        if user_id:
-            user = await session.get(User, user_id)
-            if user:
-                # Type assertion: user.plan is a str at runtime even though it's Column[str] in the model
-                user_plan = str(user.plan)  # type: ignore[arg-type]
-        
         # Filter analysis based on plan
         filtered_result = filter_analysis_by_plan(result, user_plan)
 
@@ -175,6 +176,7 @@ async def get_analysis_progress(analysis_id: str):
     - progress_percent: 0-100
     - message: human-readable status message
     - current_page/total_pages: for multi-page funnels
+    - preview_url: above-the-fold screenshot of the page being analyzed, when available
     """
     progress_tracker = get_progress_tracker()
     progress = await progress_tracker.get(analysis_id)
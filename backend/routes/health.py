@@ -9,7 +9,10 @@ from pydantic import BaseModel
 
 from ..db.session import get_db_session
 from ..models.database import User
+from ..services.llm_resilience import get_llm_resilience_stats
 from ..services.passwords import verify_password
+from ..services.screenshot import get_capture_stats, get_screenshot_pool_stats
+from ..services.storage import get_storage_service, get_storage_stats
 
 router = APIRouter(prefix="/health", tags=["health"])
 
@@ -64,6 +67,35 @@ async def database_health(session: AsyncSession = Depends(get_db_session)):
         }
 
 
+@router.get("/screenshots")
+async def screenshot_health():
+    """Report browser pool utilisation and capture outcomes (incl. orphans) for the screenshot stage."""
+    pool_stats = get_screenshot_pool_stats()
+    return {
+        "status": "running" if pool_stats is not None else "idle",
+        "pool": pool_stats,
+        "captures": get_capture_stats(),
+    }
+
+
+@router.get("/llm")
+async def llm_health():
+    """Report LLM circuit state and concurrency; call outcomes and spend are under /api/admin/llm-usage/live."""
+    resilience = get_llm_resilience_stats()
+    if resilience is None:
+        return {"status": "idle", "concurrency": None}
+    return {"status": resilience["circuit"], "concurrency": resilience["concurrency"]}
+
+
+@router.get("/storage")
+async def storage_health():
+    """Report screenshot upload counts, latency percentiles and throughput."""
+    return {
+        "status": "configured" if get_storage_service() is not None else "disabled",
+        "uploads": get_storage_stats(),
+    }
+
+
 @router.post("/test-password")
 async def test_password_verification(
     request: PasswordTestRequest,
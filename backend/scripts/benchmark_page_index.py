@@ -0,0 +1,105 @@
+"""Benchmark the similar-page index: build, reload and query times at a given size.
+
+Pages are synthesised from a fixed vocabulary, with a share of them near-duplicates of
+earlier pages (as template clones are in practice), so recall can be checked too:
+
+    python -m backend.scripts.benchmark_page_index --pages 100000 --queries 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from ..services.page_index import PageIndex
+
+_VOCABULARY = [f"w{index}" for index in range(20000)]
+
+
+def _page_text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choices(_VOCABULARY, k=words))
+
+
+def _near_duplicate(rng: random.Random, text: str, edits: int) -> str:
+    words = text.split()
+    for _ in range(edits):
+        words[rng.randrange(len(words))] = rng.choice(_VOCABULARY)
+    return " ".join(words)
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the similar-page index")
+    parser.add_argument("--pages", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--words", type=int, default=300, help="Words per synthetic page")
+    parser.add_argument("--dims", type=int, default=512)
+    parser.add_argument("--batch", type=int, default=5000, help="Pages per add_many call while building")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    texts = [_page_text(rng, args.words) for _ in range(args.pages)]
+    result = {"page_type": "sales", "scores": {"clarity": 70, "value": 70, "proof": 70, "design": 70, "flow": 70}}
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = str(Path(directory) / "page_index.sqlite3")
+        index = PageIndex(path, dims=args.dims)
+        started = time.perf_counter()
+        for start in range(0, args.pages, args.batch):
+            index.add_many(
+                [(f"https://example.com/{n}", texts[n], "pro", result, None, None) for n in range(start, min(args.pages, start + args.batch))]
+            )
+        build_seconds = time.perf_counter() - started
+        index.close()
+
+        reloaded = PageIndex(path, dims=args.dims)
+        started = time.perf_counter()
+        reloaded.search("warm up", "pro")
+        reload_seconds = time.perf_counter() - started
+
+        query_ms: List[float] = []
+        found = 0
+        for _ in range(args.queries):
+            target = rng.randrange(args.pages)
+            query = _near_duplicate(rng, texts[target], edits=max(1, args.words // 50))
+            started = time.perf_counter()
+            matches = reloaded.search(query, "pro", limit=3)
+            query_ms.append((time.perf_counter() - started) * 1000)
+            found += bool(matches) and matches[0].url == f"https://example.com/{target}"
+        stats = reloaded.stats()
+        reloaded.close()
+        file_bytes = Path(path).stat().st_size
+
+    print(
+        json.dumps(
+            {
+                "pages": args.pages,
+                "dims": args.dims,
+                "build_seconds": round(build_seconds, 2),
+                "build_pages_per_second": round(args.pages / build_seconds),
+                "reload_seconds": round(reload_seconds, 3),
+                "query_ms_mean": round(statistics.mean(query_ms), 2),
+                "query_ms_p95": round(_percentile(query_ms, 0.95), 2),
+                "near_duplicate_recall_at_1": round(found / args.queries, 3),
+                "memory_mb": round(stats["memory_bytes"] / 1e6, 1),
+                "file_mb": round(file_bytes / 1e6, 1),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Benchmark monolithic vs split (parallel sub-prompt) page analysis: wall time and token cost.
+
+Against the real API (needs OPENAI_API_KEY):
+
+    python -m backend.scripts.benchmark_split_analysis --url https://example.com --plan pro --runs 3
+
+Offline, with a simulated model whose generation time grows with the reply length:
+
+    python -m backend.scripts.benchmark_split_analysis --simulate --runs 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import statistics
+import time
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+from ..services.llm_telemetry import begin_llm_usage
+from ..services.openai_service import OpenAIService
+from ..services.scraper import PageContent, scrape_url
+from ..services.token_budget import estimate_text_tokens
+from ..utils.config import settings
+
+
+class _SimulatedCompletions:
+    """Chat completions stand-in: time to first token plus a fixed decode rate.
+
+    Replies fill ``fill`` of ``max_tokens`` (with jitter), which is how long structured
+    replies behave in practice; the content is a JSON object with every requested field.
+    """
+
+    def __init__(self, *, ttft_seconds: float, tokens_per_second: float, fill: float) -> None:
+        self.ttft_seconds = ttft_seconds
+        self.tokens_per_second = tokens_per_second
+        self.fill = fill
+
+    async def create(self, **params):
+        prompt = json.dumps(params["messages"], default=str)
+        completion_tokens = int(params["max_tokens"] * min(1.0, self.fill * random.uniform(0.8, 1.2)))
+        await asyncio.sleep(self.ttft_seconds + completion_tokens / self.tokens_per_second)
+        fields = _requested_fields(prompt)
+        reply = {field: _sample_value(field) for field in fields}
+        usage = SimpleNamespace(prompt_tokens=estimate_text_tokens(prompt), completion_tokens=completion_tokens)
+        message = SimpleNamespace(content=json.dumps(reply))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+def _requested_fields(prompt: str) -> List[str]:
+    from ..services.openai_service import _RESULT_FIELD_SCHEMA
+
+    schema = prompt.split("Return ONLY valid JSON with this structure:", 1)[-1]
+    return [name for name, _ in _RESULT_FIELD_SCHEMA if f'\\"{name}\\":' in schema]
+
+
+def _sample_value(field: str):
+    if field == "scores":
+        return {key: random.randint(50, 90) for key in ("clarity", "value", "proof", "design", "flow")}
+    if field in ("page_type", "feedback", "headline_recommendation"):
+        return f"simulated {field}"
+    return [{"recommendation": f"simulated {field}"}]
+
+
+def _sample_page() -> PageContent:
+    return PageContent(
+        url="https://example.com/offer",
+        title="Grow Your Audience in 30 Days",
+        headings=["Grow your audience in 30 days", "What you get", "Loved by 10,000 creators", "Pricing"],
+        paragraphs=[
+            "A step-by-step program for creators who want consistent growth without burning out. " * 3,
+            "Weekly live calls, templates and a private community to keep you accountable. " * 3,
+            "Try it risk-free with our 30-day money-back guarantee. " * 3,
+        ],
+        ctas=["Start my free trial", "See pricing", "Join now"],
+        forms=["email signup"],
+    )
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1)]
+
+
+async def _run_mode(
+    service: OpenAIService, page: PageContent, *, split: bool, plan: Optional[str], runs: int
+) -> Dict[str, object]:
+    settings.LLM_SPLIT_ANALYSIS_ENABLED = split
+    walls: List[float] = []
+    prompt_tokens: List[int] = []
+    completion_tokens: List[int] = []
+    costs: List[float] = []
+    for _ in range(runs):
+        usage = begin_llm_usage(plan=plan)
+        started = time.perf_counter()
+        await service.analyze_page(page, page_number=1, total_pages=1, plan=plan, raise_errors=True)
+        walls.append(time.perf_counter() - started)
+        summary = usage.summary()
+        prompt_tokens.append(summary["prompt_tokens"])
+        completion_tokens.append(summary["completion_tokens"])
+        costs.append(summary["cost_usd"])
+    return {
+        "mode": "split" if split else "monolithic",
+        "calls_per_page": usage.summary()["calls"],
+        "wall_seconds_mean": round(statistics.mean(walls), 3),
+        "wall_seconds_p95": round(_percentile(walls, 0.95), 3),
+        "prompt_tokens_mean": round(statistics.mean(prompt_tokens)),
+        "completion_tokens_mean": round(statistics.mean(completion_tokens)),
+        "cost_usd_mean": round(statistics.mean(costs), 6),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare monolithic and split page analysis")
+    parser.add_argument("--url", help="Page to scrape and analyse (default: a built-in sample page)")
+    parser.add_argument("--plan", default="pro", help="Plan whose budget and schema are used")
+    parser.add_argument("--runs", type=int, default=3, help="Analyses per mode")
+    parser.add_argument("--simulate", action="store_true", help="Use a simulated model instead of the API")
+    parser.add_argument("--ttft", type=float, default=0.8, help="Simulated time to first token (seconds)")
+    parser.add_argument("--tokens-per-second", type=float, default=60.0, help="Simulated decode rate")
+    parser.add_argument("--fill", type=float, default=0.7, help="Simulated share of max_tokens generated")
+    args = parser.parse_args()
+
+    settings.LLM_CACHE_ENABLED = False  # Every run must reach the model
+    page = await scrape_url(args.url) if args.url else _sample_page()
+
+    service = OpenAIService()
+    if args.simulate:
+        completions = _SimulatedCompletions(
+            ttft_seconds=args.ttft, tokens_per_second=args.tokens_per_second, fill=args.fill
+        )
+        service.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    elif service.client is None:
+        parser.error("OPENAI_API_KEY is not configured; use --simulate to run offline")
+
+    results = []
+    for split in (False, True):
+        results.append(await _run_mode(service, page, split=split, plan=args.plan, runs=max(1, args.runs)))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
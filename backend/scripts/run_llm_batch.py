@@ -0,0 +1,73 @@
+"""CLI to run funnel analyses through the offline LLM batch path.
+
+Jobs come from a JSONL file, one funnel per line:
+
+    {"urls": ["https://example.com", "https://example.com/checkout"], "user_id": 12, "plan": "pro"}
+
+or from earlier analyses to rerun (stored as new analyses linked to the originals):
+
+    python -m backend.scripts.run_llm_batch --reanalyze 101 102 --backend openai
+    python -m backend.scripts.run_llm_batch --input imports.jsonl --backend local
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+from pathlib import Path
+from typing import List
+
+from sqlalchemy import select
+
+from ..db.session import AsyncSessionFactory, init_db
+from ..models.database import Analysis, User
+from ..services.llm_batch import BatchJob, BatchRunner, create_batch_backend
+
+
+async def _reanalysis_jobs(session, analysis_ids: List[int]) -> List[BatchJob]:
+    result = await session.execute(
+        select(Analysis, User.plan).join(User, User.id == Analysis.user_id).where(Analysis.id.in_(analysis_ids))
+    )
+    return [
+        BatchJob(
+            urls=list(analysis.urls),
+            user_id=analysis.user_id,
+            plan=plan,
+            name=analysis.name,
+            parent_analysis_id=analysis.id,
+        )
+        for analysis, plan in result.all()
+    ]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Analyse funnels through the LLM batch interface")
+    parser.add_argument("--input", type=Path, help="JSONL file of jobs (urls, user_id, plan, industry, name)")
+    parser.add_argument("--reanalyze", type=int, nargs="*", default=[], help="Analysis IDs to rerun")
+    parser.add_argument("--backend", choices=("openai", "local"), default="openai")
+    parser.add_argument("--poll-seconds", type=float, help="Seconds between status checks")
+    args = parser.parse_args()
+    if not args.input and not args.reanalyze:
+        parser.error("Give --input and/or --reanalyze")
+
+    await init_db()
+
+    jobs: List[BatchJob] = []
+    if args.input:
+        for line in args.input.read_text(encoding="utf-8").splitlines():
+            if line.strip():
+                jobs.append(BatchJob(**json.loads(line)))
+    if args.reanalyze:
+        # Closed before the batches are submitted: polling can take hours
+        async with AsyncSessionFactory() as session:
+            jobs.extend(await _reanalysis_jobs(session, args.reanalyze))
+
+    runner = BatchRunner(create_batch_backend(args.backend), poll_seconds=args.poll_seconds)
+    analysis_ids = await runner.run(jobs, AsyncSessionFactory)
+
+    print(json.dumps({"jobs": len(jobs), "analysis_ids": analysis_ids}, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -6,23 +6,31 @@ import asyncio
 import logging
 import time
 import uuid
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import httpx
 
 from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from ..models.database import Analysis, AnalysisPage, User
 from ..models.schemas import AnalysisResponse
-from ..services.screenshot import get_screenshot_service
-from ..services.llm_provider import get_llm_provider
+from ..services.capture_preview import PreviewPublisher
+from ..services.llm_telemetry import begin_llm_usage, record_plan_usage
+from ..services.summary_digest import PageDigest, build_page_digest
+from ..services.screenshot import get_screenshot_service, run_capture
+from ..services.screenshot_store import ScreenshotStore
+from ..services.llm_provider import answered_by, get_llm_provider
+from ..services.page_index import get_page_index
+from ..services.result_validation import PAGE_RESULT_FIELDS, normalize_page_result
 from ..services.storage import get_storage_service
-from ..services.scraper import scrape_funnel
+from ..services.tiled_capture import TileUploader
+from ..services.scraper import PageContent, scrape_funnel
 from ..services.progress_tracker import get_progress_tracker
 from ..services.performance_analyzer import get_performance_analyzer
 from ..services.source_analyzer import get_source_analyzer
 from ..utils.config import settings
+from ..utils.images import EncodedImage, difference_hash
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +38,8 @@ _VALIDATION_HEADERS = {
     "User-Agent": "Mozilla/5.0 (compatible; FunnelAnalyzer/1.0; +https://funnelanalyzer.pro)",
 }
 _VALIDATION_TIMEOUT = httpx.Timeout(8.0, connect=5.0)
+# Streamed page-analysis fields surfaced in progress before the full reply arrives
+_EARLY_RESULT_FIELDS = ("scores", "page_type")
 
 
 async def _validate_single_url(client: httpx.AsyncClient, url: str) -> Optional[str]:
@@ -80,6 +90,29 @@ async def _validate_urls_or_raise(urls: List[str]) -> None:
         raise ValueError(f"Some URLs could not be reached: {details}")
 
 
+def overall_scores(page_scores: List[Dict[str, int]]) -> Tuple[Dict[str, int], int]:
+    """Average each criterion across pages, and the overall score as the mean of those."""
+
+    all_scores: Dict[str, List[int]] = {"clarity": [], "value": [], "proof": [], "design": [], "flow": []}
+    for scores in page_scores:
+        for key in all_scores:
+            all_scores[key].append(scores[key])
+
+    avg_scores = {key: sum(values) // len(values) for key, values in all_scores.items()}
+    return avg_scores, sum(avg_scores.values()) // len(avg_scores)
+
+
+def build_page_record(page_content: PageContent, analysis_result: Dict[str, Any]) -> Dict[str, Any]:
+    """The stored per-page analysis fields, normalised from the LLM provider's reply."""
+
+    result = normalize_page_result(analysis_result)
+    return {
+        "url": page_content.url,
+        "title": page_content.title,
+        **{name: result[name] for name in PAGE_RESULT_FIELDS},
+    }
+
+
 async def analyze_funnel(
     urls: List[str],
     session: AsyncSession,
@@ -89,8 +122,12 @@ async def analyze_funnel(
     industry: Optional[str] = None,
     name: Optional[str] = None,
     parent_analysis_id: Optional[int] = None,
+    plan: Optional[str] = None,
 ) -> AnalysisResponse:
-    """Generate analysis results, persist them, and return a response payload."""
+    """Generate analysis results, persist them, and return a response payload.
+
+    ``plan`` selects the LLM prompt budget (image detail and prompt size) for the user's tier.
+    """
     
     # Generate or use provided analysis ID for progress tracking
     if not analysis_id:
@@ -98,6 +135,7 @@ async def analyze_funnel(
     
     progress = get_progress_tracker()
     total_pages = len(urls)
+    llm_usage = begin_llm_usage(plan=plan)
     
     start_time = time.time()
     perf_start = time.perf_counter()
@@ -137,9 +175,14 @@ async def analyze_funnel(
     
     # Step 2: Initialize analysis services
     llm_provider = get_llm_provider()
+    page_index = get_page_index()
+    page_index_metrics = {"reused": 0, "hinted": 0}
     performance_analyzer = get_performance_analyzer(api_key=settings.GOOGLE_PAGESPEED_API_KEY)
     source_analyzer = get_source_analyzer()
     page_analyses = []
+    page_digests: List[PageDigest] = []
+    # Started as soon as the last page's analysis is in, overlapping that page's upload
+    summary_task: Optional[asyncio.Task] = None
     screenshot_service = None
     storage_service = get_storage_service()
     
@@ -163,9 +206,33 @@ async def analyze_funnel(
         "failed": 0,
         "uploaded": 0,
         "timeouts": 0,
+        "queue_wait_seconds": 0.0,
+        "navigation_seconds": 0.0,
+        "blocked_requests": 0,
+        "estimated_bytes_saved": 0,
+        "encoded_bytes": 0,
+        "tiled_pages": 0,
+        "tiles_uploaded": 0,
+        "mobile_captured": 0,
+        "cancelled": 0,
+        "deduplicated": 0,
+        "previews": 0,
+        "preview_for_llm": 0,
+        "preview_without_visual_elements": 0,
     }
+    # Asset references commit in short transactions of their own, not with the analysis
+    screenshot_store = (
+        ScreenshotStore(
+            session,
+            storage_service,
+            sessions=async_sessionmaker(session.bind, expire_on_commit=False, autoflush=False),
+        )
+        if storage_service
+        else None
+    )
     screenshot_time_total = 0.0
     llm_duration_total = 0.0
+    first_score_seconds: list[float] = []
     telemetry_notes: list[str] = []
     if not screenshot_service:
         telemetry_notes.append("screenshot_service_unavailable")
@@ -174,317 +241,474 @@ async def analyze_funnel(
     if not storage_service:
         telemetry_notes.append("storage_service_unconfigured")
 
-    def _ensure_list(value: Any) -> list:
-        if not value:
-            return []
-        if isinstance(value, list):
-            return value
-        return [value]
-
-    def _ensure_dict(value: Any) -> Optional[dict]:
-        return value if isinstance(value, dict) else None
-
-    def _dict_list(value: Any) -> list:
-        items = _ensure_list(value)
-        return [item for item in items if isinstance(item, dict)]
-
-    def _string_list(value: Any) -> list[str]:
-        items = _ensure_list(value)
-        return [str(item) for item in items if isinstance(item, (str, int, float))]
-
-    for i, page_content in enumerate(page_contents):
-        current_page = i + 1
+    try:
+        for i, page_content in enumerate(page_contents):
+            current_page = i + 1
         
-        # Update progress for each page
-        # Screenshots: 20-40%, Analysis: 40-85%
-        screenshot_progress = 20 + (current_page - 1) * (20 / total_pages)
+            # Update progress for each page
+            # Screenshots: 20-40%, Analysis: 40-85%
+            screenshot_progress = 20 + (current_page - 1) * (20 / total_pages)
         
-        # Get page URL for display
-        page_url = page_content.url
-        # Shorten URL for display (remove protocol and www, truncate if needed)
-        display_url = page_url.replace('https://', '').replace('http://', '').replace('www.', '')
-        if len(display_url) > 50:
-            display_url = display_url[:47] + '...'
+            # Get page URL for display
+            page_url = page_content.url
+            # Shorten URL for display (remove protocol and www, truncate if needed)
+            display_url = page_url.replace('https://', '').replace('http://', '').replace('www.', '')
+            if len(display_url) > 50:
+                display_url = display_url[:47] + '...'
         
-        await progress.update(
-            analysis_id=analysis_id,
-            stage="screenshots",
-            progress_percent=int(screenshot_progress),
-            message=f"Page {current_page}/{total_pages}: Capturing screenshot from {display_url}",
-            current_page=current_page,
-            total_pages=total_pages,
-        )
+            await progress.update(
+                analysis_id=analysis_id,
+                stage="screenshots",
+                progress_percent=int(screenshot_progress),
+                message=f"Page {current_page}/{total_pages}: Capturing screenshot from {display_url}",
+                current_page=current_page,
+                total_pages=total_pages,
+            )
         
-        screenshot_base64 = None
-        visual_elements = None  # Will store extracted CTAs, images, etc.
-        screenshot_timeout_seconds = 15  # Increased from 8s to accommodate Framer Motion animations
-        screenshot_task: asyncio.Task[str | None] | None = None
-        screenshot_captured = False
-        screenshot_uploaded = False
-        screenshot_asset = None
-
-        if screenshot_service:
-            screenshot_metrics["attempted"] += 1
-            capture_timer_start = time.perf_counter()
+            screenshot: EncodedImage | None = None
+            mobile_screenshot: EncodedImage | None = None
+            visual_elements = None  # Will store extracted CTAs, images, etc.
+            screenshot_timeout_seconds = settings.SCREENSHOT_CAPTURE_TIMEOUT_SECONDS
+            screenshot_captured = False
+            screenshot_uploaded = False
+            screenshot_asset = None
+            tiling = None
+            # Tall pages are captured as tiles that upload while the capture continues
+            tile_uploader = (
+                TileUploader(storage_service, store=screenshot_store, source_url=page_content.url)
+                if storage_service
+                else None
+            )
+            # A viewport preview is published to progress while the full capture runs
+            preview = (
+                PreviewPublisher(storage_service, progress, analysis_id)
+                if screenshot_service and settings.SCREENSHOT_PREVIEW_ENABLED
+                else None
+            )
+            llm_on_preview = False
+
+            if screenshot_service:
+                screenshot_metrics["attempted"] += 1
+                capture_timer_start = time.perf_counter()
+                mobile_task: asyncio.Task[EncodedImage] | None = None
+                if settings.SCREENSHOT_MOBILE_COMPARISON:
+                    # Emulated mobile capture runs in its own pooled context alongside the desktop one
+                    mobile_task = asyncio.create_task(
+                        run_capture(
+                            screenshot_service.capture_screenshot(page_content.url, device="mobile"),
+                            timeout_seconds=screenshot_timeout_seconds,
+                        )
+                    )
             
-            # Use analyze_above_fold to get both screenshot AND visual element data
-            try:
-                above_fold_task = asyncio.create_task(
-                    screenshot_service.analyze_above_fold(page_content.url)
-                )
-                above_fold_data = await asyncio.wait_for(
-                    asyncio.shield(above_fold_task),
-                    timeout=screenshot_timeout_seconds,
+                # Use analyze_above_fold to get both screenshot AND visual element data.
+                # On timeout the capture is cancelled, which closes its browser context
+                capture_task = asyncio.create_task(
+                    run_capture(
+                        screenshot_service.analyze_above_fold(
+                            page_content.url,
+                            tile_sink=tile_uploader,
+                            on_preview=preview,
+                            on_visual_elements=preview.set_visual_elements if preview is not None else None,
+                        ),
+                        timeout_seconds=screenshot_timeout_seconds,
+                    )
                 )
+
+                async def _finish_capture() -> None:
+                    nonlocal screenshot, visual_elements, tiling, screenshot_captured
+                    try:
+                        above_fold_data = await capture_task
                 
-                if above_fold_data:
-                    screenshot_base64 = above_fold_data.get("screenshot")
-                    visual_elements = above_fold_data.get("visual_elements")
-                    screenshot_captured = bool(screenshot_base64)
+                        if above_fold_data:
+                            screenshot = above_fold_data.get("screenshot")
+                            visual_elements = above_fold_data.get("visual_elements")
+                            tiling = above_fold_data.get("tiles")
+                            screenshot_captured = screenshot is not None
+                            if tiling:
+                                screenshot_metrics["tiled_pages"] += 1
+                            if screenshot is not None:
+                                screenshot_metrics["encoded_bytes"] += screenshot.size_bytes
+                            screenshot_metrics["queue_wait_seconds"] += above_fold_data.get("queue_wait_seconds") or 0.0
+                            screenshot_metrics["navigation_seconds"] += above_fold_data.get("navigation_seconds") or 0.0
+                            blocking_stats = above_fold_data.get("resource_blocking") or {}
+                            screenshot_metrics["blocked_requests"] += blocking_stats.get("blocked_requests", 0)
+                            screenshot_metrics["estimated_bytes_saved"] += blocking_stats.get("estimated_bytes_saved", 0)
                     
-                    if visual_elements:
+                            if visual_elements:
+                                logger.info(
+                                    f"Extracted {len(visual_elements.get('buttons', []))} CTAs from {page_content.url}"
+                                )
+                        
+                    except asyncio.TimeoutError:
                         logger.info(
-                            f"Extracted {len(visual_elements.get('buttons', []))} CTAs from {page_content.url}"
+                            "Screenshot exceeded %ss for %s; capture cancelled, continuing without it",
+                            screenshot_timeout_seconds,
+                            page_content.url,
                         )
-                        
-            except asyncio.TimeoutError:
-                logger.info(
-                    "Screenshot exceeded %ss for %s; continuing without blocking analysis",
-                    screenshot_timeout_seconds,
-                    page_content.url,
-                )
-                screenshot_metrics["timeouts"] += 1
-            except Exception as screenshot_error:  # noqa: BLE001
-                logger.warning(
-                    "Failed to capture screenshot for %s: %s",
-                    page_content.url,
-                    screenshot_error,
-                )
-            finally:
+                        screenshot_metrics["timeouts"] += 1
+                        screenshot_metrics["cancelled"] += 1
+                    except Exception as screenshot_error:  # noqa: BLE001
+                        logger.warning(
+                            "Failed to capture screenshot for %s: %s",
+                            page_content.url,
+                            screenshot_error,
+                        )
+                    finally:
+                        if not screenshot_captured and tile_uploader:
+                            await tile_uploader.discard()
+
+                preview_llm_after = settings.SCREENSHOT_PREVIEW_LLM_AFTER_SECONDS
+                if preview is not None and preview_llm_after > 0:
+                    await asyncio.wait({capture_task}, timeout=preview_llm_after)
+                    # Deadline is tight: the LLM starts from the preview while the full capture
+                    # keeps running for the report
+                    llm_on_preview = not capture_task.done() and preview.image is not None
+                if not llm_on_preview:
+                    await _finish_capture()
+
+                if mobile_task is not None:
+                    try:
+                        mobile_screenshot = await mobile_task
+                        screenshot_metrics["mobile_captured"] += 1
+                    except asyncio.TimeoutError:
+                        screenshot_metrics["cancelled"] += 1
+                        logger.info("Mobile screenshot timed out for %s; analyzing desktop only", page_content.url)
+                    except Exception as mobile_error:  # noqa: BLE001
+                        logger.warning("Failed to capture mobile screenshot for %s: %s", page_content.url, mobile_error)
+
                 screenshot_time_total += time.perf_counter() - capture_timer_start
 
-        # Step: Performance analysis (if API key available)
-        performance_data = None
-        if performance_analyzer and settings.GOOGLE_PAGESPEED_API_KEY:
-            try:
-                perf_progress = 35 + (current_page - 1) * (10 / total_pages)
-                await progress.update(
-                    analysis_id=analysis_id,
-                    stage="performance_analysis",
-                    progress_percent=int(perf_progress),
-                    message=f"Page {current_page}/{total_pages}: Analyzing page speed for {display_url}",
-                    current_page=current_page,
-                    total_pages=total_pages,
-                )
-                performance_data = await performance_analyzer.analyze_performance(page_content.url)
-                logger.info(f"Performance analysis complete for {page_content.url}")
-            except Exception as perf_error:
-                logger.warning(f"Performance analysis failed for {page_content.url}: {perf_error}")
+            # Step: Performance analysis (if API key available)
+            performance_data = None
+            if performance_analyzer and settings.GOOGLE_PAGESPEED_API_KEY:
+                try:
+                    perf_progress = 35 + (current_page - 1) * (10 / total_pages)
+                    await progress.update(
+                        analysis_id=analysis_id,
+                        stage="performance_analysis",
+                        progress_percent=int(perf_progress),
+                        message=f"Page {current_page}/{total_pages}: Analyzing page speed for {display_url}",
+                        current_page=current_page,
+                        total_pages=total_pages,
+                    )
+                    performance_data = await performance_analyzer.analyze_performance(page_content.url)
+                    logger.info(f"Performance analysis complete for {page_content.url}")
+                except Exception as perf_error:
+                    logger.warning(f"Performance analysis failed for {page_content.url}: {perf_error}")
         
-        # Step: Source code analysis
-        source_data = None
-        if source_analyzer and page_content.raw_html:
-            try:
-                source_progress = 38 + (current_page - 1) * (7 / total_pages)
-                await progress.update(
-                    analysis_id=analysis_id,
-                    stage="source_analysis",
-                    progress_percent=int(source_progress),
-                    message=f"Page {current_page}/{total_pages}: Analyzing technical SEO for {display_url}",
-                    current_page=current_page,
-                    total_pages=total_pages,
+            # Step: Source code analysis
+            source_data = None
+            if source_analyzer and page_content.raw_html:
+                try:
+                    source_progress = 38 + (current_page - 1) * (7 / total_pages)
+                    await progress.update(
+                        analysis_id=analysis_id,
+                        stage="source_analysis",
+                        progress_percent=int(source_progress),
+                        message=f"Page {current_page}/{total_pages}: Analyzing technical SEO for {display_url}",
+                        current_page=current_page,
+                        total_pages=total_pages,
+                    )
+                    source_data = await source_analyzer.analyze_source(
+                        page_content.raw_html, 
+                        page_content.url
+                    )
+                    logger.info(f"Source code analysis complete for {page_content.url}")
+                except Exception as source_error:
+                    logger.warning(f"Source analysis failed for {page_content.url}: {source_error}")
+
+            # Update progress for AI analysis
+            ai_progress = 45 + (current_page - 1) * (35 / total_pages)
+            await progress.update(
+                analysis_id=analysis_id,
+                stage="ai_analysis",
+                progress_percent=int(ai_progress),
+                message=f"Page {current_page}/{total_pages}: AI analyzing {display_url} for insights…",
+                current_page=current_page,
+                total_pages=total_pages,
+            )
+
+            llm_screenshot = screenshot
+            llm_visual_elements = visual_elements
+            if llm_screenshot is None and preview is not None and preview.image is not None:
+                # Full capture timed out, failed or is still running: above the fold beats nothing.
+                # Visual elements are there if extraction finished before the full-page capture
+                llm_screenshot = preview.image
+                llm_visual_elements = visual_elements or preview.visual_elements
+                screenshot_metrics["preview_for_llm"] += 1
+                if llm_visual_elements is None:
+                    screenshot_metrics["preview_without_visual_elements"] += 1
+                    if "preview_without_visual_elements" not in telemetry_notes:
+                        telemetry_notes.append("preview_without_visual_elements")
+
+            llm_timer_start = time.perf_counter()
+
+            async def _on_partial_result(key: str, value: Any, page_number: int = current_page) -> None:
+                if key not in _EARLY_RESULT_FIELDS:
+                    return
+                if key == "scores":
+                    first_score_seconds.append(time.perf_counter() - llm_timer_start)
+                await progress.set_partial_result(analysis_id, page_number, {key: value})
+
+            # Near-identical pages analysed before reuse that result; similar ones inform the prompt
+            similar = None
+            screenshot_phash = None
+            if page_index is not None:
+                try:
+                    if llm_screenshot is not None:
+                        screenshot_phash = await asyncio.to_thread(difference_hash, llm_screenshot.data)
+                    matches = await page_index.nearest(page_content, plan)
+                    similar = matches[0] if matches else None
+                except Exception as index_error:  # noqa: BLE001 - the index is only an optimisation
+                    logger.warning(f"Page index lookup failed for {page_content.url}: {index_error}")
+
+            if (
+                similar is not None
+                and similar.similarity >= settings.LLM_PAGE_INDEX_REUSE_SIMILARITY
+                and similar.reusable_for(
+                    page_content.url,
+                    user_id,
+                    screenshot_phash,
+                    max_distance=settings.SCREENSHOT_DEDUPE_MAX_DISTANCE,
                 )
-                source_data = await source_analyzer.analyze_source(
-                    page_content.raw_html, 
-                    page_content.url
+            ):
+                analysis_result = dict(similar.result)
+                page_index_metrics["reused"] += 1
+                for key in _EARLY_RESULT_FIELDS:
+                    if key in analysis_result:
+                        await _on_partial_result(key, analysis_result[key])
+            else:
+                use_hint = similar is not None and similar.similarity >= settings.LLM_PAGE_INDEX_HINT_SIMILARITY
+                if use_hint:
+                    page_index_metrics["hinted"] += 1
+                fallbacks_before = llm_usage.fallbacks
+                analysis_result = await llm_provider.analyze_page(
+                    page_content,
+                    page_number=i + 1,
+                    total_pages=len(urls),
+                    screenshot=llm_screenshot,
+                    mobile_screenshot=mobile_screenshot,
+                    visual_elements=llm_visual_elements,  # Pass extracted visual data to LLM
+                    industry=industry,  # Pass industry for tailored recommendations
+                    plan=plan,
+                    on_partial=_on_partial_result,  # Scores reach progress before the rest of the reply
+                    similar_page_hint=similar.hint() if use_hint else None,
+                )
+                # Only real model output is indexed; stub or placeholder results must not be reused
+                provider = answered_by()
+                if (
+                    page_index is not None
+                    and provider is not None
+                    and not provider.placeholder
+                    and llm_usage.fallbacks == fallbacks_before
+                ):
+                    try:
+                        await page_index.add(
+                            page_content, plan, analysis_result, user_id=user_id, phash=screenshot_phash
+                        )
+                    except Exception as index_error:  # noqa: BLE001
+                        logger.warning(f"Page index update failed for {page_content.url}: {index_error}")
+            llm_duration_total += time.perf_counter() - llm_timer_start
+
+            # Normalised as stored, so the early summary and the saved overall score agree
+            page_record = build_page_record(page_content, analysis_result)
+            page_digests.append(build_page_digest(i + 1, page_content.url, page_record))
+            if len(page_digests) == len(page_contents):
+                page_scores = [page["scores"] for page in page_analyses] + [page_record["scores"]]
+                summary_task = asyncio.create_task(
+                    llm_provider.analyze_funnel_summary(
+                        page_digests, overall_scores(page_scores)[1], industry, plan=plan
+                    )
                 )
-                logger.info(f"Source code analysis complete for {page_content.url}")
-            except Exception as source_error:
-                logger.warning(f"Source analysis failed for {page_content.url}: {source_error}")
 
-        # Update progress for AI analysis
-        ai_progress = 45 + (current_page - 1) * (35 / total_pages)
+            if llm_on_preview:
+                await _finish_capture()
+
+            screenshot_url = None
+            screenshot_asset = None
+            if screenshot is not None and storage_service:
+                try:
+                    # Reruns of an unchanged page reuse the stored copy instead of uploading again
+                    screenshot_asset = await screenshot_store.store(screenshot, source_url=page_content.url)
+                    if screenshot_asset:
+                        screenshot_url = screenshot_asset.url
+                        screenshot_uploaded = True
+                        logger.info(
+                            f"✓ Screenshot uploaded for {page_content.url}: {screenshot_url}"
+                        )
+                        # Also log the first few characters to verify it's a valid URL
+                        logger.info(f"Screenshot URL preview: {screenshot_url[:100]}...")
+                except Exception as upload_error:  # noqa: BLE001 - log and continue
+                    logger.warning(
+                        "Failed to upload screenshot for %s: %s",
+                        page_content.url,
+                        upload_error,
+                    )
+            elif not storage_service:
+                logger.warning(f"No storage service available for screenshot upload: {page_content.url}")
+            elif screenshot is None:
+                logger.warning(f"No screenshot data captured for: {page_content.url}")
+
+            if preview is not None:
+                if preview.image is not None:
+                    screenshot_metrics["previews"] += 1
+                if screenshot_asset:
+                    # The full capture replaces the preview in progress and in storage
+                    await progress.set_preview(analysis_id, screenshot_asset.url)
+                    await preview.discard()
+                else:
+                    # No full capture: keep the uploaded preview as the page's screenshot
+                    screenshot_asset = await preview.stored()
+                    if screenshot_asset:
+                        screenshot_url = screenshot_asset.url
+
+            screenshot_tiles = None
+            if tiling and tile_uploader:
+                uploaded_tiles = await tile_uploader.finish()
+                screenshot_metrics["tiles_uploaded"] += len(uploaded_tiles)
+                screenshot_tiles = {**{k: v for k, v in tiling.items() if k != "tiles"}, "tiles": uploaded_tiles}
+
+            if screenshot_service:
+                if screenshot_captured:
+                    screenshot_metrics["succeeded"] += 1
+                else:
+                    screenshot_metrics["failed"] += 1
+                if screenshot_uploaded:
+                    screenshot_metrics["uploaded"] += 1
+
+            page_analyses.append({
+                **page_record,
+                "screenshot_url": screenshot_url,
+                "screenshot_storage_key": getattr(screenshot_asset, "key", None),
+                "screenshot_tiles": screenshot_tiles,
+                # New technical analysis data
+                "performance_data": performance_data,
+                "source_analysis": source_data,
+            })
+    
+        # Step 3: Calculate overall scores
         await progress.update(
             analysis_id=analysis_id,
-            stage="ai_analysis",
-            progress_percent=int(ai_progress),
-            message=f"Page {current_page}/{total_pages}: AI analyzing {display_url} for insights…",
-            current_page=current_page,
+            stage="scoring",
+            progress_percent=85,
+            message="Calculating conversion scores and performance metrics…",
             total_pages=total_pages,
         )
-
-        llm_timer_start = time.perf_counter()
-        analysis_result = await llm_provider.analyze_page(
-            page_content,
-            page_number=i + 1,
-            total_pages=len(urls),
-            screenshot_base64=screenshot_base64,
-            visual_elements=visual_elements,  # Pass extracted visual data to LLM
-            industry=industry,  # Pass industry for tailored recommendations
-        )
-        llm_duration_total += time.perf_counter() - llm_timer_start
-
-        screenshot_url = None
-        screenshot_asset = None
-        if screenshot_base64 and storage_service:
-            try:
-                screenshot_asset = await storage_service.upload_base64_image(
-                    base64_data=screenshot_base64,
-                    content_type="image/png",
-                )
-                if screenshot_asset:
-                    screenshot_url = screenshot_asset.url
-                    screenshot_uploaded = True
-                    logger.info(
-                        f"✓ Screenshot uploaded for {page_content.url}: {screenshot_url}"
-                    )
-                    # Also log the first few characters to verify it's a valid URL
-                    logger.info(f"Screenshot URL preview: {screenshot_url[:100]}...")
-            except Exception as upload_error:  # noqa: BLE001 - log and continue
-                logger.warning(
-                    "Failed to upload screenshot for %s: %s",
-                    page_content.url,
-                    upload_error,
-                )
-        elif not storage_service:
-            logger.warning(f"No storage service available for screenshot upload: {page_content.url}")
-        elif not screenshot_base64:
-            logger.warning(f"No screenshot data captured for: {page_content.url}")
-
-        if screenshot_service:
-            if screenshot_captured:
-                screenshot_metrics["succeeded"] += 1
-            else:
-                screenshot_metrics["failed"] += 1
-            if screenshot_uploaded:
-                screenshot_metrics["uploaded"] += 1
-
-        page_analyses.append({
-            "url": page_content.url,
-            "title": page_content.title,
-            "page_type": analysis_result.get("page_type", "unknown"),
-            "scores": analysis_result["scores"],
-            "feedback": analysis_result["feedback"],
-            # Enhanced recommendations
-            "headline_recommendation": analysis_result.get("headline_recommendation"),
-            "cta_recommendations": _dict_list(analysis_result.get("cta_recommendations")),
-            "design_improvements": _dict_list(analysis_result.get("design_improvements")),
-            "trust_elements_missing": _dict_list(analysis_result.get("trust_elements_missing")),
-            "ab_test_priority": _ensure_dict(analysis_result.get("ab_test_priority")),
-            "priority_alerts": _dict_list(analysis_result.get("priority_alerts")),
-            "funnel_flow_gaps": _dict_list(analysis_result.get("funnel_flow_gaps")),
-            "copy_diagnostics": _ensure_dict(analysis_result.get("copy_diagnostics")),
-            "visual_diagnostics": _ensure_dict(analysis_result.get("visual_diagnostics")),
-            "video_recommendations": _dict_list(analysis_result.get("video_recommendations")),
-            "email_capture_recommendations": _string_list(analysis_result.get("email_capture_recommendations")),
-            "screenshot_url": screenshot_url,
-            "screenshot_storage_key": getattr(screenshot_asset, "key", None),
-            # New technical analysis data
-            "performance_data": performance_data,
-            "source_analysis": source_data,
-        })
     
-    # Step 3: Calculate overall scores
-    await progress.update(
-        analysis_id=analysis_id,
-        stage="scoring",
-        progress_percent=85,
-        message="Calculating conversion scores and performance metrics…",
-        total_pages=total_pages,
-    )
-    
-    all_scores = {"clarity": [], "value": [], "proof": [], "design": [], "flow": []}
-    for page_analysis in page_analyses:
-        for key in all_scores:
-            all_scores[key].append(page_analysis["scores"][key])
+        avg_scores, overall_score = overall_scores([page_analysis["scores"] for page_analysis in page_analyses])
     
-    avg_scores = {key: sum(values) // len(values) for key, values in all_scores.items()}
-    overall_score = sum(avg_scores.values()) // len(avg_scores)
-    
-    # Step 4: Generate executive summary
-    await progress.update(
-        analysis_id=analysis_id,
-        stage="executive_summary",
-        progress_percent=90,
-        message="Creating executive summary with strategic recommendations…",
-        total_pages=total_pages,
-    )
+        # Step 4: Generate executive summary
+        await progress.update(
+            analysis_id=analysis_id,
+            stage="executive_summary",
+            progress_percent=90,
+            message="Creating executive summary with strategic recommendations…",
+            total_pages=total_pages,
+        )
     
-    summary = await llm_provider.analyze_funnel_summary(page_analyses, overall_score, industry)
+        if summary_task is None:
+            summary_task = asyncio.create_task(
+                llm_provider.analyze_funnel_summary(page_digests, overall_score, industry, plan=plan)
+            )
+        summary = await summary_task
     
-    # Update progress after summary completes
-    await progress.update(
-        analysis_id=analysis_id,
-        stage="saving",
-        progress_percent=93,
-        message="Saving analysis results to database…",
-        total_pages=total_pages,
-    )
+        # Update progress after summary completes
+        await progress.update(
+            analysis_id=analysis_id,
+            stage="saving",
+            progress_percent=93,
+            message="Saving analysis results to database…",
+            total_pages=total_pages,
+        )
     
-    duration = int(time.time() - start_time)
-    total_perf_duration = time.perf_counter() - perf_start
-
-    pipeline_metrics = {
-        "stage_timings": {
-            "scrape_seconds": round(scrape_duration, 3),
-            "analysis_seconds": round(llm_duration_total, 3),
-            "screenshot_seconds": round(screenshot_time_total, 3) if screenshot_service else None,
-            "total_seconds": round(total_perf_duration, 3),
-        },
-        "screenshot": screenshot_metrics if screenshot_service else None,
-        "llm_provider": settings.LLM_PROVIDER,
-        "notes": telemetry_notes or None,
-    }
-
-    logger.info(
-        "Analysis completed in %ss with overall score %s", duration, overall_score
-    )
-    logger.debug("Analysis telemetry: %s", pipeline_metrics)
+        duration = int(time.time() - start_time)
+        total_perf_duration = time.perf_counter() - perf_start
+        record_plan_usage(llm_usage, total_perf_duration)
+
+        if screenshot_store:
+            screenshot_metrics["deduplicated"] = screenshot_store.stats["reused"]
+        screenshot_metrics["queue_wait_seconds"] = round(screenshot_metrics["queue_wait_seconds"], 3)
+        screenshot_metrics["navigation_seconds"] = round(screenshot_metrics["navigation_seconds"], 3)
+
+        pipeline_metrics = {
+            "stage_timings": {
+                "scrape_seconds": round(scrape_duration, 3),
+                "analysis_seconds": round(llm_duration_total, 3),
+                "time_to_first_score_seconds": (
+                    round(sum(first_score_seconds) / len(first_score_seconds), 3) if first_score_seconds else None
+                ),
+                "screenshot_seconds": round(screenshot_time_total, 3) if screenshot_service else None,
+                "total_seconds": round(total_perf_duration, 3),
+            },
+            "screenshot": screenshot_metrics if screenshot_service else None,
+            "llm_provider": settings.LLM_PROVIDER,
+            "llm": llm_usage.summary() if llm_usage.calls or llm_usage.fallbacks else None,
+            "page_index": page_index_metrics if page_index is not None else None,
+            "notes": telemetry_notes or None,
+        }
+
+        logger.info(
+            "Analysis completed in %ss with overall score %s", duration, overall_score
+        )
+        logger.debug("Analysis telemetry: %s", pipeline_metrics)
     
-    # Step 5: Persist to database
-    resolved_user_id = await _resolve_user_id(session, user_id)
+        # Step 5: Persist to database
+        resolved_user_id = await _resolve_user_id(session, user_id)
     
-    analysis_result = {
-        "urls": urls,
-        "scores": avg_scores,
-        "overall_score": overall_score,
-        "summary": summary,
-        "pages": page_analyses,
-        "analysis_duration_seconds": duration,
-        "recipient_email": recipient_email,
-        "pipeline_metrics": pipeline_metrics,
-    }
-
-    analysis = Analysis(
-        user_id=resolved_user_id,
-        urls=analysis_result["urls"],
-        scores=analysis_result["scores"],
-        overall_score=analysis_result["overall_score"],
-        summary=analysis_result["summary"],
-        detailed_feedback=analysis_result["pages"],
-        pipeline_metrics=pipeline_metrics,
-        analysis_duration_seconds=analysis_result.get("analysis_duration_seconds"),
-        recipient_email=recipient_email,
-        name=name,
-        parent_analysis_id=parent_analysis_id,
-    )
-
-    analysis.pages = [
-        AnalysisPage(
-            url=page["url"],
-            page_type=page.get("page_type"),
-            title=page.get("title"),
-            screenshot_url=page.get("screenshot_url"),
-            screenshot_storage_key=page.get("screenshot_storage_key"),
-            page_scores=page["scores"],
-            page_feedback=page["feedback"],
+        analysis_result = {
+            "urls": urls,
+            "scores": avg_scores,
+            "overall_score": overall_score,
+            "summary": summary,
+            "pages": page_analyses,
+            "analysis_duration_seconds": duration,
+            "recipient_email": recipient_email,
+            "pipeline_metrics": pipeline_metrics,
+        }
+
+        analysis = Analysis(
+            user_id=resolved_user_id,
+            urls=analysis_result["urls"],
+            scores=analysis_result["scores"],
+            overall_score=analysis_result["overall_score"],
+            summary=analysis_result["summary"],
+            detailed_feedback=analysis_result["pages"],
+            pipeline_metrics=pipeline_metrics,
+            analysis_duration_seconds=analysis_result.get("analysis_duration_seconds"),
+            recipient_email=recipient_email,
+            name=name,
+            parent_analysis_id=parent_analysis_id,
         )
-        for page in analysis_result["pages"]
-    ]
 
-    session.add(analysis)
-    await session.flush()
-    await session.commit()
+        analysis.pages = [
+            AnalysisPage(
+                url=page["url"],
+                page_type=page.get("page_type"),
+                title=page.get("title"),
+                screenshot_url=page.get("screenshot_url"),
+                screenshot_storage_key=page.get("screenshot_storage_key"),
+                screenshot_tiles=page.get("screenshot_tiles"),
+                page_scores=page["scores"],
+                page_feedback=page["feedback"],
+            )
+            for page in analysis_result["pages"]
+        ]
+
+        session.add(analysis)
+        await session.flush()
+        await session.commit()
+    except BaseException:
+        if summary_task is not None:
+            # Started early for the last page; nobody will await it now
+            summary_task.cancel()
+            await asyncio.gather(summary_task, return_exceptions=True)
+        if screenshot_store:
+            # References are committed as each page is stored; this run will not save its pages
+            try:
+                await screenshot_store.release_taken()
+            except Exception as release_error:  # noqa: BLE001 - keep the original error
+                logger.warning("Failed to release screenshots of a failed analysis: %s", release_error)
+        raise
     await session.refresh(analysis, attribute_names=["pages"])
     
     # Step 5: Finalize and save results
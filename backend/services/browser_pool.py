@@ -0,0 +1,273 @@
+"""Pooled Playwright browser contexts shared by every screenshot capture."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, List, Optional
+
+from playwright.async_api import Browser, BrowserContext, Page
+
+from .device_profiles import DeviceProfile
+from .resource_blocking import ResourceBlocker, ResourceBlockPolicy
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+
+_CONTEXT_CLOSE_TIMEOUT_SECONDS = 10
+
+_HEAP_PROBE_SCRIPT = "() => (performance.memory && performance.memory.usedJSHeapSize) || 0"
+_STORAGE_RESET_SCRIPT = """
+    () => {
+        try { window.localStorage.clear(); } catch (e) {}
+        try { window.sessionStorage.clear(); } catch (e) {}
+    }
+"""
+
+
+@dataclass
+class _PooledContext:
+    context: BrowserContext
+    page: Page
+    profile: Optional[str] = None
+    blocker: Optional[ResourceBlocker] = None
+    navigations: int = 0
+    created_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class PageLease:
+    """A page checked out from the pool, plus how long the caller queued for it."""
+
+    page: Page
+    context: BrowserContext
+    queue_wait_seconds: float
+    blocker: Optional[ResourceBlocker] = None
+
+    def resource_stats(self) -> Optional[Dict[str, object]]:
+        """Requests blocked during this lease, when interception is enabled."""
+        return self.blocker.stats.as_dict() if self.blocker else None
+
+
+class BrowserContextPool:
+    """Bounded pool of warm BrowserContexts, each with a single reusable page.
+
+    Contexts are handed out LIFO so the warmest renderer is reused first. Device emulation
+    (touch, DPR, mobile UA) is fixed per context, so idle contexts are kept per device profile
+    and the pool evicts idle contexts of other profiles to stay within ``max_contexts``. A context is
+    recycled (closed and replaced) after ``max_navigations`` page loads, once its JS heap
+    exceeds ``max_heap_mb``, or whenever a lease ends with an exception so a wedged page
+    never goes back into circulation.
+    """
+
+    def __init__(
+        self,
+        browser: Browser,
+        *,
+        max_contexts: int = 4,
+        max_navigations: int = 20,
+        max_heap_mb: int = 512,
+        user_agent: str = DEFAULT_USER_AGENT,
+        request_policy: Optional[ResourceBlockPolicy] = None,
+    ) -> None:
+        self._browser = browser
+        self._request_policy = request_policy if request_policy and request_policy.enabled else None
+        self._max_contexts = max(1, max_contexts)
+        self._max_navigations = max(1, max_navigations)
+        self._max_heap_bytes = max(1, max_heap_mb) * 1024 * 1024
+        self._user_agent = user_agent
+        self._semaphore = asyncio.Semaphore(self._max_contexts)
+        self._idle: Dict[Optional[str], List[_PooledContext]] = {}
+        self._in_use = 0
+        self._waiting = 0
+        self._closed = False
+        self._stats: Dict[str, float] = {
+            "leases": 0,
+            "contexts_created": 0,
+            "contexts_recycled": 0,
+            "leases_cancelled": 0,
+            "queue_wait_seconds_total": 0.0,
+            "queue_wait_seconds_max": 0.0,
+        }
+
+    async def warm(self, count: int) -> None:
+        """Pre-create up to ``count`` idle contexts so the first captures skip startup."""
+
+        target = min(max(0, count), self._max_contexts)
+        idle = self._idle.setdefault(None, [])
+        while len(idle) < target:
+            idle.append(await self._create())
+
+    @asynccontextmanager
+    async def lease(
+        self,
+        *,
+        viewport_width: int,
+        viewport_height: int,
+        profile: Optional[DeviceProfile] = None,
+    ) -> AsyncIterator[PageLease]:
+        """Check out a page sized to the requested viewport, waiting if the pool is saturated.
+
+        ``profile`` selects a context emulating that device; without one a plain desktop
+        context is used.
+        """
+
+        if self._closed:
+            raise RuntimeError("Browser context pool is closed")
+
+        wait_start = time.perf_counter()
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+        queue_wait = time.perf_counter() - wait_start
+        self._record_wait(queue_wait)
+
+        pooled: Optional[_PooledContext] = None
+        self._in_use += 1
+        try:
+            idle = self._idle.get(profile.name if profile else None)
+            pooled = idle.pop() if idle else await self._create(profile)
+            await pooled.page.set_viewport_size({"width": viewport_width, "height": viewport_height})
+            if pooled.blocker is not None:
+                pooled.blocker.reset()
+            yield PageLease(
+                page=pooled.page,
+                context=pooled.context,
+                queue_wait_seconds=queue_wait,
+                blocker=pooled.blocker,
+            )
+        except BaseException as exc:
+            if isinstance(exc, asyncio.CancelledError):
+                # The caller gave up (e.g. a capture timeout): closing the context aborts any
+                # navigation or in-page script and frees the renderer's memory
+                self._stats["leases_cancelled"] += 1
+            if pooled is not None:
+                await self._discard(pooled)
+                pooled = None
+            raise
+        finally:
+            self._in_use -= 1
+            try:
+                if pooled is not None:
+                    await self._release(pooled)
+            finally:
+                self._semaphore.release()
+
+    def stats(self) -> Dict[str, float]:
+        """Return a snapshot of pool utilisation and queueing."""
+
+        leases = int(self._stats["leases"])
+        return {
+            "max_contexts": self._max_contexts,
+            "in_use": self._in_use,
+            "idle": self._idle_count(),
+            "waiting": self._waiting,
+            "leases": leases,
+            "contexts_created": int(self._stats["contexts_created"]),
+            "contexts_recycled": int(self._stats["contexts_recycled"]),
+            "leases_cancelled": int(self._stats["leases_cancelled"]),
+            "queue_wait_seconds_avg": round(self._stats["queue_wait_seconds_total"] / leases, 4) if leases else 0.0,
+            "queue_wait_seconds_max": round(self._stats["queue_wait_seconds_max"], 4),
+        }
+
+    async def close(self) -> None:
+        """Close all idle contexts. Leased contexts close with their browser."""
+
+        self._closed = True
+        idle, self._idle = self._idle, {}
+        for bucket in idle.values():
+            for pooled in bucket:
+                await self._close_context(pooled)
+
+    async def _create(self, profile: Optional[DeviceProfile] = None) -> _PooledContext:
+        options: Dict[str, object] = {"user_agent": self._user_agent}
+        if profile is not None:
+            options.update(profile.context_options())
+        context = await self._browser.new_context(**options)
+        blocker: Optional[ResourceBlocker] = None
+        if self._request_policy is not None:
+            blocker = ResourceBlocker(self._request_policy)
+            await context.route(blocker.url_pattern, blocker.handle)
+        page = await context.new_page()
+        pooled = _PooledContext(
+            context=context,
+            page=page,
+            profile=profile.name if profile else None,
+            blocker=blocker,
+        )
+
+        def _on_navigated(frame) -> None:
+            if frame is page.main_frame and frame.url != "about:blank":
+                pooled.navigations += 1
+
+        page.on("framenavigated", _on_navigated)
+        self._stats["contexts_created"] += 1
+        return pooled
+
+    async def _release(self, pooled: _PooledContext) -> None:
+        if self._closed or pooled.page.is_closed():
+            await self._discard(pooled)
+            return
+
+        if pooled.navigations >= self._max_navigations:
+            logger.debug("Recycling browser context after %s navigations", pooled.navigations)
+            await self._discard(pooled)
+            return
+
+        try:
+            heap_bytes = await pooled.page.evaluate(_HEAP_PROBE_SCRIPT)
+            if heap_bytes and heap_bytes > self._max_heap_bytes:
+                logger.info("Recycling browser context with %.0f MB JS heap", heap_bytes / (1024 * 1024))
+                await self._discard(pooled)
+                return
+
+            await pooled.page.evaluate(_STORAGE_RESET_SCRIPT)
+            await pooled.context.clear_cookies()
+            await pooled.page.goto("about:blank")
+        except Exception as exc:  # noqa: BLE001 - a page that cannot be reset is not reusable
+            logger.debug("Discarding browser context that failed to reset: %s", exc)
+            await self._discard(pooled)
+            return
+
+        if self._idle_count() >= self._max_contexts:
+            await self._evict_idle(exclude=pooled.profile)
+        self._idle.setdefault(pooled.profile, []).append(pooled)
+
+    def _idle_count(self) -> int:
+        return sum(len(bucket) for bucket in self._idle.values())
+
+    async def _evict_idle(self, *, exclude: Optional[str]) -> None:
+        # Drop the coldest context from the largest bucket of another profile
+        candidates = [(len(bucket), name) for name, bucket in self._idle.items() if bucket and name != exclude]
+        if not candidates:
+            candidates = [(len(bucket), name) for name, bucket in self._idle.items() if bucket]
+        if not candidates:
+            return
+        _, name = max(candidates, key=lambda item: item[0])
+        await self._discard(self._idle[name].pop(0))
+
+    async def _discard(self, pooled: _PooledContext) -> None:
+        self._stats["contexts_recycled"] += 1
+        # Shielded so a second cancellation cannot leave the context half-closed
+        await asyncio.shield(self._close_context(pooled))
+
+    async def _close_context(self, pooled: _PooledContext) -> None:
+        try:
+            await asyncio.wait_for(pooled.context.close(), timeout=_CONTEXT_CLOSE_TIMEOUT_SECONDS)
+        except Exception as exc:  # noqa: BLE001 - browser may already be gone
+            logger.debug("Ignoring error while closing browser context: %s", exc)
+
+    def _record_wait(self, seconds: float) -> None:
+        self._stats["leases"] += 1
+        self._stats["queue_wait_seconds_total"] += seconds
+        if seconds > self._stats["queue_wait_seconds_max"]:
+            self._stats["queue_wait_seconds_max"] = seconds
@@ -0,0 +1,303 @@
+"""Supervises several Chromium processes, each with its own context pool.
+
+Captures are spread across browsers by current load. A periodic health check samples each
+browser's resident memory (via CDP process info and ``/proc``) and its recent capture
+failure rate; a browser over either limit, or one that disconnects, is replaced. Replacement
+is launched first and the old browser is drained — no new leases, in-flight leases finish —
+before it is closed, so restarts do not fail work already running.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional
+
+from playwright.async_api import Browser, Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+
+from .browser_pool import BrowserContextPool, PageLease
+
+logger = logging.getLogger(__name__)
+
+BrowserLauncher = Callable[[], Awaitable[Browser]]
+PoolFactory = Callable[[Browser], Awaitable[BrowserContextPool]]
+
+
+def default_browser_count() -> int:
+    """Half the cores (Chromium renderers are multi-threaded), between 1 and 4."""
+    return max(1, min(4, (os.cpu_count() or 2) // 2))
+
+
+@dataclass(frozen=True)
+class BrowserLimits:
+    max_rss_mb: int = 1500
+    max_failure_rate: float = 0.5
+    failure_window: int = 50  # Most recent captures considered for the failure rate
+    min_samples: int = 10  # Captures required before the failure rate is acted on
+    health_interval_seconds: float = 30.0
+    drain_timeout_seconds: float = 60.0
+
+
+@dataclass
+class ManagedBrowser:
+    id: int
+    browser: Browser
+    pool: BrowserContextPool
+    started_at: float = field(default_factory=time.monotonic)
+    outcomes: Deque[bool] = field(default_factory=deque)
+    draining: bool = False
+    rss_mb: Optional[float] = None
+
+    @property
+    def load(self) -> int:
+        stats = self.pool.stats()
+        return int(stats["in_use"]) + int(stats["waiting"])
+
+    def record(self, success: bool, window: int) -> None:
+        self.outcomes.append(success)
+        while len(self.outcomes) > window:
+            self.outcomes.popleft()
+
+    def failure_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return sum(1 for ok in self.outcomes if not ok) / len(self.outcomes)
+
+
+# Playwright messages for a crashed page/renderer or a browser that went away
+_BROWSER_FAILURE_MARKERS = (
+    "target crashed",
+    "page crashed",
+    "target closed",
+    "target page, context or browser has been closed",
+    "browser has been closed",
+    "browser has disconnected",
+    "connection closed",
+)
+
+
+def _is_browser_failure(exc: BaseException) -> bool:
+    """Separate browser trouble from target-site trouble.
+
+    Only crashes and disconnects count. Navigation timeouts, DNS errors, refused connections
+    and 4xx/5xx are the site's problem: restarting a shared browser would not fix them.
+    """
+
+    if isinstance(exc, PlaywrightTimeoutError) or not isinstance(exc, PlaywrightError):
+        return False
+    message = str(exc).lower()
+    return any(marker in message for marker in _BROWSER_FAILURE_MARKERS)
+
+
+async def _read_rss_mb(browser: Browser) -> Optional[float]:
+    """Sum VmRSS over every process of ``browser``. Returns None where /proc is unavailable."""
+
+    session = None
+    try:
+        session = await browser.new_browser_cdp_session()
+        info = await session.send("SystemInfo.getProcessInfo")
+    except PlaywrightError as exc:
+        logger.debug("Could not read browser process info: %s", exc)
+        return None
+    finally:
+        if session is not None:
+            try:
+                await session.detach()
+            except PlaywrightError:
+                pass
+
+    total_kb = 0
+    found = False
+    for process in info.get("processInfo", []):
+        try:
+            with open(f"/proc/{int(process['id'])}/status", encoding="ascii") as status:
+                for line in status:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        found = True
+                        break
+        except (OSError, KeyError, ValueError):
+            continue
+    return round(total_kb / 1024, 1) if found else None
+
+
+class BrowserSupervisor:
+    """Runs ``size`` browsers and hands out pages from the least-loaded healthy one."""
+
+    def __init__(
+        self,
+        launcher: BrowserLauncher,
+        pool_factory: PoolFactory,
+        *,
+        size: int,
+        limits: Optional[BrowserLimits] = None,
+    ) -> None:
+        self._launcher = launcher
+        self._pool_factory = pool_factory
+        self._size = max(1, size)
+        self._limits = limits or BrowserLimits()
+        self._browsers: List[ManagedBrowser] = []
+        self._ids = itertools.count(1)
+        self._restarting: set[int] = set()
+        self._background: set[asyncio.Task[None]] = set()
+        self._health_task: Optional[asyncio.Task[None]] = None
+        self._closed = False
+        self._restarts: Dict[str, int] = {"memory": 0, "failures": 0, "crash": 0}
+
+    async def start(self) -> None:
+        for _ in range(self._size):
+            self._browsers.append(await self._launch())
+        self._health_task = asyncio.create_task(self._health_loop())
+        logger.info("Browser supervisor started with %s browser(s)", self._size)
+
+    @asynccontextmanager
+    async def lease(self, **kwargs) -> AsyncIterator[PageLease]:
+        """Lease a page from the least-loaded browser; kwargs go to ``BrowserContextPool.lease``."""
+
+        managed = self._pick()
+        try:
+            async with managed.pool.lease(**kwargs) as lease:
+                yield lease
+        except BaseException as exc:
+            if _is_browser_failure(exc) or not managed.browser.is_connected():
+                managed.record(False, self._limits.failure_window)
+            raise
+        else:
+            managed.record(True, self._limits.failure_window)
+
+    def stats(self) -> Dict[str, object]:
+        browsers = []
+        totals = {"max_contexts": 0, "in_use": 0, "idle": 0, "waiting": 0, "leases": 0, "leases_cancelled": 0}
+        for managed in self._browsers:
+            pool_stats = managed.pool.stats()
+            for key in totals:
+                totals[key] += int(pool_stats[key])
+            browsers.append(
+                {
+                    "id": managed.id,
+                    "rss_mb": managed.rss_mb,
+                    "failure_rate": round(managed.failure_rate(), 3),
+                    "draining": managed.draining,
+                    "age_seconds": round(time.monotonic() - managed.started_at, 1),
+                    "pool": pool_stats,
+                }
+            )
+        return {
+            **totals,
+            "browsers": browsers,
+            "restarts": dict(self._restarts),
+        }
+
+    async def check_health(self) -> None:
+        """Sample every browser and restart the ones over their limits."""
+
+        for managed in list(self._browsers):
+            if managed.draining or managed.id in self._restarting:
+                continue
+            if not managed.browser.is_connected():
+                self._schedule_restart(managed, "crash")
+                continue
+
+            managed.rss_mb = await _read_rss_mb(managed.browser)
+            if managed.rss_mb is not None and managed.rss_mb > self._limits.max_rss_mb:
+                logger.warning("Browser %s using %.0f MB RSS; restarting", managed.id, managed.rss_mb)
+                self._schedule_restart(managed, "memory")
+                continue
+
+            if (
+                len(managed.outcomes) >= self._limits.min_samples
+                and managed.failure_rate() > self._limits.max_failure_rate
+            ):
+                logger.warning(
+                    "Browser %s failing %.0f%% of captures; restarting",
+                    managed.id,
+                    managed.failure_rate() * 100,
+                )
+                self._schedule_restart(managed, "failures")
+
+    async def close(self) -> None:
+        self._closed = True
+        if self._health_task is not None:
+            self._health_task.cancel()
+            await asyncio.gather(self._health_task, return_exceptions=True)
+            self._health_task = None
+        for task in list(self._background):
+            task.cancel()
+        await asyncio.gather(*self._background, return_exceptions=True)
+        browsers, self._browsers = self._browsers, []
+        for managed in browsers:
+            await self._shutdown(managed)
+
+    def _pick(self) -> ManagedBrowser:
+        if self._closed:
+            raise RuntimeError("Browser supervisor is closed")
+        live = [m for m in self._browsers if m.browser.is_connected()]
+        candidates = [m for m in live if not m.draining] or live
+        if not candidates:
+            raise RuntimeError("No healthy browser available for capture")
+        return min(candidates, key=lambda m: m.load)
+
+    async def _launch(self) -> ManagedBrowser:
+        browser = await self._launcher()
+        pool = await self._pool_factory(browser)
+        managed = ManagedBrowser(id=next(self._ids), browser=browser, pool=pool)
+        browser.on("disconnected", lambda _browser: self._on_disconnected(managed))
+        return managed
+
+    def _on_disconnected(self, managed: ManagedBrowser) -> None:
+        if self._closed or managed.draining:
+            return
+        logger.error("Browser %s disconnected; launching a replacement", managed.id)
+        self._schedule_restart(managed, "crash")
+
+    def _schedule_restart(self, managed: ManagedBrowser, reason: str) -> None:
+        if self._closed or managed.id in self._restarting:
+            return
+        self._restarting.add(managed.id)
+        task = asyncio.create_task(self._restart(managed, reason))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _restart(self, managed: ManagedBrowser, reason: str) -> None:
+        try:
+            replacement = await self._launch()
+            if self._closed:
+                await self._shutdown(replacement)
+                return
+            # New leases go to the replacement immediately; the old browser only finishes its work
+            managed.draining = True
+            self._browsers = [replacement if m is managed else m for m in self._browsers]
+            self._restarts[reason] += 1
+            await self._drain(managed)
+        except Exception as exc:  # noqa: BLE001 - keep the old browser if a replacement cannot start
+            logger.error("Failed to restart browser %s: %s", managed.id, exc)
+        finally:
+            self._restarting.discard(managed.id)
+
+    async def _drain(self, managed: ManagedBrowser) -> None:
+        deadline = time.monotonic() + self._limits.drain_timeout_seconds
+        while managed.browser.is_connected() and managed.load > 0 and time.monotonic() < deadline:
+            await asyncio.sleep(0.5)
+        await self._shutdown(managed)
+
+    async def _shutdown(self, managed: ManagedBrowser) -> None:
+        managed.draining = True
+        await managed.pool.close()
+        try:
+            await managed.browser.close()
+        except PlaywrightError as exc:
+            logger.debug("Ignoring error while closing browser %s: %s", managed.id, exc)
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._limits.health_interval_seconds)
+            try:
+                await self.check_health()
+            except Exception as exc:  # noqa: BLE001 - the loop must survive a bad sample
+                logger.warning("Browser health check failed: %s", exc)
@@ -0,0 +1,89 @@
+"""Above-the-fold previews published while the full-page capture is still running.
+
+The screenshot service hands a viewport capture to a ``PreviewSink`` right after navigation.
+``PreviewPublisher`` uploads it in the background and points the analysis progress at it, so
+the UI can show the page long before the scroll-and-capture pass finishes. It also keeps the
+visual elements once they are extracted (before the full-page screenshot is taken), so an LLM
+call that starts from the preview can still use them.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from ..utils.images import EncodedImage
+from .progress_tracker import ProgressTracker
+from .storage import StorageService, StoredObject
+
+logger = logging.getLogger(__name__)
+
+PreviewSink = Callable[[EncodedImage], Awaitable[None]]
+VisualElementsSink = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class PreviewPublisher:
+    """Preview sink that uploads in the background and publishes the URL to progress.
+
+    ``__call__`` returns immediately so the capture is not held up by the upload.
+    """
+
+    def __init__(
+        self,
+        storage: Optional[StorageService],
+        progress: ProgressTracker,
+        analysis_id: str,
+        *,
+        prefix: str = "screenshots/previews/",
+    ) -> None:
+        self._storage = storage
+        self._progress = progress
+        self._analysis_id = analysis_id
+        self._prefix = prefix
+        self._task: Optional[asyncio.Task[Optional[StoredObject]]] = None
+        self.image: Optional[EncodedImage] = None
+        self.visual_elements: Optional[Dict[str, Any]] = None
+        self.ready = asyncio.Event()
+
+    async def __call__(self, image: EncodedImage) -> None:
+        if self.image is not None:
+            return
+        self.image = image
+        self.ready.set()
+        if self._storage is not None:
+            self._task = asyncio.create_task(self._upload(image))
+
+    async def set_visual_elements(self, visual_elements: Dict[str, Any]) -> None:
+        """``VisualElementsSink``: keep the extracted elements for an LLM call made from the preview."""
+
+        self.visual_elements = visual_elements
+
+    async def _upload(self, image: EncodedImage) -> Optional[StoredObject]:
+        stored = await self._storage.upload_image(
+            data=image.data,
+            content_type=image.content_type,
+            prefix=self._prefix,
+        )
+        if stored:
+            await self._progress.set_preview(self._analysis_id, stored.url)
+        return stored
+
+    async def stored(self) -> Optional[StoredObject]:
+        """Wait for the preview upload and return it (None when nothing was uploaded)."""
+
+        if self._task is None:
+            return None
+        try:
+            return await self._task
+        except Exception as exc:  # noqa: BLE001 - a preview is best-effort
+            logger.warning("Failed to upload screenshot preview: %s", exc)
+            return None
+
+    async def discard(self) -> None:
+        """Delete the uploaded preview once the full capture has replaced it."""
+
+        stored = await self.stored()
+        self._task = None
+        if stored is not None and self._storage is not None:
+            await self._storage.delete_object(stored.key)
@@ -11,7 +11,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..models.database import Analysis, AnalysisPage, User
 from ..utils.config import settings
+from .screenshot_store import ScreenshotStore
 from .storage import get_storage_service
+from .tiled_capture import tile_storage_keys
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +35,8 @@ async def cleanup_ephemeral_screenshots(
       • The owning analysis is older than ``retention_days``.
       • The user is the default anonymous user OR currently on the free plan.
 
+    Shared screenshots whose delete failed after their last reference went are retried first.
+
     Returns stats describing how many assets were inspected/deleted.
     """
 
@@ -43,10 +47,21 @@ async def cleanup_ephemeral_screenshots(
             "inspected": 0,
             "eligible": 0,
             "deleted": 0,
+            "tiles_deleted": 0,
             "skipped": 0,
+            "failed_deletes_retried": 0,
             "dry_run": dry_run,
         }
 
+    store = ScreenshotStore(session, storage)
+    failed_deletes_retried = 0
+    if not dry_run:
+        # Objects whose delete failed when their last reference went, in an earlier release
+        retried = await store.retry_failed_deletes()
+        failed_deletes_retried = sum(1 for outcome in retried.values() if outcome == "deleted")
+        if retried:
+            await session.commit()
+
     current_time = now or _now_utc()
     cutoff = current_time - timedelta(days=retention_days)
 
@@ -71,7 +86,9 @@ async def cleanup_ephemeral_screenshots(
         "inspected": len(rows),
         "eligible": len(rows),
         "deleted": 0,
+        "tiles_deleted": 0,
         "skipped": 0,
+        "failed_deletes_retried": failed_deletes_retried,
         "dry_run": dry_run,
     }
 
@@ -100,13 +117,19 @@ async def cleanup_ephemeral_screenshots(
         if dry_run:
             continue
 
-        deleted = await storage.delete_object(key)
-        if not deleted:
+        # A deduplicated screenshot shared with a newer analysis is retained in storage,
+        # but this page's reference is still released and cleared.
+        outcomes = await store.release([key])
+        if outcomes.get(key) == "failed":
             stats["skipped"] += 1
             continue
 
+        tile_outcomes = await store.release(tile_storage_keys(page.screenshot_tiles))
+        stats["tiles_deleted"] += sum(1 for outcome in tile_outcomes.values() if outcome == "deleted")
+
         page.screenshot_storage_key = None
         page.screenshot_url = None
+        page.screenshot_tiles = None
         stats["deleted"] += 1
         analyses_to_update[analysis.id] = analysis
         deleted_keys.add(key)
@@ -124,6 +147,7 @@ async def cleanup_ephemeral_screenshots(
                 if key and key in deleted_keys:
                     item["screenshot_storage_key"] = None
                     item["screenshot_url"] = None
+                    item["screenshot_tiles"] = None
                     changed = True
             if changed:
                 analysis.detailed_feedback = details
@@ -0,0 +1,65 @@
+"""Device emulation profiles used for multi-viewport screenshot capture."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+
+@dataclass(frozen=True)
+class DeviceProfile:
+    """Context-level emulation settings. Pooled contexts are only reused within a profile."""
+
+    name: str
+    width: int
+    height: int
+    device_scale_factor: float = 1.0
+    is_mobile: bool = False
+    has_touch: bool = False
+    user_agent: Optional[str] = None
+
+    def context_options(self) -> Dict[str, object]:
+        options: Dict[str, object] = {
+            "viewport": {"width": self.width, "height": self.height},
+            "device_scale_factor": self.device_scale_factor,
+            "is_mobile": self.is_mobile,
+            "has_touch": self.has_touch,
+        }
+        if self.user_agent:
+            options["user_agent"] = self.user_agent
+        return options
+
+
+DEVICE_PROFILES: Dict[str, DeviceProfile] = {
+    "desktop": DeviceProfile(name="desktop", width=1920, height=1080),
+    "tablet": DeviceProfile(
+        name="tablet",
+        width=768,
+        height=1024,
+        device_scale_factor=2,
+        is_mobile=True,
+        has_touch=True,
+        user_agent=(
+            "Mozilla/5.0 (iPad; CPU OS 17_0 like Mac OS X) AppleWebKit/605.1.15 "
+            "(KHTML, like Gecko) Version/17.0 Mobile/15E148 Safari/604.1"
+        ),
+    ),
+    "mobile": DeviceProfile(
+        name="mobile",
+        width=375,
+        height=812,
+        device_scale_factor=3,
+        is_mobile=True,
+        has_touch=True,
+        user_agent=(
+            "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 "
+            "(KHTML, like Gecko) Version/17.0 Mobile/15E148 Safari/604.1"
+        ),
+    ),
+}
+
+
+def get_device_profile(name: Optional[str]) -> Optional[DeviceProfile]:
+    if not name:
+        return None
+    return DEVICE_PROFILES.get(name.lower())
@@ -0,0 +1,390 @@
+"""Offline batch execution of funnel analyses: scheduled reanalysis, bulk imports and backfills.
+
+These runs do not need interactive latency, so instead of the live completion path their page
+requests are written to a JSONL batch file (one chat completion request per line, in the
+OpenAI Batch format), submitted through a batch backend and polled until done. Summaries
+follow as a second batch once the page results are in. Batched calls are billed at the batch
+price and do not draw on the live concurrency limiter, leaving it to interactive users.
+
+Backends: ``OpenAIBatchBackend`` (the provider's Batch API) and ``LocalBatchBackend``, which
+answers the file in-process for tests and local development.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..models.database import Analysis, AnalysisPage
+from ..utils.config import settings
+from .analyzer import build_page_record, overall_scores
+from .llm_telemetry import LLMCall, LLMUsageRecorder
+from .openai_service import OpenAIService
+from .result_validation import REQUIRED_FIELDS, validate_page_result
+from .scraper import PageContent, scrape_funnel
+from .summary_digest import build_page_digest
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+# Batch states after which polling stops
+TERMINAL_STATES = frozenset({"completed", "failed", "expired", "cancelled"})
+
+
+@dataclass
+class BatchJob:
+    """One funnel to analyse in batch mode, attributed to ``user_id``."""
+
+    urls: List[str]
+    user_id: int
+    plan: Optional[str] = None
+    industry: Optional[str] = None
+    name: Optional[str] = None
+    parent_analysis_id: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class BatchResult:
+    custom_id: str
+    content: Optional[str] = None  # Assistant message content; None when the request failed
+    model: Optional[str] = None
+    usage: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+class BatchFailedError(RuntimeError):
+    """The batch as a whole ended without results (failed, expired or cancelled)."""
+
+
+def write_batch_file(path: Path, requests: Dict[str, Dict[str, Any]]) -> None:
+    """Write ``custom_id -> completion params`` as batch input lines."""
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as handle:
+        for custom_id, body in requests.items():
+            line = {"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": body}
+            handle.write(json.dumps(line, separators=(",", ":")) + "\n")
+
+
+def parse_batch_output(text: str) -> Dict[str, BatchResult]:
+    """Parse batch output (or error) lines into results keyed by ``custom_id``."""
+
+    results: Dict[str, BatchResult] = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        custom_id = record.get("custom_id")
+        response = record.get("response") or {}
+        body = response.get("body") or {}
+        error = record.get("error")
+        if error or response.get("status_code") != 200:
+            detail = error or body.get("error") or {}
+            message = detail.get("message") if isinstance(detail, dict) else str(detail)
+            results[custom_id] = BatchResult(custom_id, error=message or f"status {response.get('status_code')}")
+            continue
+        choices = body.get("choices") or [{}]
+        results[custom_id] = BatchResult(
+            custom_id,
+            content=((choices[0].get("message") or {}).get("content") or "").strip(),
+            model=body.get("model"),
+            usage=body.get("usage") or {},
+        )
+    return results
+
+
+class OpenAIBatchBackend:
+    """Submits batch files through the OpenAI Files and Batch APIs."""
+
+    name = "openai"
+
+    def __init__(self, client: Any, *, completion_window: str = "24h") -> None:
+        self._client = client
+        self._completion_window = completion_window
+
+    async def submit(self, path: Path) -> str:
+        uploaded = await self._client.files.create(file=path, purpose="batch")
+        batch = await self._client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=self._completion_window,
+            metadata={"source": "funnel-analyzer", "file": path.name},
+        )
+        return batch.id
+
+    async def status(self, batch_id: str) -> str:
+        batch = await self._client.batches.retrieve(batch_id)
+        return batch.status
+
+    async def results(self, batch_id: str) -> Dict[str, BatchResult]:
+        batch = await self._client.batches.retrieve(batch_id)
+        results: Dict[str, BatchResult] = {}
+        # Failed requests are written to a separate error file
+        for file_id in (batch.error_file_id, batch.output_file_id):
+            if file_id:
+                content = await self._client.files.content(file_id)
+                results.update(parse_batch_output(content.text))
+        return results
+
+
+# Answers a request body with (content, usage)
+Responder = Callable[[Dict[str, Any]], Awaitable[Tuple[str, Dict[str, int]]]]
+
+
+class LocalBatchBackend:
+    """Answers batch files in-process, by default with deterministic offline replies."""
+
+    name = "local"
+
+    def __init__(self, responder: Optional[Responder] = None) -> None:
+        self._responder = responder or _deterministic_reply
+        self._batches: Dict[str, Path] = {}
+        self._outputs: Dict[str, str] = {}
+
+    async def submit(self, path: Path) -> str:
+        batch_id = f"local_batch_{uuid.uuid4().hex[:12]}"
+        self._batches[batch_id] = path
+        return batch_id
+
+    async def status(self, batch_id: str) -> str:
+        if batch_id not in self._outputs:
+            self._outputs[batch_id] = await self._run(self._batches[batch_id])
+        return "completed"
+
+    async def results(self, batch_id: str) -> Dict[str, BatchResult]:
+        return parse_batch_output(self._outputs[batch_id])
+
+    async def _run(self, path: Path) -> str:
+        lines = []
+        for line in path.read_text(encoding="utf-8").splitlines():
+            request = json.loads(line)
+            body = request["body"]
+            try:
+                content, usage = await self._responder(body)
+            except Exception as exc:  # noqa: BLE001 - reported per request, like the real API
+                lines.append({"custom_id": request["custom_id"], "response": None, "error": {"message": str(exc)}})
+                continue
+            response = {
+                "model": body["model"],
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}}],
+                "usage": usage,
+            }
+            lines.append(
+                {"custom_id": request["custom_id"], "response": {"status_code": 200, "body": response}, "error": None}
+            )
+        return "\n".join(json.dumps(line) for line in lines)
+
+
+async def _deterministic_reply(body: Dict[str, Any]) -> Tuple[str, Dict[str, int]]:
+    prompt = json.dumps(body["messages"], sort_keys=True)
+    digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+    if body.get("response_format", {}).get("type") == "json_object":
+        scores = {key: 55 + digest[index] % 41 for index, key in enumerate(("clarity", "value", "proof", "design", "flow"))}
+        content = json.dumps(
+            {
+                "page_type": "unknown",
+                "scores": scores,
+                "feedback": f"Offline batch analysis: weakest area is {min(scores, key=scores.get)}.",
+            }
+        )
+    else:
+        content = "Offline batch summary."
+    return content, {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4}
+
+
+class BatchRunner:
+    """Runs ``BatchJob`` funnels through a batch backend and stores the analyses."""
+
+    def __init__(
+        self,
+        backend: Any,
+        *,
+        service: Optional[OpenAIService] = None,
+        work_dir: Optional[str] = None,
+        poll_seconds: Optional[float] = None,
+        max_wait_seconds: Optional[float] = None,
+    ) -> None:
+        self._backend = backend
+        self._service = service or OpenAIService()
+        self._work_dir = Path(work_dir or settings.LLM_BATCH_DIR)
+        self._poll_seconds = settings.LLM_BATCH_POLL_SECONDS if poll_seconds is None else poll_seconds
+        self._max_wait_seconds = (
+            settings.LLM_BATCH_MAX_WAIT_HOURS * 3600 if max_wait_seconds is None else max_wait_seconds
+        )
+
+    async def run(
+        self, jobs: List[BatchJob], session_factory: async_sessionmaker[AsyncSession]
+    ) -> List[Optional[int]]:
+        """Scrape, analyse and summarise every job; returns the new analysis IDs in job order.
+
+        A job none of whose pages could be scraped is skipped, with None in place of its ID.
+        A session is only opened from ``session_factory`` once the results are in, so no
+        connection sits idle in a transaction while the batches are polled for hours.
+        """
+
+        started = time.perf_counter()
+        run_id = time.strftime("%Y%m%d-%H%M%S")
+        pages: List[List[PageContent]] = [await scrape_funnel(job.urls) for job in jobs]
+        for job, contents in zip(jobs, pages):
+            if not contents:
+                logger.warning("Skipping batch job for %s: no page could be scraped", ", ".join(job.urls))
+        recorders = [LLMUsageRecorder(plan=job.plan) for job in jobs]
+
+        page_requests: Dict[str, Dict[str, Any]] = {}
+        for job_index, (job, contents) in enumerate(zip(jobs, pages)):
+            for page_index, content in enumerate(contents):
+                # Text only: batch runs do not capture screenshots
+                page_requests[f"page-{job_index}-{page_index}"] = await self._service.build_page_request(
+                    content, page_index + 1, len(contents), industry=job.industry, plan=job.plan
+                )
+        page_results = await self._execute(page_requests, f"{run_id}-pages")
+
+        records: List[List[Dict[str, Any]]] = []
+        summary_requests: Dict[str, Dict[str, Any]] = {}
+        for job_index, (job, contents) in enumerate(zip(jobs, pages)):
+            job_records = []
+            for page_index, content in enumerate(contents):
+                custom_id = f"page-{job_index}-{page_index}"
+                result = self._page_result(page_results.get(custom_id), content, recorders[job_index])
+                job_records.append(build_page_record(content, result))
+            records.append(job_records)
+            if not job_records:
+                continue
+            digests = [
+                build_page_digest(index, record["url"], record) for index, record in enumerate(job_records, start=1)
+            ]
+            _, overall = overall_scores([record["scores"] for record in job_records])
+            summary_requests[f"summary-{job_index}"] = self._service.build_summary_request(
+                digests, overall, job.industry, plan=job.plan
+            )
+        summary_results = await self._execute(summary_requests, f"{run_id}-summaries")
+
+        analyses: List[Optional[Analysis]] = []
+        elapsed = time.perf_counter() - started
+        for job_index, job in enumerate(jobs):
+            if not records[job_index]:
+                analyses.append(None)
+                continue
+            avg_scores, overall = overall_scores([record["scores"] for record in records[job_index]])
+            summary = self._summary_result(summary_results.get(f"summary-{job_index}"), overall, recorders[job_index])
+            # Not added to the live per-plan totals: batch turnaround is hours, not interactive latency
+            analysis = Analysis(
+                user_id=job.user_id,
+                urls=job.urls,
+                scores=avg_scores,
+                overall_score=overall,
+                summary=summary,
+                detailed_feedback=records[job_index],
+                pipeline_metrics={
+                    "llm_provider": f"batch:{self._backend.name}",
+                    "llm": recorders[job_index].summary(),
+                    "notes": ["batch_mode"],
+                },
+                analysis_duration_seconds=int(elapsed),
+                name=job.name,
+                parent_analysis_id=job.parent_analysis_id,
+            )
+            analysis.pages = [
+                AnalysisPage(
+                    url=record["url"],
+                    page_type=record.get("page_type"),
+                    title=record.get("title"),
+                    page_scores=record["scores"],
+                    page_feedback=record["feedback"],
+                )
+                for record in records[job_index]
+            ]
+            analyses.append(analysis)
+
+        stored = [analysis for analysis in analyses if analysis is not None]
+        async with session_factory() as session:
+            session.add_all(stored)
+            await session.flush()
+            analysis_ids = [int(analysis.id) if analysis is not None else None for analysis in analyses]
+            await session.commit()
+        logger.info("Batch run %s stored %d analyses in %.1fs", run_id, len(stored), elapsed)
+        return analysis_ids
+
+    async def _execute(self, requests: Dict[str, Dict[str, Any]], label: str) -> Dict[str, BatchResult]:
+        """Write, submit and poll one batch file until it finishes."""
+
+        if not requests:
+            return {}
+
+        path = self._work_dir / f"{label}.jsonl"
+        write_batch_file(path, requests)
+        batch_id = await self._backend.submit(path)
+        logger.info("Submitted batch %s (%d requests) as %s", path.name, len(requests), batch_id)
+
+        deadline = time.monotonic() + self._max_wait_seconds
+        while True:
+            status = await self._backend.status(batch_id)
+            if status in TERMINAL_STATES:
+                break
+            if time.monotonic() >= deadline:
+                raise BatchFailedError(f"Batch {batch_id} still {status} after {self._max_wait_seconds:.0f}s")
+            await asyncio.sleep(self._poll_seconds)
+
+        results = await self._backend.results(batch_id)
+        if status != "completed" and not results:
+            raise BatchFailedError(f"Batch {batch_id} ended {status}")
+        return results
+
+    def _page_result(
+        self, result: Optional[BatchResult], page: PageContent, recorder: LLMUsageRecorder
+    ) -> Dict[str, Any]:
+        if result is not None and result.content is not None:
+            self._record(result, recorder)
+            # No re-asking here: a batch reply that cannot be repaired locally falls back
+            validated = validate_page_result(result.content)
+            recorder.validated_replies += 1
+            recorder.repaired_replies += validated.repaired
+            if not any(name in REQUIRED_FIELDS for name in validated.missing):
+                return validated.result
+        logger.warning("Batch analysis missing or unusable for %s: %s", page.url, getattr(result, "error", None))
+        recorder.fallbacks += 1
+        return self._service._generate_placeholder_scores(page)
+
+    def _summary_result(self, result: Optional[BatchResult], overall: int, recorder: LLMUsageRecorder) -> str:
+        if result is not None and result.content:
+            self._record(result, recorder)
+            return result.content
+        recorder.fallbacks += 1
+        return self._service._generate_placeholder_summary(overall)
+
+    @staticmethod
+    def _record(result: BatchResult, recorder: LLMUsageRecorder) -> None:
+        details = result.usage.get("prompt_tokens_details") or {}
+        recorder.record(
+            LLMCall(
+                model=result.model or "unknown",
+                latency_seconds=0.0,  # Batch turnaround is not a per-call latency
+                prompt_tokens=result.usage.get("prompt_tokens", 0) or 0,
+                completion_tokens=result.usage.get("completion_tokens", 0) or 0,
+                cached_prompt_tokens=details.get("cached_tokens", 0) or 0,
+                batch=True,
+            )
+        )
+
+
+def create_batch_backend(name: str) -> Any:
+    """``openai`` (needs OPENAI_API_KEY) or ``local``."""
+
+    if name == "local":
+        return LocalBatchBackend()
+    if name == "openai":
+        client = OpenAIService().client
+        if client is None:
+            raise RuntimeError("OPENAI_API_KEY is not configured; the openai batch backend needs it")
+        return OpenAIBatchBackend(client, completion_window=settings.LLM_BATCH_COMPLETION_WINDOW)
+    raise ValueError(f"Unknown batch backend '{name}'")
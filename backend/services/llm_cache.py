@@ -0,0 +1,164 @@
+"""Persistent cache of LLM completions keyed by a fingerprint of the full request.
+
+Reruns, retried analyses and the same page appearing in several funnels send byte-identical
+requests; this cache answers them from a local SQLite file instead of the API. Entries
+expire after ``LLM_CACHE_TTL_HOURS`` and the least recently used entries are evicted past
+``LLM_CACHE_MAX_ENTRIES``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from ..utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    content TEXT NOT NULL,
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    completion_tokens INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_llm_cache_accessed_at ON llm_cache (accessed_at);
+"""
+
+
+@dataclass(frozen=True)
+class CachedCompletion:
+    content: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+def _fingerprint_content(value: Any) -> Any:
+    """Replace inline image data with its hash so keys stay small and content-addressed."""
+
+    if isinstance(value, dict):
+        if value.get("type") == "image_url" and isinstance(value.get("image_url"), dict):
+            image = dict(value["image_url"])
+            url = image.get("url") or ""
+            if url.startswith("data:"):
+                image["url"] = "sha256:" + hashlib.sha256(url.encode("ascii", "ignore")).hexdigest()
+            return {**value, "image_url": image}
+        return {key: _fingerprint_content(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_fingerprint_content(item) for item in value]
+    return value
+
+
+def completion_cache_key(params: Dict[str, Any]) -> str:
+    """Stable key over model, sampling parameters and the full message list."""
+
+    canonical = json.dumps(_fingerprint_content(params), sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """SQLite-backed LRU + TTL store. Blocking I/O runs in worker threads."""
+
+    def __init__(self, path: str, *, ttl_seconds: float, max_entries: int) -> None:
+        self._path = path
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self._path != ":memory:":
+                Path(self._path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self._path, check_same_thread=False)
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    async def get(self, key: str) -> Optional[CachedCompletion]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def put(self, key: str, *, model: str, completion: CachedCompletion) -> None:
+        await asyncio.to_thread(self._put, key, model, completion)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            count = self._connection().execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        return {"entries": count, "max_entries": self._max_entries, "ttl_seconds": self._ttl_seconds}
+
+    def _get(self, key: str) -> Optional[CachedCompletion]:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT content, prompt_tokens, completion_tokens, created_at FROM llm_cache WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            content, prompt_tokens, completion_tokens, created_at = row
+            if now - created_at > self._ttl_seconds:
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                conn.commit()
+                return None
+            conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            conn.commit()
+        return CachedCompletion(content=content, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+    def _put(self, key: str, model: str, completion: CachedCompletion) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache "
+                "(key, model, content, prompt_tokens, completion_tokens, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, model, completion.content, completion.prompt_tokens, completion.completion_tokens, now, now),
+            )
+            conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self._ttl_seconds,))
+            conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                "SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self._max_entries,),
+            )
+            conn.commit()
+
+
+_llm_cache: Optional[LLMResponseCache] = None
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Return the shared response cache, or None when caching is disabled."""
+    global _llm_cache
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    if _llm_cache is None:
+        _llm_cache = LLMResponseCache(
+            settings.LLM_CACHE_PATH,
+            ttl_seconds=settings.LLM_CACHE_TTL_HOURS * 3600,
+            max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+        )
+    return _llm_cache
+
+
+def cleanup_llm_cache() -> None:
+    global _llm_cache
+    if _llm_cache is not None:
+        _llm_cache.close()
+        _llm_cache = None
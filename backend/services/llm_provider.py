@@ -1,14 +1,32 @@
-"""LLM provider registry to allow swapping model vendors without touching business logic."""
+"""LLM provider registry to allow swapping model vendors without touching business logic.
+
+Providers are registered with a ``ProviderProfile`` (which operations they serve, expected
+cost and latency). ``LLM_PROVIDER`` lists the ones to use, in order of preference, and
+``get_llm_provider`` returns an ``LLMRouter`` that sends each call to the best available one
+and fails over to the next when a provider errors or is degraded.
+"""
 
 from __future__ import annotations
 
 import logging
-from typing import Protocol
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, FrozenSet, List, Mapping, Optional, Protocol
 
+from ..services.llm_telemetry import estimate_cost_usd, record_llm_fallback
 from ..utils.config import settings
 
 logger = logging.getLogger(__name__)
 
+PAGE_ANALYSIS = "page_analysis"
+SUMMARY = "summary"
+
+ROUTING_STRATEGIES = ("priority", "cost", "latency")
+
+# Provider that answered the current task's latest routed call (None when every provider failed)
+_answered_by: ContextVar[Optional["ProviderProfile"]] = ContextVar("llm_answered_by", default=None)
+
 
 class LLMProvider(Protocol):
     async def analyze_page(self, *args, **kwargs):  # noqa: ANN401 - protocol mirrors provider signature
@@ -18,26 +36,245 @@ class LLMProvider(Protocol):
         ...
 
 
-_provider_cache: LLMProvider | None = None
+@dataclass(frozen=True)
+class ProviderProfile:
+    name: str
+    model: str
+    operations: FrozenSet[str] = frozenset({PAGE_ANALYSIS, SUMMARY})
+    cost_usd: Mapping[str, float] = field(default_factory=dict)  # Typical spend per call, by operation
+    latency_seconds: Mapping[str, float] = field(default_factory=dict)  # Typical latency, until observed
+    placeholder: bool = False  # Answers without a real model (the local stub): counted as a fallback
+
+
+class ProviderRegistry:
+    """Named provider factories and their profiles; instances are created on first use."""
+
+    def __init__(self) -> None:
+        self._profiles: Dict[str, ProviderProfile] = {}
+        self._factories: Dict[str, Callable[[], LLMProvider]] = {}
+        self._instances: Dict[str, LLMProvider] = {}
+
+    def register(self, profile: ProviderProfile, factory: Callable[[], LLMProvider]) -> None:
+        self._profiles[profile.name] = profile
+        self._factories[profile.name] = factory
+        self._instances.pop(profile.name, None)
+
+    def names(self) -> List[str]:
+        return list(self._profiles)
+
+    def profile(self, name: str) -> ProviderProfile:
+        try:
+            return self._profiles[name]
+        except KeyError:
+            raise ValueError(f"Unsupported LLM provider '{name}'") from None
+
+    def get(self, name: str) -> LLMProvider:
+        if name not in self._instances:
+            self.profile(name)
+            self._instances[name] = self._factories[name]()
+            logger.info("LLM provider initialised: %s", name)
+        return self._instances[name]
+
+
+@dataclass
+class _ProviderHealth:
+    latency_seconds: Dict[str, float] = field(default_factory=dict)  # Smoothed, by operation
+    consecutive_failures: int = 0
+    degraded_until: float = 0.0
+    calls: int = 0
+    failures: int = 0
+
+    def record_success(self, operation: str, latency: float) -> None:
+        previous = self.latency_seconds.get(operation)
+        self.latency_seconds[operation] = latency if previous is None else 0.8 * previous + 0.2 * latency
+        self.consecutive_failures = 0
+        self.degraded_until = 0.0
+        self.calls += 1
+
+    def record_failure(self, *, threshold: int, cooldown_seconds: float) -> None:
+        self.consecutive_failures += 1
+        self.calls += 1
+        self.failures += 1
+        if self.consecutive_failures >= threshold:
+            self.degraded_until = time.monotonic() + cooldown_seconds
+
+
+class LLMRouter:
+    """Routes each call to the best available provider, failing over down the candidate list.
+
+    Candidates are the configured providers that serve the operation and are not degraded,
+    ordered by ``strategy``: configured order (``priority``), profile cost (``cost``) or
+    observed latency (``latency``). A provider is degraded after ``failure_threshold``
+    consecutive errors (for ``cooldown_seconds``) or when it reports itself unavailable, e.g.
+    with its circuit open. The last candidate handles its own errors, so a call still returns
+    the provider's placeholder result when every provider fails. An answer from a
+    ``placeholder`` provider is recorded as an LLM fallback, like any other placeholder result.
+    """
+
+    def __init__(
+        self,
+        registry: ProviderRegistry,
+        providers: List[str],
+        *,
+        strategy: str = "priority",
+        failure_threshold: int = 3,
+        cooldown_seconds: float = 60.0,
+    ) -> None:
+        if not providers:
+            raise ValueError("At least one LLM provider must be configured")
+        if strategy not in ROUTING_STRATEGIES:
+            raise ValueError(f"Unsupported LLM routing strategy '{strategy}'")
+        for name in providers:
+            registry.profile(name)
+        self._registry = registry
+        self._providers = providers
+        self._strategy = strategy
+        self._failure_threshold = failure_threshold
+        self._cooldown_seconds = cooldown_seconds
+        self._health: Dict[str, _ProviderHealth] = {name: _ProviderHealth() for name in providers}
+
+    async def analyze_page(self, *args: Any, **kwargs: Any) -> Dict:
+        return await self._route(PAGE_ANALYSIS, "analyze_page", args, kwargs)
 
+    async def analyze_funnel_summary(self, *args: Any, **kwargs: Any) -> str:
+        return await self._route(SUMMARY, "analyze_funnel_summary", args, kwargs)
 
-def get_llm_provider() -> LLMProvider:
-    """Return the configured LLM provider as a singleton."""
+    def candidates(self, operation: str) -> List[str]:
+        serving = [name for name in self._providers if operation in self._registry.profile(name).operations]
+        if not serving:
+            raise ValueError(f"No configured LLM provider serves '{operation}'")
+        healthy = [name for name in serving if not self._is_degraded(name)]
+        # With everything degraded, still try them all rather than refuse the call
+        ranked = healthy or serving
+        if self._strategy == "cost":
+            ranked = sorted(ranked, key=lambda name: self._registry.profile(name).cost_usd.get(operation, 0.0))
+        elif self._strategy == "latency":
+            ranked = sorted(ranked, key=lambda name: self._expected_latency(name, operation))
+        return ranked
+
+    async def _route(self, operation: str, method: str, args: tuple, kwargs: Dict[str, Any]) -> Any:
+        _answered_by.set(None)
+        candidates = self.candidates(operation)
+        for index, name in enumerate(candidates):
+            last = index == len(candidates) - 1
+            provider = self._registry.get(name)
+            health = self._health[name]
+            started = time.perf_counter()
+            try:
+                result = await getattr(provider, method)(*args, raise_errors=not last, **kwargs)
+            except Exception as exc:  # noqa: BLE001 - any provider error triggers failover
+                health.record_failure(threshold=self._failure_threshold, cooldown_seconds=self._cooldown_seconds)
+                logger.warning("LLM provider %s failed %s, failing over: %s", name, operation, exc)
+                continue
+            health.record_success(operation, time.perf_counter() - started)
+            profile = self._registry.profile(name)
+            _answered_by.set(profile)
+            if profile.placeholder:
+                record_llm_fallback()
+            return result
+        raise RuntimeError(f"No LLM provider could serve '{operation}'")  # pragma: no cover - last never raises
+
+    def _is_degraded(self, name: str) -> bool:
+        if self._health[name].degraded_until > time.monotonic():
+            return True
+        provider = self._registry.get(name)
+        is_available = getattr(provider, "is_available", None)
+        return is_available is not None and not is_available()
+
+    def _expected_latency(self, name: str, operation: str) -> float:
+        observed = self._health[name].latency_seconds.get(operation)
+        if observed is not None:
+            return observed
+        return self._registry.profile(name).latency_seconds.get(operation, float("inf"))
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "strategy": self._strategy,
+            "providers": {
+                name: {
+                    "model": self._registry.profile(name).model,
+                    "degraded": self._is_degraded(name),
+                    "calls": health.calls,
+                    "failures": health.failures,
+                    "latency_seconds": {op: round(value, 3) for op, value in health.latency_seconds.items()},
+                }
+                for name, health in self._health.items()
+            },
+        }
+
+
+def _create_openai_provider() -> LLMProvider:
+    from .openai_service import get_openai_service
+
+    return get_openai_service()
+
+
+def _create_local_provider() -> LLMProvider:
+    from .local_provider import create_local_provider
+
+    return create_local_provider()
+
+
+def build_default_registry() -> ProviderRegistry:
+    registry = ProviderRegistry()
+    registry.register(
+        ProviderProfile(
+            name="openai",
+            model="gpt-4o",
+            cost_usd={
+                PAGE_ANALYSIS: estimate_cost_usd("gpt-4o", 5000, 1500) or 0.0,
+                SUMMARY: estimate_cost_usd("gpt-4o", 2000, 400) or 0.0,
+            },
+            latency_seconds={PAGE_ANALYSIS: 20.0, SUMMARY: 6.0},
+        ),
+        _create_openai_provider,
+    )
+    registry.register(
+        ProviderProfile(
+            name="local",
+            model="local-deterministic",
+            placeholder=True,
+            latency_seconds={
+                PAGE_ANALYSIS: settings.LLM_LOCAL_LATENCY_SECONDS,
+                SUMMARY: settings.LLM_LOCAL_LATENCY_SECONDS,
+            },
+        ),
+        _create_local_provider,
+    )
+    return registry
+
+
+def configured_provider_names() -> List[str]:
+    return [name.strip().lower() for name in settings.LLM_PROVIDER.split(",") if name.strip()]
+
+
+_provider_cache: LLMRouter | None = None
+
+
+def get_llm_provider() -> LLMRouter:
+    """Return the router over the configured LLM providers as a singleton."""
     global _provider_cache
 
     if _provider_cache is not None:
         return _provider_cache
 
-    provider_key = settings.LLM_PROVIDER.lower()
+    _provider_cache = LLMRouter(
+        build_default_registry(),
+        configured_provider_names(),
+        strategy=settings.LLM_ROUTING_STRATEGY,
+        failure_threshold=settings.LLM_PROVIDER_FAILURE_THRESHOLD,
+        cooldown_seconds=settings.LLM_PROVIDER_COOLDOWN_SECONDS,
+    )
+    return _provider_cache
 
-    if provider_key == "openai":
-        from .openai_service import get_openai_service
 
-        _provider_cache = get_openai_service()
-        logger.info("LLM provider initialised: OpenAI")
-        return _provider_cache
+def answered_by() -> Optional[ProviderProfile]:
+    """Profile of the provider that answered this task's latest routed call."""
+    return _answered_by.get()
+
 
-    raise ValueError(f"Unsupported LLM provider '{settings.LLM_PROVIDER}'")
+def get_llm_routing_stats() -> Optional[Dict[str, object]]:
+    return _provider_cache.stats() if _provider_cache is not None else None
 
 
 def reset_llm_provider() -> None:
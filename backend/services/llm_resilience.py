@@ -0,0 +1,329 @@
+"""Retries, hedging and a circuit breaker around LLM API calls.
+
+Transient provider errors (429, 408/409, 5xx, timeouts, dropped connections) are retried
+with full-jitter exponential backoff, waiting at least as long as the provider's
+``Retry-After``. Optionally, a call still running past the recent latency percentile gets a
+duplicate "hedge" request and whichever finishes first wins. After repeated failed calls
+the circuit opens and calls fail immediately until a probe succeeds. Every attempt (hedges
+included) also takes a slot from an adaptive concurrency limiter that backs off on 429s and
+timeouts and grows while the provider keeps up.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+import openai
+
+from ..utils.adaptive_limiter import AdaptiveConcurrencyLimiter
+from ..utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_RETRYABLE_STATUS = {408, 409, 429}
+_CONGESTION_STATUS = {429, 503}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the provider while the circuit breaker is open."""
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    max_retries: int = 3
+    base_delay_seconds: float = 0.5
+    max_delay_seconds: float = 20.0
+    max_retry_after_seconds: float = 60.0  # Longer provider waits are not worth holding a report for
+
+    def backoff(self, attempt: int) -> float:
+        """Full jitter: uniform over [0, min(max, base * 2^attempt)]."""
+        return random.uniform(0, min(self.max_delay_seconds, self.base_delay_seconds * (2 ** attempt)))
+
+
+def is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, (openai.APITimeoutError, openai.APIConnectionError, asyncio.TimeoutError)):
+        return True
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code in _RETRYABLE_STATUS or exc.status_code >= 500
+    return False
+
+
+def is_congestion(exc: BaseException) -> bool:
+    """Errors that mean "send less": rate limits, overload and timeouts."""
+    if isinstance(exc, (openai.APITimeoutError, asyncio.TimeoutError)):
+        return True
+    return isinstance(exc, openai.APIStatusError) and exc.status_code in _CONGESTION_STATUS
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    for header, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(header)
+        if value is None:
+            continue
+        try:
+            return max(0.0, float(value) * scale)
+        except ValueError:
+            continue  # HTTP-date form: fall back to our own backoff
+    return None
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failed calls; one probe after ``reset_seconds``."""
+
+    def __init__(self, *, failure_threshold: int = 5, reset_seconds: float = 30.0) -> None:
+        self._failure_threshold = max(1, failure_threshold)
+        self._reset_seconds = reset_seconds
+        self._consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self._reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self._consecutive_failures += 1
+        if self._probe_in_flight or self._consecutive_failures >= self._failure_threshold:
+            if self._opened_at is None or self._probe_in_flight:
+                logger.warning("LLM circuit opened after %s consecutive failures", self._consecutive_failures)
+            self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """Let another probe through after one ended without an outcome (e.g. it was cancelled)."""
+        self._probe_in_flight = False
+
+
+class LatencyWindow:
+    def __init__(self, size: int = 200) -> None:
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class ResilientCaller:
+    """Runs provider calls with retry, optional hedging and a shared circuit breaker."""
+
+    def __init__(
+        self,
+        *,
+        retry: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        hedge_percentile: Optional[float] = None,
+        hedge_min_samples: int = 20,
+        limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ) -> None:
+        self._retry = retry or RetryPolicy()
+        self._limiter = limiter
+        self._breaker = breaker or CircuitBreaker()
+        self._hedge_percentile = hedge_percentile
+        self._hedge_min_samples = hedge_min_samples
+        self._sleep = sleep
+        self._latency = LatencyWindow()
+        self._counters: Dict[str, int] = {
+            "calls": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "retries": 0,
+            "retryable_errors": 0,
+            "non_retryable_errors": 0,
+            "hedges_launched": 0,
+            "hedges_won": 0,
+            "circuit_rejected": 0,
+        }
+
+    async def call(self, request: Callable[[], Awaitable[T]], *, hedge: bool = True) -> T:
+        """Run ``request`` (a factory, so it can be re-issued) with the resilience policy.
+
+        Pass ``hedge=False`` for calls with side effects per attempt, such as streamed replies
+        that report partial results.
+        """
+
+        self._counters["calls"] += 1
+        probe = self._breaker.state == "half_open"
+        if not self._breaker.allow():
+            self._counters["circuit_rejected"] += 1
+            raise CircuitOpenError("LLM provider circuit is open; failing fast")
+
+        limiter = self._limiter
+        limited: Callable[[], Awaitable[T]] = request if limiter is None else (lambda: limiter.run(request))
+
+        try:
+            return await self._call_with_retries(limited, hedge=hedge)
+        except BaseException:
+            if probe:
+                # A cancelled probe records neither success nor failure; without this, no further
+                # probe would ever be allowed and the circuit would stay half open for good
+                self._breaker.release_probe()
+            raise
+
+    async def _call_with_retries(self, limited: Callable[[], Awaitable[T]], *, hedge: bool) -> T:
+        attempt = 0
+        while True:
+            try:
+                result = await self._attempt(limited, hedge=hedge)
+            except Exception as exc:
+                retryable = is_retryable(exc)
+                self._counters["retryable_errors" if retryable else "non_retryable_errors"] += 1
+                if not retryable:
+                    # The request itself is bad; the provider is healthy
+                    self._breaker.record_success()
+                    self._counters["failed"] += 1
+                    raise
+                retry_after = retry_after_seconds(exc)
+                if attempt >= self._retry.max_retries or (
+                    retry_after is not None and retry_after > self._retry.max_retry_after_seconds
+                ):
+                    self._breaker.record_failure()
+                    self._counters["failed"] += 1
+                    raise
+                delay = self._retry.backoff(attempt)
+                if retry_after is not None:
+                    delay = max(delay, retry_after)
+                attempt += 1
+                self._counters["retries"] += 1
+                logger.info("Retrying LLM call in %.2fs (attempt %s): %s", delay, attempt + 1, exc)
+                await self._sleep(delay)
+                continue
+
+            self._breaker.record_success()
+            self._counters["succeeded"] += 1
+            return result
+
+    async def _attempt(self, request: Callable[[], Awaitable[T]], *, hedge: bool) -> T:
+        started = time.perf_counter()
+        hedge_after = self._hedge_delay() if hedge else None
+        primary = asyncio.ensure_future(request())
+        if hedge_after is None:
+            result = await primary
+            self._latency.add(time.perf_counter() - started)
+            return result
+
+        backup: Optional[asyncio.Future[T]] = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+            if primary in done:
+                result = primary.result()
+                self._latency.add(time.perf_counter() - started)
+                return result
+
+            self._counters["hedges_launched"] += 1
+            backup = asyncio.ensure_future(request())
+            pending = {primary, backup}
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            self._counters["hedges_won"] += 1
+                        self._latency.add(time.perf_counter() - started)
+                        return task.result()
+                if not pending:
+                    # Both requests failed: surface the most recent error to the retry loop
+                    raise done.pop().exception()
+        finally:
+            for task in (primary, backup):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def _hedge_delay(self) -> Optional[float]:
+        if self._hedge_percentile is None or len(self._latency) < self._hedge_min_samples:
+            return None
+        return self._latency.percentile(self._hedge_percentile)
+
+    @property
+    def circuit_state(self) -> str:
+        return self._breaker.state
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            **self._counters,
+            "circuit": self._breaker.state,
+            "latency_p50_seconds": _rounded(self._latency.percentile(0.5)),
+            "latency_p95_seconds": _rounded(self._latency.percentile(0.95)),
+            "hedging": self._hedge_percentile is not None,
+            "concurrency": self._limiter.stats() if self._limiter is not None else None,
+        }
+
+
+def _rounded(value: Optional[float]) -> Optional[float]:
+    return round(value, 3) if value is not None else None
+
+
+_llm_caller: Optional[ResilientCaller] = None
+
+
+def get_llm_caller() -> ResilientCaller:
+    """Process-wide caller, so the circuit, concurrency limit and latency history are shared by all analyses."""
+    global _llm_caller
+    if _llm_caller is None:
+        _llm_caller = ResilientCaller(
+            retry=RetryPolicy(
+                max_retries=settings.LLM_MAX_RETRIES,
+                base_delay_seconds=settings.LLM_RETRY_BASE_DELAY_SECONDS,
+                max_delay_seconds=settings.LLM_RETRY_MAX_DELAY_SECONDS,
+            ),
+            breaker=CircuitBreaker(
+                failure_threshold=settings.LLM_CIRCUIT_FAILURE_THRESHOLD,
+                reset_seconds=settings.LLM_CIRCUIT_RESET_SECONDS,
+            ),
+            hedge_percentile=settings.LLM_HEDGE_PERCENTILE if settings.LLM_HEDGE_ENABLED else None,
+            limiter=AdaptiveConcurrencyLimiter(
+                initial_limit=settings.LLM_CONCURRENCY_INITIAL,
+                min_limit=settings.LLM_CONCURRENCY_MIN,
+                max_limit=settings.LLM_CONCURRENCY_MAX,
+                latency_tolerance=settings.LLM_CONCURRENCY_LATENCY_TOLERANCE,
+                is_congestion=is_congestion,
+            ),
+        )
+    return _llm_caller
+
+
+def get_llm_resilience_stats() -> Optional[Dict[str, object]]:
+    return _llm_caller.stats() if _llm_caller is not None else None
+
+
+def reset_llm_caller() -> None:
+    global _llm_caller
+    _llm_caller = None
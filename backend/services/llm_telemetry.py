@@ -0,0 +1,190 @@
+"""Per-analysis accounting of LLM calls: tokens, latency, spend and cache savings.
+
+``begin_llm_usage`` installs a recorder in the current context; every completion made while
+it is active (including from tasks spawned afterwards) is recorded on it. Finished analyses
+are also added to process-wide per-plan totals with ``record_plan_usage``.
+"""
+
+from __future__ import annotations
+
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# USD per 1M tokens (input, output). Unknown models are recorded without a cost.
+MODEL_PRICING: Dict[str, Tuple[float, float]] = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+# Prompt tokens served from the provider's prefix cache are billed at this fraction of input
+CACHED_INPUT_PRICE_FACTOR = 0.5
+# Requests run through the provider's batch interface are billed at this fraction
+BATCH_PRICE_FACTOR = 0.5
+
+
+def estimate_cost_usd(
+    model: str, prompt_tokens: int, completion_tokens: int, cached_prompt_tokens: int = 0
+) -> Optional[float]:
+    pricing = MODEL_PRICING.get(model)
+    if pricing is None:
+        return None
+    input_price, output_price = pricing
+    cached = min(cached_prompt_tokens, prompt_tokens)
+    input_cost = (prompt_tokens - cached) * input_price + cached * input_price * CACHED_INPUT_PRICE_FACTOR
+    return (input_cost + completion_tokens * output_price) / 1_000_000
+
+
+@dataclass
+class LLMCall:
+    model: str
+    latency_seconds: float
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_prompt_tokens: int = 0  # Part of prompt_tokens served from the provider's prefix cache
+    estimated_prompt_tokens: Optional[int] = None  # Pre-call estimate, to check the budgeter
+    cached: bool = False
+    batch: bool = False  # Answered through an offline batch (see llm_batch)
+
+    @property
+    def cost_usd(self) -> float:
+        cost = (
+            estimate_cost_usd(self.model, self.prompt_tokens, self.completion_tokens, self.cached_prompt_tokens)
+            or 0.0
+        )
+        return cost * BATCH_PRICE_FACTOR if self.batch else cost
+
+
+@dataclass
+class LLMUsageRecorder:
+    plan: Optional[str] = None
+    calls: List[LLMCall] = field(default_factory=list)
+    fallbacks: int = 0  # Results replaced by placeholders after the provider call failed
+    validated_replies: int = 0  # Page analysis replies checked by result_validation
+    repaired_replies: int = 0  # ... of which something was fixed locally
+    reasked_fields: int = 0  # Fields that had to be asked for again
+
+    def record(self, call: LLMCall) -> None:
+        self.calls.append(call)
+
+    def summary(self) -> Dict[str, object]:
+        hits = [call for call in self.calls if call.cached]
+        misses = [call for call in self.calls if not call.cached]
+        return {
+            "plan": self.plan,
+            "calls": len(self.calls),
+            "fallbacks": self.fallbacks,
+            "validated_replies": self.validated_replies,
+            "repaired_replies": self.repaired_replies,
+            "reasked_fields": self.reasked_fields,
+            "repair_rate": _rate(self.repaired_replies, self.validated_replies),
+            "cache_hits": len(hits),
+            "cache_misses": len(misses),
+            "prompt_tokens": sum(call.prompt_tokens for call in misses),
+            "completion_tokens": sum(call.completion_tokens for call in misses),
+            "cached_prompt_tokens": sum(call.cached_prompt_tokens for call in misses),
+            "cost_usd": round(sum(call.cost_usd for call in misses), 6),
+            # What the cached answers cost when they were first generated
+            "cache_savings_usd": round(sum(call.cost_usd for call in hits), 6),
+            "cache_hit_latency_ms": _mean_ms(hits),
+            "api_latency_ms": _mean_ms(misses),
+            "per_call": [
+                {
+                    "model": call.model,
+                    "cached": call.cached,
+                    "batch": call.batch,
+                    "estimated_prompt_tokens": call.estimated_prompt_tokens,
+                    "prompt_tokens": call.prompt_tokens,
+                    "completion_tokens": call.completion_tokens,
+                    "cached_prompt_tokens": call.cached_prompt_tokens,
+                    "cost_usd": round(call.cost_usd, 6),
+                    "latency_ms": round(call.latency_seconds * 1000, 1),
+                }
+                for call in self.calls
+            ],
+        }
+
+
+def _mean_ms(calls: List[LLMCall]) -> Optional[float]:
+    if not calls:
+        return None
+    return round(sum(call.latency_seconds for call in calls) / len(calls) * 1000, 1)
+
+
+def _rate(count: int, total: int) -> Optional[float]:
+    return round(count / total, 4) if total else None
+
+
+_current_usage: ContextVar[Optional[LLMUsageRecorder]] = ContextVar("llm_usage", default=None)
+
+
+def begin_llm_usage(plan: Optional[str] = None) -> LLMUsageRecorder:
+    recorder = LLMUsageRecorder(plan=plan)
+    _current_usage.set(recorder)
+    return recorder
+
+
+def record_llm_call(call: LLMCall) -> None:
+    recorder = _current_usage.get()
+    if recorder is not None:
+        recorder.record(call)
+
+
+def record_llm_fallback() -> None:
+    recorder = _current_usage.get()
+    if recorder is not None:
+        recorder.fallbacks += 1
+
+
+def record_llm_validation(repaired: bool, reasked_fields: int = 0) -> None:
+    recorder = _current_usage.get()
+    if recorder is not None:
+        recorder.validated_replies += 1
+        recorder.repaired_replies += repaired
+        recorder.reasked_fields += reasked_fields
+
+
+@dataclass
+class _PlanTotals:
+    analyses: int = 0
+    calls: int = 0
+    cost_usd: float = 0.0
+    llm_seconds: float = 0.0
+    analysis_seconds: float = 0.0
+    validated_replies: int = 0
+    repaired_replies: int = 0
+
+
+_plan_totals: Dict[str, _PlanTotals] = {}
+
+
+def record_plan_usage(recorder: LLMUsageRecorder, analysis_seconds: float) -> None:
+    """Add a finished analysis to the running spend and latency totals for its plan."""
+
+    totals = _plan_totals.setdefault(recorder.plan or "free", _PlanTotals())
+    misses = [call for call in recorder.calls if not call.cached]
+    totals.analyses += 1
+    totals.calls += len(recorder.calls)
+    totals.cost_usd += sum(call.cost_usd for call in misses)
+    totals.llm_seconds += sum(call.latency_seconds for call in recorder.calls)
+    totals.analysis_seconds += analysis_seconds
+    totals.validated_replies += recorder.validated_replies
+    totals.repaired_replies += recorder.repaired_replies
+
+
+def get_plan_usage_stats() -> Dict[str, Dict[str, object]]:
+    return {
+        plan: {
+            "analyses": totals.analyses,
+            "calls": totals.calls,
+            "cost_usd": round(totals.cost_usd, 6),
+            "mean_cost_usd": round(totals.cost_usd / totals.analyses, 6),
+            "mean_llm_seconds": round(totals.llm_seconds / totals.analyses, 3),
+            "mean_analysis_seconds": round(totals.analysis_seconds / totals.analyses, 3),
+            "repair_rate": _rate(totals.repaired_replies, totals.validated_replies),
+        }
+        for plan, totals in _plan_totals.items()
+    }
+
+
+def reset_plan_usage() -> None:
+    _plan_totals.clear()
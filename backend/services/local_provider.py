@@ -0,0 +1,108 @@
+"""Deterministic offline LLM provider for load tests, benchmarks and local development.
+
+Answers have the same shape as the OpenAI provider's, derived from a hash of the page so the
+same input always scores the same. ``latency_seconds`` simulates the provider round trip.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from ..services.llm_telemetry import LLMCall, record_llm_call
+from ..services.scraper import PageContent
+from ..services.summary_digest import PageDigest
+from ..utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+LOCAL_MODEL = "local-deterministic"
+
+_SCORE_KEYS = ("clarity", "value", "proof", "design", "flow")
+
+
+class LocalLLMProvider:
+    """Stands in for a real model: no network, no cost, stable answers."""
+
+    def __init__(self, *, latency_seconds: float = 0.0) -> None:
+        self.latency_seconds = max(0.0, latency_seconds)
+
+    async def analyze_page(
+        self,
+        page_content: PageContent,
+        page_number: int,
+        total_pages: int,
+        *args: Any,
+        on_partial: Optional[Callable[[str, Any], Awaitable[None]]] = None,
+        **kwargs: Any,
+    ) -> Dict:
+        started = time.perf_counter()
+        digest = _digest(page_content.url, page_content.title, *page_content.headings[:3])
+        scores = {key: 55 + digest[index] % 41 for index, key in enumerate(_SCORE_KEYS)}
+        result: Dict[str, Any] = {
+            "page_type": _page_type(page_number, total_pages),
+            "scores": scores,
+            "feedback": (
+                f"Offline analysis for {page_content.title or page_content.url}: "
+                f"weakest area is {min(scores, key=scores.get)}, strongest is {max(scores, key=scores.get)}."
+            ),
+            "design_improvements": [
+                {"area": key, "recommendation": f"Review the {key} of this page (score {value})."}
+                for key, value in sorted(scores.items(), key=lambda item: item[1])[:2]
+            ],
+        }
+
+        # Split the simulated latency so partial results arrive before the full answer, as when streaming
+        await asyncio.sleep(self.latency_seconds / 2)
+        if on_partial is not None:
+            for key in ("page_type", "scores"):
+                await on_partial(key, result[key])
+        await asyncio.sleep(self.latency_seconds / 2)
+
+        self._record(started, prompt=json.dumps(page_content.headings), completion=json.dumps(result))
+        return result
+
+    async def analyze_funnel_summary(
+        self, page_digests: List[PageDigest], overall_score: int, industry: Optional[str] = None, **kwargs: Any
+    ) -> str:
+        started = time.perf_counter()
+        await asyncio.sleep(self.latency_seconds)
+        summary = (
+            f"Offline summary: {len(page_digests)} page(s) analysed with an overall score of {overall_score}/100"
+            + (f" for the {industry} industry." if industry else ".")
+        )
+        self._record(started, prompt="\n".join(digest.render() for digest in page_digests), completion=summary)
+        return summary
+
+    def is_available(self) -> bool:
+        return True
+
+    def _record(self, started: float, *, prompt: str, completion: str) -> None:
+        record_llm_call(
+            LLMCall(
+                model=LOCAL_MODEL,
+                latency_seconds=time.perf_counter() - started,
+                prompt_tokens=len(prompt) // 4,
+                completion_tokens=len(completion) // 4,
+            )
+        )
+
+
+def _digest(*parts: Optional[str]) -> bytes:
+    return hashlib.sha256("\x00".join(part or "" for part in parts).encode("utf-8")).digest()
+
+
+def _page_type(page_number: int, total_pages: int) -> str:
+    if page_number == 1:
+        return "sales_page"
+    if page_number == total_pages:
+        return "thank_you"
+    return "order_form" if page_number == 2 else "upsell"
+
+
+def create_local_provider() -> LocalLLMProvider:
+    return LocalLLMProvider(latency_seconds=settings.LLM_LOCAL_LATENCY_SECONDS)
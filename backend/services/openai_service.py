@@ -2,191 +2,869 @@
 
 from __future__ import annotations
 
+import asyncio
+import functools
 import json
 import logging
-from typing import Dict, List, Optional
+import textwrap
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
 from openai import AsyncOpenAI
 
+from ..services.llm_cache import CachedCompletion, completion_cache_key, get_llm_cache
+from ..services.llm_resilience import get_llm_caller
+from ..services.llm_telemetry import LLMCall, record_llm_call, record_llm_fallback, record_llm_validation
+from ..services.result_validation import REQUIRED_FIELDS, validate_page_result
 from ..services.scraper import PageContent
+from ..services.summary_digest import PageDigest, render_digests
+from ..services.vision_preprocess import preprocess_vision_input
+from ..services.token_budget import (
+    LOW_DETAIL_TOKENS,
+    PromptBudget,
+    VisionInput,
+    budget_for_plan,
+    estimate_text_tokens,
+)
 from ..utils.config import settings
+from ..utils.images import EncodedImage
+from ..utils.json_stream import TopLevelMemberParser
 
 logger = logging.getLogger(__name__)
 
+# Receives each top-level field of a streamed JSON reply as soon as it is complete
+PartialCallback = Callable[[str, Any], Awaitable[None]]
+
+# Fractions of the default scraped-content limits tried, in order, to fit the prompt budget
+_PROMPT_CONTENT_SCALES = (1.0, 0.6, 0.3)
+
+_PAGE_ANALYSIS_SYSTEM_PROMPT = (
+    "You are a professional conversion optimization consultant with 15+ years of experience "
+    "analyzing and improving marketing funnels. Your role is to provide clear, actionable analysis "
+    "that helps marketers and funnel builders improve their conversion rates.\n"
+    "\n"
+    "ANALYSIS APPROACH:\n"
+    "• Be specific and direct - identify exact issues and provide concrete solutions\n"
+    "• Focus on elements that drive measurable conversion improvements\n"
+    "• Provide precise recommendations (e.g., 'Change headline to: [exact text]' not 'improve messaging')\n"
+    "• Prioritize high-impact changes over minor tweaks\n"
+    "• Use clear, professional language that any marketer would understand\n"
+    "\n"
+    "CORE EVALUATION CRITERIA:\n"
+    "1. **Clarity**: Can visitors immediately understand the offer and value proposition?\n"
+    "2. **Value Proposition**: Are benefits clearly communicated? Is the offer compelling?\n"
+    "3. **Trust & Proof**: Are there credible testimonials, data, case studies, or guarantees?\n"
+    "4. **Call-to-Action**: Are CTAs clear, visible, and friction-free? Do they create urgency?\n"
+    "5. **User Experience**: Is navigation intuitive? Does the flow guide visitors toward conversion?\n"
+    "\n"
+    "WHEN ANALYZING VISUALS (if screenshot provided):\n"
+    "• Identify ALL call-to-action buttons by their visual appearance, text, and placement\n"
+    "• Assess above-the-fold content - what's immediately visible without scrolling?\n"
+    "• Evaluate mobile responsiveness and layout effectiveness\n"
+    "• Check visual hierarchy - does design guide attention to key elements?\n"
+    "• Identify missing or weak trust indicators (logos, badges, testimonials)\n"
+    "\n"
+    "WHEN ANALYZING TEXT CONTENT:\n"
+    "• Scan for all CTA button text, links, and form submissions\n"
+    "• Evaluate headline clarity and benefit-driven copy\n"
+    "• Identify objection handling and urgency mechanisms\n"
+    "• Check for specificity in claims (numbers, timeframes, guarantees)\n"
+    "\n"
+    "IMPORTANT: If you see CTA buttons in the screenshot OR in the scraped content, acknowledge them "
+    "specifically in your analysis. Don't claim CTAs are missing if they exist.\n"
+    "\n"
+    "Return structured JSON only with your professional analysis."
+)
+
+# Page analysis reply schema, one entry per top-level field; plans request only the fields they display
+_RESULT_FIELD_SCHEMA: Tuple[Tuple[str, str], ...] = (
+    (
+        "page_type",
+        '"page_type": "Identify the ACTUAL page type based on content analysis, not just position. Options: sales_page (VSL or long-form sales letter), order_form (checkout/payment page), upsell (one-time offer/bump), downsell (alternative lower-priced offer), thank_you (confirmation/success), squeeze_page (email capture), webinar_registration, landing_page (lead capture), bridge_page (pre-sell), application_page (qualify leads), other"',
+    ),
+    (
+        "scores",
+        '"scores": {\n'
+        '    "clarity": 0-100,  // How clear is the value proposition?\n'
+        '    "value": 0-100,    // How compelling is the offer?\n'
+        '    "proof": 0-100,    // How credible are the claims?\n'
+        '    "design": 0-100,   // How effective is the visual design?\n'
+        '    "flow": 0-100      // How smooth is the user journey?\n'
+        '}',
+    ),
+    (
+        "feedback",
+        '"feedback": "Professional 3-5 sentence summary of the page\'s conversion effectiveness. Be specific about what\'s working and what needs improvement."',
+    ),
+    (
+        "headline_recommendation",
+        '"headline_recommendation": "Primary recommended headline"',
+    ),
+    (
+        "headline_alternatives",
+        '"headline_alternatives": [\n'
+        '    "Alternative headline option 1 with specific benefit",\n'
+        '    "Alternative headline option 2 with different angle",\n'
+        '    "Alternative headline option 3 for urgency/scarcity",\n'
+        '    "Alternative headline option 4 for social proof angle",\n'
+        '    "Alternative headline option 5 for transformation focus"\n'
+        ']',
+    ),
+    (
+        "cta_recommendations",
+        '"cta_recommendations": [\n'
+        '    {\n'
+        '        "copy": "Exact button text (e.g., \'Get Instant Access Now\', \'Start My Free Trial\')",\n'
+        '        "location": "Specific placement (e.g., \'Hero section, centered below headline\')",\n'
+        '        "style": "Visual styling (e.g., \'Large green button, 60px height, white text\')",\n'
+        '        "reason": "Why this CTA will convert better (be specific about psychology)"\n'
+        '    },\n'
+        '    {\n'
+        '        "copy": "Alternative CTA option 2",\n'
+        '        "location": "Different strategic placement",\n'
+        '        "style": "Contrasting visual approach",\n'
+        '        "reason": "Alternative angle for testing"\n'
+        '    }\n'
+        ']',
+    ),
+    (
+        "design_improvements",
+        '"design_improvements": [\n'
+        '    {\n'
+        '        "area": "Specific page section (e.g., \'Hero section\', \'Above the fold\', \'Pricing table\')",\n'
+        '        "current_state": "What exists now that\'s problematic",\n'
+        '        "recommendation": "Exact change to make with measurements/specs",\n'
+        '        "example": "Concrete example: \'Change background from white to light gray (#F5F5F5), increase headline font from 32px to 48px, add 40px padding\'",\n'
+        '        "impact": "Expected conversion impact with reasoning"\n'
+        '    }\n'
+        ']',
+    ),
+    (
+        "copy_improvements",
+        '"copy_improvements": [\n'
+        '    {\n'
+        '        "section": "Which copy block needs work",\n'
+        '        "current": "Current problematic text",\n'
+        '        "improved": "Recommended replacement text (full rewrite)",\n'
+        '        "why": "Specific reason this improves conversion"\n'
+        '    }\n'
+        ']',
+    ),
+    (
+        "trust_elements_missing",
+        '"trust_elements_missing": [\n'
+        '    {\n'
+        '        "element": "Specific trust element needed with full details",\n'
+        '        "example": "Concrete example: \'Add testimonial from John Smith, CEO of TechCorp: Quote about 300% revenue increase, include headshot photo\'",\n'
+        '        "placement": "Where to place it on the page",\n'
+        '        "why": "How this specific element builds trust and improves conversion"\n'
+        '    }\n'
+        ']',
+    ),
+    (
+        "ab_test_priority",
+        '"ab_test_priority": {\n'
+        '    "element": "The single highest-priority element to A/B test",\n'
+        '    "control": "Current version (exact copy/design)",\n'
+        '    "variant_1": "First test variant with full details",\n'
+        '    "variant_2": "Second test variant with different approach",\n'
+        '    "variant_3": "Third test variant (optional)",\n'
+        '    "expected_lift": "Estimated percentage improvement (e.g., \'15-25% based on similar tests\')",\n'
+        '    "reasoning": "Why this test is the priority with conversion psychology rationale",\n'
+        '    "implementation": "Step-by-step how to implement this test"\n'
+        '}',
+    ),
+    (
+        "priority_alerts",
+        '"priority_alerts": [\n'
+        '    {\n'
+        '        "severity": "high|medium|low",\n'
+        '        "issue": "Specific problem affecting conversions",\n'
+        '        "impact": "How this impacts conversion rate",\n'
+        '        "fix": "Exact steps to resolve"\n'
+        '    }\n'
+        ']',
+    ),
+    (
+        "funnel_flow_gaps",
+        '"funnel_flow_gaps": [\n'
+        '    {\n'
+        '        "step": "Where in the customer journey",\n'
+        '        "issue": "What\'s missing or broken",\n'
+        '        "fix": "How to fix it"\n'
+        '    }\n'
+        ']',
+    ),
+    (
+        "copy_diagnostics",
+        '"copy_diagnostics": {\n'
+        '    "hook": "Does the opening create immediate interest? What\'s working/missing?",\n'
+        '    "offer": "Is the value proposition crystal clear? What could be clearer?",\n'
+        '    "urgency": "What urgency mechanisms exist? Are they credible?",\n'
+        '    "objections": "Which objections are addressed? Which are missing?",\n'
+        '    "audience_fit": "Does the copy speak directly to the target customer?"\n'
+        '}',
+    ),
+    (
+        "visual_diagnostics",
+        '"visual_diagnostics": {\n'
+        '    "hero": "Effectiveness of above-the-fold content and first impression",\n'
+        '    "layout": "Visual organization and information hierarchy",\n'
+        '    "contrast": "Readability and visual clarity",\n'
+        '    "mobile": "Mobile responsiveness and usability",\n'
+        '    "credibility": "Professional appearance and trust signals"\n'
+        '}',
+    ),
+    (
+        "video_recommendations",
+        '"video_recommendations": [\n'
+        '    {\n'
+        '        "context": "Where video appears or should appear",\n'
+        '        "recommendation": "Specific improvement or addition"\n'
+        '    }\n'
+        ']',
+    ),
+    (
+        "email_capture_recommendations",
+        '"email_capture_recommendations": [\n'
+        '    "Specific recommendations for email opt-in strategy and nurture sequence"\n'
+        ']',
+    ),
+)
+
+
+_DETAILED_REQUIREMENTS = """ANALYSIS REQUIREMENTS:
+
+1. **Identify ALL CTAs**: Look for CTA buttons in both the screenshot (if provided) and the scraped page content. 
+   List every CTA you find with its exact text.
+
+2. **Evaluate Current State**: What's working well? What specific elements are hurting conversion?
+
+3. **Provide Exact Recommendations**: Don't say "improve the headline" - provide the exact headline text to use.
+   Don't say "add CTAs" if CTAs exist - instead evaluate their effectiveness and suggest improvements.
+   For EVERY recommendation type, provide 3-5 specific examples, not generic instructions.
+
+4. **Prioritize Impact**: Focus on changes that will meaningfully improve conversion rates.
+
+5. **Be Specific with Examples**: 
+   - Headlines: Provide 3-5 alternative headline options
+   - CTAs: Provide exact button copy with context
+   - Design: Specify exact colors, sizes, placements
+   - Copy: Show before/after text examples
+   - Trust elements: Name specific testimonials, guarantees, badges to add"""
+
+_SCORES_ONLY_REQUIREMENTS = """ANALYSIS REQUIREMENTS:
+
+Score the page on each criterion and write the feedback, taking into account every CTA in the screenshot (if provided) and the scraped page content.
+Only the fields below are used for this report: do not add recommendations, alternatives or diagnostics."""
+
+
+def _render_result_schema(fields: Optional[Tuple[str, ...]] = None, feedback_chars: Optional[int] = None) -> str:
+    """The reply structure shown to the model, limited to ``fields`` (None = every field)."""
+
+    entries = []
+    for name, spec in _RESULT_FIELD_SCHEMA:
+        if fields is not None and name not in fields:
+            continue
+        if name == "feedback" and feedback_chars:
+            spec = (
+                f'"feedback": "Under {feedback_chars} characters: the page\'s biggest conversion strength '
+                'and the single most important fix."'
+            )
+        entries.append(textwrap.indent(spec, "    "))
+    return "{\n" + ",\n".join(entries) + "\n}"
+
+
+@functools.lru_cache(maxsize=32)
+def _page_analysis_instructions(
+    result_fields: Optional[Tuple[str, ...]] = None, feedback_chars: Optional[int] = None
+) -> str:
+    """System message for page analysis: everything that does not depend on the page.
+
+    It is byte-identical for every page analysed with the same plan (and split part), so it
+    forms a stable prompt prefix the provider can cache; page content goes in the user message.
+    """
+
+    detailed = result_fields is None or any(
+        field not in ("page_type", "scores", "feedback") for field in result_fields
+    )
+    requirements = _DETAILED_REQUIREMENTS if detailed else _SCORES_ONLY_REQUIREMENTS
+    return f"""{_PAGE_ANALYSIS_SYSTEM_PROMPT}
+
+{requirements}
+
+Return ONLY valid JSON with this structure:
+{_render_result_schema(result_fields, feedback_chars)}
+
+CRITICAL: If you identify CTA buttons (either visually or in the content), acknowledge them specifically. 
+Don't claim CTAs are missing if they're present - instead evaluate their effectiveness."""
+
+
+@dataclass(frozen=True)
+class AnalysisPart:
+    """A slice of the page analysis schema that can be requested on its own."""
+
+    name: str
+    fields: Tuple[str, ...]
+    max_tokens: int
+    vision: bool = True  # Send the desktop screenshot with this part
+    mobile: bool = False  # Send the mobile capture too
+    required: bool = False  # Without it the page has no usable result
+
+
+# Independent parts for split analysis (LLM_SPLIT_ANALYSIS_ENABLED); together they cover the schema
+ANALYSIS_PARTS: Tuple[AnalysisPart, ...] = (
+    AnalysisPart("scoring", ("page_type", "scores", "feedback"), max_tokens=500, required=True),
+    AnalysisPart(
+        "copy_cta",
+        (
+            "headline_recommendation",
+            "headline_alternatives",
+            "cta_recommendations",
+            "copy_improvements",
+            "copy_diagnostics",
+            "email_capture_recommendations",
+        ),
+        max_tokens=1400,
+    ),
+    AnalysisPart(
+        "visual_design",
+        ("design_improvements", "visual_diagnostics", "video_recommendations"),
+        max_tokens=1000,
+        mobile=True,
+    ),
+    AnalysisPart(
+        "trust_flow",
+        ("trust_elements_missing", "ab_test_priority", "priority_alerts", "funnel_flow_gaps"),
+        max_tokens=1200,
+        vision=False,
+    ),
+)
+
+
+def _split_result_fields(result_fields: Optional[Tuple[str, ...]]) -> List[AnalysisPart]:
+    """The parts needed for ``result_fields`` (None = all), each narrowed to the requested fields."""
+
+    parts = []
+    for part in ANALYSIS_PARTS:
+        fields = tuple(field for field in part.fields if result_fields is None or field in result_fields)
+        if fields:
+            parts.append(replace(part, fields=fields))
+    return parts
+
 
 class OpenAIService:
     """Service for interacting with OpenAI API."""
     
     def __init__(self):
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY) if settings.OPENAI_API_KEY else None
+        # Retries are handled by the shared resilient caller, not the SDK
+        self.client = (
+            AsyncOpenAI(api_key=settings.OPENAI_API_KEY, max_retries=0) if settings.OPENAI_API_KEY else None
+        )
     
     async def analyze_page(
         self,
         page_content: PageContent,
         page_number: int,
         total_pages: int,
-        screenshot_base64: Optional[str] = None,
+        screenshot: Optional[EncodedImage] = None,
+        mobile_screenshot: Optional[EncodedImage] = None,
         visual_elements: Optional[Dict] = None,
         industry: Optional[str] = None,
+        plan: Optional[str] = None,
+        on_partial: Optional[PartialCallback] = None,
+        raise_errors: bool = False,
+        similar_page_hint: Optional[str] = None,
     ) -> Dict:
         """
         Analyze a single page using GPT-4o with Vision.
         
+        The prompt and screenshot are sized to the plan's ``PromptBudget``: tall captures are
+        cropped and downscaled, image detail follows the plan, and scraped content is trimmed
+        until the estimated text tokens fit.
+        
         Args:
             page_content: Scraped page content
             page_number: Position in funnel (1-indexed)
             total_pages: Total number of pages in funnel
-            screenshot_base64: Optional base64 encoded screenshot for visual analysis
+            screenshot: Optional encoded screenshot for visual analysis
+            mobile_screenshot: Optional emulated mobile above-the-fold capture for comparison
             visual_elements: Optional extracted visual data (CTAs, images, etc.) from screenshot
+            plan: Subscription plan of the requesting user, selecting the prompt budget
+            on_partial: Optional async callback streamed each result field (scores, page_type, …)
+                as soon as the model has finished writing it
+            raise_errors: Raise instead of returning placeholder scores, so a router can fail over
+            similar_page_hint: Optional summary of an earlier analysis of a similar page
+                (see ``page_index``), so the model can stay consistent and skip repeating it
             
         Returns:
             Dict with scores, feedback, and specific recommendations
         """
         if not self.client:
+            if raise_errors:
+                raise RuntimeError("OpenAI API key not configured")
             logger.warning("OpenAI API key not configured, using placeholder scores")
             return self._generate_placeholder_scores(page_content)
         
         try:
+            budget = budget_for_plan(plan)
+            vision = None
+            if screenshot is not None:
+                # The fold plus crops of CTAs, forms and testimonials further down the page
+                vision = await preprocess_vision_input(
+                    screenshot,
+                    visual_elements,
+                    detail=budget.image_detail,
+                    max_aspect=budget.max_image_aspect,
+                )
+            if not budget.include_mobile:
+                mobile_screenshot = None
+
+            parts = _split_result_fields(budget.result_fields) if settings.LLM_SPLIT_ANALYSIS_ENABLED else []
+            if len(parts) > 1:
+                result = await self._analyze_page_split(
+                    parts,
+                    page_content,
+                    page_number,
+                    total_pages,
+                    budget=budget,
+                    vision=vision,
+                    mobile_screenshot=mobile_screenshot,
+                    visual_elements=visual_elements,
+                    industry=industry,
+                    on_partial=on_partial,
+                    similar_page_hint=similar_page_hint,
+                )
+            else:
+                result = await self._analyze_page_fields(
+                    page_content,
+                    page_number,
+                    total_pages,
+                    budget=budget,
+                    result_fields=budget.result_fields,
+                    max_tokens=budget.max_completion_tokens,
+                    vision=vision,
+                    mobile_screenshot=mobile_screenshot,
+                    visual_elements=visual_elements,
+                    industry=industry,
+                    on_partial=on_partial,
+                    similar_page_hint=similar_page_hint,
+                )
+            logger.info(f"Analyzed page {page_number}/{total_pages}: {page_content.url}")
+            return result
+            
+        except Exception as e:
+            if raise_errors:
+                raise
+            logger.error(f"OpenAI API error for {page_content.url}: {str(e)}")
+            record_llm_fallback()
+            return self._generate_placeholder_scores(page_content)
+
+    async def _analyze_page_split(
+        self,
+        parts: List[AnalysisPart],
+        page_content: PageContent,
+        page_number: int,
+        total_pages: int,
+        *,
+        budget: PromptBudget,
+        vision: Optional[VisionInput],
+        mobile_screenshot: Optional[EncodedImage],
+        visual_elements: Optional[Dict],
+        industry: Optional[str],
+        on_partial: Optional[PartialCallback],
+        similar_page_hint: Optional[str] = None,
+    ) -> Dict:
+        """Run one focused completion per part concurrently and merge the replies.
+
+        Each part asks for a slice of the schema with its own completion cap, so wall time is
+        bounded by the slowest slice instead of the whole reply. The scoring part is required;
+        a failed recommendation part only leaves its fields out of the result.
+        """
+
+        calls = [
+            self._analyze_page_fields(
+                page_content,
+                page_number,
+                total_pages,
+                budget=budget,
+                result_fields=part.fields,
+                max_tokens=min(part.max_tokens, budget.max_completion_tokens),
+                vision=vision if part.vision else None,
+                mobile_screenshot=mobile_screenshot if part.mobile else None,
+                visual_elements=visual_elements,
+                industry=industry,
+                on_partial=on_partial if part.required else None,
+                similar_page_hint=similar_page_hint,
+            )
+            for part in parts
+        ]
+        replies = await asyncio.gather(*calls, return_exceptions=True)
+
+        result: Dict[str, Any] = {}
+        for part, reply in zip(parts, replies):
+            if isinstance(reply, BaseException):
+                if part.required:
+                    raise reply
+                logger.warning("Analysis part %s failed for %s: %s", part.name, page_content.url, reply)
+                continue
+            result.update({key: value for key, value in reply.items() if key in part.fields})
+        return result
+
+    async def _analyze_page_fields(
+        self,
+        page_content: PageContent,
+        page_number: int,
+        total_pages: int,
+        *,
+        budget: PromptBudget,
+        result_fields: Optional[Tuple[str, ...]],
+        max_tokens: int,
+        vision: Optional[VisionInput],
+        mobile_screenshot: Optional[EncodedImage],
+        visual_elements: Optional[Dict],
+        industry: Optional[str],
+        on_partial: Optional[PartialCallback],
+        similar_page_hint: Optional[str] = None,
+    ) -> Dict:
+        """One page analysis completion for ``result_fields`` (None = the full schema).
+
+        The reply is validated and repaired locally (see ``result_validation``); only fields
+        that cannot be recovered are asked for again, in a second completion limited to them.
+        Raises ``ValueError`` when a required field is still missing after that.
+        """
+
+        request = functools.partial(
+            self._page_analysis_request,
+            page_content,
+            page_number,
+            total_pages,
+            budget=budget,
+            max_tokens=max_tokens,
+            vision=vision,
+            mobile_screenshot=mobile_screenshot,
+            visual_elements=visual_elements,
+            industry=industry,
+            similar_page_hint=similar_page_hint,
+        )
+        params, estimated_prompt_tokens = request(result_fields=result_fields)
+        content = await self._create_completion(
+            estimated_prompt_tokens=estimated_prompt_tokens,
+            on_partial=on_partial,
+            result_fields=result_fields,
+            **params,
+        )
+        validated = validate_page_result(content, result_fields)
+
+        reasked = tuple(validated.missing)
+        if reasked:
+            logger.info("Re-asking for %s on %s", ", ".join(reasked), page_content.url)
+            params, estimated_prompt_tokens = request(result_fields=reasked)
+            content = await self._create_completion(
+                estimated_prompt_tokens=estimated_prompt_tokens, result_fields=reasked, **params
+            )
+            validated = validated.merge(validate_page_result(content, reasked))
+        record_llm_validation(repaired=validated.repaired, reasked_fields=len(reasked))
+
+        required_missing = [name for name in validated.missing if name in REQUIRED_FIELDS]
+        if required_missing:
+            raise ValueError(f"Analysis reply is missing {', '.join(required_missing)}")
+        return validated.result
+
+    async def build_page_request(
+        self,
+        page_content: PageContent,
+        page_number: int,
+        total_pages: int,
+        *,
+        screenshot: Optional[EncodedImage] = None,
+        visual_elements: Optional[Dict] = None,
+        industry: Optional[str] = None,
+        plan: Optional[str] = None,
+    ) -> Dict:
+        """Chat completion parameters for a full (unsplit) page analysis, e.g. for a batch file."""
+
+        budget = budget_for_plan(plan)
+        vision = None
+        if screenshot is not None:
+            vision = await preprocess_vision_input(
+                screenshot, visual_elements, detail=budget.image_detail, max_aspect=budget.max_image_aspect
+            )
+        params, _ = self._page_analysis_request(
+            page_content,
+            page_number,
+            total_pages,
+            budget=budget,
+            result_fields=budget.result_fields,
+            max_tokens=budget.max_completion_tokens,
+            vision=vision,
+            mobile_screenshot=None,
+            visual_elements=visual_elements,
+            industry=industry,
+        )
+        return params
+
+    def _page_analysis_request(
+        self,
+        page_content: PageContent,
+        page_number: int,
+        total_pages: int,
+        *,
+        budget: PromptBudget,
+        result_fields: Optional[Tuple[str, ...]],
+        max_tokens: int,
+        vision: Optional[VisionInput],
+        mobile_screenshot: Optional[EncodedImage],
+        visual_elements: Optional[Dict],
+        industry: Optional[str],
+        similar_page_hint: Optional[str] = None,
+    ) -> Tuple[Dict, int]:
+        """Completion parameters for a page analysis, and the estimated prompt tokens."""
+
+        instructions = _page_analysis_instructions(result_fields, budget.feedback_chars)
+
+        # Drop lower-priority scraped content until the text fits the budget
+        for content_scale in _PROMPT_CONTENT_SCALES:
             prompt = self._build_expert_analysis_prompt(
                 page=page_content,
                 page_number=page_number,
                 total_pages=total_pages,
-                include_visual=bool(screenshot_base64),
+                include_visual=vision is not None,
                 visual_elements=visual_elements,
                 industry=industry,
+                content_scale=content_scale,
+                screenshot_cropped=bool(vision and vision.cropped),
+                screenshot_regions=vision.regions if vision else 0,
+                similar_page_hint=similar_page_hint,
             )
-            
-            # Build messages with optional vision
-            messages = [
+            text_tokens = estimate_text_tokens(instructions) + estimate_text_tokens(prompt)
+            if text_tokens <= budget.max_prompt_tokens:
+                break
+        estimated_prompt_tokens = text_tokens
+
+        # Static instructions first, so repeated calls share a cacheable prefix
+        messages = [{"role": "system", "content": instructions}]
+
+        # If we have a screenshot, use vision analysis
+        if vision is not None:
+            estimated_prompt_tokens += vision.estimated_tokens
+            content = [
                 {
-                    "role": "system",
-                    "content": (
-                        "You are a professional conversion optimization consultant with 15+ years of experience "
-                        "analyzing and improving marketing funnels. Your role is to provide clear, actionable analysis "
-                        "that helps marketers and funnel builders improve their conversion rates.\n"
-                        "\n"
-                        "ANALYSIS APPROACH:\n"
-                        "• Be specific and direct - identify exact issues and provide concrete solutions\n"
-                        "• Focus on elements that drive measurable conversion improvements\n"
-                        "• Provide precise recommendations (e.g., 'Change headline to: [exact text]' not 'improve messaging')\n"
-                        "• Prioritize high-impact changes over minor tweaks\n"
-                        "• Use clear, professional language that any marketer would understand\n"
-                        "\n"
-                        "CORE EVALUATION CRITERIA:\n"
-                        "1. **Clarity**: Can visitors immediately understand the offer and value proposition?\n"
-                        "2. **Value Proposition**: Are benefits clearly communicated? Is the offer compelling?\n"
-                        "3. **Trust & Proof**: Are there credible testimonials, data, case studies, or guarantees?\n"
-                        "4. **Call-to-Action**: Are CTAs clear, visible, and friction-free? Do they create urgency?\n"
-                        "5. **User Experience**: Is navigation intuitive? Does the flow guide visitors toward conversion?\n"
-                        "\n"
-                        "WHEN ANALYZING VISUALS (if screenshot provided):\n"
-                        "• Identify ALL call-to-action buttons by their visual appearance, text, and placement\n"
-                        "• Assess above-the-fold content - what's immediately visible without scrolling?\n"
-                        "• Evaluate mobile responsiveness and layout effectiveness\n"
-                        "• Check visual hierarchy - does design guide attention to key elements?\n"
-                        "• Identify missing or weak trust indicators (logos, badges, testimonials)\n"
-                        "\n"
-                        "WHEN ANALYZING TEXT CONTENT:\n"
-                        "• Scan for all CTA button text, links, and form submissions\n"
-                        "• Evaluate headline clarity and benefit-driven copy\n"
-                        "• Identify objection handling and urgency mechanisms\n"
-                        "• Check for specificity in claims (numbers, timeframes, guarantees)\n"
-                        "\n"
-                        "IMPORTANT: If you see CTA buttons in the screenshot OR in the scraped content, acknowledge them "
-                        "specifically in your analysis. Don't claim CTAs are missing if they exist.\n"
-                        "\n"
-                        "Return structured JSON only with your professional analysis."
-                    ),
+                    "type": "text",
+                    "text": f"Analyze this page VISUALLY and by CONTENT:\n\n{prompt}"
                 },
+                {
+                    "type": "image_url",
+                    "image_url": {
+                        "url": vision.image.data_url(),
+                        "detail": vision.detail
+                    }
+                }
             ]
-            
-            # If we have a screenshot, use vision analysis
-            if screenshot_base64:
-                messages.append({
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": f"Analyze this page VISUALLY and by CONTENT:\n\n{prompt}"
-                        },
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/png;base64,{screenshot_base64}",
-                                "detail": "high"
-                            }
-                        }
-                    ]
-                })
-            else:
-                # Text-only analysis
-                messages.append({
-                    "role": "user",
-                    "content": prompt
-                })
-            
-            response = await self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=messages,
-                temperature=0.2,  # Low temperature for consistent, deterministic analysis
-                max_tokens=3000,
-                response_format={"type": "json_object"},
-            )
-            
-            content = response.choices[0].message.content.strip()
-            result = json.loads(content)
-            logger.info(f"Analyzed page {page_number}/{total_pages}: {page_content.url}")
-            return result
-            
-        except Exception as e:
-            logger.error(f"OpenAI API error for {page_content.url}: {str(e)}")
-            return self._generate_placeholder_scores(page_content)
+            if mobile_screenshot is not None:
+                estimated_prompt_tokens += LOW_DETAIL_TOKENS
+                content.extend([
+                    {
+                        "type": "text",
+                        "text": (
+                            "The next image is the same page above the fold on a phone (375px wide, touch). "
+                            "Compare it with the desktop capture and put mobile-specific issues "
+                            "(hidden or tiny CTAs, cramped copy, hero pushed below the fold) in visual_diagnostics.mobile."
+                        ),
+                    },
+                    {
+                        "type": "image_url",
+                        # Low detail is a fixed small token cost and enough for layout comparison
+                        "image_url": {"url": mobile_screenshot.data_url(), "detail": "low"},
+                    },
+                ])
+            messages.append({
+                "role": "user",
+                "content": content,
+            })
+        else:
+            # Text-only analysis
+            messages.append({
+                "role": "user",
+                "content": prompt
+            })
+
+        params = {
+            "model": budget.model,
+            "messages": messages,
+            "temperature": 0.2,  # Low temperature for consistent, deterministic analysis
+            "max_tokens": max_tokens,
+            "response_format": {"type": "json_object"},
+        }
+        return params, estimated_prompt_tokens
     
     async def analyze_funnel_summary(
-        self, page_results: List[Dict], overall_score: int, industry: Optional[str] = None
+        self,
+        page_digests: List[PageDigest],
+        overall_score: int,
+        industry: Optional[str] = None,
+        plan: Optional[str] = None,
+        raise_errors: bool = False,
     ) -> str:
         """
         Generate an executive summary for the entire funnel.
         
         Args:
-            page_results: List of individual page analysis results
+            page_digests: Compact digest of each page's analysis, in funnel order
             overall_score: Calculated overall funnel score
+            plan: Subscription plan of the requesting user, selecting the model and summary length
+            raise_errors: Raise instead of returning a placeholder summary, so a router can fail over
             
         Returns:
             Executive summary text
         """
         if not self.client:
+            if raise_errors:
+                raise RuntimeError("OpenAI API key not configured")
             return self._generate_placeholder_summary(overall_score)
         
         try:
-            prompt = self._build_summary_prompt(page_results, overall_score, industry)
-            
-            response = await self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": (
-                            "You are a professional conversion optimization consultant providing an executive summary "
-                            "of a complete funnel analysis. Your summary should be clear, actionable, and focused on "
-                            "high-impact improvements that will drive measurable results. Use professional language "
-                            "that marketing and business professionals expect."
-                        ),
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                temperature=0.3,  # Low temperature for consistent summaries
-                max_tokens=500,
+            summary = await self._create_completion(
+                **self.build_summary_request(page_digests, overall_score, industry, plan=plan)
             )
-            
-            summary = response.choices[0].message.content.strip()
             logger.info(f"Generated funnel summary (score: {overall_score})")
             return summary
             
         except Exception as e:
+            if raise_errors:
+                raise
             logger.error(f"OpenAI API error for summary: {str(e)}")
+            record_llm_fallback()
             return self._generate_placeholder_summary(overall_score)
 
+    def build_summary_request(
+        self,
+        page_digests: List[PageDigest],
+        overall_score: int,
+        industry: Optional[str] = None,
+        plan: Optional[str] = None,
+    ) -> Dict:
+        """Chat completion parameters for the funnel executive summary."""
+
+        budget = budget_for_plan(plan)
+        prompt = self._build_summary_prompt(page_digests, overall_score, industry, max_chars=budget.summary_chars)
+        return {
+            "model": budget.summary_model,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": (
+                        "You are a professional conversion optimization consultant providing an executive summary "
+                        "of a complete funnel analysis. Your summary should be clear, actionable, and focused on "
+                        "high-impact improvements that will drive measurable results. Use professional language "
+                        "that marketing and business professionals expect."
+                    ),
+                },
+                {"role": "user", "content": prompt},
+            ],
+            "temperature": 0.3,  # Low temperature for consistent summaries
+            "max_tokens": budget.summary_max_tokens,
+        }
+
+    def is_available(self) -> bool:
+        """False without an API key or while the shared circuit breaker is failing calls fast."""
+        return self.client is not None and get_llm_caller().circuit_state != "open"
+
+    async def _create_completion(
+        self,
+        *,
+        estimated_prompt_tokens: Optional[int] = None,
+        on_partial: Optional[PartialCallback] = None,
+        result_fields: Optional[Tuple[str, ...]] = None,
+        **params,
+    ) -> str:
+        """Single path to the chat completions API, answered from the response cache when possible.
+
+        ``estimated_prompt_tokens`` is the pre-call estimate, recorded next to the actual usage.
+        With ``on_partial`` the response is streamed and each top-level field of the JSON
+        reply is passed to it as soon as it is complete. ``result_fields`` are the page fields
+        a JSON reply was asked for (None = all); it is only cached when none of them is missing.
+        """
+
+        cache = get_llm_cache()
+        key = completion_cache_key(params) if cache else None
+        started = time.perf_counter()
+
+        if cache and key:
+            try:
+                cached = await cache.get(key)
+            except Exception as exc:  # noqa: BLE001 - a broken cache must not break analysis
+                logger.warning("LLM cache lookup failed: %s", exc)
+                cached = None
+            if cached is not None:
+                if on_partial is not None:
+                    await _emit_cached_members(cached.content, on_partial)
+                record_llm_call(
+                    LLMCall(
+                        model=params["model"],
+                        latency_seconds=time.perf_counter() - started,
+                        prompt_tokens=cached.prompt_tokens,
+                        completion_tokens=cached.completion_tokens,
+                        estimated_prompt_tokens=estimated_prompt_tokens,
+                        cached=True,
+                    )
+                )
+                return cached.content
+
+        caller = get_llm_caller()
+        if on_partial is not None:
+            # Streams report partial results as they go, so they are retried but never hedged
+            content, usage = await caller.call(lambda: self._stream_completion(params, on_partial), hedge=False)
+        else:
+            response = await caller.call(lambda: self.client.chat.completions.create(**params))
+            content = response.choices[0].message.content.strip()
+            usage = response.usage
+        completion = CachedCompletion(
+            content=content,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+        )
+        record_llm_call(
+            LLMCall(
+                model=params["model"],
+                latency_seconds=time.perf_counter() - started,
+                prompt_tokens=completion.prompt_tokens,
+                completion_tokens=completion.completion_tokens,
+                cached_prompt_tokens=_cached_prompt_tokens(usage),
+                estimated_prompt_tokens=estimated_prompt_tokens,
+            )
+        )
+
+        if cache and key and _is_cacheable(content, params, result_fields):
+            try:
+                await cache.put(key, model=params["model"], completion=completion)
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("LLM cache write failed: %s", exc)
+        return content
+
+    async def _stream_completion(self, params: Dict, on_partial: PartialCallback) -> Tuple[str, Any]:
+        parser = TopLevelMemberParser()
+        parts: List[str] = []
+        usage = None
+        stream = await self.client.chat.completions.create(
+            **params,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        async for chunk in stream:
+            if chunk.usage is not None:
+                usage = chunk.usage  # Sent on a final chunk with no choices
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            parts.append(delta)
+            for key, value in parser.feed(delta):
+                await _emit_partial(on_partial, key, value)
+        return "".join(parts).strip(), usage
+
     def _build_expert_analysis_prompt(
         self,
         page: PageContent,
@@ -195,14 +873,26 @@ class OpenAIService:
         include_visual: bool,
         visual_elements: Optional[Dict] = None,
         industry: Optional[str] = None,
+        content_scale: float = 1.0,
+        screenshot_cropped: bool = False,
+        screenshot_regions: int = 0,
+        similar_page_hint: Optional[str] = None,
     ) -> str:
-        """Build the prompt for analyzing a single page with CRO expert guidance."""
+        """Build the user prompt describing a single page for CRO analysis.
+
+        Only page-specific content goes here; the instructions and reply schema are in the
+        system message (``_page_analysis_instructions``).
+        ``content_scale`` shrinks how much scraped content is included, to fit a token budget.
+        """
 
         page_type = self._guess_page_type(page_number, total_pages)
 
-        headings = "\n".join(page.headings[:12]) or "None"
-        key_content = "\n".join([p[:300] for p in page.paragraphs[:8]]) or "None"
-        ctas = "\n".join(page.ctas[:12]) or "None"
+        def scaled(limit: int) -> int:
+            return max(2, int(limit * content_scale))
+
+        headings = "\n".join(page.headings[:scaled(12)]) or "None"
+        key_content = "\n".join([p[:scaled(300)] for p in page.paragraphs[:scaled(8)]]) or "None"
+        ctas = "\n".join(page.ctas[:scaled(12)]) or "None"
         forms = " | ".join(page.forms[:4]) if page.forms else "None detected"
         videos = " | ".join(page.videos[:4]) if page.videos else "None detected"
         iframes = "\n".join([f"- {iframe['description']}: {iframe['src']}" for iframe in page.iframes[:4]]) if page.iframes else "None"
@@ -213,7 +903,7 @@ class OpenAIService:
             buttons = visual_elements["buttons"]
             total_buttons = visual_elements.get("totalButtons", len(buttons))
             visual_ctas = f"\n\nCTA BUTTONS DETECTED ON FULL PAGE ({total_buttons} total):\n"
-            for btn in buttons[:15]:  # Show top 15
+            for btn in buttons[:scaled(15)]:  # Show top 15
                 text = btn.get("text", "").strip()
                 if not text:
                     continue
@@ -236,7 +926,14 @@ class OpenAIService:
                     visual_images += f"- {alt}\n"
 
         visual_note = (
-            "FULL PAGE SCREENSHOT PROVIDED: This screenshot captures the ENTIRE page from top to bottom. "
+            "SCREENSHOT PROVIDED: The top of the image is the page above the fold at full size. Below it, "
+            f"separated by gray bars, are {screenshot_regions} downscaled crops of CTAs, forms and testimonials "
+            "from further down the page, in that order. Use the visual element data below for anything not shown."
+            if include_visual and screenshot_regions
+            else "SCREENSHOT PROVIDED: The screenshot shows the top of the page (hero and the first sections); "
+            "the page continues below it. Use the visual element data below for CTAs and images further down."
+            if include_visual and screenshot_cropped
+            else "FULL PAGE SCREENSHOT PROVIDED: This screenshot captures the ENTIRE page from top to bottom. "
             "Analyze all sections - hero, body content, testimonials, CTAs throughout the page, footer, etc. "
             "The visual element data below shows ALL buttons and images found on the complete page, not just above-the-fold."
             if include_visual
@@ -266,10 +963,18 @@ class OpenAIService:
             }
             industry_guidance = f"\n\nINDUSTRY CONTEXT - {industry_map.get(industry, '')}"
 
+        reference_note = ""
+        if similar_page_hint:
+            reference_note = (
+                f"\n\n{similar_page_hint}\n"
+                "Keep scores consistent with that analysis wherever this page matches it, and spend the "
+                "recommendations on what differs rather than restating what applies to both."
+            )
+
         return f"""
 Analyze page {page_number} of {total_pages} in this marketing funnel. Provide specific, actionable recommendations for improving conversion rates.
 
-{visual_note}{iframe_note}{industry_guidance}
+{visual_note}{iframe_note}{industry_guidance}{reference_note}
 
 PAGE CONTEXT:
 - Funnel Position: {page_type}
@@ -293,179 +998,31 @@ Forms Detected: {forms}
 Video/Media Elements: {videos}{visual_images}
 
 Embedded iframes/order forms:
-{iframes}
-
-ANALYSIS REQUIREMENTS:
-
-1. **Identify ALL CTAs**: Look for CTA buttons in both the screenshot (if provided) and the scraped content above. 
-   List every CTA you find with its exact text.
-
-2. **Evaluate Current State**: What's working well? What specific elements are hurting conversion?
-
-3. **Provide Exact Recommendations**: Don't say "improve the headline" - provide the exact headline text to use.
-   Don't say "add CTAs" if CTAs exist - instead evaluate their effectiveness and suggest improvements.
-   For EVERY recommendation type, provide 3-5 specific examples, not generic instructions.
-
-4. **Prioritize Impact**: Focus on changes that will meaningfully improve conversion rates.
-
-5. **Be Specific with Examples**: 
-   - Headlines: Provide 3-5 alternative headline options
-   - CTAs: Provide exact button copy with context
-   - Design: Specify exact colors, sizes, placements
-   - Copy: Show before/after text examples
-   - Trust elements: Name specific testimonials, guarantees, badges to add
-
-Return ONLY valid JSON with this structure:
-{{
-    "page_type": "Identify the ACTUAL page type based on content analysis, not just position. Options: sales_page (VSL or long-form sales letter), order_form (checkout/payment page), upsell (one-time offer/bump), downsell (alternative lower-priced offer), thank_you (confirmation/success), squeeze_page (email capture), webinar_registration, landing_page (lead capture), bridge_page (pre-sell), application_page (qualify leads), other",
-    "scores": {{
-        "clarity": 0-100,  // How clear is the value proposition?
-        "value": 0-100,    // How compelling is the offer?
-        "proof": 0-100,    // How credible are the claims?
-        "design": 0-100,   // How effective is the visual design?
-        "flow": 0-100      // How smooth is the user journey?
-    }},
-    "feedback": "Professional 3-5 sentence summary of the page's conversion effectiveness. Be specific about what's working and what needs improvement.",
-    "headline_recommendation": "Primary recommended headline",
-    "headline_alternatives": [
-        "Alternative headline option 1 with specific benefit",
-        "Alternative headline option 2 with different angle",
-        "Alternative headline option 3 for urgency/scarcity",
-        "Alternative headline option 4 for social proof angle",
-        "Alternative headline option 5 for transformation focus"
-    ],
-    "cta_recommendations": [
-        {{
-            "copy": "Exact button text (e.g., 'Get Instant Access Now', 'Start My Free Trial')",
-            "location": "Specific placement (e.g., 'Hero section, centered below headline')",
-            "style": "Visual styling (e.g., 'Large green button, 60px height, white text')",
-            "reason": "Why this CTA will convert better (be specific about psychology)"
-        }},
-        {{
-            "copy": "Alternative CTA option 2",
-            "location": "Different strategic placement",
-            "style": "Contrasting visual approach",
-            "reason": "Alternative angle for testing"
-        }}
-    ],
-    "design_improvements": [
-        {{
-            "area": "Specific page section (e.g., 'Hero section', 'Above the fold', 'Pricing table')",
-            "current_state": "What exists now that's problematic",
-            "recommendation": "Exact change to make with measurements/specs",
-            "example": "Concrete example: 'Change background from white to light gray (#F5F5F5), increase headline font from 32px to 48px, add 40px padding'",
-            "impact": "Expected conversion impact with reasoning"
-        }}
-    ],
-    "copy_improvements": [
-        {{
-            "section": "Which copy block needs work",
-            "current": "Current problematic text",
-            "improved": "Recommended replacement text (full rewrite)",
-            "why": "Specific reason this improves conversion"
-        }}
-    ],
-    "trust_elements_missing": [
-        {{
-            "element": "Specific trust element needed with full details",
-            "example": "Concrete example: 'Add testimonial from John Smith, CEO of TechCorp: Quote about 300% revenue increase, include headshot photo'",
-            "placement": "Where to place it on the page",
-            "why": "How this specific element builds trust and improves conversion"
-        }}
-    ],
-    "ab_test_priority": {{
-        "element": "The single highest-priority element to A/B test",
-        "control": "Current version (exact copy/design)",
-        "variant_1": "First test variant with full details",
-        "variant_2": "Second test variant with different approach",
-        "variant_3": "Third test variant (optional)",
-        "expected_lift": "Estimated percentage improvement (e.g., '15-25% based on similar tests')",
-        "reasoning": "Why this test is the priority with conversion psychology rationale",
-        "implementation": "Step-by-step how to implement this test"
-    }},
-    "priority_alerts": [
-        {{
-            "severity": "high|medium|low",
-            "issue": "Specific problem affecting conversions",
-            "impact": "How this impacts conversion rate",
-            "fix": "Exact steps to resolve"
-        }}
-    ],
-    "funnel_flow_gaps": [
-        {{
-            "step": "Where in the customer journey",
-            "issue": "What's missing or broken",
-            "fix": "How to fix it"
-        }}
-    ],
-    "copy_diagnostics": {{
-        "hook": "Does the opening create immediate interest? What's working/missing?",
-        "offer": "Is the value proposition crystal clear? What could be clearer?",
-        "urgency": "What urgency mechanisms exist? Are they credible?",
-        "objections": "Which objections are addressed? Which are missing?",
-        "audience_fit": "Does the copy speak directly to the target customer?"
-    }},
-    "visual_diagnostics": {{
-        "hero": "Effectiveness of above-the-fold content and first impression",
-        "layout": "Visual organization and information hierarchy",
-        "contrast": "Readability and visual clarity",
-        "mobile": "Mobile responsiveness and usability",
-        "credibility": "Professional appearance and trust signals"
-    }},
-    "video_recommendations": [
-        {{
-            "context": "Where video appears or should appear",
-            "recommendation": "Specific improvement or addition"
-        }}
-    ],
-    "email_capture_recommendations": [
-        "Specific recommendations for email opt-in strategy and nurture sequence"
-    ]
-}}
-
-CRITICAL: If you identify CTA buttons (either visually or in the content), acknowledge them specifically. 
-Don't claim CTAs are missing if they're present - instead evaluate their effectiveness."""
+{iframes}"""
     
-    def _build_summary_prompt(self, page_results: List[Dict], overall_score: int, industry: Optional[str] = None) -> str:
-        """Build the prompt for generating executive summary with congruence analysis for multi-page funnels."""
-        summary_chunks: List[str] = []
-
-        for index, page in enumerate(page_results, start=1):
-            score = sum(page.get("scores", {}).values()) // 5 if page.get("scores") else 0
-            headline = page.get("headline_recommendation", "N/A")
-            page_type = page.get("page_type", "unknown")
-
-            ctas = page.get("cta_recommendations") or []
-            if ctas:
-                first_cta = ctas[0]
-                if isinstance(first_cta, dict):
-                    copy = first_cta.get("copy")
-                    location = first_cta.get("location")
-                    reason = first_cta.get("reason")
-                    parts = [p for p in [copy, location, reason] if p]
-                    top_cta = " | ".join(parts) if parts else "(CTA details unavailable)"
-                else:
-                    top_cta = str(first_cta)
-            else:
-                top_cta = "N/A"
-
-            summary_chunks.append(
-                f"Page {index} ({page_type}): Score {score}/100\n"
-                f"  URL: {page.get('url', 'N/A')}\n"
-                f"  Headline Suggestion: {headline}\n"
-                f"  Top CTA: {top_cta}"
-            )
+    def _build_summary_prompt(
+        self,
+        page_digests: List[PageDigest],
+        overall_score: int,
+        industry: Optional[str] = None,
+        max_chars: Optional[int] = None,
+    ) -> str:
+        """Build the prompt for generating executive summary with congruence analysis for multi-page funnels.
 
-        pages_summary = "\n".join(summary_chunks)
+        Pages are described by their digests, capped at ``LLM_SUMMARY_MAX_PAGE_DIGESTS`` in full,
+        so the prompt does not grow with funnel length. ``max_chars`` asks for a summary short enough to be shown untruncated on the user's plan.
+        """
+        pages_summary = render_digests(page_digests, settings.LLM_SUMMARY_MAX_PAGE_DIGESTS)
+        page_count = len(page_digests)
         
         # Add multi-page congruence analysis requirements
         congruence_requirements = ""
-        if len(page_results) > 1:
+        if page_count > 1:
             congruence_requirements = f"""
 
 MULTI-PAGE FUNNEL CONGRUENCE ANALYSIS (CRITICAL):
 
-This is a {len(page_results)}-page funnel. You MUST analyze:
+This is a {page_count}-page funnel. You MUST analyze:
 
 1. **Design Consistency**: Do all pages use similar colors, fonts, layouts, and branding? Are there jarring visual transitions?
 2. **Messaging Flow**: Does the value proposition carry through consistently? Does each page build on the previous one?
@@ -499,6 +1056,13 @@ Include congruence analysis in your executive summary. If pages feel disconnecte
             }
             industry_context = industry_context_map.get(industry, "")
 
+        length_limit = (
+            f"\n\nLENGTH LIMIT: Only the first {max_chars} characters will be shown. Write at most two sentences "
+            f"within {max_chars} characters: the overall assessment and the primary opportunity."
+            if max_chars
+            else ""
+        )
+
         return f"""Provide an executive summary of this complete funnel analysis. Overall performance score: {overall_score}/100.
 
 INDIVIDUAL PAGE PERFORMANCE:
@@ -507,18 +1071,18 @@ INDIVIDUAL PAGE PERFORMANCE:
 
 EXECUTIVE SUMMARY REQUIREMENTS:
 
-{"For this SINGLE-PAGE analysis, provide a professional 4-6 sentence summary covering:" if len(page_results) == 1 else "For this MULTI-PAGE funnel, provide a professional 5-8 sentence summary covering:"}
+{"For this SINGLE-PAGE analysis, provide a professional 4-6 sentence summary covering:" if page_count == 1 else "For this MULTI-PAGE funnel, provide a professional 5-8 sentence summary covering:"}
 
-1. **Overall Assessment**: Current {"page" if len(page_results) == 1 else "funnel"} performance and conversion effectiveness
-{"2. **Congruence Analysis**: How well do the pages flow together? Are there design, messaging, or trust inconsistencies?" if len(page_results) > 1 else ""}
-{"3" if len(page_results) > 1 else "2"}. **Key Strengths**: What's working well that should be maintained or amplified
-{"4" if len(page_results) > 1 else "3"}. **Primary Opportunity**: The single highest-impact improvement opportunity (be specific - which {"page" if len(page_results) > 1 else "element"}, which change, expected impact)
-{"5" if len(page_results) > 1 else "4"}. **Quick Wins**: 2-3 actionable changes that can be implemented immediately
-{"6" if len(page_results) > 1 else "5"}. **Strategic Recommendation**: One broader strategic consideration for long-term optimization
+1. **Overall Assessment**: Current {"page" if page_count == 1 else "funnel"} performance and conversion effectiveness
+{"2. **Congruence Analysis**: How well do the pages flow together? Are there design, messaging, or trust inconsistencies?" if page_count > 1 else ""}
+{"3" if page_count > 1 else "2"}. **Key Strengths**: What's working well that should be maintained or amplified
+{"4" if page_count > 1 else "3"}. **Primary Opportunity**: The single highest-impact improvement opportunity (be specific - which {"page" if page_count > 1 else "element"}, which change, expected impact)
+{"5" if page_count > 1 else "4"}. **Quick Wins**: 2-3 actionable changes that can be implemented immediately
+{"6" if page_count > 1 else "5"}. **Strategic Recommendation**: One broader strategic consideration for long-term optimization
 
-{"IMPORTANT: This is a MULTI-PAGE funnel. You MUST address page-to-page flow: Does page 1 set proper expectations for page 2? Do the pages feel like parts of the same experience?" if len(page_results) > 1 else "IMPORTANT: This is a SINGLE-PAGE analysis. Do NOT mention page-to-page congruence, flow between pages, or multi-step considerations. Focus solely on this one page's conversion effectiveness."}
+{"IMPORTANT: This is a MULTI-PAGE funnel. You MUST address page-to-page flow: Does page 1 set proper expectations for page 2? Do the pages feel like parts of the same experience?" if page_count > 1 else "IMPORTANT: This is a SINGLE-PAGE analysis. Do NOT mention page-to-page congruence, flow between pages, or multi-step considerations. Focus solely on this one page's conversion effectiveness."}
 
-Focus on specific, actionable insights. Avoid generic advice. Use professional marketing language appropriate for this industry."""
+Focus on specific, actionable insights. Avoid generic advice. Use professional marketing language appropriate for this industry.{length_limit}"""
     
     def _guess_page_type(self, page_number: int, total_pages: int) -> str:
         """Guess page type based on position in funnel."""
@@ -567,6 +1131,44 @@ Focus on specific, actionable insights. Avoid generic advice. Use professional m
         )
 
 
+async def _emit_partial(on_partial: PartialCallback, key: str, value: Any) -> None:
+    try:
+        await on_partial(key, value)
+    except Exception as exc:  # noqa: BLE001 - early results are best-effort
+        logger.warning("Partial result callback failed for %s: %s", key, exc)
+
+
+async def _emit_cached_members(content: str, on_partial: PartialCallback) -> None:
+    try:
+        members = json.loads(content)
+    except ValueError:
+        return
+    if isinstance(members, dict):
+        for key, value in members.items():
+            await _emit_partial(on_partial, key, value)
+
+
+def _cached_prompt_tokens(usage: Any) -> int:
+    """Prompt tokens the provider served from its prefix cache (0 when not reported)."""
+
+    details = getattr(usage, "prompt_tokens_details", None)
+    return getattr(details, "cached_tokens", 0) or 0
+
+
+def _is_cacheable(content: str, params: Dict, result_fields: Optional[Tuple[str, ...]] = None) -> bool:
+    """Only cache answers the caller can use as they are.
+
+    A JSON page reply that is missing a requested field (required, or cut off by truncation)
+    would be re-asked every time it was replayed, so it is retried instead of cached.
+    """
+
+    if not content:
+        return False
+    if (params.get("response_format") or {}).get("type") == "json_object":
+        return not validate_page_result(content, result_fields).missing
+    return True
+
+
 # Singleton instance
 _openai_service: OpenAIService | None = None
 
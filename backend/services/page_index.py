@@ -0,0 +1,297 @@
+"""Nearest-neighbour index over previously analysed pages.
+
+Each analysed page's text is turned into a signed, hashed vector of word unigrams and bigrams
+(no model or network call) and kept in a NumPy matrix, so a new page can be compared against
+every earlier one with a single matrix-vector product. Near-identical pages (template clones,
+reruns with cosmetic edits) reuse the stored result outright; similar ones get a compact
+exemplar of the earlier analysis in the prompt.
+
+Vectors and results are persisted together in a SQLite file and loaded into memory on first
+use. Only pages analysed under the same plan level are matched, since plans request different
+reply fields. The index is shared by every user, so a result is only reused outright for the
+same user or URL, and only when the screenshot looks the same (see ``PageMatch.reusable_for``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from ..utils.config import settings
+from ..utils.images import hamming_distance
+from .plan_gating import get_plan_level
+from .scraper import PageContent
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:  # pragma: no cover - optional dependency during local dev
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS page_index (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    url TEXT NOT NULL,
+    plan_level INTEGER NOT NULL,
+    vector BLOB NOT NULL,
+    result TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    user_id INTEGER,
+    phash TEXT
+);
+"""
+# Columns added after the first release of the index, for files created before them
+_ADDED_COLUMNS = {"user_id": "INTEGER", "phash": "TEXT"}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+_MAX_TEXT_CHARS = 6000  # Enough to tell pages apart; keeps vectorising cheap
+
+
+def page_index_text(page: PageContent) -> str:
+    """The page text that is indexed: the parts that drive the analysis, most important first."""
+
+    parts = [page.title, *page.headings, *page.ctas, *page.paragraphs]
+    return "\n".join(part for part in parts if part)[:_MAX_TEXT_CHARS]
+
+
+def hash_vector(text: str, dims: int) -> "np.ndarray":
+    """L2-normalised signed feature-hashing vector of the word unigrams and bigrams in ``text``."""
+
+    tokens = _TOKEN_RE.findall(text.lower())
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    if not features:
+        return np.zeros(dims, dtype=np.float32)
+    hashes = np.fromiter((zlib.crc32(feature.encode()) for feature in features), dtype=np.uint32, count=len(features))
+    # The low bits pick the slot and the top bit the sign, so collisions tend to cancel out
+    signs = np.where(hashes >> 31, -1.0, 1.0)
+    vector = np.bincount(hashes % dims, weights=signs, minlength=dims).astype(np.float32)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+@dataclass(frozen=True)
+class PageMatch:
+    similarity: float
+    url: str
+    result: Dict[str, Any]
+    user_id: Optional[int] = None
+    phash: Optional[str] = None  # Difference hash of the screenshot the result was based on
+
+    def reusable_for(self, url: str, user_id: Optional[int], phash: Optional[str], *, max_distance: int) -> bool:
+        """Whether this result may stand in for a new analysis of ``url`` by ``user_id``.
+
+        Only a page of the same user (or the same URL) qualifies, and the screenshots must match
+        too: the text says nothing about design scores or visual diagnostics.
+        """
+
+        if url != self.url and (user_id is None or user_id != self.user_id):
+            return False
+        if phash is None and self.phash is None:
+            return True
+        return phash is not None and self.phash is not None and hamming_distance(phash, self.phash) <= max_distance
+
+    def hint(self) -> str:
+        """Compact summary of the earlier analysis, for the prompt of a similar page."""
+
+        scores = self.result.get("scores") if isinstance(self.result.get("scores"), dict) else {}
+        lines = [
+            f"SIMILAR PAGE ANALYSED BEFORE ({self.similarity:.0%} text overlap):",
+            f"- Page type: {self.result.get('page_type') or 'unknown'}",
+            "- Scores: " + ", ".join(f"{key} {value}" for key, value in scores.items()),
+        ]
+        feedback = " ".join(str(self.result.get("feedback") or "").split())
+        if feedback:
+            lines.append(f"- Feedback: {feedback[:300]}")
+        return "\n".join(lines)
+
+
+class PageIndex:
+    """Hashed-vector matrix in memory, persisted with the results in SQLite.
+
+    Vectors are stored as float16 and held in memory as float32 (about 2 KB per page at 512
+    dimensions), so a query is one BLAS matrix-vector product over every indexed page.
+
+    Blocking work (vectorising, matrix products, SQLite I/O) runs in worker threads.
+    """
+
+    def __init__(self, path: str, *, dims: int) -> None:
+        self._path = path
+        self._dims = dims
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._vectors = np.zeros((0, dims), dtype=np.float32)
+        self._row_ids = np.zeros(0, dtype=np.int64)
+        self._plan_levels = np.zeros(0, dtype=np.int8)
+        self._positions: Dict[str, int] = {}
+        self._size = 0
+        self.load_seconds: Optional[float] = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    async def nearest(self, page: PageContent, plan: Optional[str], *, limit: int = 1) -> List[PageMatch]:
+        return await asyncio.to_thread(self.search, page_index_text(page), plan, limit)
+
+    async def add(
+        self,
+        page: PageContent,
+        plan: Optional[str],
+        result: Dict[str, Any],
+        *,
+        user_id: Optional[int] = None,
+        phash: Optional[str] = None,
+    ) -> None:
+        await asyncio.to_thread(self.add_many, [(page.url, page_index_text(page), plan, result, user_id, phash)])
+
+    def search(self, text: str, plan: Optional[str], limit: int = 1) -> List[PageMatch]:
+        """Up to ``limit`` most similar pages analysed under ``plan``'s level, best first."""
+
+        query = hash_vector(text, self._dims)
+        with self._lock:
+            self._connection()
+            size = self._size
+            if not size:
+                return []
+            similarities = self._vectors[:size] @ query
+            similarities[self._plan_levels[:size] != get_plan_level(plan)] = -1.0
+            limit = min(limit, size)
+            top = np.argpartition(-similarities, limit - 1)[:limit]
+            top = top[np.argsort(-similarities[top])]
+            top = [position for position in top if similarities[position] > 0]
+            if not top:
+                return []
+            row_ids = [int(self._row_ids[position]) for position in top]
+            placeholders = ",".join("?" * len(row_ids))
+            rows = {
+                row[0]: row[1:]
+                for row in self._conn.execute(
+                    f"SELECT id, url, result, user_id, phash FROM page_index WHERE id IN ({placeholders})", row_ids
+                )
+            }
+        return [
+            PageMatch(
+                similarity=float(similarities[position]),
+                url=rows[row_id][0],
+                result=json.loads(rows[row_id][1]),
+                user_id=rows[row_id][2],
+                phash=rows[row_id][3],
+            )
+            for position, row_id in zip(top, row_ids)
+            if row_id in rows
+        ]
+
+    def add_many(self, pages: Sequence[tuple]) -> None:
+        """Index ``(url, text, plan, result, user_id, phash)`` tuples; a page already indexed for a plan is replaced."""
+
+        prepared = []
+        for url, text, plan, result, user_id, phash in pages:
+            level = get_plan_level(plan)
+            key = hashlib.sha256(f"{level}:{url}".encode()).hexdigest()
+            vector = hash_vector(text, self._dims).astype(np.float16)
+            prepared.append((key, url, level, vector, json.dumps(result, default=str), user_id, phash))
+
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            for key, url, level, vector, result, user_id, phash in prepared:
+                row_id = conn.execute(
+                    "INSERT INTO page_index (key, url, plan_level, vector, result, created_at, user_id, phash) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(key) DO UPDATE SET "
+                    "vector = excluded.vector, result = excluded.result, created_at = excluded.created_at, "
+                    "user_id = excluded.user_id, phash = excluded.phash "
+                    "RETURNING id",
+                    (key, url, level, vector.tobytes(), result, now, user_id, phash),
+                ).fetchone()[0]
+                self._place(key, int(row_id), level, vector)
+            conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pages": self._size,
+            "dims": self._dims,
+            "memory_bytes": int(self._vectors[: self._size].nbytes),
+            "load_seconds": self.load_seconds,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the database and load every stored vector on first use. Caller holds the lock."""
+
+        if self._conn is None:
+            if self._path != ":memory:":
+                Path(self._path).parent.mkdir(parents=True, exist_ok=True)
+            started = time.perf_counter()
+            self._conn = sqlite3.connect(self._path, check_same_thread=False)
+            self._conn.executescript(_SCHEMA)
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(page_index)")}
+            for column, column_type in _ADDED_COLUMNS.items():
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE page_index ADD COLUMN {column} {column_type}")
+            for key, row_id, level, blob in self._conn.execute(
+                "SELECT key, id, plan_level, vector FROM page_index ORDER BY id"
+            ):
+                vector = np.frombuffer(blob, dtype=np.float16)
+                if vector.shape[0] != self._dims:
+                    continue  # Written with a different LLM_PAGE_INDEX_DIMS
+                self._place(key, row_id, level, vector)
+            self.load_seconds = round(time.perf_counter() - started, 3)
+        return self._conn
+
+    def _place(self, key: str, row_id: int, level: int, vector: "np.ndarray") -> None:
+        position = self._positions.get(key)
+        if position is None:
+            if self._size == len(self._vectors):
+                self._grow(max(1024, self._size * 2))
+            position = self._size
+            self._positions[key] = position
+            self._size += 1
+        self._vectors[position] = vector
+        self._row_ids[position] = row_id
+        self._plan_levels[position] = level
+
+    def _grow(self, capacity: int) -> None:
+        vectors = np.zeros((capacity, self._dims), dtype=np.float32)
+        vectors[: self._size] = self._vectors[: self._size]
+        row_ids = np.zeros(capacity, dtype=np.int64)
+        row_ids[: self._size] = self._row_ids[: self._size]
+        plan_levels = np.zeros(capacity, dtype=np.int8)
+        plan_levels[: self._size] = self._plan_levels[: self._size]
+        self._vectors, self._row_ids, self._plan_levels = vectors, row_ids, plan_levels
+
+
+_page_index: Optional[PageIndex] = None
+
+
+def get_page_index() -> Optional[PageIndex]:
+    """Return the shared page index, or None when disabled or NumPy is not installed."""
+    global _page_index
+    if not settings.LLM_PAGE_INDEX_ENABLED or not NUMPY_AVAILABLE:
+        return None
+    if _page_index is None:
+        _page_index = PageIndex(settings.LLM_PAGE_INDEX_PATH, dims=settings.LLM_PAGE_INDEX_DIMS)
+    return _page_index
+
+
+def cleanup_page_index() -> None:
+    global _page_index
+    if _page_index is not None:
+        _page_index.close()
+        _page_index = None
@@ -0,0 +1,246 @@
+"""Event-driven page settle detection for screenshot capture.
+
+Replaces fixed sleeps with three signals, all bounded by a hard cap:
+  • network quiescence (no in-flight requests for ``quiet_ms``),
+  • DOM quiescence (no MutationObserver records for ``quiet_ms``),
+  • image decode completion for every ``<img>`` currently in the document.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from playwright.async_api import Error as PlaywrightError, Page, Request
+
+logger = logging.getLogger(__name__)
+
+# Resolves once the DOM has been mutation-free for quietMs and pending images decoded, or at maxMs.
+DOM_SETTLE_SCRIPT = """
+async ({ quietMs, maxMs }) => {
+    const start = performance.now();
+    let lastMutation = start;
+    const observer = new MutationObserver(() => { lastMutation = performance.now(); });
+    observer.observe(document.documentElement, { subtree: true, childList: true, attributes: true });
+    const remaining = () => Math.max(0, maxMs - (performance.now() - start));
+    const tick = () => new Promise(resolve => setTimeout(resolve, Math.min(50, quietMs)));
+
+    const pending = Array.from(document.images).filter(img => img.src && !img.complete);
+    const decoded = Promise.all(pending.map(img => img.decode().catch(() => null)));
+    await Promise.race([decoded, new Promise(resolve => setTimeout(resolve, remaining()))]);
+
+    while (remaining() > 0 && performance.now() - lastMutation < quietMs) {
+        await tick();
+    }
+    observer.disconnect();
+    return Math.round(performance.now() - start);
+}
+"""
+
+# One round-trip: reveal animation targets, scroll to trigger lazy content (waiting per step only
+# until the DOM goes quiet), reveal again, wait for images, then extract visual elements.
+PREPARE_AND_EXTRACT_SCRIPT = """
+async ({ quietMs, stepMaxMs, maxMs }) => {
+    const start = performance.now();
+    let lastMutation = start;
+    const observer = new MutationObserver(() => { lastMutation = performance.now(); });
+    observer.observe(document.documentElement, { subtree: true, childList: true, attributes: true });
+    const elapsed = () => performance.now() - start;
+    const nextFrame = () => new Promise(resolve => {
+        // IntersectionObserver callbacks run after the next layout; fall back to a timer if rAF is throttled.
+        const timer = setTimeout(resolve, 50);
+        requestAnimationFrame(() => requestAnimationFrame(() => { clearTimeout(timer); resolve(); }));
+    });
+    const settleStep = async (capMs) => {
+        const until = performance.now() + capMs;
+        await nextFrame();
+        while (performance.now() < until && performance.now() - lastMutation < quietMs) {
+            await nextFrame();
+        }
+    };
+
+    const reveal = () => {
+        // Elements that animate in via JS (Framer Motion, IntersectionObserver, etc.) start at opacity 0
+        document.querySelectorAll('[style*="opacity:0"], [style*="opacity: 0"]').forEach(el => {
+            el.style.opacity = '1';
+            el.style.transform = 'none';
+            el.style.visibility = 'visible';
+        });
+        document.querySelectorAll('[style*="transform"], [style*="translateX"], [style*="translateY"], [style*="scale"]').forEach(el => {
+            if (el.style.opacity === '0' || parseFloat(window.getComputedStyle(el).opacity) < 0.1) {
+                el.style.opacity = '1';
+                el.style.transform = 'none';
+            }
+        });
+    };
+
+    reveal();
+
+    const viewportHeight = window.innerHeight;
+    let steps = 0;
+    for (let y = 0; y < document.body.scrollHeight && elapsed() < maxMs; y += viewportHeight) {
+        window.scrollTo(0, y);
+        await settleStep(stepMaxMs);
+        steps += 1;
+    }
+    window.scrollTo(0, 0);
+    reveal();
+
+    const pending = Array.from(document.images).filter(img => img.src && !img.complete);
+    const imageBudget = Math.max(0, maxMs - elapsed());
+    await Promise.race([
+        Promise.all(pending.map(img => img.decode().catch(() => null))),
+        new Promise(resolve => setTimeout(resolve, imageBudget)),
+    ]);
+    await settleStep(Math.min(stepMaxMs * 2, Math.max(0, maxMs - elapsed())));
+    observer.disconnect();
+
+    // Extract visual elements from the ENTIRE page (not just above-the-fold)
+    // Boxes are in page CSS pixels, so regions can be cropped from the full-page capture
+    const box = el => {
+        const rect = el.getBoundingClientRect();
+        return {
+            x: Math.round(rect.left + window.scrollX),
+            y: Math.round(rect.top + window.scrollY),
+            width: Math.round(rect.width),
+            height: Math.round(rect.height)
+        };
+    };
+    const visible = el => {
+        const rect = el.getBoundingClientRect();
+        return rect.width > 0 && rect.height > 0;
+    };
+    const images = Array.from(document.querySelectorAll('img')).map(img => ({
+        src: img.src,
+        alt: img.alt,
+        width: img.width,
+        height: img.height
+    }));
+    const buttons = Array.from(document.querySelectorAll('button, a[class*="button"], a[class*="btn"], input[type="submit"], a[role="button"]'))
+        .map(btn => ({
+            text: btn.textContent.trim(),
+            tag: btn.tagName,
+            classes: btn.className,
+            href: btn.href || null,
+            box: visible(btn) ? box(btn) : null
+        }));
+    const forms = Array.from(document.querySelectorAll('form')).filter(visible).slice(0, 10).map(box);
+    const testimonials = Array.from(document.querySelectorAll(
+        '[class*="testimonial" i], [id*="testimonial" i], [class*="review" i], blockquote'
+    )).filter(visible).slice(0, 10).map(box);
+    const bodyStyles = window.getComputedStyle(document.body);
+
+    return {
+        images: images,
+        buttons: buttons,
+        regions: { forms: forms, testimonials: testimonials },
+        colors: {
+            background: bodyStyles.backgroundColor,
+            text: bodyStyles.color,
+            primaryFont: bodyStyles.fontFamily
+        },
+        viewportWidth: window.innerWidth,
+        viewportHeight: window.innerHeight,
+        scrollHeight: document.body.scrollHeight,
+        totalButtons: buttons.length,
+        totalImages: images.length,
+        settle: { scrollSteps: steps, elapsedMs: Math.round(elapsed()) }
+    };
+}
+"""
+
+
+class NetworkActivity:
+    """Tracks in-flight requests on a page so callers can wait for network quiescence."""
+
+    def __init__(self, page: Page) -> None:
+        self._page = page
+        self._in_flight: set[Request] = set()
+        self._last_activity = time.monotonic()
+        self._attached = False
+
+    def __enter__(self) -> "NetworkActivity":
+        self._page.on("request", self._on_request)
+        self._page.on("requestfinished", self._on_done)
+        self._page.on("requestfailed", self._on_done)
+        self._attached = True
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        if not self._attached:
+            return
+        self._page.remove_listener("request", self._on_request)
+        self._page.remove_listener("requestfinished", self._on_done)
+        self._page.remove_listener("requestfailed", self._on_done)
+        self._attached = False
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    def _on_request(self, request: Request) -> None:
+        self._in_flight.add(request)
+        self._last_activity = time.monotonic()
+
+    def _on_done(self, request: Request) -> None:
+        self._in_flight.discard(request)
+        self._last_activity = time.monotonic()
+
+    async def wait_for_quiet(self, quiet_ms: int) -> None:
+        """Return once no request has started or finished for ``quiet_ms``."""
+
+        quiet_seconds = quiet_ms / 1000
+        poll = min(0.05, quiet_seconds)
+        while True:
+            idle_for = time.monotonic() - self._last_activity
+            if not self._in_flight and idle_for >= quiet_seconds:
+                return
+            await asyncio.sleep(poll)
+
+
+async def wait_for_settle(
+    page: Page,
+    network: NetworkActivity,
+    *,
+    quiet_ms: int,
+    max_ms: int,
+) -> float:
+    """Wait until network and DOM are quiet and images decoded, never longer than ``max_ms``.
+
+    Returns the seconds spent waiting.
+    """
+
+    started = time.perf_counter()
+    dom_task = asyncio.ensure_future(page.evaluate(DOM_SETTLE_SCRIPT, {"quietMs": quiet_ms, "maxMs": max_ms}))
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(network.wait_for_quiet(quiet_ms), dom_task),
+            timeout=max_ms / 1000,
+        )
+    except asyncio.TimeoutError:
+        logger.debug("Page settle hit %sms cap with %s requests in flight", max_ms, network.in_flight)
+    except PlaywrightError as exc:
+        # Client-side redirects can destroy the execution context mid-wait; capture anyway.
+        logger.debug("Page settle interrupted: %s", exc)
+    finally:
+        if not dom_task.done():
+            dom_task.cancel()
+    return time.perf_counter() - started
+
+
+async def prepare_and_extract(
+    page: Page,
+    *,
+    quiet_ms: int,
+    step_max_ms: int,
+    max_ms: int,
+) -> Dict[str, Any]:
+    """Reveal animated content, scroll through lazy sections and extract visual elements."""
+
+    visual_data: Optional[Dict[str, Any]] = await page.evaluate(
+        PREPARE_AND_EXTRACT_SCRIPT,
+        {"quietMs": quiet_ms, "stepMaxMs": step_max_ms, "maxMs": max_ms},
+    )
+    return visual_data or {}
@@ -4,7 +4,7 @@ Implements freemium model with Basic and Pro tiers.
 """
 
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from ..models.schemas import AnalysisResponse, PageAnalysis, ScoreBreakdown
 
 
@@ -16,6 +16,17 @@ PLAN_HIERARCHY = {
 }
 
 
+# Truncation applied to free-tier reports
+FREE_FEEDBACK_CHARS = 300
+FREE_SUMMARY_CHARS = 200
+
+# Page analysis fields each plan level is shown; levels not listed see every field
+PLAN_PAGE_FIELDS: Dict[int, Tuple[str, ...]] = {
+    0: ("page_type", "scores", "feedback"),
+    1: ("page_type", "scores", "feedback", "headline_recommendation", "cta_recommendations", "design_improvements"),
+}
+
+
 def get_plan_level(plan: Optional[str]) -> int:
     """Convert plan string to numeric level for comparison."""
     if not plan:
@@ -23,6 +34,11 @@ def get_plan_level(plan: Optional[str]) -> int:
     return PLAN_HIERARCHY.get(plan.lower(), 0)
 
 
+def visible_page_fields(plan: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Page analysis fields ``filter_analysis_by_plan`` keeps for ``plan`` (None = all of them)."""
+    return PLAN_PAGE_FIELDS.get(get_plan_level(plan))
+
+
 def filter_analysis_by_plan(analysis: AnalysisResponse, user_plan: Optional[str] = None) -> AnalysisResponse:
     """
     Filter analysis response based on user's plan level.
@@ -75,6 +91,7 @@ def filter_analysis_by_plan(analysis: AnalysisResponse, user_plan: Optional[str]
                     feedback=get_field(page, "feedback") or "",
                     screenshot_url=get_field(page, "screenshot_url"),
                     screenshot_storage_key=get_field(page, "screenshot_storage_key"),
+                    screenshot_tiles=get_field(page, "screenshot_tiles"),
                     headline_recommendation=get_field(page, "headline_recommendation"),
                     cta_recommendations=get_field(page, "cta_recommendations"),
                     design_improvements=get_field(page, "design_improvements"),
@@ -93,7 +110,9 @@ def filter_analysis_by_plan(analysis: AnalysisResponse, user_plan: Optional[str]
             # Free users: Only basic info
             # Truncate feedback to 300 characters
             feedback = get_field(page, "feedback") or ""
-            truncated_feedback = feedback[:300] + "..." if len(feedback) > 300 else feedback
+            truncated_feedback = (
+                feedback[:FREE_FEEDBACK_CHARS] + "..." if len(feedback) > FREE_FEEDBACK_CHARS else feedback
+            )
             
             filtered_pages.append(
                 PageAnalysis(
@@ -105,6 +124,7 @@ def filter_analysis_by_plan(analysis: AnalysisResponse, user_plan: Optional[str]
                     # Hide all premium features
                     screenshot_url=None,
                     screenshot_storage_key=None,
+                    screenshot_tiles=None,
                     headline_recommendation=None,
                     cta_recommendations=None,
                     design_improvements=None,
@@ -127,7 +147,7 @@ def filter_analysis_by_plan(analysis: AnalysisResponse, user_plan: Optional[str]
     
     summary = get_analysis_field("summary", "")
     if plan_level < PLAN_HIERARCHY["basic"]:
-        summary = summary[:200] + "..." if len(summary) > 200 else summary
+        summary = summary[:FREE_SUMMARY_CHARS] + "..." if len(summary) > FREE_SUMMARY_CHARS else summary
     
     # Create filtered response
     is_limited = plan_level < PLAN_HIERARCHY["pro"]
@@ -1,8 +1,8 @@
 """Progress tracking for long-running analysis operations."""
 
-from typing import Dict, Optional
+from typing import Any, Dict, Optional
 from datetime import datetime, timezone
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, replace
 import asyncio
 
 
@@ -15,6 +15,8 @@ class ProgressUpdate:
     message: str
     current_page: Optional[int] = None
     total_pages: Optional[int] = None
+    preview_url: Optional[str] = None  # Latest above-the-fold screenshot, shown while analysis runs
+    partial_result: Optional[Dict[str, Any]] = None  # Early fields (scores, page_type) of the current page
     timestamp: Optional[str] = None
 
     def __post_init__(self):
@@ -48,6 +50,7 @@ class ProgressTracker:
             self._locks[analysis_id] = asyncio.Lock()
         
         async with self._locks[analysis_id]:
+            previous = self._progress.get(analysis_id)
             self._progress[analysis_id] = ProgressUpdate(
                 analysis_id=analysis_id,
                 stage=stage,
@@ -55,8 +58,44 @@ class ProgressTracker:
                 message=message,
                 current_page=current_page,
                 total_pages=total_pages,
+                preview_url=previous.preview_url if previous else None,
+                partial_result=previous.partial_result if previous else None,
+            )
+
+    async def set_preview(self, analysis_id: str, preview_url: Optional[str]):
+        """Attach a screenshot preview to the current progress; kept until replaced."""
+        if analysis_id not in self._locks:
+            self._locks[analysis_id] = asyncio.Lock()
+
+        async with self._locks[analysis_id]:
+            current = self._progress.get(analysis_id)
+            if current is None:
+                return
+            self._progress[analysis_id] = replace(
+                current,
+                preview_url=preview_url,
+                timestamp=datetime.now(timezone.utc).isoformat(),
             )
     
+    async def set_partial_result(self, analysis_id: str, page_number: int, fields: Dict[str, Any]):
+        """Merge streamed result fields for a page into the current progress."""
+        if analysis_id not in self._locks:
+            self._locks[analysis_id] = asyncio.Lock()
+
+        async with self._locks[analysis_id]:
+            current = self._progress.get(analysis_id)
+            if current is None:
+                return
+            partial = dict(current.partial_result or {})
+            if partial.get("page") != page_number:
+                partial = {"page": page_number}
+            partial.update(fields)
+            self._progress[analysis_id] = replace(
+                current,
+                partial_result=partial,
+                timestamp=datetime.now(timezone.utc).isoformat(),
+            )
+
     async def get(self, analysis_id: str) -> Optional[Dict]:
         """Get current progress for an analysis."""
         if analysis_id not in self._progress:
@@ -10,7 +10,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from ..models.database import Analysis
+from ..services.screenshot_store import ScreenshotStore
 from ..services.storage import get_storage_service
+from ..services.tiled_capture import tile_storage_keys
 
 
 logger = logging.getLogger(__name__)
@@ -87,6 +89,11 @@ async def get_report_by_id(
                         page_data["screenshot_storage_key"] = analysis.pages[idx].screenshot_storage_key
                     except IndexError:
                         page_data["screenshot_storage_key"] = None
+                if "screenshot_tiles" not in page_data:
+                    try:
+                        page_data["screenshot_tiles"] = analysis.pages[idx].screenshot_tiles
+                    except IndexError:
+                        page_data["screenshot_tiles"] = None
     else:
         stored_pages = [
             {
@@ -97,6 +104,7 @@ async def get_report_by_id(
                 "feedback": page.page_feedback,
                 "screenshot_url": page.screenshot_url,
                 "screenshot_storage_key": page.screenshot_storage_key,
+                "screenshot_tiles": page.screenshot_tiles,
             }
             for page in analysis.pages
         ]
@@ -137,30 +145,32 @@ async def delete_report(
     if analysis is None:
         return None
 
+    # Each page holds one reference on its screenshot, so page keys keep their duplicates;
+    # the detailed feedback mirrors the pages and only contributes keys no page carries.
     keys: list[str] = []
     for page in analysis.pages:
         if page.screenshot_storage_key:
             keys.append(page.screenshot_storage_key)
+        keys.extend(tile_storage_keys(page.screenshot_tiles))
 
+    page_keys = set(keys)
     detailed = analysis.detailed_feedback
     if isinstance(detailed, list):
         for item in detailed:
             if isinstance(item, dict):
                 key = item.get("screenshot_storage_key")
-                if key:
+                if key and key not in page_keys:
                     keys.append(key)
+                keys.extend(key for key in tile_storage_keys(item.get("screenshot_tiles")) if key not in page_keys)
 
-    # Preserve insertion order while removing duplicates
-    seen: dict[str, None] = {}
-    for key in keys:
-        seen.setdefault(key, None)
-    unique_keys = list(seen.keys())
+    unique_keys = list(dict.fromkeys(keys))
 
     storage = get_storage_service()
     stats: Dict[str, Any] = {
         "analysis_id": analysis.id,
         "assets_total": len(unique_keys),
         "assets_deleted": 0,
+        "assets_retained": 0,
         "assets_failed": 0,
         "assets_skipped": 0,
         "storage_available": storage is not None,
@@ -169,18 +179,9 @@ async def delete_report(
     if storage is None:
         stats["assets_skipped"] = len(unique_keys)
     else:
-        for key in unique_keys:
-            try:
-                deleted = await storage.delete_object(key)
-            except Exception as exc:  # noqa: BLE001
-                stats["assets_failed"] += 1
-                logger.error("Failed to delete asset %s during report cleanup: %s", key, exc)
-                continue
-
-            if deleted:
-                stats["assets_deleted"] += 1
-            else:
-                stats["assets_failed"] += 1
+        outcomes = await ScreenshotStore(session, storage).release(keys)
+        for outcome in outcomes.values():
+            stats[f"assets_{outcome}"] += 1
 
     await session.delete(analysis)
     await session.commit()
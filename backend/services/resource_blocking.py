@@ -0,0 +1,220 @@
+"""Request interception policy that keeps heavy third-party resources out of captures."""
+
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Pattern, Tuple
+
+from playwright.async_api import Error as PlaywrightError, Route
+
+logger = logging.getLogger(__name__)
+
+# Analytics, tag managers and ad pixels: never render anything visible.
+TRACKER_DOMAINS: Tuple[str, ...] = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "googleadservices.com",
+    "googlesyndication.com",
+    "doubleclick.net",
+    "adservice.google.com",
+    "connect.facebook.net",
+    "facebook.com/tr",
+    "analytics.tiktok.com",
+    "snap.licdn.com",
+    "px.ads.linkedin.com",
+    "bat.bing.com",
+    "clarity.ms",
+    "hotjar.com",
+    "fullstory.com",
+    "mixpanel.com",
+    "cdn.segment.com",
+    "api.segment.io",
+    "js.hs-analytics.net",
+    "js.hs-scripts.com",
+    "amazon-adsystem.com",
+    "criteo.com",
+    "taboola.com",
+    "outbrain.com",
+    "quantserve.com",
+    "scorecardresearch.com",
+)
+
+# Chat widgets load megabytes of JS and only add a bubble in the corner.
+CHAT_WIDGET_DOMAINS: Tuple[str, ...] = (
+    "widget.intercom.io",
+    "js.intercomcdn.com",
+    "js.driftt.com",
+    "client.crisp.chat",
+    "embed.tawk.to",
+    "static.zdassets.com",
+    "cdn.livechatinc.com",
+    "wchat.freshchat.com",
+    "js.usemessages.com",
+)
+
+# Video players: replaced by a placeholder frame so the layout (and the VSL slot) stays visible.
+VIDEO_EMBED_DOMAINS: Tuple[str, ...] = (
+    "youtube.com/embed",
+    "youtube-nocookie.com",
+    "player.vimeo.com",
+    "fast.wistia.net",
+    "fast.wistia.com",
+    "players.brightcove.net",
+    "fast.vidalytics.com",
+    "scripts.converteai.net",
+    "player.vturb.com.br",
+    "embed.vidyard.com",
+    "cdn.jwplayer.com",
+)
+
+_FONT_EXTENSIONS = ("woff2", "woff", "ttf", "otf", "eot")
+_MEDIA_EXTENSIONS = ("mp4", "webm", "m3u8", "mov", "m4v", "mp3", "ogg", "wav")
+
+# Typical transfer sizes used to estimate savings for requests that are never fetched.
+_ESTIMATED_BYTES = {
+    "tracker": 45_000,
+    "chat": 350_000,
+    "video": 900_000,
+    "media": 2_000_000,
+    "font": 40_000,
+}
+
+_VIDEO_PLACEHOLDER_HTML = (
+    "<!doctype html><html><body style=\"margin:0;height:100vh;display:flex;align-items:center;"
+    "justify-content:center;background:#111827;color:#f9fafb;font:600 18px sans-serif\">"
+    "&#9654;&nbsp;Video</body></html>"
+)
+
+
+@dataclass(frozen=True)
+class ResourceBlockPolicy:
+    """Which requests to block while capturing, and how long fonts may take."""
+
+    block_trackers: bool = True
+    block_chat_widgets: bool = True
+    replace_video_embeds: bool = True
+    replace_media: bool = True
+    font_timeout_ms: int = 1500
+    extra_blocked_domains: Tuple[str, ...] = ()
+
+    @property
+    def enabled(self) -> bool:
+        return any(
+            (
+                self.block_trackers,
+                self.block_chat_widgets,
+                self.replace_video_embeds,
+                self.replace_media,
+                self.font_timeout_ms > 0,
+                bool(self.extra_blocked_domains),
+            )
+        )
+
+
+@dataclass
+class ResourceBlockStats:
+    """Per-capture counters describing what interception saved."""
+
+    blocked: Dict[str, int] = field(default_factory=dict)
+    font_timeouts: int = 0
+    estimated_bytes_saved: int = 0
+
+    def record(self, category: str) -> None:
+        self.blocked[category] = self.blocked.get(category, 0) + 1
+        self.estimated_bytes_saved += _ESTIMATED_BYTES.get(category, 0)
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "blocked_requests": sum(self.blocked.values()),
+            "blocked_by_category": dict(self.blocked),
+            "font_timeouts": self.font_timeouts,
+            "estimated_bytes_saved": self.estimated_bytes_saved,
+        }
+
+
+def _domain_alternation(domains: Iterable[str]) -> str:
+    return "|".join(re.escape(domain.strip().lower()) for domain in domains if domain.strip())
+
+
+def _host_pattern(domains: Iterable[str]) -> Pattern[str]:
+    alternation = _domain_alternation(domains)
+    # Match "<scheme>://[sub.]domain[/path-prefix]" so path-qualified entries like facebook.com/tr work.
+    return re.compile(rf"^https?://([^/?#]*\.)?({alternation})([:/?#]|$)", re.IGNORECASE)
+
+
+class ResourceBlocker:
+    """Route handler applying a ResourceBlockPolicy to every request in a context."""
+
+    def __init__(self, policy: ResourceBlockPolicy) -> None:
+        self._policy = policy
+        self.stats = ResourceBlockStats()
+
+        blocked: list[str] = list(policy.extra_blocked_domains)
+        if policy.block_trackers:
+            blocked.extend(TRACKER_DOMAINS)
+        self._blocked = _host_pattern(blocked) if blocked else None
+        self._chat = _host_pattern(CHAT_WIDGET_DOMAINS) if policy.block_chat_widgets else None
+        self._video = _host_pattern(VIDEO_EMBED_DOMAINS) if policy.replace_video_embeds else None
+        self._font_ext = re.compile(rf"\.({'|'.join(_FONT_EXTENSIONS)})([?#]|$)", re.IGNORECASE)
+        self._media_ext = re.compile(rf"\.({'|'.join(_MEDIA_EXTENSIONS)})([?#]|$)", re.IGNORECASE)
+
+        # A single URL pattern lets Playwright leave every other request un-paused.
+        branches = [p.pattern for p in (self._blocked, self._chat, self._video) if p is not None]
+        if policy.font_timeout_ms > 0:
+            branches.append(rf".*{self._font_ext.pattern}")
+        if policy.replace_media:
+            branches.append(rf".*{self._media_ext.pattern}")
+        self.url_pattern: Pattern[str] = re.compile("|".join(f"(?:{b})" for b in branches), re.IGNORECASE)
+
+    def reset(self) -> None:
+        self.stats = ResourceBlockStats()
+
+    async def handle(self, route: Route) -> None:
+        request = route.request
+        url = request.url
+        resource_type = request.resource_type
+
+        try:
+            if self._blocked is not None and self._blocked.match(url):
+                self.stats.record("tracker")
+                await route.abort("blockedbyclient")
+                return
+
+            if self._chat is not None and self._chat.match(url):
+                self.stats.record("chat")
+                await route.abort("blockedbyclient")
+                return
+
+            if self._video is not None and self._video.match(url):
+                self.stats.record("video")
+                if resource_type == "document":
+                    await route.fulfill(status=200, content_type="text/html", body=_VIDEO_PLACEHOLDER_HTML)
+                else:
+                    await route.abort("blockedbyclient")
+                return
+
+            if self._policy.replace_media and (resource_type == "media" or self._media_ext.search(url)):
+                self.stats.record("media")
+                await route.fulfill(status=204, body=b"")
+                return
+
+            if resource_type == "font" or self._font_ext.search(url):
+                await self._fetch_font(route)
+                return
+
+            await route.continue_()
+        except PlaywrightError as exc:
+            # The page may have navigated away or closed while the request was paused.
+            logger.debug("Route handling skipped for %s: %s", url, exc)
+
+    async def _fetch_font(self, route: Route) -> None:
+        try:
+            response = await route.fetch(timeout=self._policy.font_timeout_ms)
+        except PlaywrightError:
+            self.stats.font_timeouts += 1
+            self.stats.record("font")
+            await route.abort("timedout")
+            return
+        await route.fulfill(response=response)
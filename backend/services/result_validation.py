@@ -0,0 +1,176 @@
+"""Schema-driven validation and local repair of page analysis replies.
+
+Replies are parsed with ``repair_json_object`` (fences, trailing commas, truncation), then
+each requested field is coerced to its kind: numeric strings become clamped integer scores,
+a lone object becomes a one-item list, missing optional fields get their defaults. Only what
+cannot be recovered locally is reported as ``missing``, so the caller can re-ask the model
+for those fields alone instead of regenerating the whole reply.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from ..utils.json_repair import repair_json_object
+
+SCORE_KEYS = ("clarity", "value", "proof", "design", "flow")
+
+# A page result is unusable without these
+REQUIRED_FIELDS = ("scores", "feedback")
+
+# Kind of every page analysis field (the reply schema is _RESULT_FIELD_SCHEMA in openai_service)
+PAGE_RESULT_FIELDS: Dict[str, str] = {
+    "page_type": "label",
+    "scores": "scores",
+    "feedback": "text",
+    "headline_recommendation": "text",
+    "headline_alternatives": "text_list",
+    "cta_recommendations": "object_list",
+    "design_improvements": "object_list",
+    "copy_improvements": "object_list",
+    "trust_elements_missing": "object_list",
+    "ab_test_priority": "object",
+    "priority_alerts": "object_list",
+    "funnel_flow_gaps": "object_list",
+    "copy_diagnostics": "object",
+    "visual_diagnostics": "object",
+    "video_recommendations": "object_list",
+    "email_capture_recommendations": "text_list",
+}
+
+_NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+_MIN_SCORES_TO_FILL = 3  # Missing criteria are filled with the mean of the others from this many
+
+_INVALID = object()
+
+
+@dataclass
+class ValidatedResult:
+    result: Dict[str, Any]
+    missing: List[str] = field(default_factory=list)  # Requested fields that could not be recovered
+    repaired: bool = False  # Something was fixed locally: JSON syntax, a type or a default
+
+    def merge(self, other: "ValidatedResult") -> "ValidatedResult":
+        """Fill this result's missing fields from ``other`` (a re-ask for just those fields)."""
+
+        result = dict(self.result)
+        for name in self.missing:
+            if name not in other.missing and name in other.result:
+                result[name] = other.result[name]
+        missing = [name for name in self.missing if name in other.missing or name not in other.result]
+        return ValidatedResult(result, missing, self.repaired or other.repaired)
+
+
+def validate_page_result(
+    reply: Union[str, Dict[str, Any]], fields: Optional[Iterable[str]] = None
+) -> ValidatedResult:
+    """Validate a reply for ``fields`` (None = every field), repairing what can be repaired.
+
+    A field counts as missing when it is required, or when the reply was cut short (it was
+    probably still to come); an optional field the model simply left out gets its default.
+    """
+
+    requested = list(PAGE_RESULT_FIELDS if fields is None else fields)
+    if isinstance(reply, dict):
+        data, repaired, truncated = reply, False, False
+    else:
+        parsed = repair_json_object(reply or "")
+        data, repaired, truncated = parsed.data or {}, parsed.repaired, parsed.truncated
+
+    result: Dict[str, Any] = {}
+    missing: List[str] = []
+    for name in requested:
+        kind = PAGE_RESULT_FIELDS.get(name)
+        if kind is None:
+            continue
+        value, changed = _coerce(kind, data.get(name, _INVALID))
+        if value is _INVALID:
+            if name in REQUIRED_FIELDS or truncated:
+                missing.append(name)
+                continue
+            value, changed = _default(kind), name in data
+        result[name] = value
+        repaired = repaired or changed
+
+    # Valid fields the model volunteered beyond the request are kept as they are
+    for name, value in data.items():
+        kind = PAGE_RESULT_FIELDS.get(name)
+        if kind is not None and name not in result and name not in missing:
+            value, _ = _coerce(kind, value)
+            if value is not _INVALID:
+                result[name] = value
+    return ValidatedResult(result, missing, repaired)
+
+
+def normalize_page_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Every page field coerced to its kind, with defaults for absent ones (for storage)."""
+
+    normalized = dict(result)
+    for name, kind in PAGE_RESULT_FIELDS.items():
+        value, _ = _coerce(kind, result.get(name, _INVALID))
+        normalized[name] = _default(kind) if value is _INVALID else value
+    return normalized
+
+
+def _default(kind: str) -> Any:
+    if kind == "label":
+        return "unknown"
+    return [] if kind in ("text_list", "object_list") else None
+
+
+def _coerce(kind: str, value: Any) -> Tuple[Any, bool]:
+    """``(coerced value, changed)``, or ``(_INVALID, False)`` when nothing usable is there."""
+
+    if value is _INVALID or value is None:
+        return _INVALID, False
+    if kind == "scores":
+        return _coerce_scores(value)
+    if kind in ("text", "label"):
+        if isinstance(value, str):
+            text = value.strip()
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            text = str(value)
+        elif isinstance(value, list) and value and all(isinstance(item, str) for item in value):
+            text = " ".join(item.strip() for item in value)
+        else:
+            return _INVALID, False
+        if not text:
+            return _INVALID, False
+        if kind == "label":
+            text = re.sub(r"[\s-]+", "_", text.lower())
+        return text, text != value
+    if kind == "text_list":
+        items = value if isinstance(value, list) else [value]
+        texts = [str(item).strip() for item in items if isinstance(item, (str, int, float)) and str(item).strip()]
+        return texts, texts != value
+    if kind == "object_list":
+        items = value if isinstance(value, list) else [value]
+        objects = [item for item in items if isinstance(item, dict)]
+        return objects, objects != value
+    if kind == "object":
+        return (value, False) if isinstance(value, dict) else (_INVALID, False)
+    return value, False
+
+
+def _coerce_scores(value: Any) -> Tuple[Any, bool]:
+    if not isinstance(value, dict):
+        return _INVALID, False
+    scores: Dict[str, int] = {}
+    for key in SCORE_KEYS:
+        raw = value.get(key)
+        if isinstance(raw, bool):
+            continue
+        if isinstance(raw, (int, float)):
+            number = float(raw)
+        elif isinstance(raw, str) and _NUMBER_RE.search(raw):
+            number = float(_NUMBER_RE.search(raw).group())  # "85", "85/100", "85%"
+        else:
+            continue
+        scores[key] = max(0, min(100, int(round(number))))
+    if len(scores) < _MIN_SCORES_TO_FILL:
+        return _INVALID, False
+    mean = round(sum(scores.values()) / len(scores))
+    filled = {key: scores.get(key, mean) for key in SCORE_KEYS}
+    return filled, filled != value
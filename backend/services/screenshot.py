@@ -3,21 +3,72 @@
 from __future__ import annotations
 
 import asyncio
-import base64
 import logging
+import time
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Awaitable, Dict, Optional, Sequence, TypeVar
 
-from playwright.async_api import async_playwright, Browser, Page
+from playwright.async_api import async_playwright, Browser, Error as PlaywrightError, Page, Playwright
+
+from ..utils.config import settings
+from ..utils.images import EncodedImage, encode_png, normalize_image_format, quality_for_tier
+from .browser_pool import BrowserContextPool
+from .browser_supervisor import BrowserLimits, BrowserSupervisor, default_browser_count
+from .capture_preview import PreviewSink, VisualElementsSink
+from .device_profiles import get_device_profile
+from .page_settle import NetworkActivity, prepare_and_extract, wait_for_settle
+from .resource_blocking import ResourceBlockPolicy
+from .tiled_capture import OverviewBuilder, ScreenshotTile, TileSink, plan_tiles
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+
+def _request_policy_from_settings() -> ResourceBlockPolicy:
+    return ResourceBlockPolicy(
+        block_trackers=settings.SCREENSHOT_BLOCK_TRACKERS,
+        block_chat_widgets=settings.SCREENSHOT_BLOCK_CHAT_WIDGETS,
+        replace_video_embeds=settings.SCREENSHOT_REPLACE_VIDEO_EMBEDS,
+        replace_media=settings.SCREENSHOT_REPLACE_MEDIA,
+        font_timeout_ms=settings.SCREENSHOT_FONT_TIMEOUT_MS,
+        extra_blocked_domains=tuple(settings.SCREENSHOT_BLOCKED_DOMAINS or ()),
+    )
+
+
+async def _capture_encoded(page: Page, *, full_page: bool, clip: Optional[Dict[str, int]] = None) -> EncodedImage:
+    """Screenshot the page in the configured format without a base64 round-trip."""
+
+    image_format = normalize_image_format(settings.SCREENSHOT_FORMAT)
+    if image_format == "jpeg":
+        # Chromium encodes JPEG natively, so skip the PNG intermediate entirely
+        data = await page.screenshot(
+            full_page=full_page,
+            clip=clip,
+            type="jpeg",
+            quality=quality_for_tier(settings.SCREENSHOT_QUALITY),
+        )
+        return EncodedImage(data=data, content_type="image/jpeg")
+
+    png_bytes = await page.screenshot(full_page=full_page, clip=clip, type="png")
+    if image_format == "png":
+        return EncodedImage(data=png_bytes, content_type="image/png")
+
+    # WebP is not a Playwright output format; transcode off the event loop
+    return await asyncio.to_thread(
+        encode_png,
+        png_bytes,
+        image_format=image_format,
+        quality_tier=settings.SCREENSHOT_QUALITY,
+    )
+
 
 class ScreenshotService:
     """Service for capturing screenshots of web pages."""
     
     def __init__(self):
-        self._browser: Optional[Browser] = None
+        self._playwright: Optional[Playwright] = None
+        self._supervisor: Optional[BrowserSupervisor] = None
     
     async def __aenter__(self):
         """Context manager entry."""
@@ -29,26 +80,58 @@ class ScreenshotService:
         await self.close()
     
     async def start(self):
-        """Start the browser."""
-        if self._browser is None:
-            playwright = await async_playwright().start()
-            self._browser = await playwright.chromium.launch(
-                headless=True,
-                args=[
-                    '--no-sandbox',
-                    '--disable-setuid-sandbox',
-                    '--disable-dev-shm-usage',
-                    '--disable-gpu',
-                ]
+        """Start the supervised browser processes."""
+        if self._supervisor is None:
+            self._playwright = await async_playwright().start()
+            self._supervisor = BrowserSupervisor(
+                self._launch_browser,
+                self._create_pool,
+                size=settings.SCREENSHOT_BROWSER_COUNT or default_browser_count(),
+                limits=BrowserLimits(
+                    max_rss_mb=settings.SCREENSHOT_BROWSER_MAX_RSS_MB,
+                    max_failure_rate=settings.SCREENSHOT_BROWSER_MAX_FAILURE_RATE,
+                    health_interval_seconds=settings.SCREENSHOT_BROWSER_HEALTH_INTERVAL_SECONDS,
+                    drain_timeout_seconds=settings.SCREENSHOT_BROWSER_DRAIN_TIMEOUT_SECONDS,
+                ),
             )
-            logger.info("Playwright browser started")
+            await self._supervisor.start()
+            logger.info("Playwright browsers started")
+    
+    async def _launch_browser(self) -> Browser:
+        return await self._playwright.chromium.launch(
+            headless=True,
+            args=[
+                '--no-sandbox',
+                '--disable-setuid-sandbox',
+                '--disable-dev-shm-usage',
+                '--disable-gpu',
+            ]
+        )
+    
+    async def _create_pool(self, browser: Browser) -> BrowserContextPool:
+        pool = BrowserContextPool(
+            browser,
+            max_contexts=settings.SCREENSHOT_POOL_MAX_CONTEXTS,
+            max_navigations=settings.SCREENSHOT_POOL_MAX_NAVIGATIONS,
+            max_heap_mb=settings.SCREENSHOT_POOL_MAX_HEAP_MB,
+            request_policy=_request_policy_from_settings(),
+        )
+        await pool.warm(settings.SCREENSHOT_POOL_WARM_CONTEXTS)
+        return pool
     
     async def close(self):
-        """Close the browser."""
-        if self._browser:
-            await self._browser.close()
-            self._browser = None
-            logger.info("Playwright browser closed")
+        """Close every browser."""
+        if self._supervisor:
+            await self._supervisor.close()
+            self._supervisor = None
+            logger.info("Playwright browsers closed")
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+
+    def pool_stats(self) -> Optional[Dict]:
+        """Return per-browser health plus aggregate context pool utilisation."""
+        return self._supervisor.stats() if self._supervisor else None
     
     async def capture_screenshot(
         self,
@@ -57,9 +140,10 @@ class ScreenshotService:
         viewport_height: int = 1080,
         full_page: bool = False,
         wait_for_network_idle: bool = True,
-    ) -> str:
+        device: Optional[str] = None,
+    ) -> EncodedImage:
         """
-        Capture a screenshot of a URL and return as base64 encoded string.
+        Capture a screenshot of a URL in the configured image format.
         
         Args:
             url: The URL to screenshot
@@ -67,234 +151,356 @@ class ScreenshotService:
             viewport_height: Browser viewport height
             full_page: Whether to capture the full scrollable page
             wait_for_network_idle: Wait for network to be idle before screenshot
+            device: Optional device profile name ("desktop", "tablet", "mobile"); emulates
+                touch, DPR and user agent and overrides the viewport size
             
         Returns:
-            Base64 encoded PNG screenshot
+            Encoded screenshot bytes (call ``.base64()`` if a string is needed)
         """
-        if not self._browser:
+        if not self._supervisor:
             await self.start()
         
-        logger.info(f"Capturing screenshot of {url}")
+        profile = get_device_profile(device)
+        if device and profile is None:
+            raise ValueError(f"Unknown device profile: {device}")
+        if profile is not None:
+            viewport_width, viewport_height = profile.width, profile.height
+        
+        logger.info(f"Capturing {device or 'default'} screenshot of {url}")
         
         try:
-            page = await self._browser.new_page(
-                viewport={'width': viewport_width, 'height': viewport_height},
-                user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            )
-            
-            try:
-                # Navigate to the page
-                await page.goto(
-                    url,
-                    wait_until='networkidle' if wait_for_network_idle else 'domcontentloaded',
-                    timeout=30000  # 30 seconds
-                )
-                
-                # Wait a bit for any animations/lazy loading
-                await page.wait_for_timeout(2000)
+            async with self._supervisor.lease(
+                viewport_width=viewport_width,
+                viewport_height=viewport_height,
+                profile=profile,
+            ) as lease:
+                page = lease.page
+
+                with NetworkActivity(page) as network:
+                    # Navigate to the page
+                    await page.goto(url, wait_until='domcontentloaded', timeout=30000)
+
+                    # Wait for network/DOM quiescence and image decode instead of a fixed sleep
+                    if wait_for_network_idle:
+                        await wait_for_settle(
+                            page,
+                            network,
+                            quiet_ms=settings.SCREENSHOT_SETTLE_QUIET_MS,
+                            max_ms=settings.SCREENSHOT_SETTLE_MAX_MS,
+                        )
                 
                 # Take screenshot
-                screenshot_bytes = await page.screenshot(
-                    full_page=full_page,
-                    type='png',
-                )
-                
-                # Convert to base64
-                screenshot_base64 = base64.b64encode(screenshot_bytes).decode('utf-8')
+                screenshot = await _capture_encoded(page, full_page=full_page)
                 
-                logger.info(f"Screenshot captured successfully for {url} ({len(screenshot_bytes)} bytes)")
-                return screenshot_base64
-                
-            finally:
-                await page.close()
+                logger.info(
+                    f"Screenshot captured successfully for {url} "
+                    f"({screenshot.size_bytes} bytes, {screenshot.content_type})"
+                )
+                return screenshot
                 
         except Exception as e:
             logger.error(f"Failed to capture screenshot of {url}: {str(e)}")
             raise Exception(f"Screenshot capture failed: {str(e)}")
     
-    async def capture_multiple_viewports(self, url: str) -> Dict[str, str]:
+    async def capture_multiple_viewports(
+        self,
+        url: str,
+        devices: Sequence[str] = ('desktop', 'tablet', 'mobile'),
+        fast: bool = False,
+    ) -> Dict[str, Optional[EncodedImage]]:
         """
-        Capture screenshots at different viewport sizes (desktop, tablet, mobile).
+        Capture above-the-fold screenshots for several devices.
+        
+        By default each device is captured concurrently in its own pooled context with full
+        device emulation. ``fast=True`` navigates once and resizes the viewport between
+        captures instead; it is quicker but only emulates the viewport size.
         
         Args:
             url: The URL to screenshot
+            devices: Device profile names to capture
+            fast: Navigate once and resize instead of emulating each device
             
         Returns:
-            Dict with base64 screenshots for each viewport
+            Dict with encoded screenshots for each viewport (None when a capture failed)
         """
-        viewports = {
-            'desktop': {'width': 1920, 'height': 1080},
-            'tablet': {'width': 768, 'height': 1024},
-            'mobile': {'width': 375, 'height': 812},
-        }
+        if fast:
+            return await self._capture_viewports_single_navigation(url, devices)
         
-        screenshots = {}
+        results = await asyncio.gather(
+            *(self.capture_screenshot(url, full_page=False, device=device) for device in devices),
+            return_exceptions=True,
+        )
         
-        for device, viewport in viewports.items():
-            try:
-                screenshot = await self.capture_screenshot(
-                    url,
-                    viewport_width=viewport['width'],
-                    viewport_height=viewport['height'],
-                    full_page=False,  # Just above-the-fold for quick analysis
-                )
-                screenshots[device] = screenshot
-                logger.info(f"Captured {device} screenshot for {url}")
-            except Exception as e:
-                logger.warning(f"Failed to capture {device} screenshot: {str(e)}")
+        screenshots: Dict[str, Optional[EncodedImage]] = {}
+        for device, result in zip(devices, results):
+            if isinstance(result, BaseException):
+                logger.warning(f"Failed to capture {device} screenshot: {str(result)}")
                 screenshots[device] = None
+            else:
+                screenshots[device] = result
+                logger.info(f"Captured {device} screenshot for {url}")
         
         return screenshots
     
-    async def analyze_above_fold(self, url: str) -> Dict:
+    async def _capture_viewports_single_navigation(
+        self,
+        url: str,
+        devices: Sequence[str],
+    ) -> Dict[str, Optional[EncodedImage]]:
+        """Load the page once, then resize and re-settle before each capture."""
+        if not self._supervisor:
+            await self.start()
+        
+        profiles = [profile for profile in map(get_device_profile, devices) if profile is not None]
+        screenshots: Dict[str, Optional[EncodedImage]] = {device: None for device in devices}
+        if not profiles:
+            return screenshots
+        
+        first = profiles[0]
+        try:
+            async with self._supervisor.lease(viewport_width=first.width, viewport_height=first.height) as lease:
+                page = lease.page
+                with NetworkActivity(page) as network:
+                    await page.goto(url, wait_until='domcontentloaded', timeout=30000)
+                    for profile in profiles:
+                        try:
+                            await page.set_viewport_size({'width': profile.width, 'height': profile.height})
+                            # Responsive layouts may swap images or re-render after a resize
+                            await wait_for_settle(
+                                page,
+                                network,
+                                quiet_ms=settings.SCREENSHOT_SETTLE_QUIET_MS,
+                                max_ms=settings.SCREENSHOT_SETTLE_MAX_MS,
+                            )
+                            screenshots[profile.name] = await _capture_encoded(page, full_page=False)
+                            logger.info(f"Captured {profile.name} screenshot for {url}")
+                        except PlaywrightError as e:
+                            logger.warning(f"Failed to capture {profile.name} screenshot: {str(e)}")
+        except Exception as e:
+            logger.warning(f"Failed to load {url} for viewport captures: {str(e)}")
+        
+        return screenshots
+    
+    async def _capture_tiled(
+        self,
+        page: Page,
+        *,
+        width: int,
+        tile_height: int,
+        page_height: int,
+        tile_sink: Optional[TileSink] = None,
+    ) -> tuple[Optional[EncodedImage], Dict]:
+        """Capture a tall page as viewport-height tiles and build a low-res overview.
+
+        Tiles are passed to ``tile_sink`` as soon as they are encoded and then dropped, so
+        only one full-resolution tile is held here at a time.
+        """
+        max_height = settings.SCREENSHOT_MAX_HEIGHT_PX
+        plan = plan_tiles(page_height, tile_height, max_height)
+        captured_height = sum(height for _, height in plan)
+        overview = OverviewBuilder(
+            width=width,
+            total_height=captured_height,
+            max_height=settings.SCREENSHOT_OVERVIEW_MAX_HEIGHT_PX,
+        )
+
+        tiles = []
+        for index, (offset_y, height) in enumerate(plan):
+            # full_page lets the clip reach below the viewport without scrolling the page
+            image = await _capture_encoded(
+                page,
+                full_page=True,
+                clip={'x': 0, 'y': offset_y, 'width': width, 'height': height},
+            )
+            tile = ScreenshotTile(index=index, offset_y=offset_y, width=width, height=height, image=image)
+            await asyncio.to_thread(overview.add, tile)
+            if tile_sink is not None:
+                await tile_sink(tile)
+            tiles.append(tile.describe())
+
+        screenshot = await asyncio.to_thread(
+            overview.encode,
+            image_format=settings.SCREENSHOT_FORMAT,
+            quality_tier=settings.SCREENSHOT_QUALITY,
+        )
+        return screenshot, {
+            'page_height': page_height,
+            'captured_height': captured_height,
+            'truncated': page_height > captured_height,
+            'tiles': tiles,
+        }
+
+    async def _capture_preview(self, page: Page) -> EncodedImage:
+        """Viewport capture for the progressive preview: waits briefly for ``load``, never for settle."""
+
+        try:
+            await page.wait_for_load_state('load', timeout=settings.SCREENSHOT_PREVIEW_LOAD_WAIT_MS)
+        except PlaywrightError:
+            pass  # Slow subresources: show what has rendered so far
+        return await _capture_encoded(page, full_page=False)
+
+    async def analyze_above_fold(
+        self,
+        url: str,
+        tile_sink: Optional[TileSink] = None,
+        on_preview: Optional[PreviewSink] = None,
+        on_visual_elements: Optional[VisualElementsSink] = None,
+    ) -> Dict:
         """
         Capture FULL PAGE screenshot and analyze ALL content including CTAs.
         
+        Pages taller than ``SCREENSHOT_TILE_THRESHOLD_PX`` are captured as tiles (each
+        passed to ``tile_sink``) and the returned screenshot is a stitched low-res overview.
+        
         Args:
             url: The URL to analyze
+            tile_sink: Optional async callback receiving each tile of a tiled capture
+            on_preview: Optional async callback receiving a viewport capture taken right
+                after load, before the settle/scroll pass
+            on_visual_elements: Optional async callback receiving the extracted visual
+                elements as soon as the settle/scroll pass ends, before the full-page capture
             
         Returns:
             Dict with full-page screenshot and extracted visual elements
         """
-        if not self._browser:
+        if not self._supervisor:
             await self.start()
         
         logger.info(f"Analyzing full page for {url}")
         
         try:
-            page = await self._browser.new_page(
-                viewport={'width': 1440, 'height': 900}
-            )
-            
-            try:
-                await page.goto(url, wait_until='networkidle', timeout=30000)
-                
-                # Wait for initial render
-                await page.wait_for_timeout(2000)
-                
-                # Force-show hidden elements with opacity:0 or display:none animations
-                # This captures elements that animate in via JS (Framer Motion, Intersection Observer, etc.)
-                await page.evaluate("""
-                    () => {
-                        // Find all elements with opacity:0 inline styles (animation targets)
-                        const hiddenElements = document.querySelectorAll('[style*="opacity:0"], [style*="opacity: 0"]');
-                        hiddenElements.forEach(el => {
-                            el.style.opacity = '1';
-                            el.style.transform = 'none';
-                            el.style.visibility = 'visible';
-                        });
-                        
-                        // Also check for elements with transform animations
-                        const transformedElements = document.querySelectorAll('[style*="transform"], [style*="translateX"], [style*="translateY"], [style*="scale"]');
-                        transformedElements.forEach(el => {
-                            if (el.style.opacity === '0' || parseFloat(window.getComputedStyle(el).opacity) < 0.1) {
-                                el.style.opacity = '1';
-                                el.style.transform = 'none';
-                            }
-                        });
-                    }
-                """)
-                
-                # Scroll to trigger lazy-loaded content and intersection observers
-                await page.evaluate("""
-                    async () => {
-                        // Scroll down in steps to trigger lazy loading and IntersectionObserver animations
-                        const scrollHeight = document.body.scrollHeight;
-                        const viewportHeight = window.innerHeight;
-                        const steps = Math.ceil(scrollHeight / viewportHeight);
-                        
-                        for (let i = 0; i < steps; i++) {
-                            window.scrollTo(0, i * viewportHeight);
-                            // Wait for intersection observers to fire
-                            await new Promise(resolve => setTimeout(resolve, 800));
-                        }
-                        
-                        // Scroll back to top for screenshot
-                        window.scrollTo(0, 0);
-                        await new Promise(resolve => setTimeout(resolve, 500));
-                    }
-                """)
-                
-                # Force-show hidden elements AGAIN after scrolling (some might animate on scroll)
-                await page.evaluate("""
-                    () => {
-                        const hiddenElements = document.querySelectorAll('[style*="opacity:0"], [style*="opacity: 0"]');
-                        hiddenElements.forEach(el => {
-                            el.style.opacity = '1';
-                            el.style.transform = 'none';
-                        });
-                    }
-                """)
-                
-                # Final wait for animations to settle
-                await page.wait_for_timeout(1000)
-                
-                # Capture FULL PAGE screenshot (entire scrollable content)
-                screenshot_bytes = await page.screenshot(
-                    type='png',
-                    full_page=True  # Capture entire page, not just viewport
-                )
-                screenshot_base64 = base64.b64encode(screenshot_bytes).decode('utf-8')
-                
-                # Extract visual elements from ENTIRE page (not just above-the-fold)
-                visual_data = await page.evaluate("""
-                    () => {
-                        // Get ALL images on the page
-                        const images = Array.from(document.querySelectorAll('img'))
-                            .map(img => ({
-                                src: img.src,
-                                alt: img.alt,
-                                width: img.width,
-                                height: img.height
-                            }));
-                        
-                        // Get ALL CTA buttons on the entire page
-                        const buttons = Array.from(document.querySelectorAll('button, a[class*="button"], a[class*="btn"], input[type="submit"], a[role="button"]'))
-                            .map(btn => ({
-                                text: btn.textContent.trim(),
-                                tag: btn.tagName,
-                                classes: btn.className,
-                                href: btn.href || null
-                            }));
-                        
-                        // Get computed styles of body
-                        const bodyStyles = window.getComputedStyle(document.body);
-                        
-                        return {
-                            images: images,
-                            buttons: buttons,
-                            colors: {
-                                background: bodyStyles.backgroundColor,
-                                text: bodyStyles.color,
-                                primaryFont: bodyStyles.fontFamily
-                            },
-                            viewportHeight: window.innerHeight,
-                            scrollHeight: document.body.scrollHeight,
-                            totalButtons: buttons.length,
-                            totalImages: images.length
-                        };
-                    }
-                """)
+            async with self._supervisor.lease(viewport_width=1440, viewport_height=900) as lease:
+                page = lease.page
+
+                with NetworkActivity(page) as network:
+                    navigation_start = time.perf_counter()
+                    await page.goto(url, wait_until='domcontentloaded', timeout=30000)
+                    if on_preview is not None:
+                        await on_preview(await self._capture_preview(page))
+                    await wait_for_settle(
+                        page,
+                        network,
+                        quiet_ms=settings.SCREENSHOT_SETTLE_QUIET_MS,
+                        max_ms=settings.SCREENSHOT_SETTLE_MAX_MS,
+                    )
+                    navigation_seconds = time.perf_counter() - navigation_start
+
+                    # Reveal animated content, scroll through lazy sections and extract
+                    # visual elements in a single round-trip
+                    visual_data = await prepare_and_extract(
+                        page,
+                        quiet_ms=settings.SCREENSHOT_SCROLL_QUIET_MS,
+                        step_max_ms=settings.SCREENSHOT_SCROLL_STEP_MAX_MS,
+                        max_ms=settings.SCREENSHOT_SCROLL_MAX_MS,
+                    )
+
+                if on_visual_elements is not None:
+                    await on_visual_elements({k: v for k, v in visual_data.items() if k != 'settle'})
+
+                # Capture FULL PAGE screenshot (entire scrollable content), tiling tall pages
+                page_height = int(visual_data.get('scrollHeight') or 0)
+                tiling = None
+                if page_height > min(settings.SCREENSHOT_TILE_THRESHOLD_PX, settings.SCREENSHOT_MAX_HEIGHT_PX):
+                    screenshot, tiling = await self._capture_tiled(
+                        page,
+                        width=1440,
+                        tile_height=900,
+                        page_height=page_height,
+                        tile_sink=tile_sink,
+                    )
+                else:
+                    screenshot = await _capture_encoded(page, full_page=True)
                 
+                settle_stats = visual_data.pop('settle', None)
                 logger.info(
                     f"✓ Full page analysis: {len(visual_data.get('buttons', []))} CTAs, "
                     f"{len(visual_data.get('images', []))} images, "
-                    f"{visual_data.get('scrollHeight', 0)}px total height"
+                    f"{visual_data.get('scrollHeight', 0)}px total height, "
+                    f"{len(tiling['tiles']) if tiling else 1} image(s)"
                 )
                 
                 return {
-                    'screenshot': screenshot_base64,
-                    'visual_elements': visual_data
+                    'screenshot': screenshot,
+                    'visual_elements': visual_data,
+                    'queue_wait_seconds': lease.queue_wait_seconds,
+                    'navigation_seconds': navigation_seconds,
+                    'resource_blocking': lease.resource_stats(),
+                    'settle': settle_stats,
+                    'tiles': tiling,
                 }
                 
-            finally:
-                await page.close()
-                
         except Exception as e:
             logger.error(f"Failed to analyze full page for {url}: {str(e)}")
             raise
 
 
+_capture_stats: Dict[str, int] = {
+    "started": 0,
+    "completed": 0,
+    "failed": 0,
+    "timed_out": 0,
+    "cancelled": 0,
+    "orphaned": 0,
+    "orphans_running": 0,
+}
+
+
+def _on_orphan_done(task: asyncio.Task) -> None:
+    _capture_stats["orphans_running"] -= 1
+    if not task.cancelled():
+        task.exception()  # Retrieve so asyncio does not log "exception was never retrieved"
+
+
+async def run_capture(
+    coro: Awaitable[T],
+    *,
+    timeout_seconds: float,
+    grace_seconds: Optional[float] = None,
+) -> T:
+    """Await a capture with a deadline, cancelling it (not just abandoning it) on timeout.
+
+    Cancellation unwinds the capture's page lease, which closes the browser context and so
+    aborts navigation and in-page scripts. A capture that still has not stopped after
+    ``grace_seconds`` is counted as orphaned. Raises ``asyncio.TimeoutError`` on timeout.
+    """
+    grace = settings.SCREENSHOT_CANCEL_GRACE_SECONDS if grace_seconds is None else grace_seconds
+    task = asyncio.ensure_future(coro)
+    _capture_stats["started"] += 1
+    try:
+        done, _ = await asyncio.wait({task}, timeout=timeout_seconds)
+    except asyncio.CancelledError:
+        # The analysis itself was cancelled: take the capture down with it
+        task.cancel()
+        _capture_stats["cancelled"] += 1
+        raise
+
+    if task in done:
+        if task.exception() is not None:
+            _capture_stats["failed"] += 1
+        else:
+            _capture_stats["completed"] += 1
+        return task.result()
+
+    _capture_stats["timed_out"] += 1
+    task.cancel()
+    _capture_stats["cancelled"] += 1
+    done, _ = await asyncio.wait({task}, timeout=grace)
+    if task in done:
+        if not task.cancelled():
+            task.exception()
+    else:
+        logger.warning("Capture still running %.1fs after cancellation", grace)
+        _capture_stats["orphaned"] += 1
+        _capture_stats["orphans_running"] += 1
+        task.add_done_callback(_on_orphan_done)
+    raise asyncio.TimeoutError(f"Capture exceeded {timeout_seconds}s")
+
+
+def get_capture_stats() -> Dict[str, int]:
+    """Process-wide counts of capture outcomes, including cancelled and orphaned captures."""
+    return dict(_capture_stats)
+
+
 # Singleton instance
 _screenshot_service: Optional[ScreenshotService] = None
 
@@ -308,6 +514,13 @@ async def get_screenshot_service() -> ScreenshotService:
     return _screenshot_service
 
 
+def get_screenshot_pool_stats() -> Optional[Dict]:
+    """Return pool stats for the running singleton without starting a browser."""
+    if _screenshot_service is None:
+        return None
+    return _screenshot_service.pool_stats()
+
+
 async def cleanup_screenshot_service():
     """Clean up the screenshot service."""
     global _screenshot_service
@@ -0,0 +1,348 @@
+"""Deduplicating, reference-counted screenshot storage.
+
+Captures of the same URL that look the same as a recent capture (perceptual hash within
+``SCREENSHOT_DEDUPE_MAX_DISTANCE`` bits, or byte-identical) reuse the existing object instead
+of uploading a new copy. Each page that points at an object holds one reference; objects are
+only deleted from storage once the last reference is released. When that delete fails, the
+row stays at zero references, marked ``delete_failed_at``, until ``retry_failed_deletes``
+(run by the cleanup job) gets the object deleted.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import io
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Literal, Optional, Tuple
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm.attributes import set_committed_value
+
+from ..models.database import ScreenshotAsset
+from ..utils.config import settings
+from ..utils.images import PIL_AVAILABLE, EncodedImage, difference_hash, hamming_distance
+from .storage import StorageService, StoredObject
+
+if PIL_AVAILABLE:
+    from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+ReleaseOutcome = Literal["deleted", "retained", "failed"]
+
+
+def _now_utc() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+@dataclass
+class _Fingerprint:
+    sha256: str
+    phash: Optional[str]
+    width: Optional[int]
+    height: Optional[int]
+
+
+def _fingerprint(image: EncodedImage) -> _Fingerprint:
+    width, height = image.width, image.height
+    if (width is None or height is None) and PIL_AVAILABLE:
+        with Image.open(io.BytesIO(image.data)) as source:
+            width, height = source.size
+    return _Fingerprint(
+        sha256=hashlib.sha256(image.data).hexdigest(),
+        phash=difference_hash(image.data),
+        width=width,
+        height=height,
+    )
+
+
+class ScreenshotStore:
+    """Stores screenshots through ``StorageService`` with dedupe and reference counting.
+
+    ``release`` uses the caller's session and only flushes, so dropped references land in the
+    same transaction as the deleted pages that held them. With ``sessions``, ``store`` instead
+    commits each asset update in a short transaction of its own, so a long analysis does not
+    hold the asset row (or, on SQLite, the database write lock) until it saves its pages; such
+    a run calls ``release_taken`` if it fails before saving them.
+    """
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        storage: StorageService,
+        *,
+        sessions: Optional[async_sessionmaker[AsyncSession]] = None,
+        dedupe: Optional[bool] = None,
+        freshness: Optional[timedelta] = None,
+        max_distance: Optional[int] = None,
+    ) -> None:
+        self._session = session
+        self._sessions = sessions
+        self._storage = storage
+        self._dedupe = settings.SCREENSHOT_DEDUPE_ENABLED if dedupe is None else dedupe
+        self._freshness = freshness or timedelta(hours=settings.SCREENSHOT_DEDUPE_FRESHNESS_HOURS)
+        self._max_distance = settings.SCREENSHOT_DEDUPE_MAX_DISTANCE if max_distance is None else max_distance
+        self._taken: List[str] = []  # One entry per reference ``store`` handed out
+        self.stats: Dict[str, int] = {"reused": 0, "uploaded": 0, "bytes_saved": 0}
+
+    async def store(
+        self,
+        image: EncodedImage,
+        *,
+        source_url: str,
+        prefix: str = "screenshots/",
+    ) -> Optional[StoredObject]:
+        """Return an existing matching object (adding a reference) or upload a new one."""
+
+        fingerprint = await asyncio.to_thread(_fingerprint, image)
+        if self._sessions is None:
+            stored = await self._store(self._session, image, fingerprint, source_url, prefix, commit=False)
+        else:
+            async with self._sessions() as session:
+                stored = await self._store(session, image, fingerprint, source_url, prefix, commit=True)
+        if stored is not None:
+            self._taken.append(stored.key)
+        return stored
+
+    async def release(self, keys: Iterable[str]) -> Dict[str, ReleaseOutcome]:
+        """Drop one reference per occurrence of each key, deleting objects nobody references.
+
+        Keys without an asset row (tiles, or screenshots stored before dedupe existed) are
+        owned by a single page and deleted directly, once per distinct key.
+        """
+
+        outcomes = await self._release(self._session, keys)
+        await self._session.flush()
+        return outcomes
+
+    async def release_taken(self, keys: Optional[Iterable[str]] = None) -> Dict[str, ReleaseOutcome]:
+        """Drop references ``store`` took (all of them by default), for captures that will not be saved."""
+
+        if keys is None:
+            keys, self._taken = self._taken, []
+        else:
+            keys = list(keys)
+            for key in keys:
+                if key in self._taken:
+                    self._taken.remove(key)
+        if self._sessions is None:
+            return await self.release(keys)
+        async with self._sessions() as session:
+            outcomes = await self._release(session, keys)
+            await session.commit()
+        return outcomes
+
+    async def _store(
+        self,
+        session: AsyncSession,
+        image: EncodedImage,
+        fingerprint: _Fingerprint,
+        source_url: str,
+        prefix: str,
+        *,
+        commit: bool,
+    ) -> Optional[StoredObject]:
+        now = _now_utc()
+        existing = await self._find_match(session, fingerprint, image.content_type, source_url)
+        if existing is not None:
+            # Only while still referenced: an asset released to 0 concurrently is being deleted
+            ref_count = await self._add_reference(session, existing.storage_key, 1, now=now, only_if_referenced=True)
+            if ref_count is not None:
+                if commit:
+                    await session.commit()
+                self.stats["reused"] += 1
+                self.stats["bytes_saved"] += image.size_bytes
+                logger.info("Reusing screenshot %s for %s (refs=%s)", existing.storage_key, source_url, ref_count)
+                return StoredObject(key=existing.storage_key, url=existing.url)
+
+        stored = await self._storage.upload_image(data=image.data, content_type=image.content_type, prefix=prefix)
+        if stored is None:
+            return None
+
+        session.add(
+            ScreenshotAsset(
+                storage_key=stored.key,
+                url=stored.url,
+                source_url=source_url,
+                phash=fingerprint.phash,
+                content_sha256=fingerprint.sha256,
+                content_type=image.content_type,
+                width=fingerprint.width,
+                height=fingerprint.height,
+                size_bytes=image.size_bytes,
+                ref_count=1,
+                created_at=now,
+                last_used_at=now,
+            )
+        )
+        if not commit:
+            await session.flush()
+        else:
+            try:
+                await session.commit()
+            except IntegrityError:
+                # Another run recorded this object first: take a reference to its row instead
+                await session.rollback()
+                ref_count = await self._add_reference(session, stored.key, 1, now=now)
+                await session.commit()
+                logger.info("Screenshot %s was recorded concurrently (refs=%s)", stored.key, ref_count)
+        self.stats["uploaded"] += 1
+        return stored
+
+    async def _release(self, session: AsyncSession, keys: Iterable[str]) -> Dict[str, ReleaseOutcome]:
+        outcomes: Dict[str, ReleaseOutcome] = {}
+        for key in keys:
+            if not key:
+                continue
+            ref_count = await self._add_reference(session, key, -1)
+            if ref_count is None:
+                if key not in outcomes:
+                    outcomes[key] = await self._delete(key)
+                continue
+            if ref_count > 0:
+                outcomes[key] = "retained"
+                continue
+
+            outcome = await self._delete(key)
+            if outcome == "deleted":
+                await session.execute(
+                    delete(ScreenshotAsset)
+                    .where(ScreenshotAsset.storage_key == key, ScreenshotAsset.ref_count <= 0)
+                    .execution_options(synchronize_session=False)
+                )
+                for asset in self._loaded_assets(session, key):
+                    session.expunge(asset)
+            else:
+                # No page references it any more: marked for cleanup, and never reused meanwhile
+                now = _now_utc()
+                await session.execute(
+                    update(ScreenshotAsset)
+                    .where(ScreenshotAsset.storage_key == key, ScreenshotAsset.ref_count <= 0)
+                    .values(delete_failed_at=now)
+                    .execution_options(synchronize_session=False)
+                )
+                for asset in self._loaded_assets(session, key):
+                    set_committed_value(asset, "delete_failed_at", now)
+            outcomes[key] = outcome
+        return outcomes
+
+    async def retry_failed_deletes(self) -> Dict[str, ReleaseOutcome]:
+        """Delete objects whose delete failed when their last reference was released."""
+
+        result = await self._session.execute(
+            select(ScreenshotAsset.storage_key).where(
+                ScreenshotAsset.delete_failed_at.is_not(None),
+                ScreenshotAsset.ref_count <= 0,
+            )
+        )
+        outcomes: Dict[str, ReleaseOutcome] = {}
+        for key in result.scalars().all():
+            outcomes[key] = await self._delete(key)
+            unreferenced = (ScreenshotAsset.storage_key == key, ScreenshotAsset.ref_count <= 0)
+            if outcomes[key] == "deleted":
+                await self._session.execute(
+                    delete(ScreenshotAsset).where(*unreferenced).execution_options(synchronize_session=False)
+                )
+                for asset in self._loaded_assets(self._session, key):
+                    self._session.expunge(asset)
+            else:
+                await self._session.execute(
+                    update(ScreenshotAsset)
+                    .where(*unreferenced)
+                    .values(delete_failed_at=_now_utc())
+                    .execution_options(synchronize_session=False)
+                )
+        await self._session.flush()
+        return outcomes
+
+    async def _add_reference(
+        self,
+        session: AsyncSession,
+        key: str,
+        delta: int,
+        *,
+        now: Optional[datetime] = None,
+        only_if_referenced: bool = False,
+    ) -> Optional[int]:
+        """Atomically add ``delta`` to an asset's ref count; the new count, or None without a row.
+
+        A single ``UPDATE ... SET ref_count = ref_count + delta`` (which locks the row until the
+        transaction ends) so concurrent analyses sharing an asset cannot lose each other's update.
+        """
+
+        statement = update(ScreenshotAsset).where(ScreenshotAsset.storage_key == key)
+        if only_if_referenced:
+            statement = statement.where(ScreenshotAsset.ref_count > 0)
+        values = {"ref_count": ScreenshotAsset.ref_count + delta}
+        if now is not None:
+            values["last_used_at"] = now
+        result = await session.execute(
+            statement.values(**values)
+            .returning(ScreenshotAsset.ref_count)
+            .execution_options(synchronize_session=False)
+        )
+        ref_count = result.scalar_one_or_none()
+        if ref_count is not None:
+            for asset in self._loaded_assets(session, key):
+                set_committed_value(asset, "ref_count", ref_count)
+                if now is not None:
+                    set_committed_value(asset, "last_used_at", now)
+        return ref_count
+
+    @staticmethod
+    def _loaded_assets(session: AsyncSession, key: str) -> List[ScreenshotAsset]:
+        """Instances of ``key``'s row already in ``session``, to keep them in step with bulk statements."""
+        return [
+            instance
+            for instance in session.identity_map.values()
+            if isinstance(instance, ScreenshotAsset) and instance.storage_key == key
+        ]
+
+    async def _find_match(
+        self,
+        session: AsyncSession,
+        fingerprint: _Fingerprint,
+        content_type: str,
+        source_url: str,
+    ) -> Optional[ScreenshotAsset]:
+        if not self._dedupe or self._freshness.total_seconds() <= 0:
+            return None
+
+        cutoff = _now_utc() - self._freshness
+        result = await session.execute(
+            select(ScreenshotAsset)
+            .where(
+                ScreenshotAsset.source_url == source_url,
+                ScreenshotAsset.content_type == content_type,
+                ScreenshotAsset.created_at >= cutoff,
+                ScreenshotAsset.ref_count > 0,
+                ScreenshotAsset.delete_failed_at.is_(None),
+            )
+            .order_by(ScreenshotAsset.created_at.desc())
+        )
+
+        best: Optional[Tuple[int, ScreenshotAsset]] = None
+        for asset in result.scalars():
+            if asset.content_sha256 == fingerprint.sha256:
+                return asset
+            if not fingerprint.phash or not asset.phash:
+                continue
+            if (asset.width, asset.height) != (fingerprint.width, fingerprint.height):
+                continue
+            distance = hamming_distance(asset.phash, fingerprint.phash)
+            if distance <= self._max_distance and (best is None or distance < best[0]):
+                best = (distance, asset)
+        return best[1] if best else None
+
+    async def _delete(self, key: str) -> ReleaseOutcome:
+        try:
+            deleted = await self._storage.delete_object(key)
+        except Exception as exc:  # noqa: BLE001 - keep cleanup resilient
+            logger.error("Failed to delete screenshot object %s: %s", key, exc)
+            return "failed"
+        return "deleted" if deleted else "failed"
@@ -4,23 +4,34 @@ from __future__ import annotations
 
 import asyncio
 import base64
+import functools
 import logging
-import mimetypes
+import time
 import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Optional
+from typing import Any, Callable, Deque, Dict, Optional, Tuple, TypeVar
 
 try:
     import boto3
+    from botocore.config import Config
     from botocore.exceptions import BotoCoreError, ClientError
 except ImportError:  # pragma: no cover - optional dependency during local dev
     boto3 = None  # type: ignore[assignment]
+    Config = None  # type: ignore[assignment]
     BotoCoreError = ClientError = Exception  # type: ignore[assignment]
 
 from ..utils.config import settings
+from ..utils.images import extension_for_content_type
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+_MIB = 1024 * 1024
+_MIN_PART_SIZE = 5 * _MIB  # S3 rejects smaller parts, except the last one
+
 
 @dataclass
 class StorageConfig:
@@ -38,11 +49,28 @@ class StoredObject:
 
 
 class StorageService:
-    """Handles uploads of binary assets to an S3-compatible bucket."""
+    """Handles uploads of binary assets to an S3-compatible bucket.
 
-    def __init__(self, config: StorageConfig, access_key: str, secret_key: str) -> None:
+    The synchronous boto3 client runs on the service's own thread pool, sized to the client's
+    connection pool, so storage I/O neither queues behind nor starves the default executor
+    (scraping, email sends). Objects of ``multipart_threshold`` bytes or more are uploaded in
+    ``multipart_chunk_size`` parts in parallel.
+    """
+
+    def __init__(
+        self,
+        config: StorageConfig,
+        access_key: str,
+        secret_key: str,
+        *,
+        max_connections: int = 16,
+        multipart_threshold: int = 8 * _MIB,
+        multipart_chunk_size: int = 8 * _MIB,
+    ) -> None:
         self._config = config
         self._acl_supported: bool = True
+        self._multipart_threshold = multipart_threshold
+        self._multipart_chunk_size = multipart_chunk_size
         session_kwargs: dict = {
             "aws_access_key_id": access_key,
             "aws_secret_access_key": secret_key,
@@ -52,45 +80,73 @@ class StorageService:
         if config.endpoint_url:
             session_kwargs["endpoint_url"] = config.endpoint_url
 
-        self._client = boto3.client("s3", **session_kwargs)
+        self._client = boto3.client("s3", config=Config(max_pool_connections=max_connections), **session_kwargs)
+        # One thread per pooled connection: more would only wait for a connection
+        self._executor = ThreadPoolExecutor(max_workers=max_connections, thread_name_prefix="storage")
 
-    async def upload_base64_image(
+    async def upload_image(
         self,
         *,
-        base64_data: str,
+        data: bytes,
         content_type: str = "image/png",
         prefix: str = "screenshots/",
     ) -> Optional[StoredObject]:
-        """Upload a base64 encoded image and return key + URL when successful."""
+        """Upload raw image bytes and return key + URL when successful."""
 
-        if not base64_data:
+        if not data:
             return None
 
-        try:
-            binary = base64.b64decode(base64_data)
-        except Exception as exc:  # noqa: BLE001 - handle decoding issues explicitly
-            logger.error("Failed to decode screenshot base64 payload: %s", exc)
-            return None
-
-        extension = mimetypes.guess_extension(content_type) or ".png"
+        extension = extension_for_content_type(content_type)
         # Ensure prefix ends with / if provided
         normalized_prefix = prefix.rstrip("/") + "/" if prefix else ""
         key = f"{normalized_prefix}{uuid.uuid4().hex}{extension}"
         
         logger.info(f"🔍 Storage debug - prefix: '{prefix}' → normalized: '{normalized_prefix}' → key: '{key}'")
 
-        loop = asyncio.get_running_loop()
-
+        multipart = len(data) >= self._multipart_threshold
+        _upload_stats["in_flight"] += 1
+        started = time.perf_counter()
         try:
-            await loop.run_in_executor(None, self._put_object_sync, key, binary, content_type)
+            if multipart:
+                await self._multipart_upload(key, data, content_type)
+            else:
+                await self._run(self._put_object_sync, key, data, content_type)
         except Exception as exc:  # noqa: BLE001 - ensure upload errors are logged
+            _upload_stats["failed"] += 1
             logger.error("Screenshot upload error: %s", exc)
             return None
+        finally:
+            _upload_stats["in_flight"] -= 1
+        _record_upload(len(data), time.perf_counter() - started, multipart)
 
         url = self._build_public_url(key)
         logger.info(f"🔍 Built URL: '{url}' from key: '{key}'")
         return StoredObject(key=key, url=url) if url else None
 
+    async def upload_base64_image(
+        self,
+        *,
+        base64_data: str,
+        content_type: str = "image/png",
+        prefix: str = "screenshots/",
+    ) -> Optional[StoredObject]:
+        """Upload a base64 encoded image. Prefer ``upload_image`` when bytes are at hand."""
+
+        if not base64_data:
+            return None
+
+        try:
+            binary = base64.b64decode(base64_data)
+        except Exception as exc:  # noqa: BLE001 - handle decoding issues explicitly
+            logger.error("Failed to decode screenshot base64 payload: %s", exc)
+            return None
+
+        return await self.upload_image(data=binary, content_type=content_type, prefix=prefix)
+
+    async def _run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
     def _put_object_sync(self, key: str, body: bytes, content_type: str) -> None:
         params = {
             "Bucket": self._config.bucket,
@@ -98,30 +154,70 @@ class StorageService:
             "Body": body,
             "ContentType": content_type,
         }
+        try:
+            self._call_with_acl(self._client.put_object, params)
+        except (ClientError, BotoCoreError) as exc:  # noqa: BLE001
+            logger.error("S3 sync upload failed for %s: %s", key, exc)
+            raise
 
-        if self._acl_supported:
-            params["ACL"] = "public-read"
+    def _call_with_acl(self, call: Callable[..., Dict[str, Any]], params: Dict[str, Any]) -> Dict[str, Any]:
+        """Make an object-creating call with a public-read ACL, dropping it for buckets that refuse ACLs."""
 
+        if not self._acl_supported:
+            return call(**params)
         try:
-            self._client.put_object(**params)
-            return
+            return call(**params, ACL="public-read")
         except ClientError as exc:  # noqa: BLE001
             error_code = (exc.response or {}).get("Error", {}).get("Code")
-            if self._acl_supported and error_code == "AccessControlListNotSupported":
-                self._acl_supported = False
-                logger.warning(
-                    "Bucket %s does not accept ACLs; retrying upload without ACL",
-                    self._config.bucket,
+            if error_code != "AccessControlListNotSupported":
+                raise
+            self._acl_supported = False
+            logger.warning(
+                "Bucket %s does not accept ACLs; retrying upload without ACL",
+                self._config.bucket,
+            )
+            return call(**params)
+
+    async def _multipart_upload(self, key: str, body: bytes, content_type: str) -> None:
+        """Upload ``body`` in parts on the storage pool; aborts the upload if any part fails."""
+
+        bucket = self._config.bucket
+        created = await self._run(
+            self._call_with_acl,
+            self._client.create_multipart_upload,
+            {"Bucket": bucket, "Key": key, "ContentType": content_type},
+        )
+        upload_id = created["UploadId"]
+        chunk = self._multipart_chunk_size
+        try:
+            parts = await asyncio.gather(
+                *(
+                    self._run(self._upload_part_sync, key, upload_id, number, body[offset:offset + chunk])
+                    for number, offset in enumerate(range(0, len(body), chunk), start=1)
                 )
-                params.pop("ACL", None)
-                self._client.put_object(**params)
-                return
-            logger.error("S3 sync upload failed for %s: %s", key, exc)
-            raise
-        except BotoCoreError as exc:  # noqa: BLE001
-            logger.error("S3 sync upload failed for %s: %s", key, exc)
+            )
+            await self._run(
+                self._client.complete_multipart_upload,
+                Bucket=bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+        except BaseException as exc:
+            logger.error("S3 multipart upload failed for %s: %s", key, exc)
+            # Otherwise the uploaded parts stay in the bucket, and are billed, until a lifecycle rule removes them
+            try:
+                await self._run(self._client.abort_multipart_upload, Bucket=bucket, Key=key, UploadId=upload_id)
+            except Exception as abort_exc:  # noqa: BLE001 - the original error is the one to report
+                logger.warning("Could not abort multipart upload %s for %s: %s", upload_id, key, abort_exc)
             raise
 
+    def _upload_part_sync(self, key: str, upload_id: str, number: int, body: bytes) -> Dict[str, Any]:
+        response = self._client.upload_part(
+            Bucket=self._config.bucket, Key=key, UploadId=upload_id, PartNumber=number, Body=body
+        )
+        return {"ETag": response["ETag"], "PartNumber": number}
+
     def _build_public_url(self, key: str) -> Optional[str]:
         base_url = self._config.base_url
         if base_url:
@@ -142,10 +238,8 @@ class StorageService:
         if not key:
             return False
 
-        loop = asyncio.get_running_loop()
-
         try:
-            await loop.run_in_executor(None, self._delete_object_sync, key)
+            await self._run(self._delete_object_sync, key)
             return True
         except Exception as exc:  # noqa: BLE001 - keep cleanup resilient
             logger.error("Failed to delete storage object %s: %s", key, exc)
@@ -165,6 +259,49 @@ class StorageService:
             logger.error("S3 delete failed for %s: %s", key, exc)
             raise
 
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+_upload_stats: Dict[str, int] = {
+    "uploads": 0,
+    "multipart_uploads": 0,
+    "failed": 0,
+    "in_flight": 0,
+    "bytes_uploaded": 0,
+}
+# (bytes, seconds) of recent successful uploads
+_recent_uploads: Deque[Tuple[int, float]] = deque(maxlen=200)
+
+
+def _record_upload(size: int, seconds: float, multipart: bool) -> None:
+    _upload_stats["uploads"] += 1
+    _upload_stats["multipart_uploads"] += multipart
+    _upload_stats["bytes_uploaded"] += size
+    _recent_uploads.append((size, seconds))
+
+
+def get_storage_stats() -> Dict[str, Any]:
+    """Process-wide upload counts, plus latency percentiles and throughput over recent uploads."""
+
+    latencies = sorted(seconds for _, seconds in _recent_uploads)
+    total_seconds = sum(latencies)
+
+    def percentile_ms(fraction: float) -> Optional[float]:
+        if not latencies:
+            return None
+        return round(latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000, 1)
+
+    return {
+        **_upload_stats,
+        "latency_ms_p50": percentile_ms(0.5),
+        "latency_ms_p95": percentile_ms(0.95),
+        # Per upload, not aggregate: concurrent uploads each count their own wall time
+        "throughput_mb_per_s": (
+            round(sum(size for size, _ in _recent_uploads) / total_seconds / 1e6, 2) if total_seconds else None
+        ),
+    }
+
 
 _storage_service: Optional[StorageService] = None
 
@@ -196,6 +333,9 @@ def get_storage_service() -> Optional[StorageService]:
         config=config,
         access_key=settings.AWS_S3_ACCESS_KEY_ID,
         secret_key=settings.AWS_S3_SECRET_ACCESS_KEY,
+        max_connections=settings.AWS_S3_MAX_CONNECTIONS,
+        multipart_threshold=max(_MIN_PART_SIZE, int(settings.AWS_S3_MULTIPART_THRESHOLD_MB * _MIB)),
+        multipart_chunk_size=max(_MIN_PART_SIZE, int(settings.AWS_S3_MULTIPART_CHUNK_MB * _MIB)),
     )
 
     logger.info("Initialized S3 storage service for bucket %s", config.bucket)
@@ -205,4 +345,6 @@ def get_storage_service() -> Optional[StorageService]:
 def cleanup_storage_service() -> None:
     """Reset the singleton (useful for tests)."""
     global _storage_service
+    if _storage_service is not None:
+        _storage_service.close()
     _storage_service = None
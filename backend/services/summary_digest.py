@@ -0,0 +1,119 @@
+"""Compact per-page digests for the funnel executive summary.
+
+A digest is taken from a page's analysis JSON as soon as the page finishes, so the summary
+prompt is ready the moment the last page completes. Every field is length-capped and long
+funnels keep only the most telling pages in full, so the prompt stays the same size however
+many pages the funnel has.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+_TEXT_CHARS = 140
+_URL_CHARS = 100
+
+
+@dataclass(frozen=True)
+class PageDigest:
+    index: int  # 1-based position in the funnel
+    url: str
+    page_type: str
+    score: int
+    weakest: str  # Lowest-scoring criterion, e.g. "proof 52"
+    headline: Optional[str] = None
+    top_cta: Optional[str] = None
+    top_issue: Optional[str] = None
+
+    def render(self) -> str:
+        lines = [
+            f"Page {self.index} ({self.page_type}): Score {self.score}/100, weakest {self.weakest}",
+            f"  URL: {self.url}",
+        ]
+        if self.headline:
+            lines.append(f"  Headline Suggestion: {self.headline}")
+        if self.top_cta:
+            lines.append(f"  Top CTA: {self.top_cta}")
+        if self.top_issue:
+            lines.append(f"  Top Issue: {self.top_issue}")
+        return "\n".join(lines)
+
+
+def build_page_digest(index: int, url: str, result: Dict[str, Any]) -> PageDigest:
+    """Digest one page's analysis result (as returned by the LLM provider)."""
+
+    scores = result.get("scores") if isinstance(result.get("scores"), dict) else {}
+    numeric = {key: value for key, value in scores.items() if isinstance(value, (int, float))}
+    score = int(sum(numeric.values()) // 5) if numeric else 0
+    weakest_key = min(numeric, key=numeric.get) if numeric else None
+
+    return PageDigest(
+        index=index,
+        url=_clip(url, _URL_CHARS),
+        page_type=str(result.get("page_type") or "unknown"),
+        score=score,
+        weakest=f"{weakest_key} {int(numeric[weakest_key])}" if weakest_key else "n/a",
+        headline=_clip(result.get("headline_recommendation")),
+        top_cta=_top_cta(result.get("cta_recommendations")),
+        top_issue=_top_issue(result),
+    )
+
+
+def render_digests(digests: List[PageDigest], max_pages: int) -> str:
+    """Render up to ``max_pages`` digests in full; the rest are folded into one aggregate line.
+
+    The first and last pages are always kept (entry and conversion), then the lowest scoring.
+    """
+
+    if len(digests) <= max_pages:
+        return "\n".join(digest.render() for digest in digests)
+
+    keep = {digests[0].index, digests[-1].index}
+    for digest in sorted(digests[1:-1], key=lambda d: d.score):
+        if len(keep) >= max(2, max_pages):
+            break
+        keep.add(digest.index)
+
+    shown = [digest for digest in digests if digest.index in keep]
+    folded = [digest for digest in digests if digest.index not in keep]
+    page_types = sorted({digest.page_type for digest in folded})
+    scores = [digest.score for digest in folded]
+    aggregate = (
+        f"Other pages ({len(folded)}): types {', '.join(page_types[:6])}; "
+        f"scores {min(scores)}-{max(scores)} (mean {sum(scores) // len(scores)})"
+    )
+    return "\n".join([digest.render() for digest in shown] + [aggregate])
+
+
+def _top_cta(value: Any) -> Optional[str]:
+    if not isinstance(value, list) or not value:
+        return None
+    first = value[0]
+    if isinstance(first, dict):
+        parts = [str(first[key]) for key in ("copy", "location") if first.get(key)]
+        return _clip(" | ".join(parts)) if parts else None
+    return _clip(str(first))
+
+
+def _top_issue(result: Dict[str, Any]) -> Optional[str]:
+    alerts = result.get("priority_alerts")
+    if isinstance(alerts, list):
+        ranked = sorted(
+            (alert for alert in alerts if isinstance(alert, dict) and alert.get("issue")),
+            key=lambda alert: {"high": 0, "medium": 1}.get(str(alert.get("severity")).lower(), 2),
+        )
+        if ranked:
+            return _clip(ranked[0]["issue"])
+    feedback = result.get("feedback")
+    if isinstance(feedback, str) and feedback.strip():
+        return _clip(re.split(r"(?<=[.!?])\s", feedback.strip(), maxsplit=1)[0])
+    return None
+
+
+def _clip(value: Any, limit: int = _TEXT_CHARS) -> Optional[str]:
+    if not value:
+        return None
+    text = " ".join(str(value).split())
+    return text if len(text) <= limit else text[: limit - 1].rstrip() + "…"
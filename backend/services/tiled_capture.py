@@ -0,0 +1,172 @@
+"""Tiled capture support for very tall pages.
+
+Instead of one full-page bitmap, tall pages are captured as viewport-height tiles. Each tile
+is handed to a sink (typically ``TileUploader``) as soon as it is encoded and folded into a
+low-resolution overview, so memory stays proportional to one tile rather than the page.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import logging
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from ..utils.images import PIL_AVAILABLE, EncodedImage, encode_pil
+from .storage import StorageService
+
+if TYPE_CHECKING:
+    from .screenshot_store import ScreenshotStore
+
+if PIL_AVAILABLE:
+    from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ScreenshotTile:
+    index: int
+    offset_y: int
+    width: int
+    height: int
+    image: EncodedImage
+
+    def describe(self) -> Dict[str, int]:
+        return {"index": self.index, "offset_y": self.offset_y, "width": self.width, "height": self.height}
+
+
+TileSink = Callable[[ScreenshotTile], Awaitable[None]]
+
+
+def plan_tiles(page_height: int, tile_height: int, max_height: int) -> List[tuple[int, int]]:
+    """Return ``(offset_y, height)`` pairs covering the page up to ``max_height``."""
+
+    captured = max(0, min(page_height, max_height))
+    tile_height = max(1, tile_height)
+    return [(y, min(tile_height, captured - y)) for y in range(0, captured, tile_height)]
+
+
+class OverviewBuilder:
+    """Downscales tiles into one low-resolution image as they arrive."""
+
+    def __init__(self, *, width: int, total_height: int, max_height: int) -> None:
+        self._scale = min(1.0, max_height / total_height) if total_height > 0 else 1.0
+        self._width = max(1, round(width * self._scale))
+        self._height = max(1, round(total_height * self._scale))
+        self._canvas = Image.new("RGB", (self._width, self._height), "white") if PIL_AVAILABLE else None
+        self._first_tile: Optional[EncodedImage] = None
+
+    def add(self, tile: ScreenshotTile) -> None:
+        """Paste a downscaled copy of ``tile``. CPU-bound: call from a worker thread."""
+
+        if self._first_tile is None:
+            self._first_tile = tile.image
+        if self._canvas is None:
+            return
+
+        top = round(tile.offset_y * self._scale)
+        bottom = min(self._height, round((tile.offset_y + tile.height) * self._scale))
+        if bottom <= top:
+            return
+        with Image.open(io.BytesIO(tile.image.data)) as source:
+            scaled = source.convert("RGB").resize((self._width, bottom - top), Image.Resampling.LANCZOS)
+        self._canvas.paste(scaled, (0, top))
+
+    def encode(self, *, image_format: str, quality_tier: str) -> Optional[EncodedImage]:
+        """Encode the overview, or fall back to the first tile when Pillow is unavailable."""
+
+        if self._canvas is None:
+            return self._first_tile
+        return encode_pil(self._canvas, image_format=image_format, quality_tier=quality_tier)
+
+
+class TileUploader:
+    """Tile sink that streams tiles to object storage while capture continues.
+
+    At most ``max_in_flight`` uploads run at once; the capture loop waits for a free slot,
+    which bounds how many encoded tiles are held in memory. With a ``store``, tiles go
+    through its dedupe (matched per tile position of ``source_url``), so a rerun of an
+    unchanged page references the tiles already stored instead of uploading them again.
+    """
+
+    def __init__(
+        self,
+        storage: StorageService,
+        *,
+        store: Optional["ScreenshotStore"] = None,
+        source_url: str = "",
+        prefix: str = "screenshots/tiles/",
+        max_in_flight: int = 2,
+    ) -> None:
+        self._storage = storage
+        self._store = store
+        self._source_url = source_url
+        self._prefix = prefix
+        self._slots = asyncio.Semaphore(max(1, max_in_flight))
+        self._tasks: List[asyncio.Task[None]] = []
+        self._entries: Dict[int, Dict[str, Any]] = {}
+        self._discarded = False
+        self.failed = 0
+
+    async def __call__(self, tile: ScreenshotTile) -> None:
+        if self._discarded:
+            # The caller gave up on this capture (e.g. timed out) while it kept running
+            return
+        await self._slots.acquire()
+        self._tasks.append(asyncio.create_task(self._upload(tile)))
+
+    async def _upload(self, tile: ScreenshotTile) -> None:
+        try:
+            if self._store is not None:
+                stored = await self._store.store(
+                    tile.image, source_url=f"{self._source_url}#tile-{tile.index}", prefix=self._prefix
+                )
+            else:
+                stored = await self._storage.upload_image(
+                    data=tile.image.data,
+                    content_type=tile.image.content_type,
+                    prefix=self._prefix,
+                )
+            if stored:
+                self._entries[tile.index] = {**tile.describe(), "key": stored.key, "url": stored.url}
+            else:
+                self.failed += 1
+        finally:
+            self._slots.release()
+
+    async def finish(self) -> List[Dict[str, Any]]:
+        """Wait for pending uploads and return manifest entries ordered by offset."""
+
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            self._tasks.clear()
+        return [self._entries[index] for index in sorted(self._entries)]
+
+    async def discard(self) -> None:
+        """Abandon the capture: stop pending uploads and drop the tiles already stored."""
+
+        self._discarded = True
+        for task in self._tasks:
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            self._tasks.clear()
+        keys = [entry["key"] for entry in self._entries.values()]
+        if self._store is not None:
+            # Deduplicated tiles may be shared with earlier analyses: release, don't delete
+            await self._store.release_taken(keys)
+        else:
+            for key in keys:
+                await self._storage.delete_object(key)
+        self._entries.clear()
+
+
+def tile_storage_keys(manifest: Any) -> List[str]:
+    """Extract storage keys from a persisted tile manifest, tolerating malformed data."""
+
+    if not isinstance(manifest, dict):
+        return []
+    tiles: Iterable[Any] = manifest.get("tiles") or []
+    return [tile["key"] for tile in tiles if isinstance(tile, dict) and tile.get("key")]
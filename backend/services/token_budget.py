@@ -0,0 +1,150 @@
+"""Token estimates and per-plan budgets for page analysis and summary prompts.
+
+A plan's budget picks the model, the reply fields to request (only those the plan displays)
+and the prompt and completion sizes. Estimates are made before each call so the prompt can
+be trimmed and the screenshot sized to the plan's budget. Image costs follow OpenAI's vision accounting: ``low`` detail is a
+flat 85 tokens; ``high`` detail scales the image to fit 2048x2048, then so the shortest side
+is at most 768px, and charges 170 tokens per 512px tile plus 85.
+"""
+
+from __future__ import annotations
+
+import io
+import math
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from ..utils.config import settings
+from ..utils.images import PIL_AVAILABLE, EncodedImage, encode_pil, normalize_image_format
+from .plan_gating import (
+    FREE_FEEDBACK_CHARS,
+    FREE_SUMMARY_CHARS,
+    PLAN_PAGE_FIELDS,
+    get_plan_level,
+)
+
+if PIL_AVAILABLE:
+    from PIL import Image
+
+LOW_DETAIL_TOKENS = 85
+_TILE_TOKENS = 170
+_TILE_SIZE = 512
+_HIGH_DETAIL_MAX_SIDE = 2048
+_HIGH_DETAIL_SHORT_SIDE = 768
+
+
+@dataclass(frozen=True)
+class PromptBudget:
+    max_prompt_tokens: int  # Text of the system and user messages
+    image_detail: str  # "high" or "low" for the desktop screenshot
+    max_image_aspect: float  # Taller screenshots are cropped from the top to height = width * aspect
+    include_mobile: bool = True
+    model: str = "gpt-4o"
+    max_completion_tokens: int = 3000
+    result_fields: Optional[Tuple[str, ...]] = None  # Fields requested from the model (None = full schema)
+    feedback_chars: Optional[int] = None  # Ask for feedback that fits what the plan displays
+    summary_model: str = "gpt-4o"
+    summary_max_tokens: int = 500
+    summary_chars: Optional[int] = None
+
+
+# Keyed by plan level (see plan_gating.PLAN_HIERARCHY). Only the fields a plan displays are
+# requested, and the free tier (scores plus truncated feedback) runs on the small model.
+PLAN_BUDGETS: Dict[int, PromptBudget] = {
+    0: PromptBudget(
+        max_prompt_tokens=3000,
+        image_detail="low",
+        max_image_aspect=1.5,
+        include_mobile=False,
+        model="gpt-4o-mini",
+        max_completion_tokens=400,
+        result_fields=PLAN_PAGE_FIELDS[0],
+        feedback_chars=FREE_FEEDBACK_CHARS,
+        summary_model="gpt-4o-mini",
+        summary_max_tokens=120,
+        summary_chars=FREE_SUMMARY_CHARS,
+    ),
+    1: PromptBudget(
+        max_prompt_tokens=5000,
+        image_detail="high",
+        max_image_aspect=2.0,
+        max_completion_tokens=1500,
+        result_fields=PLAN_PAGE_FIELDS[1],
+    ),
+    2: PromptBudget(max_prompt_tokens=8000, image_detail="high", max_image_aspect=2.5),
+}
+
+
+def budget_for_plan(plan: Optional[str]) -> PromptBudget:
+    return PLAN_BUDGETS.get(get_plan_level(plan), PLAN_BUDGETS[0])
+
+
+def estimate_text_tokens(text: str) -> int:
+    """Roughly four characters per token for English prose and markup."""
+    return math.ceil(len(text) / 4)
+
+
+def high_detail_size(width: int, height: int) -> Tuple[int, int]:
+    """Dimensions the API resizes a ``high`` detail image to before tiling."""
+
+    scale = min(1.0, _HIGH_DETAIL_MAX_SIDE / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, _HIGH_DETAIL_SHORT_SIDE / min(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def estimate_image_tokens(width: Optional[int], height: Optional[int], detail: str) -> int:
+    if detail == "low":
+        return LOW_DETAIL_TOKENS
+    if not width or not height:
+        # Unknown size: assume the largest high-detail cost (2048x768 → 4x2 tiles)
+        return LOW_DETAIL_TOKENS + _TILE_TOKENS * 8
+    scaled_width, scaled_height = high_detail_size(width, height)
+    tiles = math.ceil(scaled_width / _TILE_SIZE) * math.ceil(scaled_height / _TILE_SIZE)
+    return LOW_DETAIL_TOKENS + _TILE_TOKENS * tiles
+
+
+@dataclass
+class VisionInput:
+    image: EncodedImage
+    detail: str
+    estimated_tokens: int
+    cropped: bool = False  # Only the top of the page is shown
+    regions: int = 0  # Crops of elements further down, stacked below the fold (see vision_preprocess)
+
+
+def prepare_vision_image(image: EncodedImage, *, detail: str, max_aspect: float) -> VisionInput:
+    """Crop a tall capture to ``max_aspect`` and downscale it to what the model will see.
+
+    Sending pixels the API discards only costs upload time, so the image is resized to the
+    post-scaling size for ``detail``. CPU-bound: call from a worker thread.
+    """
+
+    if not PIL_AVAILABLE:
+        return VisionInput(image, detail, estimate_image_tokens(image.width, image.height, detail))
+
+    with Image.open(io.BytesIO(image.data)) as source:
+        width, height = source.size
+        cropped = height > width * max_aspect
+        frame = source.crop((0, 0, width, int(width * max_aspect))) if cropped else source.copy()
+
+    if detail == "low":
+        target = (_TILE_SIZE, _TILE_SIZE)
+        frame.thumbnail(target)
+    else:
+        target = high_detail_size(*frame.size)
+        if target != frame.size:
+            frame = frame.resize(target, Image.Resampling.LANCZOS)
+
+    if not cropped and frame.size == (width, height):
+        prepared = image
+    else:
+        image_format = normalize_image_format(image.content_type.split("/")[-1])
+        prepared = encode_pil(frame, image_format=image_format, quality_tier=settings.SCREENSHOT_QUALITY)
+
+    return VisionInput(
+        image=prepared,
+        detail=detail,
+        estimated_tokens=estimate_image_tokens(frame.size[0], frame.size[1], detail),
+        cropped=cropped,
+    )
@@ -0,0 +1,226 @@
+"""Build the LLM image input from a full-page capture: the fold plus crops of key regions.
+
+Instead of the top of a long page, the model sees the above-the-fold area at native
+resolution followed by downscaled crops of the CTAs, forms and testimonials further down
+(boxes come from ``visual_elements``). The composite is capped at ``width * max_aspect``
+like any other vision input, then sized by ``prepare_vision_image``. The image work is
+CPU-bound and runs in a small process pool so it does not hold up the event loop or the GIL.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import io
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..utils.config import settings
+from ..utils.images import PIL_AVAILABLE, EncodedImage, encode_pil, normalize_image_format
+from .token_budget import VisionInput, prepare_vision_image
+
+if PIL_AVAILABLE:
+    from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Crops are taken in this order until the composite is full
+REGION_PRIORITY = ("cta", "form", "testimonial")
+
+_REGION_PADDING = 24  # CSS px of context around each element
+_SEPARATOR_PX = 8
+_SEPARATOR_COLOR = (200, 200, 200)
+
+
+@dataclass(frozen=True)
+class Region:
+    kind: str  # One of REGION_PRIORITY
+    x: int
+    y: int
+    width: int
+    height: int
+
+    @property
+    def bottom(self) -> int:
+        return self.y + self.height
+
+
+def regions_from_visual_elements(visual_elements: Optional[Dict[str, Any]]) -> List[Region]:
+    """Element boxes (page CSS pixels) recorded by the settle/extract script, in priority order."""
+
+    if not visual_elements:
+        return []
+    boxes: List[Region] = []
+    for button in visual_elements.get("buttons") or []:
+        region = _region("cta", button.get("box") if isinstance(button, dict) else None)
+        if region:
+            boxes.append(region)
+    extra = visual_elements.get("regions") or {}
+    for kind, key in (("form", "forms"), ("testimonial", "testimonials")):
+        for box in extra.get(key) or []:
+            region = _region(kind, box)
+            if region:
+                boxes.append(region)
+    return sorted(boxes, key=lambda region: (REGION_PRIORITY.index(region.kind), region.y))
+
+
+def compose_vision_image(
+    image: EncodedImage,
+    regions: List[Region],
+    *,
+    fold_height: int,
+    viewport_width: Optional[int],
+    max_aspect: float,
+    region_scale: float = 0.5,
+) -> Optional[Tuple[EncodedImage, int]]:
+    """Fold at native resolution, then downscaled crops of ``regions`` below it.
+
+    ``fold_height`` and the regions are in CSS pixels; ``viewport_width`` maps them onto the
+    capture's device pixels. Returns ``(EncodedImage, regions_included)``, or None when
+    nothing below the fold is worth including (the caller then uses a plain top crop).
+    """
+
+    with Image.open(io.BytesIO(image.data)) as source:
+        source.load()
+        width, height = source.size
+        scale = width / viewport_width if viewport_width else 1.0
+        fold_px = min(height, int(fold_height * scale))
+        max_height = int(width * max_aspect)
+        if fold_px <= 0 or height <= fold_px:
+            return None
+
+        crops: List["Image.Image"] = []
+        covered: List[Region] = []
+        used = fold_px
+        for region in regions:
+            if region.y * scale >= height or region.bottom * scale <= fold_px:
+                continue  # Outside the capture, or already visible in the fold
+            if any(_overlaps(region, seen) for seen in covered):
+                continue
+            top = max(fold_px, int((region.y - _REGION_PADDING) * scale))
+            bottom = min(height, int((region.bottom + _REGION_PADDING) * scale))
+            left = max(0, int((region.x - _REGION_PADDING) * scale))
+            right = min(width, int((region.x + region.width + _REGION_PADDING) * scale))
+            if bottom <= top or right <= left:
+                continue
+            # Full-width strips keep each element in its layout context
+            if right - left > width / 2:
+                left, right = 0, width
+            crop = source.crop((left, top, right, bottom))
+            crop = crop.resize(
+                (max(1, int(crop.width * region_scale)), max(1, int(crop.height * region_scale))),
+                Image.Resampling.LANCZOS,
+            )
+            if used + _SEPARATOR_PX + crop.height > max_height:
+                continue
+            crops.append(crop.convert("RGB"))
+            covered.append(region)
+            used += _SEPARATOR_PX + crop.height
+
+        if not crops:
+            return None
+
+        canvas = Image.new("RGB", (width, used), _SEPARATOR_COLOR)
+        canvas.paste(source.crop((0, 0, width, fold_px)).convert("RGB"), (0, 0))
+
+    offset = fold_px
+    for crop in crops:
+        offset += _SEPARATOR_PX
+        canvas.paste(crop, ((width - crop.width) // 2, offset))
+        offset += crop.height
+
+    image_format = normalize_image_format(image.content_type.split("/")[-1])
+    composite = encode_pil(canvas, image_format=image_format, quality_tier=settings.SCREENSHOT_QUALITY)
+    return composite, len(crops)
+
+
+def build_vision_input(
+    image: EncodedImage,
+    visual_elements: Optional[Dict[str, Any]],
+    *,
+    detail: str,
+    max_aspect: float,
+) -> VisionInput:
+    """Composite when element boxes are known, otherwise the plain top crop. Runs in a worker."""
+
+    regions = regions_from_visual_elements(visual_elements)
+    composed = None
+    if PIL_AVAILABLE and regions:
+        try:
+            composed = compose_vision_image(
+                image,
+                regions,
+                fold_height=int(visual_elements.get("viewportHeight") or 0),
+                viewport_width=visual_elements.get("viewportWidth"),
+                max_aspect=max_aspect,
+            )
+        except Exception as exc:  # noqa: BLE001 - fall back to the plain crop
+            logger.warning("Vision composite failed, sending the top of the page: %s", exc)
+    if composed is None:
+        return prepare_vision_image(image, detail=detail, max_aspect=max_aspect)
+
+    composite, included = composed
+    vision = prepare_vision_image(composite, detail=detail, max_aspect=max_aspect)
+    return replace(vision, cropped=True, regions=included)
+
+
+_vision_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _get_vision_executor() -> Optional[ProcessPoolExecutor]:
+    global _vision_executor
+    if settings.LLM_VISION_WORKERS <= 0:
+        return None
+    if _vision_executor is None:
+        # Spawned, not forked: the API process runs an event loop, Playwright and boto3 threads
+        _vision_executor = ProcessPoolExecutor(
+            max_workers=settings.LLM_VISION_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _vision_executor
+
+
+async def preprocess_vision_input(
+    image: EncodedImage,
+    visual_elements: Optional[Dict[str, Any]],
+    *,
+    detail: str,
+    max_aspect: float,
+) -> VisionInput:
+    """Build the model's image input off the event loop (process pool, or a thread with 0 workers)."""
+
+    if not settings.LLM_VISION_COMPOSITE_ENABLED:
+        visual_elements = None
+    executor = _get_vision_executor()
+    if executor is None:
+        return await asyncio.to_thread(
+            build_vision_input, image, visual_elements, detail=detail, max_aspect=max_aspect
+        )
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        executor,
+        functools.partial(build_vision_input, image, visual_elements, detail=detail, max_aspect=max_aspect),
+    )
+
+
+def cleanup_vision_executor() -> None:
+    global _vision_executor
+    if _vision_executor is not None:
+        _vision_executor.shutdown(wait=False, cancel_futures=True)
+        _vision_executor = None
+
+
+def _region(kind: str, box: Any) -> Optional[Region]:
+    if not isinstance(box, dict):
+        return None
+    try:
+        region = Region(kind, int(box["x"]), int(box["y"]), int(box["width"]), int(box["height"]))
+    except (KeyError, TypeError, ValueError):
+        return None
+    return region if region.width > 0 and region.height > 0 else None
+
+
+def _overlaps(a: Region, b: Region) -> bool:
+    return a.y < b.bottom + _REGION_PADDING and b.y < a.bottom + _REGION_PADDING
@@ -0,0 +1,71 @@
+"""Shared fixtures for the backend tests."""
+
+import json
+from types import SimpleNamespace
+from typing import Any, Callable, Iterable, Optional, Tuple, Union
+
+import pytest
+
+from backend.services.openai_service import OpenAIService
+
+Reply = Union[str, dict]
+
+_DEFAULT_REPLY = {"scores": dict.fromkeys(("clarity", "value", "proof", "design", "flow"), 80), "feedback": "ok"}
+
+
+class FakeCompletions:
+    """Stands in for ``client.chat.completions``: records every request and answers it.
+
+    Queued ``replies`` are used first, then ``reply``. A reply is the text of the answer, a
+    dict (sent as JSON) or a callable that gets the request params and returns either (or
+    raises). Requests with ``stream=True`` get the reply in ``chunk_size`` deltas, followed by
+    a chunk with only the usage, as the API sends it.
+    """
+
+    def __init__(
+        self,
+        reply: Union[Reply, Callable[[dict], Reply]] = _DEFAULT_REPLY,
+        *,
+        replies: Iterable[Reply] = (),
+        usage: Optional[SimpleNamespace] = None,
+        chunk_size: int = 16,
+    ) -> None:
+        self.reply = reply
+        self.replies = list(replies)
+        self.usage = usage or SimpleNamespace(prompt_tokens=100, completion_tokens=50)
+        self.chunk_size = chunk_size
+        self.requests: list[dict] = []
+
+    @property
+    def calls(self) -> int:
+        return len(self.requests)
+
+    async def create(self, **params: Any):
+        self.requests.append(params)
+        reply = self.replies.pop(0) if self.replies else self.reply
+        if callable(reply):
+            reply = reply(params)
+        content = reply if isinstance(reply, str) else json.dumps(reply)
+        if params.get("stream"):
+            return self._chunks(content)
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=self.usage)
+
+    async def _chunks(self, content: str):
+        for start in range(0, len(content), self.chunk_size):
+            delta = SimpleNamespace(content=content[start:start + self.chunk_size])
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)], usage=None)
+        yield SimpleNamespace(choices=[], usage=self.usage)
+
+
+@pytest.fixture
+def fake_openai() -> Callable[..., Tuple[OpenAIService, FakeCompletions]]:
+    """Factory for an ``OpenAIService`` whose client is a ``FakeCompletions`` built from the arguments."""
+
+    def build(*args: Any, **kwargs: Any) -> Tuple[OpenAIService, FakeCompletions]:
+        completions = FakeCompletions(*args, **kwargs)
+        service = OpenAIService()
+        service.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+        return service, completions
+
+    return build
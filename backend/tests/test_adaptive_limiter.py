@@ -0,0 +1,74 @@
+"""Tests for the adaptive (AIMD) concurrency limiter."""
+
+import asyncio
+
+import pytest
+
+from backend.utils.adaptive_limiter import AdaptiveConcurrencyLimiter
+
+
+class _Overloaded(Exception):
+    pass
+
+
+def _limiter(**kwargs) -> AdaptiveConcurrencyLimiter:
+    return AdaptiveConcurrencyLimiter(is_congestion=lambda exc: isinstance(exc, _Overloaded), **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_in_flight_calls_never_exceed_the_limit():
+    limiter = _limiter(initial_limit=2, max_limit=2)
+    running = peak = 0
+
+    async def request():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    await asyncio.gather(*(limiter.run(request) for _ in range(6)))
+
+    assert peak == 2
+    stats = limiter.stats()
+    assert stats["calls"] == 6 and stats["in_flight"] == 0 and stats["queued"] == 0
+    assert stats["queue_wait_ms_max"] > 0
+
+
+@pytest.mark.asyncio
+async def test_limit_grows_while_saturated_and_healthy():
+    limiter = _limiter(initial_limit=2, max_limit=8)
+
+    async def request():
+        await asyncio.sleep(0.001)
+
+    for _ in range(5):
+        await asyncio.gather(*(limiter.run(request) for _ in range(limiter.limit + 2)))
+
+    assert limiter.limit > 2
+    assert limiter.stats()["increases"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_a_burst_of_rate_limits_cuts_the_limit_once():
+    limiter = _limiter(initial_limit=8)
+
+    async def rejected():
+        await asyncio.sleep(0.001)
+        raise _Overloaded()
+
+    results = await asyncio.gather(*(limiter.run(rejected) for _ in range(8)), return_exceptions=True)
+    assert all(isinstance(result, _Overloaded) for result in results)
+    assert limiter.limit == 4
+    assert limiter.stats()["decreases"] == 1
+
+    # A later, separate burst cuts it again
+    await asyncio.gather(limiter.run(rejected), return_exceptions=True)
+    assert limiter.limit == 2
+
+    async def bad_request():
+        raise ValueError("not a capacity problem")
+
+    with pytest.raises(ValueError):
+        await limiter.run(bad_request)
+    assert limiter.limit == 2
@@ -0,0 +1,73 @@
+"""Tests for the funnel analysis pipeline's handling of its early summary call."""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from backend.services.analyzer import analyze_funnel
+from backend.services.scraper import PageContent
+
+
+class _Provider:
+    def __init__(self) -> None:
+        self.summary_started = asyncio.Event()
+        self.summary_cancelled = False
+        self.summary_score = None
+
+    async def analyze_page(self, page_content, **kwargs):
+        # Out-of-range and string scores, as a model may send them: normalised before use
+        return {"scores": {"clarity": "90", "value": 140, "proof": 70, "design": 70, "flow": 70}, "feedback": "ok"}
+
+    async def analyze_funnel_summary(self, page_digests, overall_score, industry=None, **kwargs):
+        self.summary_score = overall_score
+        self.summary_started.set()
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            self.summary_cancelled = True
+            raise
+
+
+async def _scrape(urls):
+    return [PageContent(url=url, title="Example", headings=["H"], paragraphs=["P"], ctas=["Buy"]) for url in urls]
+
+
+async def _no_screenshots():
+    raise RuntimeError("no browser here")
+
+
+class _Progress:
+    """Progress tracker that fails once scoring starts, after the last page kicked off the summary."""
+
+    def __init__(self, provider: _Provider) -> None:
+        self._provider = provider
+
+    async def update(self, *, stage, **kwargs):
+        if stage == "scoring":
+            await self._provider.summary_started.wait()
+            raise RuntimeError("progress store down")
+
+    async def set_partial_result(self, *args, **kwargs):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_failure_after_the_last_page_cancels_the_early_summary():
+    provider = _Provider()
+    module = "backend.services.analyzer"
+    with patch(f"{module}._validate_urls_or_raise", return_value=None), patch(
+        f"{module}.scrape_funnel", _scrape
+    ), patch(f"{module}.get_llm_provider", return_value=provider), patch(
+        f"{module}.get_progress_tracker", return_value=_Progress(provider)
+    ), patch(f"{module}.get_page_index", return_value=None), patch(
+        f"{module}.get_storage_service", return_value=None
+    ), patch(f"{module}.get_screenshot_service", _no_screenshots), patch(
+        f"{module}.get_performance_analyzer", return_value=None
+    ), patch(f"{module}.get_source_analyzer", return_value=None):
+        with pytest.raises(RuntimeError, match="progress store down"):
+            await analyze_funnel(["https://example.com"], session=None)
+
+    assert provider.summary_cancelled
+    # The early summary got the overall score of the normalised page scores (90, 100, 70, 70, 70)
+    assert provider.summary_score == 80
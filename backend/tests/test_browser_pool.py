@@ -0,0 +1,156 @@
+"""Tests for the pooled Playwright browser contexts used by screenshots."""
+
+import asyncio
+
+import pytest
+
+from backend.services.browser_pool import BrowserContextPool
+from backend.services.device_profiles import DEVICE_PROFILES
+
+
+class _FakeFrame:
+    url = "about:blank"
+
+
+class _FakePage:
+    def __init__(self) -> None:
+        self.main_frame = _FakeFrame()
+        self.viewport = None
+        self.handlers = {}
+        self.closed = False
+
+    def on(self, event, handler) -> None:
+        self.handlers[event] = handler
+
+    def is_closed(self) -> bool:
+        return self.closed
+
+    async def set_viewport_size(self, size) -> None:
+        self.viewport = size
+
+    async def evaluate(self, script):  # noqa: ARG002
+        return 0
+
+    async def goto(self, url, **kwargs) -> None:  # noqa: ARG002
+        self.main_frame.url = url
+        self.handlers["framenavigated"](self.main_frame)
+
+
+class _FakeContext:
+    def __init__(self, **options) -> None:
+        self.options = options
+        self.page = _FakePage()
+        self.closed = False
+
+    async def new_page(self) -> _FakePage:
+        return self.page
+
+    async def clear_cookies(self) -> None:
+        return None
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class _FakeBrowser:
+    def __init__(self) -> None:
+        self.contexts: list[_FakeContext] = []
+
+    async def new_context(self, **kwargs) -> _FakeContext:
+        context = _FakeContext(**kwargs)
+        self.contexts.append(context)
+        return context
+
+
+@pytest.mark.asyncio
+async def test_pool_reuses_contexts_and_caps_concurrency():
+    browser = _FakeBrowser()
+    pool = BrowserContextPool(browser, max_contexts=2, max_navigations=10)
+    active = 0
+    peak = 0
+
+    async def capture() -> None:
+        nonlocal active, peak
+        async with pool.lease(viewport_width=1440, viewport_height=900) as lease:
+            active += 1
+            peak = max(peak, active)
+            await lease.page.goto("https://example.com")
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    await asyncio.gather(*(capture() for _ in range(6)))
+
+    stats = pool.stats()
+    assert peak == 2
+    assert len(browser.contexts) == 2
+    assert stats["leases"] == 6
+    assert stats["idle"] == 2
+    assert stats["in_use"] == 0
+
+
+@pytest.mark.asyncio
+async def test_pool_recycles_after_navigation_limit_and_errors():
+    browser = _FakeBrowser()
+    pool = BrowserContextPool(browser, max_contexts=1, max_navigations=2)
+
+    for _ in range(2):
+        async with pool.lease(viewport_width=800, viewport_height=600) as lease:
+            await lease.page.goto("https://example.com")
+
+    assert browser.contexts[0].closed
+    assert pool.stats()["contexts_recycled"] == 1
+
+    with pytest.raises(RuntimeError):
+        async with pool.lease(viewport_width=800, viewport_height=600):
+            raise RuntimeError("capture failed")
+
+    assert pool.stats()["contexts_recycled"] == 2
+    assert pool.stats()["idle"] == 0
+
+
+@pytest.mark.asyncio
+async def test_pool_keeps_device_profiles_in_separate_contexts():
+    browser = _FakeBrowser()
+    pool = BrowserContextPool(browser, max_contexts=2)
+    mobile = DEVICE_PROFILES["mobile"]
+
+    async with pool.lease(viewport_width=1440, viewport_height=900):
+        async with pool.lease(viewport_width=mobile.width, viewport_height=mobile.height, profile=mobile) as lease:
+            assert lease.context.options["is_mobile"] is True
+            assert lease.context.options["has_touch"] is True
+
+    async with pool.lease(viewport_width=mobile.width, viewport_height=mobile.height, profile=mobile) as lease:
+        assert lease.context is browser.contexts[1]
+
+    # A third profile evicts an idle context so the pool never holds more than max_contexts
+    tablet = DEVICE_PROFILES["tablet"]
+    async with pool.lease(viewport_width=tablet.width, viewport_height=tablet.height, profile=tablet):
+        pass
+
+    assert len(browser.contexts) == 3
+    assert pool.stats()["idle"] == 2
+    assert sum(context.closed for context in browser.contexts) == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_lease_closes_its_context():
+    browser = _FakeBrowser()
+    pool = BrowserContextPool(browser, max_contexts=1)
+    entered = asyncio.Event()
+
+    async def capture() -> None:
+        async with pool.lease(viewport_width=800, viewport_height=600):
+            entered.set()
+            await asyncio.sleep(60)
+
+    task = asyncio.create_task(capture())
+    await entered.wait()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    stats = pool.stats()
+    assert browser.contexts[0].closed
+    assert stats["leases_cancelled"] == 1
+    assert stats["in_use"] == 0
+    assert stats["idle"] == 0
@@ -0,0 +1,172 @@
+"""Tests for sharding captures across supervised browser processes."""
+
+import asyncio
+import os
+
+import pytest
+from playwright.async_api import Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+
+from backend.services.browser_pool import BrowserContextPool
+from backend.services.browser_supervisor import BrowserLimits, BrowserSupervisor
+
+
+class _FakeFrame:
+    url = "about:blank"
+
+
+class _FakePage:
+    def __init__(self) -> None:
+        self.main_frame = _FakeFrame()
+
+    def on(self, event, handler) -> None:  # noqa: ARG002
+        return None
+
+    def is_closed(self) -> bool:
+        return False
+
+    async def set_viewport_size(self, size) -> None:  # noqa: ARG002
+        return None
+
+    async def evaluate(self, script):  # noqa: ARG002
+        return 0
+
+    async def goto(self, url, **kwargs) -> None:  # noqa: ARG002
+        return None
+
+
+class _FakeContext:
+    async def new_page(self) -> _FakePage:
+        return _FakePage()
+
+    async def clear_cookies(self) -> None:
+        return None
+
+    async def close(self) -> None:
+        return None
+
+
+class _FakeCDPSession:
+    async def send(self, method):  # noqa: ARG002
+        # Report the test process itself so RSS is read from a real /proc entry
+        return {"processInfo": [{"id": os.getpid(), "type": "browser"}]}
+
+    async def detach(self) -> None:
+        return None
+
+
+class _FakeBrowser:
+    def __init__(self) -> None:
+        self.connected = True
+        self.closed = False
+        self.handlers = {}
+
+    def on(self, event, handler) -> None:
+        self.handlers[event] = handler
+
+    def is_connected(self) -> bool:
+        return self.connected
+
+    async def new_context(self, **kwargs) -> _FakeContext:  # noqa: ARG002
+        return _FakeContext()
+
+    async def new_browser_cdp_session(self) -> _FakeCDPSession:
+        return _FakeCDPSession()
+
+    async def close(self) -> None:
+        self.connected = False
+        self.closed = True
+
+    def crash(self) -> None:
+        self.connected = False
+        self.handlers["disconnected"](self)
+
+
+def _supervisor(size: int, **limits) -> tuple[BrowserSupervisor, list[_FakeBrowser]]:
+    launched: list[_FakeBrowser] = []
+
+    async def launcher() -> _FakeBrowser:
+        browser = _FakeBrowser()
+        launched.append(browser)
+        return browser
+
+    async def pool_factory(browser) -> BrowserContextPool:
+        return BrowserContextPool(browser, max_contexts=2)
+
+    limits.setdefault("health_interval_seconds", 3600)
+    return BrowserSupervisor(launcher, pool_factory, size=size, limits=BrowserLimits(**limits)), launched
+
+
+@pytest.mark.asyncio
+async def test_leases_spread_across_browsers():
+    supervisor, launched = _supervisor(2)
+    await supervisor.start()
+
+    async with supervisor.lease(viewport_width=800, viewport_height=600):
+        async with supervisor.lease(viewport_width=800, viewport_height=600):
+            in_use = [browser["pool"]["in_use"] for browser in supervisor.stats()["browsers"]]
+            assert in_use == [1, 1]
+
+    assert len(launched) == 2
+    await supervisor.close()
+
+
+@pytest.mark.asyncio
+async def test_slow_sites_do_not_count_as_browser_failures():
+    supervisor, launched = _supervisor(1, min_samples=2, max_failure_rate=0.4)
+    await supervisor.start()
+
+    site_errors = (
+        PlaywrightTimeoutError("Timeout 30000ms exceeded. navigating to \"https://slow.example.com\""),
+        PlaywrightError("net::ERR_NAME_NOT_RESOLVED at https://gone.example.com"),
+        asyncio.TimeoutError(),
+    )
+    for error in site_errors:
+        with pytest.raises(type(error)):
+            async with supervisor.lease(viewport_width=800, viewport_height=600):
+                raise error
+
+    await supervisor.check_health()
+    assert len(launched) == 1 and supervisor.stats()["restarts"]["failures"] == 0
+    await supervisor.close()
+
+
+@pytest.mark.asyncio
+async def test_failing_browser_is_drained_without_failing_in_flight_lease():
+    supervisor, launched = _supervisor(1, min_samples=2, max_failure_rate=0.4, drain_timeout_seconds=5)
+    await supervisor.start()
+
+    for _ in range(2):
+        with pytest.raises(PlaywrightError):
+            async with supervisor.lease(viewport_width=800, viewport_height=600):
+                raise PlaywrightError("Target crashed")
+
+    async with supervisor.lease(viewport_width=800, viewport_height=600) as lease:
+        await supervisor.check_health()
+        await asyncio.sleep(0.05)
+        # The replacement is serving new leases while this one is still running
+        assert len(launched) == 2
+        assert not launched[0].closed
+        await lease.page.goto("https://example.com")
+
+    await asyncio.sleep(0.6)
+    assert launched[0].closed
+    assert supervisor.stats()["restarts"]["failures"] == 1
+    await supervisor.close()
+
+
+@pytest.mark.asyncio
+async def test_crashed_and_oversized_browsers_are_replaced():
+    supervisor, launched = _supervisor(1, max_rss_mb=1)
+    await supervisor.start()
+
+    launched[0].crash()
+    await asyncio.sleep(0.05)
+    assert len(launched) == 2
+
+    await supervisor.check_health()
+    await asyncio.sleep(0.05)
+
+    stats = supervisor.stats()
+    assert stats["restarts"] == {"memory": 1, "failures": 0, "crash": 1}
+    assert len(launched) == 3
+    await supervisor.close()
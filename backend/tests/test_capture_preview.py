@@ -0,0 +1,52 @@
+"""Tests for progressive above-the-fold previews."""
+
+import asyncio
+
+import pytest
+
+from backend.services.capture_preview import PreviewPublisher
+from backend.services.progress_tracker import ProgressTracker
+from backend.services.storage import StoredObject
+from backend.utils.images import EncodedImage
+
+
+class _SlowStorage:
+    def __init__(self) -> None:
+        self.release = asyncio.Event()
+        self.deleted: list[str] = []
+
+    async def upload_image(self, *, data: bytes, content_type: str = "image/png", prefix: str = "screenshots/"):
+        await self.release.wait()
+        key = f"{prefix}preview.webp"
+        return StoredObject(key=key, url=f"https://cdn.example.com/{key}")
+
+    async def delete_object(self, key: str) -> bool:
+        self.deleted.append(key)
+        return True
+
+
+@pytest.mark.asyncio
+async def test_preview_uploads_in_background_and_sticks_to_progress():
+    tracker = ProgressTracker()
+    storage = _SlowStorage()
+    await tracker.update(analysis_id="a1", stage="screenshots", progress_percent=20, message="Capturing")
+    publisher = PreviewPublisher(storage, tracker, "a1")
+
+    # The capture is not held up by the upload
+    await asyncio.wait_for(publisher(EncodedImage(data=b"preview", content_type="image/webp")), timeout=0.1)
+    assert publisher.ready.is_set() and publisher.visual_elements is None
+
+    # Elements extracted before the full-page capture are kept for an LLM call made from the preview
+    await publisher.set_visual_elements({"buttons": [{"text": "Buy"}]})
+    assert publisher.visual_elements == {"buttons": [{"text": "Buy"}]}
+
+    storage.release.set()
+    stored = await publisher.stored()
+    assert (await tracker.get("a1"))["preview_url"] == stored.url
+
+    # Later progress updates keep showing the preview
+    await tracker.update(analysis_id="a1", stage="ai_analysis", progress_percent=45, message="Analyzing")
+    assert (await tracker.get("a1"))["preview_url"] == stored.url
+
+    await publisher.discard()
+    assert storage.deleted == ["screenshots/previews/preview.webp"]
@@ -0,0 +1,59 @@
+"""Tests for cancellation-safe capture deadlines."""
+
+import asyncio
+
+import pytest
+
+from backend.services.screenshot import get_capture_stats, run_capture
+
+
+@pytest.mark.asyncio
+async def test_run_capture_cancels_on_timeout():
+    cleaned_up = asyncio.Event()
+
+    async def slow_capture() -> str:
+        try:
+            await asyncio.sleep(60)
+        finally:
+            cleaned_up.set()
+        return "never"
+
+    before = get_capture_stats()
+    with pytest.raises(asyncio.TimeoutError):
+        await run_capture(slow_capture(), timeout_seconds=0.01, grace_seconds=1)
+
+    after = get_capture_stats()
+    assert cleaned_up.is_set()
+    assert after["cancelled"] == before["cancelled"] + 1
+    assert after["orphaned"] == before["orphaned"]
+
+
+@pytest.mark.asyncio
+async def test_run_capture_counts_orphans_that_ignore_cancellation():
+    release = asyncio.Event()
+
+    async def stubborn_capture() -> None:
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            await release.wait()
+
+    before = get_capture_stats()
+    with pytest.raises(asyncio.TimeoutError):
+        await run_capture(stubborn_capture(), timeout_seconds=0.01, grace_seconds=0.01)
+
+    assert get_capture_stats()["orphaned"] == before["orphaned"] + 1
+    assert get_capture_stats()["orphans_running"] == before["orphans_running"] + 1
+
+    release.set()
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert get_capture_stats()["orphans_running"] == before["orphans_running"]
+
+
+@pytest.mark.asyncio
+async def test_run_capture_returns_result():
+    async def fast_capture() -> str:
+        return "ok"
+
+    assert await run_capture(fast_capture(), timeout_seconds=1) == "ok"
@@ -0,0 +1,40 @@
+"""Tests for the bytes-first screenshot encoding helpers."""
+
+import base64
+import io
+
+import pytest
+
+from backend.utils.images import EncodedImage, encode_png
+
+PIL = pytest.importorskip("PIL.Image")
+
+
+def _png(width: int, height: int) -> bytes:
+    buffer = io.BytesIO()
+    PIL.new("RGB", (width, height), (240, 240, 240)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_encoded_image_builds_base64_lazily():
+    image = EncodedImage(data=b"\x89PNG-bytes", content_type="image/webp")
+
+    assert image._base64 is None
+    assert image.data_url() == "data:image/webp;base64," + base64.b64encode(b"\x89PNG-bytes").decode()
+    assert image._base64 is not None
+    assert image.extension == ".webp"
+
+
+def test_encode_png_transcodes_to_webp_and_falls_back_to_jpeg_for_tall_pages():
+    webp = encode_png(_png(200, 400), image_format="webp", quality_tier="low")
+    assert webp.content_type == "image/webp"
+    assert (webp.width, webp.height) == (200, 400)
+
+    tall = encode_png(_png(8, 17000), image_format="webp")
+    assert tall.content_type == "image/jpeg"
+    assert tall.data[:2] == b"\xff\xd8"
+
+
+def test_encode_png_passthrough_for_png():
+    source = _png(10, 10)
+    assert encode_png(source, image_format="png").data is source
@@ -0,0 +1,90 @@
+"""Tests for the offline LLM batch path."""
+
+import json
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from backend.models.database import Analysis, AnalysisPage, Base, User
+from backend.services.llm_batch import BatchJob, BatchRunner, LocalBatchBackend, parse_batch_output
+from backend.services.llm_telemetry import estimate_cost_usd, get_plan_usage_stats
+from backend.services.scraper import PageContent
+
+
+async def _scrape(urls):
+    # Unreachable sites yield no pages, as scrape_funnel does
+    return [
+        PageContent(url=url, title=f"Title {url}", headings=["H"], paragraphs=["P"], ctas=["Buy"])
+        for url in urls
+        if "offline" not in url
+    ]
+
+
+async def _responder(body):
+    text = json.dumps(body["messages"])
+    if "broken.example.com" in text:
+        raise RuntimeError("model error")
+    if body.get("response_format"):
+        reply = {"page_type": "sales", "scores": dict.fromkeys(("clarity", "value", "proof", "design", "flow"), 80), "feedback": "Good."}
+        return json.dumps(reply), {"prompt_tokens": 1000, "completion_tokens": 100}
+    return "Batch summary.", {"prompt_tokens": 500, "completion_tokens": 50}
+
+
+@pytest.mark.asyncio
+async def test_batch_run_stores_analyses_at_batch_prices(tmp_path):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+    usage_before = get_plan_usage_stats()
+
+    async with Session() as session:
+        user = User(email="agency@example.com", plan="pro", status="active", is_active=1)
+        session.add(user)
+        await session.commit()
+    jobs = [
+        BatchJob(urls=["https://a.example.com", "https://a.example.com/buy"], user_id=user.id, plan="pro"),
+        BatchJob(urls=["https://offline.example.com"], user_id=user.id, plan="pro"),
+        BatchJob(urls=["https://broken.example.com"], user_id=user.id, plan="pro", parent_analysis_id=None),
+    ]
+    runner = BatchRunner(LocalBatchBackend(_responder), work_dir=str(tmp_path), poll_seconds=0)
+    with patch("backend.services.llm_batch.scrape_funnel", _scrape):
+        analysis_ids = await runner.run(jobs, Session)
+
+    async with Session() as session:
+        analyses = {a.id: a for a in (await session.execute(select(Analysis))).scalars()}
+        page_count = len((await session.execute(select(AnalysisPage))).scalars().all())
+    await engine.dispose()
+
+    # The job with nothing scraped is skipped instead of aborting everyone else's results
+    assert len(analysis_ids) == 3 and analysis_ids[1] is None
+    assert len(analyses) == 2 and page_count == 3
+    first, broken = analyses[analysis_ids[0]], analyses[analysis_ids[2]]
+    assert first.summary == "Batch summary." and first.overall_score == 80
+    assert first.detailed_feedback[0]["page_type"] == "sales"
+
+    llm = first.pipeline_metrics["llm"]
+    assert first.pipeline_metrics["llm_provider"] == "batch:local"
+    assert get_plan_usage_stats() == usage_before  # Batch turnaround stays out of the live latency means
+    assert llm["calls"] == 3 and llm["fallbacks"] == 0 and all(call["batch"] for call in llm["per_call"])
+    full_price = 2 * estimate_cost_usd("gpt-4o", 1000, 100) + estimate_cost_usd("gpt-4o", 500, 50)
+    assert llm["cost_usd"] == pytest.approx(full_price / 2, abs=1e-6)
+
+    # Failed requests (the page and its summary) fall back to placeholders instead of failing the batch
+    assert broken.pipeline_metrics["llm"]["fallbacks"] == 2 and broken.summary
+    assert sorted(path.name.split("-")[-1] for path in tmp_path.iterdir()) == ["pages.jsonl", "summaries.jsonl"]
+
+
+def test_batch_output_errors_are_reported_per_request():
+    output = "\n".join(
+        json.dumps(line)
+        for line in (
+            {"custom_id": "ok", "response": {"status_code": 200, "body": {"model": "gpt-4o", "choices": [{"message": {"content": " hi "}}], "usage": {"prompt_tokens": 3}}}},
+            {"custom_id": "limited", "response": {"status_code": 429, "body": {"error": {"message": "rate limited"}}}, "error": None},
+        )
+    )
+    results = parse_batch_output(output)
+    assert results["ok"].content == "hi" and results["ok"].usage == {"prompt_tokens": 3}
+    assert results["limited"].content is None and results["limited"].error == "rate limited"
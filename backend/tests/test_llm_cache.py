@@ -0,0 +1,92 @@
+"""Tests for the persistent LLM response cache and usage telemetry."""
+
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from backend.services.llm_cache import CachedCompletion, LLMResponseCache, completion_cache_key
+from backend.services.llm_telemetry import begin_llm_usage
+from backend.services.scraper import PageContent
+from backend.utils.images import EncodedImage
+
+
+_SCORES = dict.fromkeys(("clarity", "value", "proof", "design", "flow"), 80)
+
+
+def _page() -> PageContent:
+    return PageContent(
+        url="https://example.com/checkout",
+        title="Checkout",
+        headings=["Complete your order"],
+        paragraphs=["Secure checkout"],
+        ctas=["Buy now"],
+    )
+
+
+def test_cache_key_covers_image_content_and_sampling_params():
+    image = EncodedImage(data=b"pixels", content_type="image/webp")
+    message = {"type": "image_url", "image_url": {"url": image.data_url(), "detail": "high"}}
+    base = {"model": "gpt-4o", "temperature": 0.2, "messages": [{"role": "user", "content": [message]}]}
+
+    same = json.loads(json.dumps(base))
+    other_image = json.loads(json.dumps(base))
+    other_image["messages"][0]["content"][0]["image_url"]["url"] = EncodedImage(data=b"other").data_url()
+    warmer = {**base, "temperature": 0.7}
+
+    assert completion_cache_key(base) == completion_cache_key(same)
+    assert completion_cache_key(base) != completion_cache_key(other_image)
+    assert completion_cache_key(base) != completion_cache_key(warmer)
+
+
+@pytest.mark.asyncio
+async def test_cache_evicts_least_recently_used_and_expired(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=3600, max_entries=2)
+    for key in ("a", "b"):
+        await cache.put(key, model="gpt-4o", completion=CachedCompletion(content=key))
+    assert await cache.get("a") is not None  # "b" is now the least recently used
+
+    await cache.put("c", model="gpt-4o", completion=CachedCompletion(content="c"))
+    assert await cache.get("b") is None
+    assert (await cache.get("a")).content == "a"
+
+    expired = LLMResponseCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=0, max_entries=2)
+    assert await expired.get("a") is None
+    cache.close()
+    expired.close()
+
+
+@pytest.mark.asyncio
+async def test_repeated_page_analysis_is_served_from_cache(tmp_path, fake_openai):
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=3600, max_entries=10)
+    service, completions = fake_openai(usage=SimpleNamespace(prompt_tokens=1000, completion_tokens=200))
+    usage = begin_llm_usage()
+
+    with patch("backend.services.openai_service.get_llm_cache", return_value=cache):
+        first = await service.analyze_page(_page(), page_number=1, total_pages=1, plan="pro")
+        second = await service.analyze_page(_page(), page_number=1, total_pages=1, plan="pro")
+
+    assert first == second
+    assert completions.calls == 1
+    summary = usage.summary()
+    assert summary["cache_hits"] == 1
+    assert summary["cache_misses"] == 1
+    assert summary["cache_savings_usd"] == pytest.approx(0.0045)
+    assert summary["cache_hit_latency_ms"] is not None
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_replies_missing_required_fields_are_not_cached(tmp_path, fake_openai):
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=3600, max_entries=10)
+    service, completions = fake_openai(replies=[{"scores": _SCORES}])
+
+    with patch("backend.services.openai_service.get_llm_cache", return_value=cache):
+        first = await service.analyze_page(_page(), page_number=1, total_pages=1, plan="pro")
+        second = await service.analyze_page(_page(), page_number=1, total_pages=1, plan="pro")
+
+    # The reply without feedback was re-asked, not stored; the second run asks the model again
+    assert first == second and first["feedback"] == "ok"
+    assert completions.calls == 3
+    cache.close()
@@ -0,0 +1,96 @@
+"""Tests for the LLM provider registry, router and offline provider."""
+
+import pytest
+
+from backend.services.llm_provider import (
+    PAGE_ANALYSIS,
+    SUMMARY,
+    LLMRouter,
+    ProviderProfile,
+    ProviderRegistry,
+    answered_by,
+)
+from backend.services.llm_telemetry import begin_llm_usage
+from backend.services.local_provider import LocalLLMProvider
+from backend.services.scraper import PageContent
+from backend.services.summary_digest import build_page_digest
+
+_PAGE = PageContent(
+    url="https://example.com",
+    title="Example",
+    headings=["Headline"],
+    paragraphs=["Body"],
+    ctas=["Buy"],
+)
+
+
+class _BrokenProvider:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.raise_errors_seen: list[bool] = []
+
+    async def analyze_page(self, *args, raise_errors=False, **kwargs):
+        self.calls += 1
+        self.raise_errors_seen.append(raise_errors)
+        raise RuntimeError("provider down")
+
+    async def analyze_funnel_summary(self, *args, raise_errors=False, **kwargs):
+        raise RuntimeError("provider down")
+
+
+def _registry(broken: _BrokenProvider) -> ProviderRegistry:
+    registry = ProviderRegistry()
+    registry.register(
+        ProviderProfile(name="remote", model="remote-model", cost_usd={PAGE_ANALYSIS: 0.03, SUMMARY: 0.01}),
+        lambda: broken,
+    )
+    registry.register(ProviderProfile(name="local", model="local-deterministic", placeholder=True), LocalLLMProvider)
+    return registry
+
+
+@pytest.mark.asyncio
+async def test_router_fails_over_and_then_skips_the_degraded_provider():
+    broken = _BrokenProvider()
+    router = LLMRouter(_registry(broken), ["remote", "local"], failure_threshold=2)
+    usage = begin_llm_usage()
+
+    for _ in range(2):
+        result = await router.analyze_page(_PAGE, page_number=1, total_pages=3)
+        assert set(result["scores"]) == {"clarity", "value", "proof", "design", "flow"}
+        assert answered_by().name == "local" and answered_by().placeholder
+
+    assert broken.raise_errors_seen == [True, True]
+    assert router.candidates(PAGE_ANALYSIS) == ["local"]
+
+    await router.analyze_page(_PAGE, page_number=1, total_pages=3)
+    assert broken.calls == 2
+    stats = router.stats()["providers"]
+    assert stats["remote"]["degraded"] and stats["remote"]["failures"] == 2
+    assert stats["local"]["calls"] == 3
+    # Stub answers are flagged, so they are not mistaken for real analyses
+    assert usage.fallbacks == 3
+
+
+def test_cost_strategy_prefers_the_cheaper_provider():
+    router = LLMRouter(_registry(_BrokenProvider()), ["remote", "local"], strategy="cost")
+    assert router.candidates(SUMMARY) == ["local", "remote"]
+
+    with pytest.raises(ValueError):
+        LLMRouter(_registry(_BrokenProvider()), ["missing"])
+
+
+@pytest.mark.asyncio
+async def test_local_provider_is_deterministic_and_streams_scores_first():
+    provider = LocalLLMProvider(latency_seconds=0.01)
+    received = []
+
+    async def on_partial(key, value):
+        received.append(key)
+
+    first = await provider.analyze_page(_PAGE, 1, 3, on_partial=on_partial)
+    second = await provider.analyze_page(_PAGE, 1, 3)
+
+    assert first == second
+    assert received == ["page_type", "scores"]
+    digests = [build_page_digest(index, _PAGE.url, first) for index in (1, 2, 3)]
+    assert "3 page(s)" in await provider.analyze_funnel_summary(digests, 70)
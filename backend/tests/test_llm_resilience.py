@@ -0,0 +1,145 @@
+"""Tests for LLM call retries, hedging and the circuit breaker."""
+
+import asyncio
+
+import httpx
+import openai
+import pytest
+
+from backend.services.llm_resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ResilientCaller,
+    RetryPolicy,
+)
+
+
+def _rate_limited(retry_after: str) -> openai.RateLimitError:
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(429, headers={"retry-after": retry_after}, request=request)
+    return openai.RateLimitError("rate limited", response=response, body=None)
+
+
+class _FakeSleep:
+    def __init__(self) -> None:
+        self.delays: list[float] = []
+
+    async def __call__(self, seconds: float) -> None:
+        self.delays.append(seconds)
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_is_retried_after_the_provider_delay():
+    sleep = _FakeSleep()
+    caller = ResilientCaller(retry=RetryPolicy(max_retries=3, base_delay_seconds=0.01), sleep=sleep)
+    attempts = 0
+
+    async def request():
+        nonlocal attempts
+        attempts += 1
+        if attempts < 3:
+            raise _rate_limited("2")
+        return "ok"
+
+    assert await caller.call(request) == "ok"
+    assert attempts == 3
+    assert sleep.delays == [2.0, 2.0]
+    stats = caller.stats()
+    assert stats["retries"] == 2 and stats["succeeded"] == 1 and stats["circuit"] == "closed"
+
+
+@pytest.mark.asyncio
+async def test_bad_requests_are_not_retried_and_do_not_trip_the_circuit():
+    caller = ResilientCaller(breaker=CircuitBreaker(failure_threshold=1), sleep=_FakeSleep())
+
+    async def request():
+        raise ValueError("malformed prompt")
+
+    with pytest.raises(ValueError):
+        await caller.call(request)
+    assert caller.stats()["retries"] == 0
+    assert caller.stats()["circuit"] == "closed"
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_after_repeated_failures_and_fails_fast():
+    caller = ResilientCaller(
+        retry=RetryPolicy(max_retries=1),
+        breaker=CircuitBreaker(failure_threshold=2, reset_seconds=60),
+        sleep=_FakeSleep(),
+    )
+    attempts = 0
+
+    async def request():
+        nonlocal attempts
+        attempts += 1
+        raise _rate_limited("0")
+
+    for _ in range(2):
+        with pytest.raises(openai.RateLimitError):
+            await caller.call(request)
+    assert caller.stats()["circuit"] == "open"
+
+    with pytest.raises(CircuitOpenError):
+        await caller.call(request)
+    assert attempts == 4
+    assert caller.stats()["circuit_rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_half_open_probe_lets_the_next_probe_through():
+    caller = ResilientCaller(
+        retry=RetryPolicy(max_retries=0),
+        breaker=CircuitBreaker(failure_threshold=1, reset_seconds=0),
+        sleep=_FakeSleep(),
+    )
+
+    async def failing():
+        raise _rate_limited("0")
+
+    with pytest.raises(openai.RateLimitError):
+        await caller.call(failing)
+    assert caller.stats()["circuit"] == "half_open"
+
+    started = asyncio.Event()
+
+    async def hanging():
+        started.set()
+        await asyncio.Event().wait()
+
+    probe = asyncio.ensure_future(caller.call(hanging, hedge=False))
+    await started.wait()
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+
+    async def healthy():
+        return "ok"
+
+    assert await caller.call(healthy) == "ok"
+    assert caller.stats()["circuit"] == "closed"
+
+
+@pytest.mark.asyncio
+async def test_slow_primary_is_hedged_and_the_backup_wins():
+    caller = ResilientCaller(hedge_percentile=0.5, hedge_min_samples=3)
+
+    async def fast():
+        return "fast"
+
+    for _ in range(3):
+        await caller.call(fast)
+
+    started = 0
+
+    async def slow_then_fast():
+        nonlocal started
+        started += 1
+        if started == 1:
+            await asyncio.sleep(5)
+            return "slow"
+        return "backup"
+
+    assert await asyncio.wait_for(caller.call(slow_then_fast), timeout=1) == "backup"
+    stats = caller.stats()
+    assert stats["hedges_launched"] == 1 and stats["hedges_won"] == 1
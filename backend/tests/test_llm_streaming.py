@@ -0,0 +1,58 @@
+"""Tests for streamed page analysis and incremental JSON parsing."""
+
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from backend.services.llm_telemetry import begin_llm_usage
+from backend.services.scraper import PageContent
+from backend.utils.json_stream import TopLevelMemberParser
+
+_REPLY = {
+    "page_type": "sales_page",
+    "scores": {"clarity": 82, "value": 75, "proof": 60, "design": 70, "flow": 68},
+    "feedback": "Strong hero, {braces} and \"quotes\", weak proof.",
+    "cta_recommendations": [{"copy": "Start now", "reason": "clearer, shorter"}],
+}
+
+
+def test_parser_emits_members_as_they_close_regardless_of_chunking():
+    document = json.dumps(_REPLY)
+    for size in (1, 5, 64, len(document)):
+        parser = TopLevelMemberParser()
+        members = []
+        for start in range(0, len(document), size):
+            members.extend(parser.feed(document[start:start + size]))
+        assert members == list(_REPLY.items())
+
+    parser = TopLevelMemberParser()
+    head = document[: document.index('"feedback"')]
+    assert [key for key, _ in parser.feed(head)] == ["page_type", "scores"]
+
+
+@pytest.mark.asyncio
+async def test_analyze_page_streams_scores_before_the_reply_finishes(fake_openai):
+    service, completions = fake_openai(_REPLY, usage=SimpleNamespace(prompt_tokens=900, completion_tokens=150))
+    page = PageContent(
+        url="https://example.com",
+        title="Example",
+        headings=["Headline"],
+        paragraphs=["Body"],
+        ctas=["Buy"],
+    )
+    received: list[str] = []
+
+    async def on_partial(key, value):
+        received.append(key)
+
+    usage = begin_llm_usage()
+    with patch("backend.services.openai_service.get_llm_cache", return_value=None):
+        result = await service.analyze_page(page, page_number=1, total_pages=1, on_partial=on_partial)
+
+    assert result == _REPLY
+    assert received == list(_REPLY)
+    assert completions.requests[0]["stream"] is True
+    assert completions.requests[0]["stream_options"] == {"include_usage": True}
+    assert usage.summary()["prompt_tokens"] == 900
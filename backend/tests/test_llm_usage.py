@@ -0,0 +1,91 @@
+"""Tests for the cacheable page-analysis prefix and LLM token/cost accounting."""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from backend.models.database import Analysis, Base, User
+from backend.routes.admin import get_llm_usage
+from backend.services.llm_telemetry import begin_llm_usage, estimate_cost_usd
+from backend.services.scraper import PageContent
+
+
+@pytest.mark.asyncio
+async def test_instructions_are_a_stable_prefix_and_cached_tokens_are_priced(fake_openai):
+    service, completions = fake_openai(
+        {"page_type": "landing", "scores": dict.fromkeys(("clarity", "value", "proof", "design", "flow"), 80), "feedback": "ok"},
+        usage=SimpleNamespace(
+            prompt_tokens=2000,
+            completion_tokens=100,
+            prompt_tokens_details=SimpleNamespace(cached_tokens=1536),
+        ),
+    )
+    usage = begin_llm_usage(plan="pro")
+
+    with patch("backend.services.openai_service.get_llm_cache", return_value=None):
+        for url in ("https://example.com/a", "https://example.com/b"):
+            page = PageContent(url=url, title="Example", headings=["H"], paragraphs=["P"], ctas=["Buy"])
+            await service.analyze_page(page, 1, 2, plan="pro")
+
+    first, second = (request["messages"] for request in completions.requests)
+    assert first[0] == second[0]
+    assert "Return ONLY valid JSON" in first[0]["content"]
+    assert "example.com/a" in first[1]["content"] and "Return ONLY" not in first[1]["content"]
+
+    summary = usage.summary()
+    assert summary["cached_prompt_tokens"] == 2 * 1536
+    assert summary["per_call"][0]["cached_prompt_tokens"] == 1536
+    uncached = estimate_cost_usd("gpt-4o", 2000, 100)
+    assert summary["per_call"][0]["cost_usd"] == round(estimate_cost_usd("gpt-4o", 2000, 100, 1536), 6)
+    assert summary["per_call"][0]["cost_usd"] < uncached
+
+
+def test_admin_usage_groups_analyses_by_user_plan_and_day():
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        Session = async_sessionmaker(engine, expire_on_commit=False)
+
+        now = datetime.now(timezone.utc)
+        async with Session() as session:
+            user = User(email="member@example.com", plan="pro", status="active", is_active=1)
+            session.add(user)
+            await session.flush()
+            for created_at, plan, cost in (
+                (now, "pro", 0.02),
+                (now, "pro", 0.03),
+                (now, "basic", 0.01),  # Ran before the upgrade
+                (now - timedelta(days=1), "pro", 0.04),
+                (now - timedelta(days=90), "pro", 0.05),
+            ):
+                session.add(
+                    Analysis(
+                        user_id=user.id,
+                        urls=["https://example.com"],
+                        scores={},
+                        overall_score=70,
+                        summary="summary",
+                        detailed_feedback=[],
+                        created_at=created_at,
+                        pipeline_metrics={
+                            "llm": {"plan": plan, "calls": 2, "prompt_tokens": 1000, "cached_prompt_tokens": 500, "cost_usd": cost}
+                        },
+                    )
+                )
+            await session.commit()
+
+            rows = await get_llm_usage(session=session, admin=user, days=30, user_id=None)
+        await engine.dispose()
+        return rows
+
+    rows = asyncio.run(scenario())
+
+    assert [(row.plan, row.analyses) for row in rows] == [("pro", 2), ("basic", 1), ("pro", 1)]
+    today = rows[0]
+    assert today.calls == 4 and today.cached_prompt_tokens == 1000 and today.cost_usd == 0.05
+    assert today.email == "member@example.com"
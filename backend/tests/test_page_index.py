@@ -0,0 +1,59 @@
+"""Tests for the hashed n-gram index of previously analysed pages."""
+
+import pytest
+
+from backend.services.page_index import PageIndex, hash_vector
+from backend.services.scraper import PageContent
+
+_COPY = [
+    "Join 20,000 coaches who doubled their client base with our proven eight week programme.",
+    "Book your free strategy call today and get a personalised growth plan.",
+    "Our money back guarantee means you risk nothing.",
+]
+
+
+def _page(url: str, headline: str, paragraphs=_COPY) -> PageContent:
+    return PageContent(url=url, title=headline, headings=[headline], paragraphs=list(paragraphs), ctas=["Book now"])
+
+
+def test_hashed_vectors_rank_near_duplicates_above_unrelated_text():
+    base = hash_vector(" ".join(_COPY), 512)
+    edited = hash_vector(" ".join(_COPY).replace("20,000", "25,000"), 512)
+    unrelated = hash_vector("Industrial pumps and valves for wastewater treatment plants, shipped worldwide.", 512)
+
+    assert float(base @ base) == pytest.approx(1.0, abs=1e-5)
+    assert float(base @ edited) > 0.9
+    assert float(base @ unrelated) < 0.3
+
+
+@pytest.mark.asyncio
+async def test_index_matches_within_a_plan_and_persists(tmp_path):
+    path = str(tmp_path / "pages.sqlite3")
+    index = PageIndex(path, dims=512)
+    result = {"page_type": "sales", "scores": {"clarity": 81, "value": 77}, "feedback": "Clear offer. Weak proof."}
+    await index.add(_page("https://a.example.com", "Double your coaching clients"), "pro", result, user_id=1, phash="f0" * 32)
+    await index.add(_page("https://b.example.com", "Wholesale pumps", ["Industrial valves shipped worldwide."]), "pro", {})
+
+    clone = _page("https://clone.example.com", "Double your coaching clients")
+    [match] = await index.nearest(clone, "pro")
+    assert match.url == "https://a.example.com" and match.similarity > 0.97
+    assert match.result == result
+    assert "clarity 81" in match.hint() and "Weak proof" in match.hint()
+    assert "a.example.com" not in match.hint()  # The index is shared between users
+
+    # Outright reuse needs the same user or URL, and a screenshot that looks the same
+    assert match.reusable_for("https://clone.example.com", 1, "f0" * 32, max_distance=6)
+    assert not match.reusable_for("https://clone.example.com", 2, "f0" * 32, max_distance=6)
+    assert not match.reusable_for("https://a.example.com", 2, "0f" * 32, max_distance=6)
+    assert not match.reusable_for("https://a.example.com", 1, None, max_distance=6)
+    assert await index.nearest(clone, None) == []  # Free-plan results have different fields
+
+    # Re-indexing a URL replaces its entry instead of adding another
+    await index.add(_page("https://a.example.com", "Double your coaching clients"), "pro", {"page_type": "upsell"})
+    assert len(index) == 2
+    index.close()
+
+    reloaded = PageIndex(path, dims=512)
+    [match] = await reloaded.nearest(clone, "pro")
+    assert match.result == {"page_type": "upsell"} and len(reloaded) == 2
+    reloaded.close()
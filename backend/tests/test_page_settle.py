@@ -0,0 +1,45 @@
+"""Tests for network quiescence tracking used by page settle detection."""
+
+import asyncio
+import time
+
+import pytest
+
+from backend.services.page_settle import NetworkActivity
+
+
+class _FakePage:
+    def __init__(self) -> None:
+        self.listeners: dict[str, list] = {}
+
+    def on(self, event, handler) -> None:
+        self.listeners.setdefault(event, []).append(handler)
+
+    def remove_listener(self, event, handler) -> None:
+        self.listeners[event].remove(handler)
+
+    def emit(self, event, request) -> None:
+        for handler in list(self.listeners.get(event, [])):
+            handler(request)
+
+
+@pytest.mark.asyncio
+async def test_wait_for_quiet_returns_once_requests_finish():
+    page = _FakePage()
+    request = object()
+
+    with NetworkActivity(page) as network:
+        page.emit("request", request)
+        assert network.in_flight == 1
+
+        async def finish_later() -> None:
+            await asyncio.sleep(0.05)
+            page.emit("requestfinished", request)
+
+        started = time.perf_counter()
+        await asyncio.gather(finish_later(), network.wait_for_quiet(30))
+        elapsed = time.perf_counter() - started
+
+    assert network.in_flight == 0
+    assert 0.07 <= elapsed < 0.5
+    assert all(not handlers for handlers in page.listeners.values())
@@ -0,0 +1,58 @@
+"""Tests for the capture-time request interception policy."""
+
+import pytest
+
+from backend.services.resource_blocking import ResourceBlocker, ResourceBlockPolicy
+
+
+class _FakeRequest:
+    def __init__(self, url: str, resource_type: str) -> None:
+        self.url = url
+        self.resource_type = resource_type
+
+
+class _FakeRoute:
+    def __init__(self, url: str, resource_type: str = "script") -> None:
+        self.request = _FakeRequest(url, resource_type)
+        self.outcome = None
+
+    async def abort(self, error_code: str = "failed") -> None:
+        self.outcome = ("abort", error_code)
+
+    async def fulfill(self, **kwargs) -> None:
+        self.outcome = ("fulfill", kwargs.get("status"))
+
+    async def continue_(self) -> None:
+        self.outcome = ("continue", None)
+
+
+@pytest.mark.asyncio
+async def test_blocker_aborts_trackers_and_replaces_video_frames():
+    blocker = ResourceBlocker(ResourceBlockPolicy())
+
+    tracker = _FakeRoute("https://www.googletagmanager.com/gtm.js?id=GTM-1")
+    video = _FakeRoute("https://player.vimeo.com/video/123", resource_type="document")
+    media = _FakeRoute("https://cdn.example.com/hero.mp4", resource_type="media")
+    first_party = _FakeRoute("https://example.com/app.js")
+
+    for route in (tracker, video, media, first_party):
+        await blocker.handle(route)
+
+    assert tracker.outcome == ("abort", "blockedbyclient")
+    assert video.outcome == ("fulfill", 200)
+    assert media.outcome == ("fulfill", 204)
+    assert first_party.outcome == ("continue", None)
+
+    stats = blocker.stats.as_dict()
+    assert stats["blocked_requests"] == 3
+    assert stats["blocked_by_category"] == {"tracker": 1, "video": 1, "media": 1}
+    assert stats["estimated_bytes_saved"] > 0
+
+
+def test_url_pattern_only_matches_intercepted_requests():
+    blocker = ResourceBlocker(ResourceBlockPolicy(extra_blocked_domains=("tracker.example",)))
+
+    assert blocker.url_pattern.search("https://cdn.tracker.example/pixel.gif")
+    assert blocker.url_pattern.search("https://fonts.example.com/inter.woff2?v=3")
+    assert not blocker.url_pattern.search("https://example.com/app.js")
+    assert not blocker.url_pattern.search("https://nottracker.example/app.js")
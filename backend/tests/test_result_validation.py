@@ -0,0 +1,81 @@
+"""Tests for local repair of page analysis replies and re-asking for missing fields."""
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+from backend.services.llm_telemetry import begin_llm_usage
+from backend.services.result_validation import normalize_page_result, validate_page_result
+from backend.services.scraper import PageContent
+from backend.utils.json_repair import repair_json_object
+
+_SCORES = {"clarity": 80, "value": 70, "proof": 60, "design": 75, "flow": 65}
+
+
+def test_truncated_reply_keeps_every_complete_member():
+    document = json.dumps({"scores": _SCORES, "feedback": "Clear, {tidy} hero.", "cta_recommendations": [{"copy": "Go"}, {"copy": "Start"}]})
+    cut = document[: document.index('"Start"') + 3]
+
+    repaired = repair_json_object("```json\n" + cut)
+    assert repaired.truncated and repaired.data["feedback"] == "Clear, {tidy} hero."
+    assert repaired.data["cta_recommendations"] == [{"copy": "Go"}]
+
+    wrapped = repair_json_object('Here you go: {"a": [1, 2,], "b": "x, ]"}\nDone!')
+    assert wrapped.data == {"a": [1, 2], "b": "x, ]"} and wrapped.repaired and not wrapped.truncated
+    assert repair_json_object("no json here").data is None
+
+
+def test_only_a_cut_reply_reports_optional_fields_missing():
+    reply = json.dumps({"scores": _SCORES, "feedback": "Fine."})
+    fields = ("scores", "feedback", "headline_recommendation", "cta_recommendations")
+
+    fenced = validate_page_result(f"```json\n{reply}\n```", fields)
+    assert fenced.missing == [] and fenced.result["cta_recommendations"] == []
+    cut = validate_page_result(reply[:-1] + ', "headline_recommendation": "Try', fields)
+    assert cut.missing == ["headline_recommendation", "cta_recommendations"]
+
+
+def test_types_are_coerced_and_defaults_filled():
+    reply = {
+        "page_type": "Sales Page",
+        "scores": {"clarity": "85/100", "value": 120, "proof": 60.4, "design": "70"},
+        "feedback": ["Good hero.", "Weak proof."],
+        "headline_alternatives": "Try this",
+        "cta_recommendations": {"copy": "Start"},
+        "ab_test_priority": "not an object",
+    }
+    validated = validate_page_result(reply)
+
+    assert validated.missing == [] and validated.repaired
+    result = validated.result
+    assert result["page_type"] == "sales_page" and result["feedback"] == "Good hero. Weak proof."
+    assert result["scores"] == {"clarity": 85, "value": 100, "proof": 60, "design": 70, "flow": 79}
+    assert result["headline_alternatives"] == ["Try this"] and result["cta_recommendations"] == [{"copy": "Start"}]
+    assert result["ab_test_priority"] is None and result["design_improvements"] == []
+
+    assert validate_page_result({"scores": {"clarity": 80}, "feedback": "ok"}).missing == ["scores"]
+    assert normalize_page_result({"scores": _SCORES})["email_capture_recommendations"] == []
+
+
+def _schema_fields(request) -> str:
+    return request["messages"][0]["content"].split("Return ONLY valid JSON with this structure:", 1)[1]
+
+
+@pytest.mark.asyncio
+async def test_only_unrecoverable_fields_are_asked_for_again(fake_openai):
+    truncated = '{"page_type": "sales", "scores": {"clarity": 80, "value": 70, "proof": 6'
+    service, completions = fake_openai(replies=[truncated, {"scores": _SCORES, "feedback": "Fine."}])
+    page = PageContent(url="https://example.com", title="Example", headings=["H"], paragraphs=["P"], ctas=["Buy"])
+    usage = begin_llm_usage()
+
+    with patch("backend.services.openai_service.get_llm_cache", return_value=None):
+        result = await service.analyze_page(page, 1, 1, plan=None, raise_errors=True)
+
+    assert result == {"page_type": "sales", "scores": _SCORES, "feedback": "Fine."}
+    retry_schema = _schema_fields(completions.requests[1])
+    assert '"scores":' in retry_schema and '"feedback":' in retry_schema and '"page_type":' not in retry_schema
+
+    summary = usage.summary()
+    assert summary["fallbacks"] == 0 and summary["reasked_fields"] == 2
+    assert summary["validated_replies"] == 1 and summary["repair_rate"] == 1.0
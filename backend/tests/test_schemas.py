@@ -107,6 +107,8 @@ def test_analysis_response_accepts_pipeline_metrics() -> None:
                 "failed": 0,
                 "uploaded": 1,
                 "timeouts": 0,
+                "preview_for_llm": 1,
+                "preview_without_visual_elements": 1,
             },
             "llm_provider": "openai",
         },
@@ -119,6 +121,7 @@ def test_analysis_response_accepts_pipeline_metrics() -> None:
     assert response.pipeline_metrics.stage_timings.scrape_seconds == 1.234
     assert response.pipeline_metrics.screenshot is not None
     assert response.pipeline_metrics.screenshot.uploaded == 1
+    assert response.pipeline_metrics.screenshot.preview_without_visual_elements == 1
 
 
 def test_performance_data_accepts_opportunity_details() -> None:
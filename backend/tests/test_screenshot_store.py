@@ -0,0 +1,240 @@
+"""Tests for perceptual-hash screenshot dedupe and reference-counted deletes."""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from PIL import Image, ImageDraw
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from backend.models.database import Base, ScreenshotAsset
+from backend.services.screenshot_store import ScreenshotStore
+from backend.services.storage import StoredObject
+from backend.utils.images import EncodedImage, encode_pil
+
+
+class _FakeStorage:
+    def __init__(self) -> None:
+        self.uploaded: list[str] = []
+        self.deleted: list[str] = []
+
+    async def upload_image(self, *, data: bytes, content_type: str = "image/png", prefix: str = "screenshots/"):
+        key = f"{prefix}{len(self.uploaded)}.webp"
+        self.uploaded.append(key)
+        return StoredObject(key=key, url=f"https://cdn.example.com/{key}")
+
+    async def delete_object(self, key: str) -> bool:
+        self.deleted.append(key)
+        return True
+
+
+def _page(cta_top: int = 300, *, noise: int = 0, quality_tier: str = "standard") -> EncodedImage:
+    image = Image.new("RGB", (640, 480), "white")
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((40, 40, 600, 140), fill="black")
+    draw.rectangle((40, cta_top, 260, cta_top + 60), fill="navy")
+    if noise:
+        draw.point([(x, 450) for x in range(0, 640, 7)], fill=(noise, noise, noise))
+    return encode_pil(image, image_format="webp", quality_tier=quality_tier)
+
+
+async def _session_factory():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return async_sessionmaker(engine, expire_on_commit=False)
+
+
+@pytest.mark.asyncio
+async def test_store_reuses_near_identical_capture_of_same_url():
+    Session = await _session_factory()
+    storage = _FakeStorage()
+
+    async with Session() as session:
+        store = ScreenshotStore(session, storage, dedupe=True)
+        first = await store.store(_page(), source_url="https://example.com")
+        # Re-encoded at a different quality with a little rendering noise: same page to a viewer
+        second = await store.store(_page(noise=200, quality_tier="low"), source_url="https://example.com")
+        other_url = await store.store(_page(), source_url="https://example.com/other")
+        changed = await store.store(_page(cta_top=180), source_url="https://example.com")
+
+        assert second.key == first.key
+        assert other_url.key != first.key
+        assert changed.key != first.key
+        assert len(storage.uploaded) == 3
+        assert store.stats["reused"] == 1
+
+        asset = (
+            await session.execute(select(ScreenshotAsset).where(ScreenshotAsset.storage_key == first.key))
+        ).scalar_one()
+        assert asset.ref_count == 2
+
+
+@pytest.mark.asyncio
+async def test_store_ignores_stale_assets():
+    Session = await _session_factory()
+    storage = _FakeStorage()
+
+    async with Session() as session:
+        store = ScreenshotStore(session, storage, dedupe=True, freshness=timedelta(hours=1))
+        first = await store.store(_page(), source_url="https://example.com")
+        asset = (await session.execute(select(ScreenshotAsset))).scalar_one()
+        asset.created_at = datetime.now(timezone.utc) - timedelta(hours=2)
+        await session.flush()
+
+        second = await store.store(_page(), source_url="https://example.com")
+
+        assert second.key != first.key
+
+
+@pytest.mark.asyncio
+async def test_release_only_deletes_when_last_reference_goes():
+    Session = await _session_factory()
+    storage = _FakeStorage()
+
+    async with Session() as session:
+        store = ScreenshotStore(session, storage, dedupe=True)
+        shared = await store.store(_page(), source_url="https://example.com")
+        await store.store(_page(), source_url="https://example.com")
+
+        outcomes = await store.release([shared.key, "screenshots/tiles/legacy.webp"])
+        assert outcomes == {shared.key: "retained", "screenshots/tiles/legacy.webp": "deleted"}
+        assert storage.deleted == ["screenshots/tiles/legacy.webp"]
+
+        outcomes = await store.release([shared.key])
+        assert outcomes == {shared.key: "deleted"}
+        assert storage.deleted[-1] == shared.key
+        assert (await session.execute(select(ScreenshotAsset))).first() is None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_sessions_do_not_lose_reference_updates(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'assets.sqlite3'}", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+    storage = _FakeStorage()
+
+    async with Session() as session:
+        shared = await ScreenshotStore(session, storage, dedupe=True).store(_page(), source_url="https://example.com")
+        await session.commit()
+
+    # Both analyses find the asset before either adds its reference
+    matched = asyncio.Barrier(2)
+
+    class _InterleavedStore(ScreenshotStore):
+        async def _find_match(self, *args, **kwargs):
+            asset = await super()._find_match(*args, **kwargs)
+            await matched.wait()
+            return asset
+
+    async def in_own_session(action):
+        async with Session() as session:
+            store = _InterleavedStore(session, storage, dedupe=True)
+            result = await action(store)
+            await session.commit()
+            return result
+
+    async def reuse():
+        # As the analyzer does: each reference commits in a short transaction of its own
+        async with Session() as session:
+            return await _InterleavedStore(session, storage, sessions=Session, dedupe=True).store(
+                _page(), source_url="https://example.com"
+            )
+
+    reused = await asyncio.gather(reuse(), reuse())
+    assert [stored.key for stored in reused] == [shared.key, shared.key]
+    async with Session() as session:
+        assert (await session.execute(select(ScreenshotAsset.ref_count))).scalar_one() == 3
+    matched = asyncio.Barrier(1)
+
+    async def release(store):
+        return await store.release([shared.key])
+
+    outcomes = await asyncio.gather(*(in_own_session(release) for _ in range(2)))
+    assert outcomes == [{shared.key: "retained"}] * 2 and storage.deleted == []
+
+    assert await in_own_session(release) == {shared.key: "deleted"}
+    assert storage.deleted == [shared.key]
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_store_commits_its_own_references_and_a_failed_run_gives_them_back(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'assets.sqlite3'}", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+    storage = _FakeStorage()
+
+    async with Session() as analysis_session:
+        store = ScreenshotStore(analysis_session, storage, sessions=Session, dedupe=True)
+        first = await store.store(_page(), source_url="https://example.com")
+        await store.store(_page(), source_url="https://example.com")
+        assert not analysis_session.in_transaction()
+
+        # Visible to (and not blocking) other sessions while the analysis is still running
+        async with Session() as other:
+            assert (await other.execute(select(ScreenshotAsset.ref_count))).scalar_one() == 2
+            await other.execute(update(ScreenshotAsset).values(last_used_at=datetime.now(timezone.utc)))
+            await other.commit()
+
+        assert await store.release_taken() == {first.key: "deleted"}
+    assert storage.deleted == [first.key]
+    async with Session() as session:
+        assert (await session.execute(select(ScreenshotAsset))).first() is None
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_object_recorded_concurrently_is_referenced_not_lost(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'assets.sqlite3'}", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+
+    class _SameKeyStorage(_FakeStorage):
+        async def upload_image(self, **kwargs):
+            await super().upload_image(**kwargs)
+            return StoredObject(key="screenshots/same.webp", url="https://cdn.example.com/screenshots/same.webp")
+
+    async with Session() as session:
+        store = ScreenshotStore(session, _SameKeyStorage(), sessions=Session, dedupe=False)
+        await store.store(_page(), source_url="https://example.com")
+        await store.store(_page(), source_url="https://example.com")
+
+    async with Session() as session:
+        assert (await session.execute(select(ScreenshotAsset.ref_count))).scalar_one() == 2
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_failed_delete_is_marked_for_cleanup_and_never_reused():
+    Session = await _session_factory()
+
+    class _FlakyStorage(_FakeStorage):
+        fail = True
+
+        async def delete_object(self, key: str) -> bool:
+            if self.fail:
+                return False
+            return await super().delete_object(key)
+
+    storage = _FlakyStorage()
+    async with Session() as session:
+        store = ScreenshotStore(session, storage, dedupe=True)
+        orphan = await store.store(_page(), source_url="https://example.com")
+        assert await store.release([orphan.key]) == {orphan.key: "failed"}
+
+        asset = (await session.execute(select(ScreenshotAsset))).scalar_one()
+        assert asset.ref_count == 0 and asset.delete_failed_at is not None
+        fresh = await store.store(_page(), source_url="https://example.com")
+        assert fresh.key != orphan.key
+
+        assert await store.retry_failed_deletes() == {orphan.key: "failed"}
+        storage.fail = False
+        assert await store.retry_failed_deletes() == {orphan.key: "deleted"}
+        assert storage.deleted == [orphan.key]
+        keys = (await session.execute(select(ScreenshotAsset.storage_key))).scalars().all()
+        assert keys == [fresh.key]
@@ -0,0 +1,54 @@
+"""Tests for page analysis split into parallel focused completions."""
+
+from unittest.mock import patch
+
+import pytest
+
+from backend.services.openai_service import ANALYSIS_PARTS, _RESULT_FIELD_SCHEMA
+from backend.services.scraper import PageContent
+
+
+def _answer_part(fail_part_with: str = ""):
+    """Reply that answers each sub-prompt with exactly the fields its schema asks for."""
+
+    def reply(params):
+        instructions = params["messages"][0]["content"]
+        schema = instructions.split("Return ONLY valid JSON with this structure:", 1)[1]
+        fields = [name for name, _ in _RESULT_FIELD_SCHEMA if f'"{name}":' in schema]
+        if fail_part_with in fields:
+            raise ValueError("bad reply")
+        return {field: dict.fromkeys(("clarity", "value", "proof", "design", "flow"), 80) if field == "scores" else f"{field} text" for field in fields}
+
+    return reply
+
+
+_PAGE = PageContent(url="https://example.com", title="Example", headings=["H"], paragraphs=["P"], ctas=["Buy"])
+
+
+@pytest.mark.asyncio
+async def test_split_analysis_merges_every_field_of_the_full_schema(fake_openai):
+    service, completions = fake_openai(_answer_part())
+    with patch("backend.services.openai_service.get_llm_cache", return_value=None), patch(
+        "backend.services.openai_service.settings.LLM_SPLIT_ANALYSIS_ENABLED", True
+    ):
+        result = await service.analyze_page(_PAGE, 1, 1, plan="pro")
+
+    assert len(completions.requests) == len(ANALYSIS_PARTS)
+    assert set(result) == {name for name, _ in _RESULT_FIELD_SCHEMA}
+    assert result["scores"] == dict.fromkeys(("clarity", "value", "proof", "design", "flow"), 80)
+    assert max(request["max_tokens"] for request in completions.requests) < 3000
+
+
+@pytest.mark.asyncio
+async def test_failed_recommendation_part_is_left_out_and_free_plan_is_not_split(fake_openai):
+    service, _ = fake_openai(_answer_part(fail_part_with="ab_test_priority"))
+    free_service, _ = fake_openai(_answer_part())
+    with patch("backend.services.openai_service.get_llm_cache", return_value=None), patch(
+        "backend.services.openai_service.settings.LLM_SPLIT_ANALYSIS_ENABLED", True
+    ):
+        result = await service.analyze_page(_PAGE, 1, 1, plan="pro", raise_errors=True)
+        free = await free_service.analyze_page(_PAGE, 1, 1, plan=None)
+
+    assert "scores" in result and "cta_recommendations" in result
+    assert "ab_test_priority" not in result and "trust_elements_missing" not in result
+    assert set(free) == {"page_type", "scores", "feedback"}
@@ -0,0 +1,101 @@
+"""Tests for S3 uploads on the storage pool: ACL fallback, multipart uploads and metrics."""
+
+import threading
+
+import pytest
+from botocore.exceptions import ClientError
+
+from backend.services.storage import StorageConfig, StorageService, get_storage_stats
+
+
+class _FakeS3:
+    def __init__(self, fail_part: int = 0) -> None:
+        self.calls = []
+        self.threads = set()
+        self.fail_part = fail_part
+
+    def _call(self, name, params):
+        self.calls.append((name, params))
+        self.threads.add(threading.current_thread().name)
+
+    def put_object(self, **params):
+        self._call("put_object", params)
+        if "ACL" in params:
+            raise ClientError({"Error": {"Code": "AccessControlListNotSupported"}}, "PutObject")
+        return {}
+
+    def create_multipart_upload(self, **params):
+        self._call("create_multipart_upload", params)
+        return {"UploadId": "upload-1"}
+
+    def upload_part(self, **params):
+        self._call("upload_part", params)
+        if params["PartNumber"] == self.fail_part:
+            raise ClientError({"Error": {"Code": "InternalError"}}, "UploadPart")
+        return {"ETag": f"etag-{params['PartNumber']}"}
+
+    def complete_multipart_upload(self, **params):
+        self._call("complete_multipart_upload", params)
+        return {}
+
+    def abort_multipart_upload(self, **params):
+        self._call("abort_multipart_upload", params)
+        return {}
+
+
+def _service(client: _FakeS3) -> StorageService:
+    config = StorageConfig(
+        bucket="shots", region="us-east-1", endpoint_url=None, base_url="https://cdn.example.com", public_expiry_seconds=60
+    )
+    service = StorageService(
+        config, "key", "secret", max_connections=4, multipart_threshold=100, multipart_chunk_size=50
+    )
+    service._client = client
+    return service
+
+
+@pytest.mark.asyncio
+async def test_small_upload_drops_refused_acl_and_runs_on_the_storage_pool():
+    client = _FakeS3()
+    service = _service(client)
+    before = get_storage_stats()["uploads"]
+
+    stored = await service.upload_image(data=b"x" * 10, content_type="image/webp", prefix="screenshots")
+    second = await service.upload_image(data=b"y" * 10, content_type="image/webp")
+    service.close()
+
+    assert stored.url == f"https://cdn.example.com/{stored.key}" and stored.key.startswith("screenshots/")
+    assert second is not None
+    assert [("ACL" in params) for name, params in client.calls] == [True, False, False]
+    assert all(name.startswith("storage") for name in client.threads)
+
+    stats = get_storage_stats()
+    assert stats["uploads"] == before + 2 and stats["in_flight"] == 0
+    assert stats["latency_ms_p50"] is not None and stats["throughput_mb_per_s"] is not None
+
+
+@pytest.mark.asyncio
+async def test_large_upload_goes_up_in_parts_and_failed_parts_abort_the_upload():
+    client = _FakeS3()
+    service = _service(client)
+    before = get_storage_stats()
+
+    body = bytes(range(100)) + bytes(range(50))
+    assert await service.upload_image(data=body) is not None
+
+    parts = sorted((params["PartNumber"], params["Body"]) for name, params in client.calls if name == "upload_part")
+    assert [number for number, _ in parts] == [1, 2, 3] and b"".join(data for _, data in parts) == body
+    complete = client.calls[-1][1]
+    assert complete["MultipartUpload"]["Parts"] == [{"ETag": f"etag-{n}", "PartNumber": n} for n in (1, 2, 3)]
+
+    failing = _FakeS3(fail_part=2)
+    failing_service = _service(failing)
+    assert await failing_service.upload_image(data=body) is None
+    assert failing.calls[-1][0] == "abort_multipart_upload"
+    assert "complete_multipart_upload" not in [name for name, _ in failing.calls]
+    service.close()
+    failing_service.close()
+
+    stats = get_storage_stats()
+    assert stats["multipart_uploads"] == before["multipart_uploads"] + 1
+    assert stats["failed"] == before["failed"] + 1
@@ -0,0 +1,61 @@
+"""Tests for per-page digests and the constant-size summary prompt."""
+
+from backend.services.openai_service import OpenAIService
+from backend.services.summary_digest import build_page_digest, render_digests
+
+
+def _result(score: int, page_type: str = "upsell") -> dict:
+    return {
+        "page_type": page_type,
+        "scores": {"clarity": score, "value": score, "proof": score - 10, "design": score, "flow": score},
+        "feedback": "Strong hero. " + "Long detail. " * 50,
+        "headline_recommendation": "Get more leads " * 30,
+        "cta_recommendations": [{"copy": "Start now", "location": "Hero", "reason": "clear " * 100}],
+        "priority_alerts": [
+            {"severity": "low", "issue": "Minor spacing"},
+            {"severity": "high", "issue": "No guarantee near the checkout button"},
+        ],
+    }
+
+
+def test_digest_is_capped_and_keeps_the_most_useful_facts():
+    digest = build_page_digest(2, "https://example.com/offer", _result(70))
+
+    assert digest.score == 68 and digest.weakest == "proof 60"
+    assert digest.top_issue == "No guarantee near the checkout button"
+    assert digest.top_cta == "Start now | Hero"
+    assert len(digest.headline) <= 140
+
+    free = build_page_digest(1, "https://example.com", {"scores": _result(80)["scores"], "feedback": "Strong hero. More."})
+    assert free.top_issue == "Strong hero." and free.headline is None
+
+
+def test_summary_prompt_size_does_not_grow_with_funnel_length():
+    service = OpenAIService()
+
+    def prompt_for(pages: int) -> str:
+        digests = [
+            build_page_digest(index, f"https://example.com/step-{index}", _result(60 + index % 30))
+            for index in range(1, pages + 1)
+        ]
+        return service._build_summary_prompt(digests, 70)
+
+    six, forty = prompt_for(6), prompt_for(40)
+    assert abs(len(forty) - len(six)) < 300
+    assert "Other pages (34)" in forty
+    assert "Page 1 (upsell)" in forty and "Page 40 (upsell)" in forty
+
+
+def test_long_funnels_keep_the_lowest_scoring_pages_in_full():
+    scores = [80, 85, 40, 90, 88, 45, 82, 79]
+    digests = [
+        build_page_digest(index, f"https://e.com/{index}", _result(score))
+        for index, score in enumerate(scores, start=1)
+    ]
+
+    rendered = render_digests(digests, max_pages=4)
+
+    assert [line.split(" (")[0] for line in rendered.splitlines() if line.startswith("Page ")] == [
+        "Page 1", "Page 3", "Page 6", "Page 8"
+    ]
+    assert rendered.endswith("Other pages (4): types upsell; scores 80-88 (mean 84)")
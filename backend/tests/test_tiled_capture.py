@@ -0,0 +1,120 @@
+"""Tests for tiled capture planning, overview stitching and streaming tile uploads."""
+
+import asyncio
+import io
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from backend.models.database import Base
+from backend.services.screenshot_store import ScreenshotStore
+from backend.services.storage import StoredObject
+from backend.services.tiled_capture import (
+    OverviewBuilder,
+    ScreenshotTile,
+    TileUploader,
+    plan_tiles,
+    tile_storage_keys,
+)
+from backend.utils.images import EncodedImage
+
+PIL = pytest.importorskip("PIL.Image")
+
+
+def _tile(index: int, offset_y: int, height: int, color: str = "red") -> ScreenshotTile:
+    buffer = io.BytesIO()
+    PIL.new("RGB", (100, height), color).save(buffer, format="PNG")
+    image = EncodedImage(data=buffer.getvalue(), content_type="image/png")
+    return ScreenshotTile(index=index, offset_y=offset_y, width=100, height=height, image=image)
+
+
+class _FakeStorage:
+    def __init__(self) -> None:
+        self.uploaded: list[str] = []
+        self.deleted: list[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def upload_image(self, *, data: bytes, content_type: str, prefix: str) -> StoredObject:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        key = f"{prefix}{len(self.uploaded)}.png"
+        self.uploaded.append(key)
+        return StoredObject(key=key, url=f"https://bucket/{key}")
+
+    async def delete_object(self, key: str) -> bool:
+        self.deleted.append(key)
+        return True
+
+
+def test_plan_tiles_caps_height_and_trims_last_tile():
+    assert plan_tiles(2000, 900, 20000) == [(0, 900), (900, 900), (1800, 200)]
+    assert plan_tiles(50000, 900, 1800) == [(0, 900), (900, 900)]
+
+
+def test_overview_is_scaled_to_max_height():
+    overview = OverviewBuilder(width=100, total_height=400, max_height=100)
+    for index in range(2):
+        overview.add(_tile(index, index * 200, 200, color="blue"))
+
+    image = overview.encode(image_format="png", quality_tier="standard")
+
+    assert (image.width, image.height) == (25, 100)
+
+
+@pytest.mark.asyncio
+async def test_tile_uploader_bounds_concurrency_and_builds_manifest():
+    storage = _FakeStorage()
+    uploader = TileUploader(storage, max_in_flight=2)
+
+    for index in range(5):
+        await uploader(_tile(index, index * 100, 100))
+    entries = await uploader.finish()
+
+    assert storage.max_in_flight <= 2
+    assert [entry["offset_y"] for entry in entries] == [0, 100, 200, 300, 400]
+    assert tile_storage_keys({"tiles": entries}) == [entry["key"] for entry in entries]
+
+
+@pytest.mark.asyncio
+async def test_tile_uploader_discard_deletes_uploaded_tiles_and_ignores_late_tiles():
+    storage = _FakeStorage()
+    uploader = TileUploader(storage)
+
+    await uploader(_tile(0, 0, 100))
+    await uploader.finish()
+    await uploader.discard()
+    await uploader(_tile(1, 100, 100))
+
+    assert storage.deleted == storage.uploaded
+    assert len(storage.uploaded) == 1
+
+
+@pytest.mark.asyncio
+async def test_tile_uploader_with_store_reuses_tiles_of_an_unchanged_page(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'assets.sqlite3'}", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+    storage = _FakeStorage()
+
+    async def capture(heights):
+        async with Session() as session:
+            store = ScreenshotStore(session, storage, sessions=Session, dedupe=True)
+            uploader = TileUploader(storage, store=store, source_url="https://example.com")
+            for index, height in enumerate(heights):
+                await uploader(_tile(index, index * 100, height))
+            return [entry["key"] for entry in await uploader.finish()], uploader
+
+    first, _ = await capture([100, 100])
+    rerun, uploader = await capture([100, 100])
+    assert rerun == first and len(storage.uploaded) == 2
+
+    # Only the tile that changed is uploaded again; discarding keeps the shared tiles
+    changed, uploader = await capture([100, 60])
+    assert changed[0] == first[0] and changed[1] not in first
+    await uploader.discard()
+    assert storage.deleted == [changed[1]]
+    await engine.dispose()
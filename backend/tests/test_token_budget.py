@@ -0,0 +1,63 @@
+"""Tests for prompt token estimates and per-plan vision sizing."""
+
+import io
+
+from PIL import Image
+
+from backend.services.openai_service import _page_analysis_instructions
+from backend.services.token_budget import (
+    LOW_DETAIL_TOKENS,
+    budget_for_plan,
+    estimate_image_tokens,
+    estimate_text_tokens,
+    prepare_vision_image,
+)
+from backend.utils.images import encode_pil
+
+
+def test_image_token_estimates_follow_vision_tiling():
+    assert estimate_image_tokens(1440, 900, "low") == LOW_DETAIL_TOKENS
+    # 1440x900 -> 1229x768 -> 3x2 tiles
+    assert estimate_image_tokens(1440, 900, "high") == 85 + 170 * 6
+    # 1024x1024 -> 768x768 -> 2x2 tiles
+    assert estimate_image_tokens(1024, 1024, "high") == 85 + 170 * 4
+    assert estimate_text_tokens("x" * 401) == 101
+
+
+def test_plan_budgets_scale_with_tier():
+    free, basic, pro = budget_for_plan(None), budget_for_plan("basic"), budget_for_plan("growth")
+    assert free.image_detail == "low" and not free.include_mobile
+    assert basic.max_prompt_tokens < pro.max_prompt_tokens
+    assert basic.max_image_aspect < pro.max_image_aspect
+
+
+def test_tall_capture_is_cropped_and_downscaled_to_what_the_model_sees():
+    capture = encode_pil(Image.new("RGB", (1440, 12000), "white"), image_format="webp")
+
+    vision = prepare_vision_image(capture, detail="high", max_aspect=2.0)
+
+    with Image.open(io.BytesIO(vision.image.data)) as prepared:
+        # Cropped to 1440x2880, then scaled to fit 2048 and a 768px short side
+        assert prepared.size == (768, 1536)
+    assert vision.cropped
+    assert vision.estimated_tokens == 85 + 170 * 6
+
+    short = encode_pil(Image.new("RGB", (800, 600), "white"), image_format="webp")
+    untouched = prepare_vision_image(short, detail="high", max_aspect=2.0)
+    assert untouched.image is short
+    assert not untouched.cropped
+
+
+def test_free_plan_requests_only_displayed_fields_on_the_small_model():
+    free, pro = budget_for_plan(None), budget_for_plan("pro")
+    assert free.model == "gpt-4o-mini" and pro.model == "gpt-4o"
+    assert free.max_completion_tokens < pro.max_completion_tokens
+    assert free.summary_max_tokens < pro.summary_max_tokens
+
+    free_prompt = _page_analysis_instructions(free.result_fields, free.feedback_chars)
+    full_prompt = _page_analysis_instructions()
+
+    assert '"scores"' in free_prompt and "Under 300 characters" in free_prompt
+    assert "cta_recommendations" not in free_prompt and "ab_test_priority" not in free_prompt
+    assert "cta_recommendations" in full_prompt and "email_capture_recommendations" in full_prompt
+    assert estimate_text_tokens(free_prompt) < estimate_text_tokens(full_prompt) / 2
@@ -0,0 +1,76 @@
+"""Tests for the fold-plus-regions LLM image composite."""
+
+import io
+from unittest.mock import patch
+
+import pytest
+from PIL import Image, ImageDraw
+
+from backend.services.vision_preprocess import (
+    build_vision_input,
+    cleanup_vision_executor,
+    preprocess_vision_input,
+    regions_from_visual_elements,
+)
+from backend.utils.images import EncodedImage, encode_pil
+
+_VISUAL_ELEMENTS = {
+    "viewportWidth": 1440,
+    "viewportHeight": 900,
+    "buttons": [
+        {"text": "Hero CTA", "box": {"x": 600, "y": 500, "width": 240, "height": 60}},
+        {"text": "Buy now", "box": {"x": 600, "y": 5200, "width": 240, "height": 60}},
+        {"text": "Hidden", "box": None},
+    ],
+    "regions": {
+        "forms": [{"x": 400, "y": 7000, "width": 640, "height": 400}],
+        "testimonials": [{"x": 0, "y": 3000, "width": 1440, "height": 300}],
+    },
+}
+
+
+def _capture() -> EncodedImage:
+    page = Image.new("RGB", (1440, 9000), "white")
+    draw = ImageDraw.Draw(page)
+    draw.rectangle((600, 5200, 840, 5260), fill="green")
+    draw.rectangle((400, 7000, 1040, 7400), fill="blue")
+    return encode_pil(page, image_format="png")
+
+
+def test_regions_are_read_in_priority_order():
+    regions = regions_from_visual_elements(_VISUAL_ELEMENTS)
+    assert [(region.kind, region.y) for region in regions] == [
+        ("cta", 500),
+        ("cta", 5200),
+        ("form", 7000),
+        ("testimonial", 3000),
+    ]
+    assert regions_from_visual_elements(None) == []
+
+
+def test_composite_keeps_the_fold_and_crops_below_it():
+    vision = build_vision_input(_capture(), _VISUAL_ELEMENTS, detail="high", max_aspect=2.0)
+
+    # The hero CTA is already in the fold; the lower CTA, form and testimonial are cropped in
+    assert vision.regions == 3 and vision.cropped
+    with Image.open(io.BytesIO(vision.image.data)) as composite:
+        width, height = composite.size
+        assert height <= width * 2.0
+        pixels = composite.convert("RGB").getcolors(maxcolors=1 << 20)
+    colors = {color for _, color in pixels}
+    assert any(g > 100 and r < 50 and b < 50 for r, g, b in colors)  # The green CTA made it in
+    assert any(b > 200 and r < 50 and g < 50 for r, g, b in colors)  # So did the blue form
+
+    plain = build_vision_input(_capture(), None, detail="high", max_aspect=2.0)
+    assert plain.regions == 0 and plain.cropped
+
+
+@pytest.mark.asyncio
+async def test_preprocessing_runs_in_the_worker_pool():
+    with patch("backend.services.vision_preprocess.settings.LLM_VISION_WORKERS", 1):
+        try:
+            vision = await preprocess_vision_input(_capture(), _VISUAL_ELEMENTS, detail="low", max_aspect=2.0)
+        finally:
+            cleanup_vision_executor()
+
+    assert vision.regions == 3 and vision.detail == "low"
@@ -0,0 +1,131 @@
+"""Adaptive (AIMD) concurrency limiter for calls to a shared, rate-limited upstream."""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class AdaptiveConcurrencyLimiter:
+    """Caps in-flight calls at a limit that adapts to how the upstream is coping.
+
+    Additive increase: each healthy call made while the limiter was saturated raises the limit
+    by ``1 / limit``, i.e. roughly +1 per full round of calls. A call is healthy when it
+    succeeds no slower than ``latency_tolerance`` times the smoothed latency, so rising
+    latency holds the limit where it is. Multiplicative decrease: a congestion error (as
+    judged by ``is_congestion``) multiplies the limit by ``decrease_factor``. Errors from
+    calls started before the last decrease are ignored, so one burst of 429s cuts the limit
+    once rather than once per failed call.
+    """
+
+    def __init__(
+        self,
+        *,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        decrease_factor: float = 0.5,
+        latency_tolerance: float = 2.0,
+        is_congestion: Callable[[BaseException], bool] = lambda exc: False,
+    ) -> None:
+        self._min_limit = max(1, min_limit)
+        self._max_limit = max(self._min_limit, max_limit)
+        self._limit = float(min(max(initial_limit, self._min_limit), self._max_limit))
+        self._decrease_factor = decrease_factor
+        self._latency_tolerance = latency_tolerance
+        self._is_congestion = is_congestion
+        self._condition = asyncio.Condition()
+        self._in_flight = 0
+        self._queued = 0
+        self._latency_ema: Optional[float] = None
+        self._last_decrease_at = 0.0
+        self._counters: Dict[str, float] = {
+            "calls": 0,
+            "increases": 0,
+            "decreases": 0,
+            "queue_wait_seconds_total": 0.0,
+            "queue_wait_seconds_max": 0.0,
+        }
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    async def run(self, request: Callable[[], Awaitable[T]]) -> T:
+        """Wait for a slot, then await ``request()`` and feed its outcome back into the limit."""
+
+        saturated = await self._acquire()
+        started = time.monotonic()
+        try:
+            result = await request()
+        except Exception as exc:
+            if self._is_congestion(exc):
+                self._on_congestion(started)
+            raise
+        else:
+            self._on_success(time.monotonic() - started, saturated)
+            return result
+        finally:
+            await self._release()
+
+    async def _acquire(self) -> bool:
+        queued_at = time.monotonic()
+        async with self._condition:
+            self._queued += 1
+            try:
+                await self._condition.wait_for(lambda: self._in_flight < self.limit)
+            finally:
+                self._queued -= 1
+            self._in_flight += 1
+            saturated = self._in_flight >= self.limit
+
+        waited = time.monotonic() - queued_at
+        self._counters["calls"] += 1
+        self._counters["queue_wait_seconds_total"] += waited
+        self._counters["queue_wait_seconds_max"] = max(self._counters["queue_wait_seconds_max"], waited)
+        return saturated or waited > 0.001
+
+    async def _release(self) -> None:
+        async with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def _on_success(self, latency: float, saturated: bool) -> None:
+        baseline = self._latency_ema
+        self._latency_ema = latency if baseline is None else 0.9 * baseline + 0.1 * latency
+        if not saturated or self._limit >= self._max_limit:
+            return  # Raising an unused limit says nothing about what the upstream can take
+        if baseline is not None and latency > self._latency_tolerance * baseline:
+            return
+        previous = self.limit
+        self._limit = min(self._max_limit, self._limit + 1 / self._limit)
+        if self.limit > previous:
+            self._counters["increases"] += 1
+
+    def _on_congestion(self, started: float) -> None:
+        if started < self._last_decrease_at:
+            return
+        self._last_decrease_at = time.monotonic()
+        self._limit = max(self._min_limit, math.floor(self._limit * self._decrease_factor))
+        self._counters["decreases"] += 1
+        # Waiters are re-checked on the next release; nothing to wake here
+
+    def stats(self) -> Dict[str, object]:
+        calls = int(self._counters["calls"])
+        return {
+            "limit": self.limit,
+            "min_limit": self._min_limit,
+            "max_limit": self._max_limit,
+            "in_flight": self._in_flight,
+            "queued": self._queued,
+            "calls": calls,
+            "increases": int(self._counters["increases"]),
+            "decreases": int(self._counters["decreases"]),
+            "queue_wait_ms_avg": round(self._counters["queue_wait_seconds_total"] / calls * 1000, 1) if calls else None,
+            "queue_wait_ms_max": round(self._counters["queue_wait_seconds_max"] * 1000, 1),
+            "latency_ema_ms": round(self._latency_ema * 1000, 1) if self._latency_ema is not None else None,
+        }
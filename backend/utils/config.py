@@ -25,7 +25,39 @@ class Settings(BaseSettings):
     
     # API Keys
     OPENAI_API_KEY: str = ""
-    LLM_PROVIDER: str = "openai"
+    LLM_PROVIDER: str = "openai"  # Comma-separated, in order of preference: openai, local
+    LLM_ROUTING_STRATEGY: str = "priority"  # priority (listed order), cost or latency
+    LLM_PROVIDER_FAILURE_THRESHOLD: int = 3  # Consecutive errors before a provider is skipped
+    LLM_PROVIDER_COOLDOWN_SECONDS: float = 60.0  # How long a failing provider is skipped for
+    LLM_LOCAL_LATENCY_SECONDS: float = 0.5  # Simulated round trip of the offline "local" provider
+    LLM_CACHE_ENABLED: bool = True  # Answer repeated identical LLM requests from a local cache
+    LLM_CACHE_PATH: str = "./llm_cache.sqlite3"
+    LLM_CACHE_TTL_HOURS: float = 168.0  # Cached responses older than this are discarded
+    LLM_CACHE_MAX_ENTRIES: int = 5000  # Least recently used entries are evicted beyond this
+    LLM_MAX_RETRIES: int = 3  # Retries for 429/5xx/timeouts, with jittered exponential backoff
+    LLM_RETRY_BASE_DELAY_SECONDS: float = 0.5
+    LLM_RETRY_MAX_DELAY_SECONDS: float = 20.0
+    LLM_HEDGE_ENABLED: bool = False  # Send a duplicate request when one runs past the latency percentile
+    LLM_HEDGE_PERCENTILE: float = 0.95
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = 5  # Consecutive failed calls before failing fast
+    LLM_CIRCUIT_RESET_SECONDS: float = 30.0  # Time before a probe call is let through
+    LLM_SPLIT_ANALYSIS_ENABLED: bool = False  # Request scoring, copy/CTA, design and trust/flow as parallel calls
+    LLM_SUMMARY_MAX_PAGE_DIGESTS: int = 6  # Pages described in full in the summary prompt; the rest are aggregated
+    LLM_VISION_COMPOSITE_ENABLED: bool = True  # Send the fold plus crops of CTAs/forms/testimonials instead of the page top
+    LLM_VISION_WORKERS: int = 2  # Processes preparing LLM images (0 = a thread in the API process)
+    LLM_PAGE_INDEX_ENABLED: bool = False  # Match new pages against earlier analyses (requires numpy)
+    LLM_PAGE_INDEX_PATH: str = "./page_index.sqlite3"
+    LLM_PAGE_INDEX_DIMS: int = 512  # Hashed n-gram vector size; changing it ignores previously indexed pages
+    LLM_PAGE_INDEX_REUSE_SIMILARITY: float = 0.97  # Reuse the earlier result outright at or above this
+    LLM_PAGE_INDEX_HINT_SIMILARITY: float = 0.75  # Add the earlier analysis to the prompt at or above this
+    LLM_BATCH_DIR: str = "./llm_batches"  # Where batch input files are written (scripts/run_llm_batch.py)
+    LLM_BATCH_POLL_SECONDS: float = 60.0
+    LLM_BATCH_MAX_WAIT_HOURS: float = 26.0  # Give up on a batch still running after this
+    LLM_BATCH_COMPLETION_WINDOW: str = "24h"
+    LLM_CONCURRENCY_INITIAL: int = 4  # Starting in-flight limit; adapts up on healthy calls, halves on 429s/timeouts
+    LLM_CONCURRENCY_MIN: int = 1
+    LLM_CONCURRENCY_MAX: int = 32
+    LLM_CONCURRENCY_LATENCY_TOLERANCE: float = 2.0  # Stop growing once calls run this many times slower than usual
     GOOGLE_PAGESPEED_API_KEY: Optional[str] = None
     
     # Database
@@ -58,6 +90,9 @@ class Settings(BaseSettings):
     AWS_S3_ENDPOINT_URL: Optional[str] = None
     AWS_S3_BASE_URL: Optional[str] = None
     AWS_S3_PUBLIC_URL_EXPIRY_SECONDS: int = 86400
+    AWS_S3_MAX_CONNECTIONS: int = 16  # Pooled connections, and threads on the storage executor
+    AWS_S3_MULTIPART_THRESHOLD_MB: float = 8.0  # Upload objects this large in parallel parts (min 5)
+    AWS_S3_MULTIPART_CHUNK_MB: float = 8.0  # Part size (min 5)
 
     # Email provider (SendGrid)
     SENDGRID_API_KEY: Optional[str] = None
@@ -84,7 +119,7 @@ class Settings(BaseSettings):
         "Funnel Analyzer Growth Pro",
     ])
     
-    @field_validator('THRIVECART_BASIC_PRODUCT_IDS', 'THRIVECART_PRO_PRODUCT_IDS', mode='before')
+    @field_validator('THRIVECART_BASIC_PRODUCT_IDS', 'THRIVECART_PRO_PRODUCT_IDS', 'SCREENSHOT_BLOCKED_DOMAINS', mode='before')
     @classmethod
     def parse_product_ids(cls, v):
         """Parse product IDs from various formats (JSON array, CSV, single value)."""
@@ -119,6 +154,42 @@ class Settings(BaseSettings):
     ANALYSIS_RATE_LIMIT_PER_IP: int = 10
     ANALYSIS_RATE_LIMIT_PER_USER: int = 25
     ANALYSIS_RATE_LIMIT_WINDOW_SECONDS: int = 3600
+
+    # Screenshot capture (Playwright)
+    SCREENSHOT_POOL_MAX_CONTEXTS: int = 4  # Concurrent pages per browser process
+    SCREENSHOT_POOL_WARM_CONTEXTS: int = 1  # Contexts created at browser start
+    SCREENSHOT_POOL_MAX_NAVIGATIONS: int = 20  # Recycle a context after this many page loads
+    SCREENSHOT_POOL_MAX_HEAP_MB: int = 512  # Recycle a context whose JS heap grows past this
+    SCREENSHOT_BROWSER_COUNT: int = 0  # Chromium processes to shard captures across (0 = sized to cores)
+    SCREENSHOT_BROWSER_MAX_RSS_MB: int = 1500  # Restart a browser whose processes exceed this RSS
+    SCREENSHOT_BROWSER_MAX_FAILURE_RATE: float = 0.5  # Restart a browser failing more captures than this
+    SCREENSHOT_BROWSER_HEALTH_INTERVAL_SECONDS: float = 30.0
+    SCREENSHOT_BROWSER_DRAIN_TIMEOUT_SECONDS: float = 60.0  # Max wait for in-flight captures before closing
+    SCREENSHOT_BLOCK_TRACKERS: bool = True  # Abort analytics/ad pixel requests during capture
+    SCREENSHOT_BLOCK_CHAT_WIDGETS: bool = True
+    SCREENSHOT_REPLACE_VIDEO_EMBEDS: bool = True  # Swap video player iframes for a placeholder frame
+    SCREENSHOT_REPLACE_MEDIA: bool = True  # Answer <video>/<audio> fetches with an empty response
+    SCREENSHOT_FONT_TIMEOUT_MS: int = 1500  # Give up on web fonts slower than this (0 disables)
+    SCREENSHOT_BLOCKED_DOMAINS: Union[list[str], str] = Field(default_factory=list)
+    SCREENSHOT_SETTLE_QUIET_MS: int = 500  # Network + DOM quiet window that counts as "loaded"
+    SCREENSHOT_SETTLE_MAX_MS: int = 5000  # Hard cap on the post-navigation settle wait
+    SCREENSHOT_SCROLL_QUIET_MS: int = 120  # DOM quiet window per scroll step
+    SCREENSHOT_SCROLL_STEP_MAX_MS: int = 400  # Upper bound per viewport while scrolling
+    SCREENSHOT_SCROLL_MAX_MS: int = 6000  # Hard cap for the whole scroll/reveal pass
+    SCREENSHOT_FORMAT: str = "webp"  # webp, jpeg or png
+    SCREENSHOT_QUALITY: str = "standard"  # high, standard or low (ignored for png)
+    SCREENSHOT_TILE_THRESHOLD_PX: int = 6000  # Pages taller than this are captured as viewport tiles
+    SCREENSHOT_MAX_HEIGHT_PX: int = 20000  # Content below this offset is not captured
+    SCREENSHOT_OVERVIEW_MAX_HEIGHT_PX: int = 4096  # Height of the stitched overview sent to the LLM
+    SCREENSHOT_MOBILE_COMPARISON: bool = False  # Opt-in: also capture an emulated mobile view (a second navigation per page)
+    SCREENSHOT_CAPTURE_TIMEOUT_SECONDS: float = 15.0  # Per-page capture deadline in the analysis pipeline
+    SCREENSHOT_CANCEL_GRACE_SECONDS: float = 5.0  # Captures still running this long after cancel count as orphaned
+    SCREENSHOT_DEDUPE_ENABLED: bool = True  # Reuse stored screenshots (and tiles) that match a recent capture of the same URL
+    SCREENSHOT_DEDUPE_FRESHNESS_HOURS: float = 24.0  # Only captures newer than this are reused
+    SCREENSHOT_DEDUPE_MAX_DISTANCE: int = 6  # Max differing perceptual-hash bits (of 256) for a match
+    SCREENSHOT_PREVIEW_ENABLED: bool = True  # Publish an above-the-fold preview to progress before the full capture
+    SCREENSHOT_PREVIEW_LOAD_WAIT_MS: int = 1000  # Max wait for the load event before the preview is taken
+    SCREENSHOT_PREVIEW_LLM_AFTER_SECONDS: float = 0.0  # Start the LLM on the preview if the full capture takes longer (0 = always wait)
     
 
 settings = Settings()
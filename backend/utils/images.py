@@ -0,0 +1,159 @@
+"""Binary image helpers shared by capture, storage and LLM vision input."""
+
+from __future__ import annotations
+
+import base64
+import io
+import logging
+import mimetypes
+from dataclasses import dataclass, field
+from typing import Optional
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:  # pragma: no cover - optional dependency during local dev
+    PIL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Encoder quality per tier. PNG ignores quality and is always lossless.
+QUALITY_TIERS = {
+    "high": 90,
+    "standard": 80,
+    "low": 60,
+}
+
+_CONTENT_TYPES = {
+    "png": "image/png",
+    "jpeg": "image/jpeg",
+    "webp": "image/webp",
+}
+
+_EXTENSIONS = {
+    "image/png": ".png",
+    "image/jpeg": ".jpg",
+    "image/webp": ".webp",
+}
+
+# libwebp cannot encode images taller or wider than this.
+WEBP_MAX_DIMENSION = 16383
+
+
+@dataclass
+class EncodedImage:
+    """Encoded image bytes. Base64 is produced lazily, only for consumers that need it."""
+
+    data: bytes
+    content_type: str = "image/png"
+    width: Optional[int] = None
+    height: Optional[int] = None
+    _base64: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self.data)
+
+    @property
+    def extension(self) -> str:
+        return extension_for_content_type(self.content_type)
+
+    def base64(self) -> str:
+        if self._base64 is None:
+            self._base64 = base64.b64encode(self.data).decode("ascii")
+        return self._base64
+
+    def data_url(self) -> str:
+        return f"data:{self.content_type};base64,{self.base64()}"
+
+    @classmethod
+    def from_base64(cls, payload: str, content_type: str = "image/png") -> "EncodedImage":
+        image = cls(data=base64.b64decode(payload), content_type=content_type)
+        image._base64 = payload
+        return image
+
+
+def extension_for_content_type(content_type: str) -> str:
+    # mimetypes maps image/jpeg to ".jpe" on some platforms, so prefer the explicit table
+    return _EXTENSIONS.get(content_type) or mimetypes.guess_extension(content_type) or ".bin"
+
+
+def difference_hash(data: bytes, hash_size: int = 16) -> Optional[str]:
+    """Perceptual difference hash (``hash_size``² bits, hex) or None when Pillow is unavailable.
+
+    Robust to re-encoding and minor rendering noise; visibly different content flips bits.
+    CPU-bound: call from a worker thread.
+    """
+
+    if not PIL_AVAILABLE:
+        return None
+    with Image.open(io.BytesIO(data)) as source:
+        pixels = list(source.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.LANCZOS).getdata())
+
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return f"{value:0{hash_size * hash_size // 4}x}"
+
+
+def hamming_distance(left: str, right: str) -> int:
+    return bin(int(left, 16) ^ int(right, 16)).count("1")
+
+
+def normalize_image_format(image_format: Optional[str]) -> str:
+    value = (image_format or "png").strip().lower()
+    if value == "jpg":
+        value = "jpeg"
+    return value if value in _CONTENT_TYPES else "png"
+
+
+def quality_for_tier(tier: Optional[str]) -> int:
+    return QUALITY_TIERS.get((tier or "standard").strip().lower(), QUALITY_TIERS["standard"])
+
+
+def encode_pil(image: "Image.Image", *, image_format: str = "webp", quality_tier: str = "standard") -> EncodedImage:
+    """Encode a Pillow image, falling back to JPEG past WebP's dimension limit."""
+
+    target = normalize_image_format(image_format)
+    width, height = image.size
+    if target == "webp" and max(width, height) > WEBP_MAX_DIMENSION:
+        target = "jpeg"
+    if target != "png" and image.mode != "RGB":
+        image = image.convert("RGB")
+
+    quality = quality_for_tier(quality_tier)
+    buffer = io.BytesIO()
+    if target == "webp":
+        image.save(buffer, format="WEBP", quality=quality, method=4)
+    elif target == "jpeg":
+        image.save(buffer, format="JPEG", quality=quality, optimize=True, progressive=True)
+    else:
+        image.save(buffer, format="PNG", optimize=True)
+    return EncodedImage(data=buffer.getvalue(), content_type=_CONTENT_TYPES[target], width=width, height=height)
+
+
+def encode_png(png_bytes: bytes, *, image_format: str = "webp", quality_tier: str = "standard") -> EncodedImage:
+    """Re-encode a PNG capture into the requested format.
+
+    Falls back to JPEG when the image exceeds WebP's dimension limit, and to the original
+    PNG when Pillow is unavailable. CPU-bound: call from a worker thread.
+    """
+
+    target = normalize_image_format(image_format)
+    if target == "png" or not PIL_AVAILABLE:
+        return EncodedImage(data=png_bytes, content_type="image/png")
+
+    with Image.open(io.BytesIO(png_bytes)) as source:
+        encoded = encode_pil(source, image_format=target, quality_tier=quality_tier)
+
+    logger.debug(
+        "Encoded screenshot %sx%s as %s: %s -> %s bytes",
+        encoded.width,
+        encoded.height,
+        encoded.content_type,
+        len(png_bytes),
+        encoded.size_bytes,
+    )
+    return encoded
@@ -0,0 +1,100 @@
+"""Recover a JSON object from a model reply that is wrapped, truncated or has trailing junk."""
+
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+_FENCE_RE = re.compile(r"^```[a-zA-Z]*\s*|\s*```$")
+_MAX_CUT_ATTEMPTS = 64
+
+
+@dataclass
+class RepairedJSON:
+    data: Optional[Dict[str, Any]]  # None when nothing usable is left
+    repaired: bool = False  # Anything was changed to make the reply parse
+    truncated: bool = False  # The reply was cut short, so members after the cut are lost
+
+
+def repair_json_object(text: str) -> RepairedJSON:
+    """Parse ``text`` as a JSON object, repairing it when needed.
+
+    Repairs code fences and prose around the object, trailing commas, and truncation (the
+    reply is cut back to its last complete value and the open brackets are closed, so every
+    member that was fully written survives). Only the last one sets ``truncated``.
+    """
+
+    try:
+        parsed = json.loads(text)
+        if isinstance(parsed, dict):
+            return RepairedJSON(parsed)
+    except ValueError:
+        pass
+
+    start = text.find("{")
+    if start < 0:
+        return RepairedJSON(None, repaired=True)
+
+    body, complete, cuts = _scan(_FENCE_RE.sub("", text[start:].strip()))
+    if complete is not None:
+        try:
+            parsed = json.loads(body[:complete])
+            return RepairedJSON(parsed if isinstance(parsed, dict) else None, repaired=True)
+        except ValueError:
+            pass
+
+    # Truncated: try the latest cut points first, closing whatever was still open there
+    for end, closers in reversed(cuts[-_MAX_CUT_ATTEMPTS:]):
+        candidate = body[:end].rstrip().rstrip(",") + "".join(reversed(closers))
+        try:
+            parsed = json.loads(candidate)
+        except ValueError:
+            continue
+        if isinstance(parsed, dict):
+            return RepairedJSON(parsed, repaired=True, truncated=True)
+    return RepairedJSON(None, repaired=True, truncated=True)
+
+
+def _scan(text: str) -> Tuple[str, Optional[int], List[Tuple[int, List[str]]]]:
+    """``text`` without trailing commas (outside strings), the end of its first complete
+    top-level value (if any), and the places it could be cut."""
+
+    out: List[str] = []
+    stack: List[str] = []
+    cuts: List[Tuple[int, List[str]]] = []
+    pending_comma = False  # A comma is held back until the next token shows it is not trailing
+    in_string = escaped = False
+    for char in text:
+        if in_string:
+            out.append(char)
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if pending_comma and not char.isspace():
+            pending_comma = False
+            if char not in "}]":
+                out.append(",")
+        if char == ",":
+            # Everything before a separator is a complete value
+            cuts.append((len(out), list(stack)))
+            pending_comma = True
+            continue
+        out.append(char)
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]":
+            if not stack or stack[-1] != char:
+                break
+            stack.pop()
+            if not stack:
+                return "".join(out), len(out), cuts
+            cuts.append((len(out), list(stack)))
+    return "".join(out), None, cuts
@@ -0,0 +1,69 @@
+"""Incremental parsing of a streamed JSON object, one top-level member at a time."""
+
+from __future__ import annotations
+
+import json
+from typing import Any, List, Optional, Tuple
+
+
+class TopLevelMemberParser:
+    """Feed chunks of a JSON object; get back each top-level ``(key, value)`` once it closes.
+
+    Only the top level is tracked (nesting depth and string state), so the cost per chunk is
+    proportional to the chunk. A member is emitted when the ``,`` or ``}`` after it arrives.
+    """
+
+    def __init__(self) -> None:
+        self._text = ""
+        self._position = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._member_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        self._text += chunk
+        members: List[Tuple[str, Any]] = []
+        text = self._text
+        for index in range(self._position, len(text)):
+            char = text[index]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1 and self._member_start is None:
+                    self._member_start = index
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                if self._depth == 1 and char == "}":
+                    self._emit(text, index, members)
+                self._depth -= 1
+            elif char == "," and self._depth == 1:
+                self._emit(text, index, members)
+
+        # Keep only the member still being streamed, so memory and rescans stay bounded
+        keep_from = len(text) if self._member_start is None else self._member_start
+        self._text = text[keep_from:]
+        self._position = len(text) - keep_from
+        if self._member_start is not None:
+            self._member_start = 0
+        return members
+
+    def _emit(self, text: str, end: int, members: List[Tuple[str, Any]]) -> None:
+        if self._member_start is None:
+            return
+        segment = text[self._member_start:end]
+        self._member_start = None
+        try:
+            parsed = json.loads("{" + segment + "}")
+        except ValueError:
+            return  # Malformed member: the final full parse will report it
+        members.extend(parsed.items())
@@ -39,6 +39,12 @@ export interface ProgressUpdate {
   message: string
   current_page?: number | null
   total_pages?: number | null
+  preview_url?: string | null  // Above-the-fold screenshot available before the report
+  partial_result?: {
+    page: number
+    page_type?: string
+    scores?: Partial<ScoreBreakdown>
+  } | null  // Streamed early fields for the page being analyzed
   timestamp?: string
 }
 
@@ -137,6 +137,7 @@ export interface SourceAnalysis {
 export interface PipelineStageTimings {
   scrape_seconds?: number
   analysis_seconds?: number
+  time_to_first_score_seconds?: number | null
   screenshot_seconds?: number
   total_seconds?: number
 }
@@ -147,15 +148,83 @@ export interface ScreenshotPipelineMetrics {
   failed: number
   uploaded: number
   timeouts: number
+  queue_wait_seconds?: number | null
+  navigation_seconds?: number | null
+  blocked_requests?: number | null
+  estimated_bytes_saved?: number | null
+  encoded_bytes?: number | null
+  tiled_pages?: number | null
+  tiles_uploaded?: number | null
+  mobile_captured?: number | null
+  cancelled?: number | null
+  deduplicated?: number | null
+  previews?: number | null
+  preview_for_llm?: number | null
+  preview_without_visual_elements?: number | null
+}
+
+export interface LLMCallMetrics {
+  model: string
+  cached: boolean
+  batch?: boolean
+  estimated_prompt_tokens?: number | null
+  prompt_tokens: number
+  completion_tokens: number
+  cached_prompt_tokens?: number
+  cost_usd?: number | null
+  latency_ms?: number | null
+}
+
+export interface LLMPipelineMetrics {
+  plan?: string | null
+  calls: number
+  fallbacks?: number
+  validated_replies?: number
+  repaired_replies?: number
+  reasked_fields?: number
+  repair_rate?: number | null
+  cache_hits: number
+  cache_misses: number
+  prompt_tokens?: number | null
+  completion_tokens?: number | null
+  cached_prompt_tokens?: number | null
+  cost_usd?: number | null
+  cache_savings_usd?: number | null
+  cache_hit_latency_ms?: number | null
+  api_latency_ms?: number | null
+  per_call?: LLMCallMetrics[]
+}
+
+export interface PageIndexMetrics {
+  reused: number
+  hinted: number
 }
 
 export interface PipelineTelemetry {
   stage_timings?: PipelineStageTimings
   screenshot?: ScreenshotPipelineMetrics
   llm_provider?: string
+  llm?: LLMPipelineMetrics
+  page_index?: PageIndexMetrics | null
   notes?: string[]
 }
 
+export interface ScreenshotTile {
+  index: number
+  offset_y: number
+  width: number
+  height: number
+  key: string
+  url: string
+}
+
+export interface ScreenshotTileManifest {
+  page_height: number
+  captured_height: number
+  truncated: boolean
+  tiles: ScreenshotTile[]
+}
+
 export interface PageAnalysis {
   url: string
   page_type?: string
@@ -164,6 +233,7 @@ export interface PageAnalysis {
   feedback: string
   screenshot_url?: string
   screenshot_storage_key?: string
+  screenshot_tiles?: ScreenshotTileManifest | null  // Full-resolution tiles for tall pages
   headline_recommendation?: string
   headline_alternatives?: string[]  // 3-5 alternative headline options
   cta_recommendations?: CTARecommendation[]
@@ -223,6 +293,7 @@ export interface ReportDeleteResponse {
   analysis_id: number
   assets_total: number
   assets_deleted: number
+  assets_retained?: number  // Shared screenshots still referenced elsewhere
   assets_failed: number
   assets_skipped: number
   storage_available: boolean
@@ -2,7 +2,6 @@
 """Test script to verify screenshot functionality is working correctly."""
 
 import asyncio
-import base64
 import os
 import sys
 from pathlib import Path
@@ -30,22 +29,22 @@ async def test_screenshot_capture():
         
         # Test above-the-fold screenshot
         print(f"\n2. Capturing above-the-fold screenshot of {test_url}...")
-        screenshot_base64 = await screenshot_service.capture_screenshot(
+        screenshot = await screenshot_service.capture_screenshot(
             url=test_url,
             viewport_width=1440,
             viewport_height=900,
             full_page=False,
         )
         
-        if screenshot_base64:
-            size_kb = len(screenshot_base64) / 1024
-            print(f"✓ Above-the-fold screenshot captured: {size_kb:.1f} KB (base64)")
+        if screenshot:
+            size_kb = screenshot.size_bytes / 1024
+            print(f"✓ Above-the-fold screenshot captured: {size_kb:.1f} KB ({screenshot.content_type})")
             
             # Save to file for inspection
-            screenshot_bytes = base64.b64decode(screenshot_base64)
-            with open("test_screenshot_above_fold.png", "wb") as f:
-                f.write(screenshot_bytes)
-            print(f"✓ Saved to: test_screenshot_above_fold.png ({len(screenshot_bytes)/1024:.1f} KB)")
+            filename = f"test_screenshot_above_fold{screenshot.extension}"
+            with open(filename, "wb") as f:
+                f.write(screenshot.data)
+            print(f"✓ Saved to: {filename}")
         else:
             print("✗ Failed to capture above-the-fold screenshot")
             return False
@@ -60,17 +59,17 @@ async def test_screenshot_capture():
         )
         
         if screenshot_full:
-            size_kb = len(screenshot_full) / 1024
-            print(f"✓ Full-page screenshot captured: {size_kb:.1f} KB (base64)")
+            size_kb = screenshot_full.size_bytes / 1024
+            print(f"✓ Full-page screenshot captured: {size_kb:.1f} KB ({screenshot_full.content_type})")
             
             # Save to file for inspection
-            screenshot_bytes_full = base64.b64decode(screenshot_full)
-            with open("test_screenshot_full_page.png", "wb") as f:
-                f.write(screenshot_bytes_full)
-            print(f"✓ Saved to: test_screenshot_full_page.png ({len(screenshot_bytes_full)/1024:.1f} KB)")
+            filename = f"test_screenshot_full_page{screenshot_full.extension}"
+            with open(filename, "wb") as f:
+                f.write(screenshot_full.data)
+            print(f"✓ Saved to: {filename}")
             
             # Compare sizes
-            ratio = len(screenshot_bytes_full) / len(screenshot_bytes)
+            ratio = screenshot_full.size_bytes / screenshot.size_bytes
             print(f"\nℹ️  Full page is {ratio:.1f}x larger than above-the-fold")
             if ratio < 1.2:
                 print("⚠️  Warning: Full page screenshot is not much larger - page might be short or full_page isn't working")
@@ -82,15 +81,14 @@ async def test_screenshot_capture():
         print(f"\n4. Capturing multiple viewport sizes...")
         screenshots = await screenshot_service.capture_multiple_viewports(test_url)
         
-        for device, screenshot in screenshots.items():
-            if screenshot:
-                size_kb = len(screenshot) / 1024
+        for device, device_screenshot in screenshots.items():
+            if device_screenshot:
+                size_kb = device_screenshot.size_bytes / 1024
                 print(f"✓ {device.capitalize()}: {size_kb:.1f} KB")
                 
                 # Save each viewport
-                screenshot_bytes_device = base64.b64decode(screenshot)
-                with open(f"test_screenshot_{device}.png", "wb") as f:
-                    f.write(screenshot_bytes_device)
+                with open(f"test_screenshot_{device}{device_screenshot.extension}", "wb") as f:
+                    f.write(device_screenshot.data)
             else:
                 print(f"✗ {device.capitalize()}: Failed")
         
@@ -102,9 +100,9 @@ async def test_screenshot_capture():
             print("✓ Storage service is configured")
             
             try:
-                asset = await storage_service.upload_base64_image(
-                    base64_data=screenshot_full,
-                    content_type="image/png"
+                asset = await storage_service.upload_image(
+                    data=screenshot_full.data,
+                    content_type=screenshot_full.content_type,
                 )
                 
                 if asset and asset.url:
@@ -155,22 +153,22 @@ async def test_infusionsoft_page():
         screenshot_service = await get_screenshot_service()
         
         print(f"\nCapturing full page of Infusionsoft order form...")
-        screenshot_base64 = await screenshot_service.capture_screenshot(
+        screenshot = await screenshot_service.capture_screenshot(
             url=test_url,
             viewport_width=1440,
             viewport_height=900,
             full_page=True,
         )
         
-        if screenshot_base64:
-            screenshot_bytes = base64.b64decode(screenshot_base64)
-            size_kb = len(screenshot_bytes) / 1024
+        if screenshot:
+            size_kb = screenshot.size_bytes / 1024
+            filename = f"test_infusionsoft_page{screenshot.extension}"
             
-            with open("test_infusionsoft_page.png", "wb") as f:
-                f.write(screenshot_bytes)
+            with open(filename, "wb") as f:
+                f.write(screenshot.data)
             
             print(f"✓ Infusionsoft page captured: {size_kb:.1f} KB")
-            print(f"✓ Saved to: test_infusionsoft_page.png")
+            print(f"✓ Saved to: {filename}")
             print("\nThis should show:")
             print("  • Sales copy above the order form")
             print("  • The embedded Infusionsoft order form")
@@ -211,13 +209,13 @@ async def main():
         
         if infusionsoft_success:
             print("\n✅ All tests passed!")
-            print("\nGenerated test images:")
-            print("  • test_screenshot_above_fold.png")
-            print("  • test_screenshot_full_page.png")
-            print("  • test_screenshot_desktop.png")
-            print("  • test_screenshot_tablet.png")
-            print("  • test_screenshot_mobile.png")
-            print("  • test_infusionsoft_page.png")
+            print("\nGenerated test images (extension follows SCREENSHOT_FORMAT):")
+            print("  • test_screenshot_above_fold.*")
+            print("  • test_screenshot_full_page.*")
+            print("  • test_screenshot_desktop.*")
+            print("  • test_screenshot_tablet.*")
+            print("  • test_screenshot_mobile.*")
+            print("  • test_infusionsoft_page.*")
             print("\nOpen these images to verify they look correct.")
         else:
             print("\n⚠️  Basic tests passed but Infusionsoft test failed")